@@ -24,22 +24,34 @@ import logging
 import sys
 import traceback
 import decimal
+import uuid
 import psycopg2
 
 print("[DEBUG] Importing optimizer and models...")
 from optimizer.wave_optimizer import MultiStageOptimizer, OptimizationConstraints, OptimizationRequirements
+from optimizer.rolling_horizon import RollingHorizonOptimizer
+from optimizer.portfolio import PortfolioOptimizer
+from optimizer.zone_decomposition import ZoneDecompositionOptimizer
+from optimizer.lns import LNSOptimizer
+from optimizer.multi_resolution import MultiResolutionOptimizer
+from optimizer.model_estimator import admit, estimate_model_size, DOWNGRADES
 from data_generator.generator import SyntheticDataGenerator
 from models.warehouse import (
     OptimizationInput, Worker, Equipment, SKU, Order, OrderItem, WarehouseConfig,
     SkillType, EquipmentType
 )
-from models.optimization import OptimizationResult
+from models.optimization import OptimizationResult, OptimizationJobRequest, WaveBatchRequest, WaveReplanRequest
 print("[DEBUG] Importing DatabaseService...")
 from database_service import DatabaseService
 print("[DEBUG] Importing WalkingTimeCalculator...")
 from walking_time_calculator import WalkingTimeCalculator
+from walking_time_store import (current_config_hash, current_walking_parameters, get_walking_time_store,
+                                refresh_walking_time_stores)
+from bin_index import get_bin_index
 print("[DEBUG] Importing ConfigService...")
 from config_service import config_service
+from optimization_jobs import OptimizationJobManager, JobQueueFullError
+from wave_batch import WaveBatchRunner
 
 
 
@@ -79,9 +91,80 @@ print("[DEBUG] Creating SyntheticDataGenerator...")
 data_generator = SyntheticDataGenerator()
 print("[DEBUG] Creating DatabaseService...")
 db_service = DatabaseService()
+job_manager = OptimizationJobManager()
 print("[DEBUG] All global objects created. Ready to define endpoints.")
 
 
+@app.on_event("shutdown")
+def shutdown_job_manager():
+    job_manager.shutdown()
+
+
+def _save_run_profile(run_id: int, profile: Optional[Dict[str, Any]]):
+    """Persist an optimizer profile with its run; profiling must never fail the optimization."""
+    if not profile:
+        return
+    try:
+        db_service.save_optimization_run_profile(run_id, profile)
+    except Exception as e:
+        logger.warning(f"Failed to save profile for optimization run {run_id}: {e}")
+
+
+def _save_wave_run(scenario_type: str, result: Dict[str, Any]) -> Optional[int]:
+    """Record a solved wave as an optimization run; returns the run id, or None when saving fails."""
+    try:
+        run_id = db_service.save_optimization_run(
+            scenario_type=scenario_type,
+            total_orders=result["num_orders"],
+            total_workers=result["num_workers"],
+            total_equipment=result["num_equipment"]
+        )
+        db_service.update_optimization_run(
+            run_id=run_id,
+            objective_value=result["objective_value"],
+            solver_status=result["status"],
+            solve_time_seconds=result["solve_time"]
+        )
+        _save_run_profile(run_id, result.get("profile"))
+        return run_id
+    except Exception as e:
+        logger.error(f"Error saving {scenario_type} run: {e}")
+        return None
+
+
+def _admit_request(optimizer_name: str, num_orders: int, num_workers: int, num_equipment: int) -> Dict[str, Any]:
+    """Check a request against the model budgets; 413 if no optimizer in its downgrade chain fits."""
+    admission = admit(optimizer_name, num_orders, num_workers, num_equipment)
+    if admission["rejected"]:
+        raise HTTPException(status_code=413, detail=f"Request too large to optimize: {admission['reason']}")
+    if admission["downgraded"]:
+        logger.warning(admission["reason"])
+    return admission
+
+
+def _create_optimizer(solve_mode: str, model_mode: str, warehouse_config, warm_start: Optional[str] = None,
+                      time_budget_seconds: Optional[float] = None):
+    """Optimizer for a solve_mode/model_mode pair of /optimize/database."""
+    if solve_mode == "rolling_horizon":
+        return RollingHorizonOptimizer(warehouse_config)
+    if solve_mode == "portfolio":
+        return PortfolioOptimizer(warehouse_config, time_budget_seconds=time_budget_seconds)
+    if solve_mode == "zone_decomposition":
+        return ZoneDecompositionOptimizer(warehouse_config)
+    if solve_mode == "lns":
+        return LNSOptimizer(warehouse_config)
+    if solve_mode == "multi_resolution":
+        return MultiResolutionOptimizer(warehouse_config, model_mode=model_mode)
+    return MultiStageOptimizer(warehouse_config, model_mode=model_mode, warm_start=warm_start)
+
+
+def _modes_of(optimizer_name: str, model_mode: str):
+    """(solve_mode, model_mode) of an estimator optimizer name."""
+    if optimizer_name.startswith("multi_stage_"):
+        return "monolithic", optimizer_name[len("multi_stage_"):]
+    return optimizer_name, model_mode
+
+
 @app.get("/ping")
 def ping():
     return {"pong": True}
@@ -97,7 +180,9 @@ async def root():
         "endpoints": {
             "/optimize": "Run optimization with custom input",
             "/optimize/scenario/{scenario_type}": "Run optimization with demo scenario",
+            "/optimize/stream/{scenario_type}": "Stream improving solutions as server-sent events",
             "/optimize/database": "Run optimization with database data",
+            "/optimization/jobs": "Submit and poll background optimization jobs",
             "/data/warehouse/{warehouse_id}": "Get warehouse data from database",
             "/data/stats/{warehouse_id}": "Get warehouse statistics",
             "/history": "Get optimization history",
@@ -178,17 +263,44 @@ async def get_warehouse_stats(warehouse_id: int = 1):
 
 
 @app.post("/optimize/database")
-async def optimize_database_data(warehouse_id: int = 1, order_limit: int = 50):
+def optimize_database_data(warehouse_id: int = 1, order_limit: int = 50, model_mode: str = "time_indexed",
+                           solve_mode: str = "monolithic", warm_start: Optional[str] = None,
+                           time_budget_seconds: Optional[float] = None):
     """
     Run optimization using data from the database.
     
     Args:
         warehouse_id: ID of the warehouse to optimize
         order_limit: Maximum number of orders to include in optimization
+        model_mode: "time_indexed" (per-slot capacity model), "interval" (NoOverlap/Cumulative model)
+            or "skill_class" (Cumulative over interchangeable worker classes, individuals assigned after)
+        solve_mode: "monolithic" (one CP-SAT model), "rolling_horizon" (deadline-ordered windows,
+            always uses the interval model; for waves above max_orders_per_wave) or "portfolio"
+            (heuristics and CP-SAT presets race in parallel, best feasible plan wins) or
+            "zone_decomposition" (PICK solved per zone in parallel processes, downstream stages in one model)
+            or "lns" (list schedule improved by re-solving small neighborhoods; for very large waves)
+            or "multi_resolution" (solved with 30-minute slots, then refined with 5-minute slots
+            inside windows around the coarse starts; uses model_mode)
+        warm_start: Heuristic whose schedule is hinted to CP-SAT ("simple" or "sequencer"); monolithic solves only
+        time_budget_seconds: Wall-clock budget of a portfolio solve (defaults to the solver time limit)
+        
+    Requests whose model would exceed the configured memory or build-time budget
+    are downgraded to a cheaper solve mode (see "admission" in the response) or
+    rejected with 413.
         
     Returns:
         OptimizationResult with complete schedule and metrics
     """
+    if model_mode not in MultiStageOptimizer.MODEL_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid model_mode '{model_mode}'. Use one of: {', '.join(MultiStageOptimizer.MODEL_MODES)}")
+    if solve_mode not in ("monolithic", "rolling_horizon", "portfolio", "zone_decomposition", "lns",
+                          "multi_resolution"):
+        raise HTTPException(status_code=400, detail=f"Invalid solve_mode '{solve_mode}'. Use one of: monolithic, rolling_horizon, portfolio, zone_decomposition, lns, multi_resolution")
+    if time_budget_seconds is not None and time_budget_seconds <= 0:
+        raise HTTPException(status_code=400, detail="time_budget_seconds must be positive")
+    if warm_start is not None and warm_start not in MultiStageOptimizer.WARM_START_HEURISTICS:
+        raise HTTPException(status_code=400, detail=f"Invalid warm_start '{warm_start}'. Use one of: {', '.join(MultiStageOptimizer.WARM_START_HEURISTICS)}")
+    
     try:
         # Get data from database
         workers_data = db_service.get_workers(warehouse_id)
@@ -322,6 +434,11 @@ async def optimize_database_data(warehouse_id: int = 1, order_limit: int = 50):
             overtime_multiplier=1.5
         )
         
+        # Admission control: fit the model into the memory and build-time budgets before building it
+        admission = _admit_request(f"multi_stage_{model_mode}" if solve_mode == "monolithic" else solve_mode,
+                                   len(orders), len(workers), len(equipment))
+        solve_mode, model_mode = _modes_of(admission["optimizer"], model_mode)
+        
         # Save optimization run
         run_id = db_service.save_optimization_run(
             scenario_type="database",
@@ -331,7 +448,7 @@ async def optimize_database_data(warehouse_id: int = 1, order_limit: int = 50):
         )
         
         # Initialize optimizer with warehouse config
-        optimizer = MultiStageOptimizer(warehouse_config)
+        optimizer = _create_optimizer(solve_mode, model_mode, warehouse_config, warm_start, time_budget_seconds)
         
         # Run optimization using new interface
         start_time = datetime.now()
@@ -347,6 +464,7 @@ async def optimize_database_data(warehouse_id: int = 1, order_limit: int = 50):
             solver_status=result.metrics.solver_status if result.metrics else "UNKNOWN",
             solve_time_seconds=solve_time
         )
+        _save_run_profile(run_id, result.input_summary.get("profile"))
         
         # Save optimization plan to database
         try:
@@ -412,6 +530,22 @@ async def optimize_database_data(warehouse_id: int = 1, order_limit: int = 50):
             "status": "success",
             "run_id": run_id,
             "warehouse_id": warehouse_id,
+            "model_mode": result.input_summary.get("model_mode", model_mode),
+            "solve_mode": solve_mode,
+            "windows": result.input_summary.get("windows"),
+            "portfolio": result.input_summary.get("portfolio"),
+            "zones": result.input_summary.get("zones"),
+            "neighborhoods": result.input_summary.get("neighborhoods"),
+            "levels": result.input_summary.get("levels"),
+            "admission": admission,
+            "warm_start": result.input_summary.get("warm_start"),
+            "model_build": {
+                "model_build_seconds": result.input_summary.get("model_build_seconds"),
+                "duration_precompute_seconds": result.input_summary.get("duration_precompute_seconds"),
+                "db_round_trips": result.input_summary.get("db_round_trips"),
+                "horizon_tightening": result.input_summary.get("horizon_tightening")
+            },
+            "profile": result.input_summary.get("profile"),
             "walking_time_optimization": walking_time_info,
             "result": result.to_summary_dict() if hasattr(result, 'to_summary_dict') else {
                 "total_orders": len(orders),
@@ -421,6 +555,8 @@ async def optimize_database_data(warehouse_id: int = 1, order_limit: int = 50):
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database optimization failed: {str(e)}")
 
@@ -438,6 +574,25 @@ async def get_optimization_history(limit: int = 10):
         raise HTTPException(status_code=500, detail=f"Failed to get history: {str(e)}")
 
 
+@app.get("/optimization/runs/{run_id}/profile")
+async def get_optimization_run_profile(run_id: int):
+    """Phase timings, model size and solver statistics recorded for an optimization run."""
+    try:
+        run = db_service.get_optimization_run_profile(run_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get run profile: {str(e)}")
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"Optimization run {run_id} not found")
+    if run["profile"] is None:
+        raise HTTPException(status_code=404, detail=f"No profile recorded for optimization run {run_id}")
+    return {
+        "status": "success",
+        "run_id": run_id,
+        "run": {key: value for key, value in run.items() if key != "profile"},
+        "profile": run["profile"]
+    }
+
+
 @app.post("/optimize")
 async def optimize_workflow(optimization_input: OptimizationInput):
     """Legacy endpoint - use /optimize/database instead."""
@@ -450,10 +605,118 @@ async def optimize_scenario(scenario_type: str):
     raise HTTPException(status_code=400, detail="Use /optimize/database endpoint for optimization")
 
 
+# Streaming solves in progress, by stream_id, so operators can accept the current plan early
+active_streams: Dict[str, MultiStageOptimizer] = {}
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
 @app.get("/optimize/stream/{scenario_type}")
-async def optimize_scenario_stream(scenario_type: str):
-    """Legacy endpoint - use /optimize/database instead."""
-    raise HTTPException(status_code=400, detail="Use /optimize/database endpoint for optimization")
+async def optimize_scenario_stream(scenario_type: str, num_orders: int = 30, model_mode: str = "interval",
+                                   time_limit: int = 60):
+    """
+    Optimize a generated scenario and stream every improving solution as server-sent events.
+    
+    Args:
+        scenario_type: "bottleneck", "deadline", "inefficient" or any other value for custom data
+        num_orders: Number of orders to generate for custom scenarios
+        model_mode: "time_indexed" or "interval" (see /optimize/database)
+        time_limit: Solver time limit in seconds
+    
+    Returns:
+        text/event-stream with a "started" event (carrying the stream_id), one "solution"
+        event per improving solution and a final "result" (or "error") event. POST
+        /optimize/stream/{stream_id}/accept stops the search and keeps the best plan so far.
+    """
+    if model_mode not in MultiStageOptimizer.MODEL_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid model_mode '{model_mode}'. Use one of: {', '.join(MultiStageOptimizer.MODEL_MODES)}")
+    
+    if scenario_type in ["bottleneck", "deadline", "inefficient"]:
+        scenario_data = data_generator.generate_demo_scenario(scenario_type)
+    else:
+        scenario_data = {
+            "warehouse_config": data_generator.generate_warehouse_config(),
+            "orders": data_generator.generate_orders(num_orders),
+            "scenario_type": "custom"
+        }
+    
+    warehouse_config = scenario_data["warehouse_config"]
+    orders = scenario_data["orders"]
+    deadlines = {order.id: order.shipping_deadline for order in orders}
+    
+    # Admission control, as for /optimize/database; only the CP models stream their solutions
+    admission = _admit_request(f"multi_stage_{model_mode}", len(orders), len(warehouse_config.workers),
+                               len(warehouse_config.equipment))
+    solve_mode, model_mode = _modes_of(admission["optimizer"], model_mode)
+    if solve_mode != "monolithic":
+        raise HTTPException(status_code=413, detail=f"Request too large to stream: {admission['reason']}")
+    optimizer = MultiStageOptimizer(warehouse_config, model_mode=model_mode)
+    stream_id = uuid.uuid4().hex
+    
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    
+    def publish(event: str, data: Dict[str, Any]):
+        # Called from the solver thread
+        loop.call_soon_threadsafe(events.put_nowait, (event, data))
+    
+    def run_solver():
+        try:
+            result = optimizer.optimize_workflow(
+                orders, warehouse_config.workers, warehouse_config.equipment, deadlines,
+                time_limit_seconds=time_limit, on_solution=lambda data: publish("solution", data)
+            )
+            publish("result", {
+                "stream_id": stream_id,
+                "solve_stats": optimizer.solve_stats,
+                "result": result.to_summary_dict()
+            })
+        except Exception as e:
+            publish("error", {"stream_id": stream_id, "detail": f"Optimization failed: {str(e)}"})
+    
+    async def event_stream():
+        active_streams[stream_id] = optimizer
+        solve = loop.run_in_executor(None, run_solver)
+        try:
+            yield _sse("started", {
+                "stream_id": stream_id,
+                "scenario_type": scenario_data["scenario_type"],
+                "total_orders": len(orders),
+                "model_mode": model_mode,
+                "admission": admission,
+                "time_limit_seconds": time_limit
+            })
+            while True:
+                event, data = await events.get()
+                yield _sse(event, data)
+                if event in ("result", "error"):
+                    break
+        finally:
+            # Also reached when the client disconnects: don't keep solving for nobody
+            active_streams.pop(stream_id, None)
+            optimizer.stop_search()
+            await solve
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.post("/optimize/stream/{stream_id}/accept")
+async def accept_streamed_solution(stream_id: str):
+    """Stop a streaming solve; its final result event carries the best solution found so far."""
+    optimizer = active_streams.get(stream_id)
+    if optimizer is None:
+        raise HTTPException(status_code=404, detail=f"No active optimization stream '{stream_id}'")
+    
+    optimizer.stop_search()
+    return {
+        "status": "success",
+        "stream_id": stream_id,
+        "message": "Search stopped; the best solution so far is sent as the final result event"
+    }
 
 
 @app.get("/generate/data")
@@ -575,6 +838,36 @@ async def get_optimization_constraints():
     }
 
 
+@app.get("/optimization/estimate")
+async def estimate_optimization(orders: int, workers: int, equipment: int, granularity_minutes: int = 15,
+                                optimizer: str = "multi_stage_time_indexed"):
+    """
+    Predict the model size, memory and build time of an optimization request without building it.
+    
+    Args:
+        orders, workers, equipment: Request size
+        granularity_minutes: Slot size of the MultiStageOptimizer models
+        optimizer: "multi_stage_<model_mode>", "wave_constraint", "rolling_horizon", "portfolio",
+            "zone_decomposition", "lns", "multi_resolution", "simple" or "simple_wave"
+    
+    Returns:
+        The estimate, and what the run endpoints would do with the request under the current budgets
+    """
+    if min(orders, workers, equipment) <= 0 or granularity_minutes <= 0:
+        raise HTTPException(status_code=400, detail="orders, workers, equipment and granularity_minutes must be positive")
+    try:
+        estimate = estimate_model_size(optimizer, orders, workers, equipment, granularity_minutes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "status": "success",
+        "estimate": estimate,
+        "admission": admit(optimizer, orders, workers, equipment, granularity_minutes),
+        "downgrades": DOWNGRADES
+    }
+
+
 
 
 
@@ -997,7 +1290,7 @@ async def get_wms_inefficiencies():
 
 
 @app.post("/optimization/run")
-async def run_optimization():
+def run_optimization():
     """
     Run optimization on the same 100 orders used in the original plan.
     
@@ -1071,8 +1364,10 @@ async def run_optimization():
             skus=sku_objects
         )
         
-        # Create optimizer
-        optimizer = MultiStageOptimizer(warehouse_config)
+        # Create optimizer, downgraded if the time-indexed model wouldn't fit the budgets
+        admission = _admit_request("multi_stage_time_indexed", len(orders), len(worker_objects),
+                                   len(equipment_objects))
+        optimizer = _create_optimizer(*_modes_of(admission["optimizer"], "time_indexed"), warehouse_config)
         
         # Convert orders to Order objects and create deadlines dict
         order_objects = []
@@ -1119,6 +1414,7 @@ async def run_optimization():
             solver_status=optimized_plan.metrics.solver_status,
             solve_time_seconds=optimization_time
         )
+        _save_run_profile(run_id, optimized_plan.input_summary.get("profile"))
         
         # Convert OptimizationResult to dict for saving
         optimization_dict = {
@@ -1170,22 +1466,31 @@ async def run_optimization():
                 "solver_status": optimized_plan.metrics.solver_status,
                 "total_cost": optimized_plan.metrics.total_cost,
                 "cost_savings": 0  # Would need baseline comparison
-            }
+            },
+            "admission": admission
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Optimization error: {e}")
         raise HTTPException(status_code=500, detail=f"Optimization failed: {str(e)}")
 
 
 @app.post("/optimization/wave/{wave_id}")
-async def optimize_wave(wave_id: int, optimize_type: str = "within_wave"):
+def optimize_wave(wave_id: int, optimize_type: str = "within_wave", time_limit: int = 300,
+                  warm_start: Optional[str] = None, use_cached_data: bool = True):
     """
     Optimize a specific wave using OR-Tools constraint programming.
     
     Args:
         wave_id: ID of the wave to optimize
         optimize_type: "within_wave" (keep orders in same wave) or "cross_wave" (allow moving orders between waves)
+        time_limit: Solver time limit in seconds
+        warm_start: Heuristic whose schedule is hinted to CP-SAT ("simple" or "sequencer")
+        use_cached_data: Reuse the wave's orders, workers and equipment if they
+            were loaded within optimization.wave_snapshot_ttl_seconds and the
+            wave's version_id and updated_at haven't changed since
     
     Returns:
         Optimization results for the wave
@@ -1211,10 +1516,11 @@ async def optimize_wave(wave_id: int, optimize_type: str = "within_wave"):
         
         # Run the optimization
         start_time = time.time()
-        logger.info(f"Starting optimization with time limit of 300 seconds")
+        logger.info(f"Starting optimization with time limit of {time_limit} seconds")
         
         try:
-            result = optimizer.optimize_wave(wave_id, time_limit=300)  # 5 minute time limit
+            result = optimizer.optimize_wave(wave_id, time_limit=time_limit, warm_start=warm_start,
+                                             use_cache=use_cached_data)
             optimization_time = time.time() - start_time
             logger.info(f"Wave {wave_id} OR-Tools optimization completed in {optimization_time:.2f}s")
         except Exception as e:
@@ -1227,6 +1533,8 @@ async def optimize_wave(wave_id: int, optimize_type: str = "within_wave"):
             raise HTTPException(status_code=500, detail="Optimizer returned invalid result format")
         
         # Check if optimization was successful
+        if (result.get("admission") or {}).get("rejected"):
+            raise HTTPException(status_code=413, detail=f"Wave too large to optimize: {result['error']}")
         if result.get("error"):
             logger.error(f"OR-Tools optimization failed for wave {wave_id}: {result['error']}")
             raise HTTPException(status_code=500, detail=f"OR-Tools optimization failed: {result['error']}")
@@ -1280,6 +1588,12 @@ async def optimize_wave(wave_id: int, optimize_type: str = "within_wave"):
             },
             "constraints_satisfied": True,
             "deadline_violations": 0,  # Would be calculated from actual solution
+            "horizon_tightening": result.get("horizon_tightening"),
+            "warm_start": result.get("warm_start"),
+            "admission": result.get("admission"),
+            "profile": result.get("profile"),
+            # Input to /optimization/wave/{wave_id}/replan
+            "solution": result.get("solution"),
             "message": f"OR-Tools optimization completed successfully. Objective value: {objective_value:.2f}"
         }
         
@@ -1301,6 +1615,7 @@ async def optimize_wave(wave_id: int, optimize_type: str = "within_wave"):
                 solver_status=status,
                 solve_time_seconds=solve_time
             )
+            _save_run_profile(run_id, result.get("profile"))
             
             # Create detailed optimization result structure even if solution is empty
             # This provides basic metrics for the frontend
@@ -1337,6 +1652,170 @@ async def optimize_wave(wave_id: int, optimize_type: str = "within_wave"):
         raise HTTPException(status_code=500, detail=f"Unexpected error in OR-Tools optimization: {e}")
 
 
+@app.post("/optimization/wave/{wave_id}/replan")
+def replan_wave(wave_id: int, replan_request: WaveReplanRequest):
+    """
+    Incrementally re-plan a solved wave after orders were added, cancelled or reprioritised.
+    
+    Stages already started by replan_time and orders away from the changes keep
+    their previous assignments; only the changed orders and their neighborhood
+    are re-solved.
+    
+    Args:
+        wave_id: ID of the wave to re-plan (its current orders are read from the database)
+        replan_request: Previous solution and the order delta
+    
+    Returns:
+        Re-plan result with the merged solution and what was frozen
+    """
+    from optimizer.wave_replan import WaveReplanner
+    
+    replanner = WaveReplanner(neighborhood_size=replan_request.neighborhood_size,
+                              time_limit=replan_request.time_limit)
+    delta = {
+        "added_order_ids": replan_request.added_order_ids,
+        "cancelled_order_ids": replan_request.cancelled_order_ids,
+        "reprioritized_orders": replan_request.reprioritized_orders
+    }
+    try:
+        result = replanner.replan_wave(wave_id, replan_request.previous_solution, delta, replan_request.replan_time)
+    except Exception as e:
+        logger.error(f"Re-plan of wave {wave_id} failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Re-plan failed: {e}")
+    if result.get("error"):
+        status_code = 413 if result.get("admission") else 500
+        raise HTTPException(status_code=status_code, detail=f"Re-plan failed: {result['error']}")
+    
+    run_id = _save_wave_run(f"wave_{wave_id}_replan", result)
+    if run_id is not None:
+        result["run_id"] = run_id
+    
+    logger.info(f"Re-planned wave {wave_id} in {result['replan']['replan_seconds']:.2f}s "
+                f"({result['replan']['free_orders']} orders re-solved, {result['replan']['frozen_orders']} frozen)")
+    return result
+
+
+@app.post("/optimization/waves/batch")
+def optimize_waves_batch(batch_request: WaveBatchRequest):
+    """
+    Optimize many waves concurrently on a process pool.
+    
+    The workers and equipment are read once and shared by every wave; each
+    wave is solved like /optimization/wave/{wave_id}.
+    
+    Args:
+        batch_request: wave_ids, or plan_version_id for every wave of that plan
+            version, plus the per-wave time_limit and warm_start
+    
+    Returns:
+        With stream (the default), text/event-stream with a "started" event, one
+        "wave" event per wave as it completes and a final "summary" event;
+        otherwise the per-wave results and the summary in one response
+    """
+    from optimizer.wave_constraint_optimizer import WaveConstraintOptimizer
+    
+    if (batch_request.wave_ids is None) == (batch_request.plan_version_id is None):
+        raise HTTPException(status_code=400, detail="Give either wave_ids or plan_version_id")
+    if batch_request.warm_start is not None and batch_request.warm_start not in WaveConstraintOptimizer.WARM_START_HEURISTICS:
+        raise HTTPException(status_code=400, detail=f"Unknown warm start heuristic '{batch_request.warm_start}'")
+    
+    runner = WaveBatchRunner()
+    wave_ids = batch_request.wave_ids
+    if wave_ids is None:
+        plan_waves = runner.plan_wave_ids(batch_request.plan_version_id)
+        if plan_waves.get("error"):
+            raise HTTPException(status_code=500, detail=plan_waves["error"])
+        wave_ids = plan_waves["wave_ids"]
+    wave_ids = list(dict.fromkeys(wave_ids))
+    if not wave_ids:
+        raise HTTPException(status_code=404, detail="No waves to optimize")
+    
+    resources = runner.load_resources()
+    if resources.get("error"):
+        raise HTTPException(status_code=500, detail=f"Failed to load workers and equipment: {resources['error']}")
+    
+    logger.info(f"Optimizing {len(wave_ids)} waves in a batch (time limit {batch_request.time_limit}s per wave)")
+    
+    def batch_events():
+        for event, data in runner.run(wave_ids, resources, batch_request.time_limit, batch_request.warm_start):
+            if event == "wave" and data["status"] == "success":
+                data["run_id"] = _save_wave_run(f"wave_{data['wave_id']}_batch_or_tools", data["result"])
+            elif event == "summary":
+                logger.info(f"Wave batch finished: {data['succeeded']}/{data['waves']} waves in "
+                            f"{data['wall_seconds']:.1f}s ({data['solve_seconds']:.1f}s of solving)")
+            yield event, data
+    
+    if batch_request.stream:
+        return StreamingResponse((_sse(event, data) for event, data in batch_events()),
+                                 media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    
+    response = {"status": "success", "waves": []}
+    for event, data in batch_events():
+        if event == "wave":
+            response["waves"].append(data)
+        elif event == "summary":
+            response["summary"] = data
+    return response
+
+
+@app.post("/optimization/jobs")
+async def submit_optimization_job(job_request: OptimizationJobRequest):
+    """
+    Queue an optimization to run in the background solver pool.
+    
+    Args:
+        job_request: kind ("database" for /optimize/database, "run" for /optimization/run,
+            "wave" for /optimization/wave/{wave_id}) and that endpoint's parameters
+    
+    Returns:
+        Job status including the job_id to poll
+    """
+    try:
+        job = job_manager.submit(job_request.kind, job_request.params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=f"Optimization queue is full: {e}")
+    
+    return {"status": "success", "job": job}
+
+
+@app.get("/optimization/jobs")
+async def list_optimization_jobs():
+    """List queued, running and recently finished optimization jobs."""
+    return {"status": "success", "jobs": job_manager.list_jobs()}
+
+
+@app.get("/optimization/jobs/{job_id}")
+async def get_optimization_job(job_id: str):
+    """Get the status of an optimization job."""
+    job = job_manager.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Optimization job '{job_id}' not found")
+    return {"status": "success", "job": job}
+
+
+@app.get("/optimization/jobs/{job_id}/result")
+async def get_optimization_job_result(job_id: str):
+    """Get the result of a finished optimization job (409 while it is still queued or running)."""
+    job = job_manager.result(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Optimization job '{job_id}' not found")
+    if job["status"] in ("queued", "running", "cancelling"):
+        raise HTTPException(status_code=409, detail=f"Optimization job '{job_id}' is {job['status']}")
+    return {"status": "success", "job": job}
+
+
+@app.post("/optimization/jobs/{job_id}/cancel")
+async def cancel_optimization_job(job_id: str):
+    """Cancel a queued job, or stop a running job's solver and keep its best solution so far."""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Optimization job '{job_id}' not found")
+    return {"status": "success", "job": job}
+
+
 @app.post("/optimization/cross-wave")
 async def optimize_cross_wave():
     """
@@ -2655,22 +3134,62 @@ async def get_wave_detailed_metrics(wave_id: int):
         }
 
 
+def _walking_time_source(warehouse_id: int):
+    """The warehouse's matrix store, or its bin index while the matrix is missing or stale."""
+    store = get_walking_time_store(warehouse_id)
+    if store is not None:
+        return store
+    try:
+        return get_bin_index(warehouse_id)
+    except Exception as e:
+        logger.warning(f"No bin index for warehouse {warehouse_id}, using the walking_times table: {e}")
+        return None
+
+
+def _path_walking_minutes(cursor, bin_ids, store) -> float:
+    """Walking minutes along consecutive bins, from the matrix store or bin index, else the walking_times table."""
+    if store is not None:
+        return store.path_walking_time(bin_ids)
+    total = 0.0
+    for from_bin, to_bin in zip(bin_ids, bin_ids[1:]):
+        cursor.execute("""
+            SELECT walking_time_minutes
+            FROM walking_times
+            WHERE from_bin_id = %s AND to_bin_id = %s
+        """, (from_bin, to_bin))
+        wt_row = cursor.fetchone()
+        if wt_row and wt_row['walking_time_minutes'] is not None:
+            total += float(wt_row['walking_time_minutes'])
+    return total
+
+
 @app.post("/api/recompute-walking-times")
-async def recompute_walking_times(warehouse_id: int = 1):
-    """Recompute walking times matrix for all bins in the warehouse."""
+def recompute_walking_times(warehouse_id: int = 1, export_table: Optional[bool] = None, full: bool = False):
+    """
+    Recompute walking times matrix for all bins in the warehouse.
+    
+    Updates the memory-mapped matrix file, recomputing only the rows of bins
+    added, moved or deleted since it was written (full recomputes every pair);
+    export_table also fills the walking_times table (default:
+    walking_time_matrix.export_table).
+    """
     try:
         calculator = WalkingTimeCalculator(warehouse_id)
-        success = calculator.recompute_walking_times()
+        success = calculator.recompute_walking_times(export_table=export_table, full=full)
         
         if success:
-            # Get the total number of records created
-            walking_times = db_service.get_walking_times(warehouse_id)
-            total_records = len(walking_times)
-            
+            store = calculator.store
             return {
                 "success": True,
                 "message": f"Successfully recomputed walking times for warehouse {warehouse_id}",
-                "total_records": total_records,
+                # Ordered pairs of distinct bins, as the walking_times table counts them
+                "total_records": store.size * (store.size - 1),
+                "bins": store.size,
+                "matrix_version": store.version,
+                "config_hash": store.config_hash,
+                # Added/moved/deleted bins and recomputed rows; None when every pair was recomputed
+                "incremental_update": calculator.store_update,
+                "table_export": calculator.table_export,
                 "warehouse_id": warehouse_id,
                 "computed_at": datetime.now().isoformat()
             }
@@ -2685,16 +3204,40 @@ async def recompute_walking_times(warehouse_id: int = 1):
 
 
 @app.get("/api/walking-times")
-async def get_walking_times(warehouse_id: int = 1):
-    """Get walking times matrix for a warehouse."""
+def get_walking_times(warehouse_id: int = 1, from_table: bool = False):
+    """
+    Get walking times matrix for a warehouse.
+    
+    Computed from the warehouse's bin index, which follows the matrix file and
+    the walking_time configuration, so it matches what the optimizer uses;
+    matrix_version is None while the matrix is missing or stale. from_table
+    reads the walking_times table instead, which is only refreshed by a
+    recompute with export_table and may be stale.
+    """
     try:
-        walking_times = db_service.get_walking_times(warehouse_id)
+        if from_table:
+            walking_times = db_service.get_walking_times(warehouse_id)
+            return {
+                "warehouse_id": warehouse_id,
+                "source": "walking_times_table",
+                "possibly_stale_export": True,
+                "walking_times": walking_times,
+                "total_records": len(walking_times),
+                "retrieved_at": datetime.now().isoformat()
+            }
         
+        index = get_bin_index(warehouse_id)
+        store = get_walking_time_store(warehouse_id)
+        retrieved_at = datetime.now().isoformat()
+        walking_times = [dict(record, computed_at=retrieved_at) for record in index.records()]
         return {
             "warehouse_id": warehouse_id,
+            "source": "bin_index",
+            "matrix_version": store.version if store is not None else None,
+            "config_hash": current_config_hash(),
             "walking_times": walking_times,
             "total_records": len(walking_times),
-            "retrieved_at": datetime.now().isoformat()
+            "retrieved_at": retrieved_at
         }
     except Exception as e:
         print(f"Error getting walking times: {e}")
@@ -2714,15 +3257,21 @@ async def get_configuration():
 
 
 @app.put("/config")
-async def update_configuration(config_data: Dict[str, Any]):
+def update_configuration(config_data: Dict[str, Any]):
     """Update the application configuration."""
     try:
+        walking_parameters = current_walking_parameters()
         success = config_service.update_config(config_data)
         if success:
+            # Matrices stamped with the previous walking_time parameters are recomputed here; lookups
+            # use the bin index until they are
+            matrix_versions = refresh_walking_time_stores() \
+                if current_walking_parameters() != walking_parameters else {}
             return {
                 "success": True,
                 "message": "Configuration updated successfully",
-                "config": config_service.get_config()
+                "config": config_service.get_config(),
+                "walking_time_matrix_versions": matrix_versions
             }
         else:
             raise HTTPException(status_code=500, detail="Failed to save configuration")
@@ -2731,10 +3280,13 @@ async def update_configuration(config_data: Dict[str, Any]):
 
 
 @app.post("/config/reset")
-async def reset_configuration():
+def reset_configuration():
     """Reset configuration to default values."""
     try:
+        walking_parameters = current_walking_parameters()
         config_service.reset_to_defaults()
+        if current_walking_parameters() != walking_parameters:
+            refresh_walking_time_stores()
         return {"message": "Configuration reset to defaults"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to reset configuration: {str(e)}")
@@ -2991,6 +3543,7 @@ async def get_wave_comparison_data(warehouse_id: int = 1):
             if not waves:
                 raise HTTPException(status_code=404, detail="No waves found for this warehouse")
             wave_comparisons = {}
+            walking_store = _walking_time_source(warehouse_id)
             for wave in waves:
                 wave_id = wave['id']
                 # Calculate travel time for this wave using walking_times
@@ -3017,17 +3570,8 @@ async def get_wave_comparison_data(warehouse_id: int = 1):
                         # Use the sequence of bins as the pick path
                         bin_ids = [row['bin_id'] for row in bin_rows]
                         # Sum walking times between consecutive bins
-                        for i in range(len(bin_ids) - 1):
-                            from_bin = bin_ids[i]
-                            to_bin = bin_ids[i+1]
-                            cursor.execute("""
-                                SELECT walking_time_minutes
-                                FROM walking_times
-                                WHERE from_bin_id = %s AND to_bin_id = %s
-                            """, (from_bin, to_bin))
-                            wt_row = cursor.fetchone()
-                            if wt_row and wt_row['walking_time_minutes'] is not None:
-                                total_travel_time += decimal.Decimal(wt_row['walking_time_minutes'])
+                        walking_minutes = _path_walking_minutes(cursor, bin_ids, walking_store)
+                        total_travel_time += decimal.Decimal(str(round(walking_minutes, 2)))
                 except Exception as e:
                     # Fallback to 0 if any error
                     total_travel_time = decimal.Decimal(0)
@@ -3292,7 +3836,7 @@ async def get_wave_completion_metrics(wave_id: int):
                 cursor.execute("""
                     SELECT w.id, w.wave_name, w.planned_start_time, w.planned_completion_time, 
                            w.actual_start_time, w.actual_completion_time, w.assigned_workers,
-                           w.labor_cost
+                           w.labor_cost, w.warehouse_id
                     FROM waves w
                     WHERE w.id = %s
                 """, (wave_id,))
@@ -3415,6 +3959,7 @@ async def get_wave_completion_metrics(wave_id: int):
                 wait_hours = 0.0
             # Calculate travel time
             total_travel_time = 0.0
+            walking_store = _walking_time_source(wave.get('warehouse_id') or 1)
             try:
                 cursor.execute("""
                     SELECT DISTINCT wa.order_id
@@ -3434,20 +3979,7 @@ async def get_wave_completion_metrics(wave_id: int):
                         """, (order_id,))
                         bin_rows = cursor.fetchall()
                         bin_ids = [row['bin_id'] for row in bin_rows]
-                        for i in range(len(bin_ids) - 1):
-                            from_bin = bin_ids[i]
-                            to_bin = bin_ids[i+1]
-                            try:
-                                cursor.execute("""
-                                    SELECT walking_time_minutes
-                                    FROM walking_times
-                                    WHERE from_bin_id = %s AND to_bin_id = %s
-                                """, (from_bin, to_bin))
-                                wt_row = cursor.fetchone()
-                                if wt_row and wt_row['walking_time_minutes'] is not None:
-                                    total_travel_time += float(wt_row['walking_time_minutes'])
-                            except Exception as e:
-                                logging.warning(f"Error fetching walking time from {from_bin} to {to_bin}: {e}")
+                        total_travel_time += _path_walking_minutes(cursor, bin_ids, walking_store)
                     except Exception as e:
                         logging.warning(f"Error calculating travel time for order {order_id}: {e}")
             except Exception as e:
@@ -0,0 +1,561 @@
+#!/usr/bin/env python3
+"""
+Offline scaling benchmark for the optimizers.
+
+Runs every optimizer over a ladder of synthetic instances generated with
+SyntheticDataGenerator, from 10 orders x 5 workers up to 2000 x 60, under a
+fixed time limit. Each run happens in a fresh process so its peak RSS is its
+own, and a run that exceeds its time budget or dies is recorded rather than
+aborting the suite. No database is needed: pick walking times are left at zero.
+
+Results are written as JSON so two commits can be compared:
+
+    python benchmark_optimizers.py --ladder small
+    python benchmark_optimizers.py --ladder full --time-limit 60 --output full.json
+    python benchmark_optimizers.py --compare baseline.json current.json
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Slot 0 of every benchmark schedule; deadlines are generated relative to it
+SCHEDULE_START = datetime(2025, 1, 6, 0, 0)
+
+# "end_of_day" gives every order the same late deadline so the hard-deadline
+# models stay feasible and the ladder measures search; "generated" keeps the
+# generator's 2-12 hour deadline mix, which most CP rungs can't meet.
+DEADLINE_POLICIES = ("end_of_day", "generated")
+
+# (orders, workers, equipment, slot granularity) rungs, smallest first
+INSTANCE_LADDER = [
+    {"name": "10x5", "orders": 10, "workers": 5, "equipment": 10, "granularity_minutes": 15},
+    {"name": "50x10", "orders": 50, "workers": 10, "equipment": 15, "granularity_minutes": 15},
+    {"name": "100x15", "orders": 100, "workers": 15, "equipment": 20, "granularity_minutes": 15},
+    {"name": "250x25", "orders": 250, "workers": 25, "equipment": 30, "granularity_minutes": 15},
+    {"name": "500x40", "orders": 500, "workers": 40, "equipment": 41, "granularity_minutes": 30},
+    {"name": "1000x50", "orders": 1000, "workers": 50, "equipment": 50, "granularity_minutes": 30},
+    {"name": "2000x60", "orders": 2000, "workers": 60, "equipment": 60, "granularity_minutes": 60}
+]
+LADDERS = {
+    "small": INSTANCE_LADDER[:3],
+    "full": INSTANCE_LADDER
+}
+
+# Optimizer -> largest order count it is run on (None = every rung). The
+# time-indexed and wave constraint models grow with orders x workers x slots
+# and would exhaust memory long before the top of the ladder.
+OPTIMIZERS = {
+    "multi_stage_time_indexed": 100,
+    "multi_stage_interval": None,
+    "multi_stage_skill_class": None,
+    "multi_resolution": 100,
+    "zone_decomposition": None,
+    "lns": None,
+    "simple": None,
+    "simple_wave": None,
+    "wave_constraint": 250
+}
+
+# Decomposed optimizer -> monolithic optimizer its objective loss is measured against
+DECOMPOSITION_BASELINES = {
+    "zone_decomposition": "multi_stage_interval",
+    "lns": "multi_stage_interval"
+}
+
+# Metrics compared between result files; all of them are better when lower
+COMPARED_METRICS = ("build_seconds", "solve_seconds", "peak_rss_mb")
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def build_instance(instance: Dict[str, Any], seed: int, deadlines: str = "end_of_day"):
+    """Generate the warehouse and orders of a ladder rung."""
+    from data_generator.generator import SyntheticDataGenerator
+
+    generator = SyntheticDataGenerator(seed=seed)
+    warehouse_config = generator.generate_warehouse_config(instance["workers"], instance["equipment"])
+    orders = generator.generate_orders(instance["orders"], start_time=SCHEDULE_START)
+    if deadlines == "end_of_day":
+        for order in orders:
+            order.shipping_deadline = SCHEDULE_START.replace(hour=23, minute=45)
+    return warehouse_config, orders
+
+
+def to_wave_data(warehouse_config, orders) -> Dict[str, List[Dict]]:
+    """Rows shaped like WaveConstraintOptimizer.get_wave_data returns them."""
+    priority_names = {1: 'high', 2: 'high', 3: 'medium', 4: 'low', 5: 'low'}
+    return {
+        "wave_data": [{
+            "order_id": order.id,
+            "shipping_deadline": order.shipping_deadline,
+            "priority": priority_names.get(order.priority, 'medium'),
+            "customer_id": order.customer_id,
+            "customer_type": "standard",
+            "planned_start_time": SCHEDULE_START
+        } for order in orders],
+        # One row per worker skill, as the worker_skills join produces
+        "workers": [{
+            "id": worker.id,
+            "name": worker.name,
+            "hourly_rate": worker.hourly_rate,
+            "skill_name": skill.value,
+            "proficiency_level": 1
+        } for worker in warehouse_config.workers for skill in sorted(worker.skills, key=lambda s: s.value)],
+        "equipment": [{
+            "id": eq.id,
+            "equipment_code": eq.name,
+            "equipment_type": eq.equipment_type.value,
+            "capacity": eq.capacity,
+            "hourly_cost": eq.hourly_cost
+        } for eq in warehouse_config.equipment]
+    }
+
+
+def _on_time_percentage(ship_end_minutes: Dict[int, float], orders) -> float:
+    """Share of orders whose ship stage ends by the deadline, in minutes from SCHEDULE_START."""
+    if not orders:
+        return 0.0
+    on_time = sum(
+        1 for order in orders
+        if order.id in ship_end_minutes
+        and ship_end_minutes[order.id] <= (order.shipping_deadline - SCHEDULE_START).total_seconds() / 60
+    )
+    return on_time / len(orders) * 100
+
+
+def _run_multi_stage(model_mode, warehouse_config, orders, instance, time_limit):
+    from optimizer.wave_optimizer import MultiStageOptimizer
+
+    optimizer = MultiStageOptimizer(warehouse_config, model_mode=model_mode)
+    # Model the whole rung instead of truncating to the demo limits
+    optimizer.requirements.max_orders_per_wave = len(orders)
+    optimizer.requirements.max_workers = len(warehouse_config.workers)
+    optimizer.time_granularity = instance["granularity_minutes"]
+    optimizer.schedule_base_time = SCHEDULE_START
+    optimizer.order_walking_minutes = {order.id: 0.0 for order in orders}
+
+    deadlines = {order.id: order.shipping_deadline for order in orders}
+    result = optimizer.optimize_workflow(orders, warehouse_config.workers, warehouse_config.equipment,
+                                         deadlines, time_limit_seconds=time_limit)
+    stats = optimizer.solve_stats
+    # Without a CP solution the result comes from SimpleOptimizer, whose on-time rate is nominal
+    fallback = stats.get("status") not in ("OPTIMAL", "FEASIBLE")
+    return {
+        "status": stats.get("status"),
+        "fallback": fallback,
+        "build_seconds": optimizer.model_build_seconds,
+        "solve_seconds": stats.get("wall_time_seconds"),
+        "objective": stats.get("objective"),
+        "gap": stats.get("gap"),
+        "on_time_percentage": None if fallback else result.metrics.on_time_percentage,
+        "profile": result.input_summary.get("profile")
+    }
+
+
+def _run_multi_resolution(warehouse_config, orders, instance, time_limit):
+    from optimizer.multi_resolution import MultiResolutionOptimizer
+
+    # Refines to MultiResolutionOptimizer's own granularities rather than the rung's
+    optimizer = MultiResolutionOptimizer(warehouse_config, time_limit_seconds=time_limit)
+    optimizer.schedule_base_time = SCHEDULE_START
+    optimizer.order_walking_minutes = {order.id: 0.0 for order in orders}
+
+    deadlines = {order.id: order.shipping_deadline for order in orders}
+    result = optimizer.optimize_workflow(orders, warehouse_config.workers, warehouse_config.equipment, deadlines)
+    levels = optimizer.level_reports
+    solved = [level for level in levels if level["status"] in ("OPTIMAL", "FEASIBLE")]
+    return {
+        "status": solved[-1]["status"] if solved else levels[-1]["status"],
+        "fallback": not solved,
+        "build_seconds": sum(level["build_seconds"] for level in levels),
+        "solve_seconds": sum(level["solve_seconds"] or 0.0 for level in levels),
+        "objective": solved[-1]["objective"] if solved else None,
+        "granularity_minutes": solved[-1]["granularity_minutes"] if solved else None,
+        "on_time_percentage": result.metrics.on_time_percentage if solved else None,
+        "levels": levels,
+        "profile": result.input_summary.get("profile")
+    }
+
+
+def _run_zone_decomposition(warehouse_config, orders, instance, time_limit):
+    from optimizer.zone_decomposition import ZoneDecompositionOptimizer
+
+    optimizer = ZoneDecompositionOptimizer(warehouse_config, time_limit_seconds=time_limit)
+    optimizer.requirements.max_orders_per_wave = len(orders)
+    optimizer.requirements.max_workers = len(warehouse_config.workers)
+    optimizer.time_granularity = instance["granularity_minutes"]
+    optimizer.schedule_base_time = SCHEDULE_START
+    optimizer.order_walking_minutes = {order.id: 0.0 for order in orders}
+
+    deadlines = {order.id: order.shipping_deadline for order in orders}
+    result = optimizer.optimize_workflow(orders, warehouse_config.workers, warehouse_config.equipment, deadlines)
+    # The objective is the monolithic one, so it is comparable with multi_stage_interval
+    objective = result.input_summary.get("objective")
+    downstream = optimizer.downstream_report
+    return {
+        # No downstream solve means a zone's pick model failed
+        "status": result.metrics.solver_status if objective is not None else downstream.get("status", "ZONE_FAILED"),
+        "fallback": objective is None,
+        "build_seconds": downstream.get("build_seconds"),
+        "solve_seconds": result.metrics.optimization_runtime_seconds,
+        "objective": objective,
+        "on_time_percentage": None if objective is None else result.metrics.on_time_percentage,
+        "zones": optimizer.zone_reports,
+        "profile": result.input_summary.get("profile")
+    }
+
+
+def _run_lns(warehouse_config, orders, instance, time_limit):
+    from optimizer.lns import LNSOptimizer
+
+    optimizer = LNSOptimizer(warehouse_config, time_limit_seconds=time_limit)
+    optimizer.time_granularity = instance["granularity_minutes"]
+    optimizer.schedule_base_time = SCHEDULE_START
+    optimizer.order_walking_minutes = {order.id: 0.0 for order in orders}
+
+    deadlines = {order.id: order.shipping_deadline for order in orders}
+    result = optimizer.optimize_workflow(orders, warehouse_config.workers, warehouse_config.equipment, deadlines)
+    summary = result.input_summary
+    return {
+        "status": result.metrics.solver_status,
+        "fallback": False,
+        "build_seconds": None,
+        "solve_seconds": result.metrics.optimization_runtime_seconds,
+        "objective": summary["objective"],
+        "initial_objective": summary["initial_objective"],
+        "iterations": summary["iterations"],
+        "on_time_percentage": result.metrics.on_time_percentage,
+        "neighborhoods": summary["neighborhoods"],
+        "profile": summary.get("profile")
+    }
+
+
+def _run_simple(warehouse_config, orders, instance, time_limit):
+    from optimizer.wave_optimizer import SimpleOptimizer
+
+    solve_start = time.time()
+    deadlines = {order.id: order.shipping_deadline for order in orders}
+    result = SimpleOptimizer(warehouse_config).optimize_workflow(
+        orders, warehouse_config.workers, warehouse_config.equipment, deadlines)
+    return {
+        "status": result.metrics.solver_status,
+        "build_seconds": 0.0,
+        "solve_seconds": time.time() - solve_start,
+        "objective": result.metrics.total_cost,
+        "on_time_percentage": result.metrics.on_time_percentage
+    }
+
+
+def _run_simple_wave(warehouse_config, orders, instance, time_limit):
+    from optimizer.simple_wave_optimizer import SimpleWaveOptimizer
+
+    wave_data = to_wave_data(warehouse_config, orders)
+    solve_start = time.time()
+    result = SimpleWaveOptimizer().optimize_wave(wave_data)
+    solve_seconds = time.time() - solve_start
+    if result.get("error"):
+        return {"status": "error", "error": result["error"]}
+
+    # The optimizer rates on-time against the wall clock; use SCHEDULE_START like the others
+    ship_end_minutes = {
+        schedule['order_id']: schedule['stages'][-1]['end_time']
+        for schedule in result["solution"]["schedule"]
+    }
+    return {
+        "status": result["status"],
+        "build_seconds": 0.0,
+        "solve_seconds": solve_seconds,
+        "objective": result["objective_value"],
+        "on_time_percentage": _on_time_percentage(ship_end_minutes, orders),
+        "profile": result.get("profile")
+    }
+
+
+def _run_wave_constraint(warehouse_config, orders, instance, time_limit):
+    from optimizer.wave_constraint_optimizer import WaveConstraintOptimizer
+
+    wave_data = to_wave_data(warehouse_config, orders)
+    optimizer = WaveConstraintOptimizer()
+    build_start = time.time()
+    if not optimizer.create_optimization_model(wave_data):
+        return {"status": "model_error", "build_seconds": time.time() - build_start}
+    build_seconds = time.time() - build_start
+
+    result = optimizer.solve_optimization(time_limit)
+    record = {
+        "status": optimizer.profile.solver_stats.get("status", "error"),
+        "build_seconds": build_seconds,
+        "solve_seconds": result.get("solve_time"),
+        "objective": result.get("objective_value"),
+        "profile": optimizer.profile.to_dict()
+    }
+    if result.get("status") == "success":
+        ship_duration = optimizer.stage_durations['ship']
+        ship_end_minutes = {
+            order.id: optimizer.solver.Value(optimizer.start_times[order_idx, 'ship']) + ship_duration
+            for order_idx, order in enumerate(orders)
+        }
+        record["on_time_percentage"] = _on_time_percentage(ship_end_minutes, orders)
+    return record
+
+
+def run_benchmark(optimizer_name: str, instance: Dict[str, Any], time_limit: float,
+                  seed: int = 42, deadlines: str = "end_of_day") -> Dict[str, Any]:
+    """Run one optimizer on one ladder rung in this process and return its record."""
+    warehouse_config, orders = build_instance(instance, seed, deadlines)
+    baseline_rss = _peak_rss_mb()
+
+    run_start = time.time()
+    if optimizer_name.startswith("multi_stage_"):
+        outcome = _run_multi_stage(optimizer_name[len("multi_stage_"):], warehouse_config, orders,
+                                   instance, time_limit)
+    else:
+        runners = {
+            "simple": _run_simple,
+            "multi_resolution": _run_multi_resolution,
+            "zone_decomposition": _run_zone_decomposition,
+            "lns": _run_lns,
+            "simple_wave": _run_simple_wave,
+            "wave_constraint": _run_wave_constraint
+        }
+        outcome = runners[optimizer_name](warehouse_config, orders, instance, time_limit)
+
+    record = {
+        "optimizer": optimizer_name,
+        "instance": instance["name"],
+        "orders": instance["orders"],
+        "workers": instance["workers"],
+        "equipment": instance["equipment"],
+        "granularity_minutes": instance["granularity_minutes"],
+        "time_limit_seconds": time_limit,
+        "fallback": False,
+        "build_seconds": None,
+        "solve_seconds": None,
+        "objective": None,
+        "on_time_percentage": None,
+        **outcome,
+        "total_seconds": time.time() - run_start,
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": _peak_rss_mb()
+    }
+    profile = record.pop("profile", None) or {}
+    record["phases"] = profile.get("phases", {})
+    record["model_size"] = profile.get("model_size", {})
+    return record
+
+
+def _child(conn, optimizer_name, instance, time_limit, seed, deadlines, verbose):
+    if not verbose:
+        sys.stdout = open(os.devnull, "w")
+        logging.disable(logging.WARNING)
+    try:
+        conn.send(run_benchmark(optimizer_name, instance, time_limit, seed, deadlines))
+    except Exception as e:
+        conn.send({"status": "error", "error": f"{type(e).__name__}: {e}", "peak_rss_mb": _peak_rss_mb()})
+    finally:
+        conn.close()
+
+
+def run_isolated(optimizer_name: str, instance: Dict[str, Any], time_limit: float, seed: int = 42,
+                 deadlines: str = "end_of_day", run_timeout: Optional[float] = None,
+                 verbose: bool = False) -> Dict[str, Any]:
+    """Run one benchmark in a fresh process; timeouts and crashes become records too."""
+    base_record = {"optimizer": optimizer_name, "instance": instance["name"], "orders": instance["orders"],
+                   "workers": instance["workers"], "equipment": instance["equipment"],
+                   "granularity_minutes": instance["granularity_minutes"], "time_limit_seconds": time_limit}
+    max_orders = OPTIMIZERS[optimizer_name]
+    if max_orders is not None and instance["orders"] > max_orders:
+        return {**base_record, "status": "skipped", "error": f"{optimizer_name} runs up to {max_orders} orders"}
+
+    # Model builds grow with the instance, so the budget is more than the solver limit
+    run_timeout = run_timeout or time_limit * 3 + 120
+    context = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    process = context.Process(target=_child,
+                              args=(child_conn, optimizer_name, instance, time_limit, seed, deadlines, verbose))
+    process.start()
+    child_conn.close()
+
+    record = None
+    if parent_conn.poll(run_timeout):
+        try:
+            record = parent_conn.recv()
+        except EOFError:
+            pass
+    process.join(5)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+        if record is None:
+            return {**base_record, "status": "timeout", "error": f"No result within {run_timeout:.0f}s"}
+    if record is None:
+        # Killed by the OS (e.g. out of memory) before it could report
+        return {**base_record, "status": "crashed", "error": f"Worker exited with code {process.exitcode}"}
+    return {**base_record, **record}
+
+
+def annotate_objective_loss(results: List[Dict[str, Any]]) -> None:
+    """
+    Add objective_loss_percentage to decomposed runs: how much worse their
+    objective is than the monolithic baseline's on the same rung.
+    """
+    objectives = {(r["optimizer"], r["instance"]): r.get("objective") for r in results}
+    for record in results:
+        baseline_name = DECOMPOSITION_BASELINES.get(record["optimizer"])
+        if baseline_name is None:
+            continue
+        baseline = objectives.get((baseline_name, record["instance"]))
+        objective = record.get("objective")
+        record["objective_loss_percentage"] = (
+            (objective / baseline - 1) * 100 if objective is not None and baseline else None
+        )
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(ladder: List[Dict[str, Any]], optimizers: List[str], time_limit: float, seed: int = 42,
+              deadlines: str = "end_of_day", run_timeout: Optional[float] = None,
+              verbose: bool = False) -> Dict[str, Any]:
+    """Run every optimizer on every rung and return the results document."""
+    from ortools import __version__ as ortools_version
+
+    results = []
+    for instance in ladder:
+        for optimizer_name in optimizers:
+            record = run_isolated(optimizer_name, instance, time_limit, seed, deadlines, run_timeout, verbose)
+            results.append(record)
+            print(_format_record(record))
+    annotate_objective_loss(results)
+    for record in results:
+        if "objective_loss_percentage" in record:
+            print(f"{record['instance']:>8} {record['optimizer']:<26} objective loss vs "
+                  f"{DECOMPOSITION_BASELINES[record['optimizer']]}: "
+                  f"{_fmt(record['objective_loss_percentage'], '.1f')}%")
+    return {
+        "metadata": {
+            "commit": _git_commit(),
+            "created_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "ortools": ortools_version,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "time_limit_seconds": time_limit,
+            "seed": seed,
+            "deadlines": deadlines
+        },
+        "results": results
+    }
+
+
+def _fmt(value, spec=".2f"):
+    return "-" if value is None else format(value, spec)
+
+
+def _format_record(record: Dict[str, Any]) -> str:
+    return (f"{record['instance']:>8} {record['optimizer']:<26} {record['status']:<10} "
+            f"build {_fmt(record.get('build_seconds')):>7}s  solve {_fmt(record.get('solve_seconds')):>7}s  "
+            f"objective {_fmt(record.get('objective')):>12}  on-time {_fmt(record.get('on_time_percentage'), '.1f'):>5}%  "
+            f"peak RSS {_fmt(record.get('peak_rss_mb'), '.0f'):>5}MB")
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float = 0.2) -> List[Dict[str, Any]]:
+    """
+    Compare two result documents run by run.
+
+    Returns one row per metric that got more than threshold (relative) worse,
+    plus rows for runs that stopped producing a solution.
+    """
+    baseline_runs = {(r["optimizer"], r["instance"]): r for r in baseline["results"]}
+    regressions = []
+    for run in current["results"]:
+        previous = baseline_runs.get((run["optimizer"], run["instance"]))
+        if previous is None:
+            continue
+        if previous.get("objective") is not None and run.get("objective") is None:
+            regressions.append({"optimizer": run["optimizer"], "instance": run["instance"],
+                                "metric": "status", "baseline": previous["status"], "current": run["status"]})
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = previous.get(metric), run.get(metric)
+            # Ignore sub-10ms timings, they are noise
+            if before is None or after is None or max(before, after) < 0.01:
+                continue
+            if after > before * (1 + threshold):
+                regressions.append({"optimizer": run["optimizer"], "instance": run["instance"],
+                                    "metric": metric, "baseline": before, "current": after,
+                                    "change_percentage": (after / before - 1) * 100 if before else None})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline optimizer scaling benchmark')
+    parser.add_argument('--ladder', choices=sorted(LADDERS), default='small',
+                        help='Instance ladder to run (default: small)')
+    parser.add_argument('--instances', nargs='+', help='Run only these rungs (e.g. 10x5 250x25)')
+    parser.add_argument('--optimizers', nargs='+', choices=list(OPTIMIZERS), default=list(OPTIMIZERS),
+                        help='Optimizers to run (default: all)')
+    parser.add_argument('--time-limit', type=float, default=30, help='Solver time limit per run in seconds')
+    parser.add_argument('--run-timeout', type=float, help='Wall-clock budget per run (default: 3x time limit + 120s)')
+    parser.add_argument('--seed', type=int, default=42, help='Data generator seed (default: 42)')
+    parser.add_argument('--deadlines', choices=DEADLINE_POLICIES, default='end_of_day',
+                        help='Deadline policy (default: end_of_day)')
+    parser.add_argument('--output', help='Results file (default: benchmark_results/<ladder>_<commit>.json)')
+    parser.add_argument('--verbose', action='store_true', help='Show optimizer output')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help='Compare two results files instead of running; exits 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Relative slowdown reported as a regression (default: 0.2)')
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        regressions = compare_results(baseline, current, args.threshold)
+        for row in regressions:
+            print(f"{row['instance']:>8} {row['optimizer']:<26} {row['metric']:<14} "
+                  f"{row['baseline']} -> {row['current']}")
+        print(f"{len(regressions)} regression(s) between {baseline['metadata'].get('commit')} "
+              f"and {current['metadata'].get('commit')}")
+        sys.exit(1 if regressions else 0)
+
+    ladder = LADDERS[args.ladder]
+    if args.instances:
+        ladder = [instance for instance in INSTANCE_LADDER if instance["name"] in args.instances]
+
+    document = run_suite(ladder, args.optimizers, args.time_limit, args.seed, args.deadlines,
+                         args.run_timeout, args.verbose)
+    output = args.output or os.path.join(
+        "benchmark_results", f"{args.ladder}_{document['metadata']['commit'] or 'unknown'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(document, f, indent=2, default=str)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
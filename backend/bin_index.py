@@ -0,0 +1,143 @@
+"""
+Process-wide index of a warehouse's bins.
+
+calculate_walking_time_between_bins used to build a WalkingTimeCalculator,
+fetch every bin and scan the list twice, for every pair it was asked about.
+BinIndex loads the bins once into a WalkingTimeMatrix (coordinate, zone and
+level arrays) with a dict from bin id to array position. A single pair then
+costs a dict lookup and the calculator's formula, and batches of
+(from, to) pairs are computed with array operations.
+
+get_bin_index() keeps one index per warehouse. The index is reloaded when
+the warehouse's matrix file is rewritten (a recompute or an incremental bin
+update bumps its version) or the walking_time configuration changes, both
+checked as cheaply as walking_time_store's lookups. Without a matrix file
+nothing signals bin changes, so the bins are then reloaded every
+BINS_TTL_SECONDS. The index answers for a warehouse whose matrix is missing
+or not yet refreshed to the current configuration.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from walking_time_calculator import WalkingTimeCalculator
+from walking_time_matrix import PATH_TYPE
+from walking_time_store import current_config_hash, matrix_file_identity, matrix_path
+
+# How long an index loaded without a matrix file is trusted
+BINS_TTL_SECONDS = 60.0
+
+
+class BinIndex:
+    """A warehouse's bins in arrays, answering walking times without the database."""
+
+    def __init__(self, bins: List[Dict], calculator: WalkingTimeCalculator, version: Any = None):
+        self.calculator = calculator
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.matrix = calculator.build_matrix(bins)
+        self.position = {bin_id: position for position, bin_id in enumerate(self.matrix.bin_ids.tolist())}
+        self._sorter = np.argsort(self.matrix.bin_ids, kind="stable")
+        self._sorted_ids = self.matrix.bin_ids[self._sorter]
+        # Arguments of calculate_walking_time_minutes per bin, for single pairs
+        self._coordinates = [tuple(row) for row in self.matrix.coordinates.tolist()]
+        self._zones = [b.get('zone') for b in bins]
+        self._levels = [b.get('level') for b in bins]
+
+    @property
+    def size(self) -> int:
+        return self.matrix.size
+
+    def positions(self, bin_ids: Iterable[int]) -> np.ndarray:
+        """Array position of each bin id, -1 for unknown bins."""
+        bin_ids = np.asarray(bin_ids, dtype=np.int64)
+        if not self.size:
+            return np.full(bin_ids.shape, -1, dtype=np.int64)
+        found = np.minimum(np.searchsorted(self._sorted_ids, bin_ids), self.size - 1)
+        return np.where(self._sorted_ids[found] == bin_ids, self._sorter[found], -1)
+
+    def walking_time(self, from_bin_id: int, to_bin_id: int) -> Optional[float]:
+        """Walking minutes between two bins, None if either is unknown."""
+        i = self.position.get(from_bin_id)
+        j = self.position.get(to_bin_id)
+        if i is None or j is None:
+            return None
+        return self.calculator.calculate_walking_time_minutes(
+            self._coordinates[i], self._coordinates[j], self._zones[i], self._zones[j],
+            self._levels[i], self._levels[j]
+        )
+
+    def walking_times(self, from_bin_ids: Iterable[int], to_bin_ids: Iterable[int]) -> np.ndarray:
+        """Walking minutes for each (from, to) pair; NaN where a bin is unknown."""
+        from_positions = self.positions(from_bin_ids)
+        to_positions = self.positions(to_bin_ids)
+        known = (from_positions >= 0) & (to_positions >= 0)
+        minutes = np.full(len(from_positions), np.nan)
+        minutes[known] = self.matrix.pair_walking_times(from_positions[known], to_positions[known])
+        return minutes
+
+    def path_walking_time(self, bin_ids: Sequence[int]) -> float:
+        """Walking minutes along consecutive bins, skipping steps to or from unknown bins."""
+        if len(bin_ids) < 2:
+            return 0.0
+        return round(float(np.nansum(self.walking_times(bin_ids[:-1], bin_ids[1:]))), 2)
+
+    def pair(self, from_bin_id: int, to_bin_id: int) -> Optional[Dict]:
+        """The walking_times record of two bins, None if either is unknown."""
+        i = self.position.get(from_bin_id)
+        j = self.position.get(to_bin_id)
+        if i is None or j is None:
+            return None
+        return {
+            'from_bin_id': from_bin_id,
+            'to_bin_id': to_bin_id,
+            'from_bin_code': self.matrix.bin_codes[i],
+            'to_bin_code': self.matrix.bin_codes[j],
+            'distance_feet': round(self.calculator.calculate_weighted_manhattan_distance(
+                self._coordinates[i], self._coordinates[j]), 2),
+            'walking_time_minutes': self.walking_time(from_bin_id, to_bin_id),
+            'path_type': PATH_TYPE
+        }
+
+    def records(self) -> Iterator[Dict]:
+        """The walking_times rows of every ordered pair of distinct bins, with their zones, in bin order."""
+        zones = self._zones
+        position = self.position
+        for record in self.matrix.records():
+            record['from_zone'] = zones[position[record['from_bin_id']]]
+            record['to_zone'] = zones[position[record['to_bin_id']]]
+            yield record
+
+
+_indexes: Dict[int, BinIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def bin_index_version(warehouse_id: int = 1) -> Tuple:
+    """Identity of the warehouse's matrix file and the walking_time config hash."""
+    return matrix_file_identity(matrix_path(warehouse_id)), current_config_hash()
+
+
+def _current(index: Optional[BinIndex], version: Tuple) -> bool:
+    if index is None or index.version != version:
+        return False
+    # Without a matrix file, bins added or moved in the database only show up on a reload
+    return version[0] is not None or time.monotonic() - index.loaded_at < BINS_TTL_SECONDS
+
+
+def get_bin_index(warehouse_id: int = 1) -> BinIndex:
+    """This process's index of a warehouse's bins, loaded on first use and after a version bump."""
+    version = bin_index_version(warehouse_id)
+    index = _indexes.get(warehouse_id)
+    if _current(index, version):
+        return index
+    with _indexes_lock:
+        index = _indexes.get(warehouse_id)
+        if not _current(index, version):
+            calculator = WalkingTimeCalculator(warehouse_id)
+            index = BinIndex(calculator.get_all_bins(), calculator, version)
+            _indexes[warehouse_id] = index
+    return index
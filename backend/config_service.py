@@ -7,6 +7,7 @@ optimization settings, and UI preferences.
 
 import json
 import os
+import time
 from typing import Dict, Any, Optional
 from pathlib import Path
 
@@ -18,12 +19,24 @@ class ConfigService:
         self.config_file = config_file
         self.config_path = Path(__file__).parent / config_file
         self._config = None
+        # Bumped whenever the configuration is loaded or changed, so values derived from it can be cached
+        self.generation = 0
+        self._file_mtime_ns = None
+        self._checked_at = float('-inf')
         self._load_config()
     
+    def _file_mtime(self) -> Optional[int]:
+        try:
+            return self.config_path.stat().st_mtime_ns
+        except OSError:
+            return None
+    
     def _load_config(self) -> None:
         """Load configuration from file."""
         try:
             if self.config_path.exists():
+                # Taken before reading, so a write during the read is picked up by the next check
+                self._file_mtime_ns = self._file_mtime()
                 with open(self.config_path, 'r') as f:
                     self._config = json.load(f)
             else:
@@ -33,6 +46,26 @@ class ConfigService:
         except Exception as e:
             print(f"Error loading config: {e}")
             self._config = self._get_default_config()
+        self.generation += 1
+    
+    def reload_if_changed(self, min_interval_seconds: float = 0) -> bool:
+        """
+        Reload the configuration if another process changed config.json.
+        
+        Args:
+            min_interval_seconds: Skip the check when the last one was this recent
+            
+        Returns:
+            True if the configuration was reloaded
+        """
+        now = time.monotonic()
+        if now - self._checked_at < min_interval_seconds:
+            return False
+        self._checked_at = now
+        if self._file_mtime() == self._file_mtime_ns:
+            return False
+        self._load_config()
+        return True
     
     def _get_default_config(self) -> Dict[str, Any]:
         """Get default configuration values."""
@@ -45,11 +78,26 @@ class ConfigService:
                 "x_weight": 1.0,
                 "y_weight": 1.0
             },
+            "walking_time_matrix": {
+                "directory": "walking_time_matrices",
+                "dtype": "float32",
+                "export_table": False,
+                "copy_chunk_rows": 1000000
+            },
             "optimization": {
                 "default_hourly_rate": 25.0,
                 "estimated_minutes_per_order": 2.5,
                 "efficiency_threshold_low": 70,
-                "efficiency_threshold_high": 85
+                "efficiency_threshold_high": 85,
+                "max_concurrent_solves": 2,
+                "max_queued_jobs": 20,
+                "max_batch_processes": 4,
+                "database_pool_size": 8,
+                "wave_snapshot_ttl_seconds": 300,
+                "max_model_memory_mb": 2048,
+                "max_model_build_seconds": 120,
+                "downgrade_oversized_requests": True,
+                "model_calibration_file": None
             },
             "standard_times": {
                 "label_minutes_per_order": 5.0,
@@ -68,9 +116,11 @@ class ConfigService:
     
     def _save_config(self) -> bool:
         """Save configuration to file."""
+        self.generation += 1
         try:
             with open(self.config_path, 'w') as f:
                 json.dump(self._config, f, indent=2)
+            self._file_mtime_ns = self._file_mtime()
             return True
         except Exception as e:
             print(f"Error saving config: {e}")
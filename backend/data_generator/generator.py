@@ -48,10 +48,16 @@ class SyntheticDataGenerator:
             "Books": ["Novel", "Textbook", "Magazine", "Cookbook", "Journal"]
         }
         
-    def generate_warehouse_config(self) -> WarehouseConfig:
-        """Generate complete warehouse configuration."""
-        workers = self._generate_workers()
-        equipment = self._generate_equipment()
+    def generate_warehouse_config(self, num_workers: int = 15,
+                                  num_equipment: Optional[int] = None) -> WarehouseConfig:
+        """
+        Generate complete warehouse configuration.
+        
+        num_workers and num_equipment scale the crew and equipment park for
+        benchmark instances; the defaults give the 15-worker demo warehouse.
+        """
+        workers = self._generate_workers(num_workers)
+        equipment = self._generate_equipment(num_equipment)
         skus = self._generate_skus()
         
         return WarehouseConfig(
@@ -63,8 +69,8 @@ class SyntheticDataGenerator:
             skus=skus
         )
     
-    def _generate_workers(self) -> List[Worker]:
-        """Generate 15 workers with varying skills and efficiency."""
+    def _generate_workers(self, num_workers: int = 15) -> List[Worker]:
+        """Generate workers with varying skills and efficiency (skill mix repeats every 15)."""
         workers = []
         
         # Define skill combinations (some workers are more specialized)
@@ -91,8 +97,8 @@ class SyntheticDataGenerator:
             {SkillType.CONSOLIDATION, SkillType.STAGING}
         ]
         
-        for i in range(15):
-            skills = skill_combinations[i]
+        for i in range(num_workers):
+            skills = skill_combinations[i % len(skill_combinations)]
             
             # Vary efficiency (some workers are more productive)
             efficiency = random.uniform(0.8, 1.2)
@@ -104,7 +110,8 @@ class SyntheticDataGenerator:
             
             worker = Worker(
                 id=i + 1,
-                name=self.worker_names[i],
+                name=self.worker_names[i % len(self.worker_names)] +
+                     (f" {i // len(self.worker_names) + 1}" if i >= len(self.worker_names) else ""),
                 skills=skills,
                 hourly_rate=hourly_rate,
                 efficiency_factor=efficiency,
@@ -114,64 +121,36 @@ class SyntheticDataGenerator:
         
         return workers
     
-    def _generate_equipment(self) -> List[Equipment]:
-        """Generate warehouse equipment with capacity constraints."""
-        equipment = []
-        
-        # Packing stations (bottleneck equipment)
-        for i in range(8):
-            equipment.append(Equipment(
-                id=i + 1,
-                name=f"Packing Station {i + 1}",
-                equipment_type=EquipmentType.PACKING_STATION,
-                capacity=1,
-                hourly_cost=15.0,
-                efficiency_factor=random.uniform(0.9, 1.1)
-            ))
-        
-        # Dock doors (shipping bottleneck)
-        for i in range(6):
-            equipment.append(Equipment(
-                id=i + 9,
-                name=f"Dock Door {i + 1}",
-                equipment_type=EquipmentType.DOCK_DOOR,
-                capacity=1,
-                hourly_cost=5.0,
-                efficiency_factor=1.0
-            ))
-        
-        # Pick carts
-        for i in range(20):
-            equipment.append(Equipment(
-                id=i + 15,
-                name=f"Pick Cart {i + 1}",
-                equipment_type=EquipmentType.PICK_CART,
-                capacity=1,
-                hourly_cost=2.0,
-                efficiency_factor=1.0
-            ))
+    def _generate_equipment(self, num_equipment: Optional[int] = None) -> List[Equipment]:
+        """
+        Generate warehouse equipment with capacity constraints.
         
-        # Conveyors
-        for i in range(3):
-            equipment.append(Equipment(
-                id=i + 35,
-                name=f"Conveyor {i + 1}",
-                equipment_type=EquipmentType.CONVEYOR,
-                capacity=5,  # Can handle multiple items
-                hourly_cost=8.0,
-                efficiency_factor=1.0
-            ))
+        The default park has 41 units; num_equipment scales every equipment
+        type proportionally, keeping at least one unit of each.
+        """
+        # (type, name, count, capacity, hourly cost, randomized efficiency)
+        equipment_types = [
+            (EquipmentType.PACKING_STATION, "Packing Station", 8, 1, 15.0, True),  # Bottleneck equipment
+            (EquipmentType.DOCK_DOOR, "Dock Door", 6, 1, 5.0, False),  # Shipping bottleneck
+            (EquipmentType.PICK_CART, "Pick Cart", 20, 1, 2.0, False),
+            (EquipmentType.CONVEYOR, "Conveyor", 3, 5, 8.0, False),  # Can handle multiple items
+            (EquipmentType.LABEL_PRINTER, "Label Printer", 4, 1, 3.0, False)
+        ]
+        default_total = sum(count for _, _, count, _, _, _ in equipment_types)
         
-        # Label printers
-        for i in range(4):
-            equipment.append(Equipment(
-                id=i + 38,
-                name=f"Label Printer {i + 1}",
-                equipment_type=EquipmentType.LABEL_PRINTER,
-                capacity=1,
-                hourly_cost=3.0,
-                efficiency_factor=1.0
-            ))
+        equipment = []
+        for equipment_type, name, count, capacity, hourly_cost, varied in equipment_types:
+            if num_equipment is not None:
+                count = max(1, round(count * num_equipment / default_total))
+            for i in range(count):
+                equipment.append(Equipment(
+                    id=len(equipment) + 1,
+                    name=f"{name} {i + 1}",
+                    equipment_type=equipment_type,
+                    capacity=capacity,
+                    hourly_cost=hourly_cost,
+                    efficiency_factor=random.uniform(0.9, 1.1) if varied else 1.0
+                ))
         
         return equipment
     
@@ -11,12 +11,14 @@ Handles PostgreSQL database connections and queries for:
 """
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import Json, RealDictCursor
 from typing import List, Dict, Optional, Any
 import logging
 from datetime import datetime, timedelta
 import json
 
+from walking_time_table import WalkingTimeTableWriter
+
 logger = logging.getLogger(__name__)
 
 
@@ -160,37 +162,13 @@ class DatabaseService:
             return [dict(row) for row in cursor.fetchall()]
     
     def save_walking_times_matrix(self, walking_times: List[Dict]) -> bool:
-        """Save walking times matrix to database."""
+        """Save walking times matrix to database (COPY into a staging table, then swap it in)."""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            # Clear existing walking times
-            cursor.execute("DELETE FROM walking_times")
-            
-            # Insert new walking times
-            for record in walking_times:
-                cursor.execute("""
-                    INSERT INTO walking_times 
-                    (from_bin_id, to_bin_id, distance_feet, walking_time_minutes, path_type)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (
-                    record['from_bin_id'],
-                    record['to_bin_id'],
-                    record['distance_feet'],
-                    record['walking_time_minutes'],
-                    record['path_type']
-                ))
-            
-            conn.commit()
-            conn.close()
+            WalkingTimeTableWriter(self.get_connection).write_records(walking_times)
             return True
             
         except Exception as e:
             logger.error(f"Error saving walking times: {e}")
-            if 'conn' in locals():
-                conn.rollback()
-                conn.close()
             return False
     
     def get_pending_orders(self, warehouse_id: int = 1, limit: Optional[int] = None) -> List[Dict]:
@@ -293,6 +271,30 @@ class DatabaseService:
             
             conn.commit()
     
+    def save_optimization_run_profile(self, run_id: int, profile: Dict[str, Any]):
+        """Store the optimizer profile (phase timings, model size, solver stats) of a run."""
+        conn = self.get_connection()
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                UPDATE optimization_runs SET profile = %s WHERE id = %s
+            """, (Json(profile, dumps=lambda value: json.dumps(value, default=str)), run_id))
+            
+            conn.commit()
+    
+    def get_optimization_run_profile(self, run_id: int) -> Optional[Dict[str, Any]]:
+        """Get a run's metadata with its stored profile, or None if the run doesn't exist."""
+        conn = self.get_connection()
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("""
+                SELECT id, scenario_type, start_time, end_time, status, objective_value,
+                       solver_status, solve_time_seconds, profile
+                FROM optimization_runs
+                WHERE id = %s
+            """, (run_id,))
+            
+            row = cursor.fetchone()
+            return dict(row) if row else None
+    
     def save_optimization_schedule(self, run_id: int, schedules: List[Dict]):
         """Save optimization schedule results."""
         conn = self.get_connection()
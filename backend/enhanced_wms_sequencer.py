@@ -15,12 +15,17 @@ for AI optimization to address.
 """
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
+import copy
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple, Optional
+from typing import Callable, List, Dict, Tuple, Optional
 import random
 
+from optimizer.wave_snapshot import WaveSnapshotLoader
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -39,6 +44,9 @@ class EnhancedWMSSequencer:
         self.password = password
         self.conn = None
         
+        # order_id -> zones; when set, zones are read from here instead of the database
+        self.order_zones = None
+        
         # Stage definitions with basic durations
         self.stages = ['pick', 'consolidate', 'pack', 'label', 'stage', 'ship']
         self.stage_skills = {
@@ -74,6 +82,17 @@ class EnhancedWMSSequencer:
             )
         return self.conn
     
+    def open_pool(self, size: int) -> ThreadedConnectionPool:
+        """Open a pool of up to size connections with this sequencer's parameters."""
+        return ThreadedConnectionPool(
+            1, size,
+            host=self.host,
+            port=self.port,
+            database=self.database,
+            user=self.user,
+            password=self.password
+        )
+    
     def get_wave_orders(self, wave_id: int) -> List[Dict]:
         """Get all orders for a wave with their details."""
         conn = self.get_connection()
@@ -98,6 +117,8 @@ class EnhancedWMSSequencer:
     
     def get_order_zones(self, order_id: int) -> List[str]:
         """Get zones for an order's items."""
+        if self.order_zones is not None:
+            return self.order_zones.get(order_id, [])
         conn = self.get_connection()
         with conn.cursor() as cursor:
             cursor.execute("""
@@ -109,6 +130,21 @@ class EnhancedWMSSequencer:
             """, (order_id,))
             return [row[0] for row in cursor.fetchall()]
     
+    def get_wave_order_zones(self, wave_id: int) -> Dict[int, List[str]]:
+        """Get the zones of every order in a wave with one query (order_id -> zones)."""
+        conn = self.get_connection()
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT oi.order_id, array_agg(DISTINCT s.zone ORDER BY s.zone)
+                FROM order_items oi
+                JOIN skus s ON oi.sku_id = s.id
+                WHERE oi.order_id IN (
+                    SELECT order_id FROM wave_assignments WHERE wave_id = %s
+                )
+                GROUP BY oi.order_id
+            """, (wave_id,))
+            return {order_id: list(zones) for order_id, zones in cursor.fetchall()}
+    
     def get_available_workers(self) -> List[Dict]:
         """Get all active workers with their skills."""
         conn = self.get_connection()
@@ -244,6 +280,10 @@ class EnhancedWMSSequencer:
     
     def calculate_stage_duration(self, stage: str, order: Dict) -> int:
         """Calculate realistic duration for a stage."""
+        # Per-order durations (when provided) are used as-is
+        if stage in order.get('stage_durations', {}):
+            return order['stage_durations'][stage]
+        
         # Use actual pick/pack times from the order if available
         if stage == 'pick' and order.get('total_pick_time'):
             duration = float(order['total_pick_time'])
@@ -300,9 +340,20 @@ class EnhancedWMSSequencer:
             return queue_lengths
     
     def adjust_resource_allocation(self, wave_id: int, workers: List[Dict],
-                                 worker_assignments: Dict) -> None:
-        """Dynamically adjust resource allocation based on queue lengths."""
-        queue_lengths = self.monitor_queue_lengths(wave_id)
+                                 worker_assignments: Dict,
+                                 queue_lengths: Optional[Dict[str, int]] = None) -> None:
+        """
+        Dynamically adjust resource allocation based on queue lengths.
+        
+        The queue lengths are read from the database unless given.
+        """
+        if queue_lengths is None:
+            queue_lengths = self.monitor_queue_lengths(wave_id)
+        
+        # Nothing to rebalance unless a stage is over its threshold
+        if not any(queue_lengths.get(stage, 0) > threshold
+                   for stage, threshold in self.queue_thresholds.items()):
+            return
         
         # Find workers currently assigned to less critical stages
         available_workers = []
@@ -326,8 +377,103 @@ class EnhancedWMSSequencer:
                         logger.info(f"Moving worker {worker['name']} to {stage} stage")
                         break
     
-    def sequence_wave_orders(self, wave_id: int) -> bool:
-        """Apply enhanced WMS sequencing to a wave."""
+    def plan_wave(self, orders: List[Dict], workers: List[Dict], equipment: List[Dict],
+                  start_time: datetime,
+                  before_order: Optional[Callable[[Dict, Dict[str, int]], None]] = None) -> List[Dict]:
+        """
+        Sequence a wave in memory and return its stage assignments.
+        
+        Orders are sorted by deadline, priority and zone efficiency, grouped by
+        zone and processed stage by stage. Nothing is written to the database;
+        before_order, if given, is called before each order is sequenced with
+        the running worker assignments and the queue lengths so far (stages
+        planned without a worker, by stage).
+        """
+        # Step 1: Sort orders by deadline, priority, and zone efficiency
+        sorted_orders = self.sort_orders_by_criteria(orders)
+        
+        # Step 2: Group orders by zone for basic efficiency
+        zone_groups = self.group_orders_by_zone(sorted_orders)
+        
+        # Step 3: Process orders with enhanced sequencing
+        assignments = []
+        worker_assignments = {}
+        equipment_assignments = {}
+        queue_lengths = {}
+        current_time = start_time
+        sequence_order = 1
+        
+        for zone_group in zone_groups:
+            logger.info(f"Processing zone group with {len(zone_group)} orders")
+            
+            for order in zone_group:
+                if before_order:
+                    before_order(worker_assignments, queue_lengths)
+                
+                # Process each stage for this order
+                for stage in self.stages:
+                    # Calculate duration
+                    duration = self.calculate_stage_duration(stage, order)
+                    
+                    # Find available worker
+                    worker = self.find_worker_for_stage(stage, workers, worker_assignments)
+                    
+                    # Find available equipment
+                    equipment_item = self.find_equipment_for_stage(stage, equipment, equipment_assignments)
+                    
+                    assignments.append({
+                        'order_id': order['order_id'],
+                        'stage': stage,
+                        'worker_id': worker['id'] if worker else None,
+                        'equipment_id': equipment_item['id'] if equipment_item else None,
+                        'start_time': current_time,
+                        'duration': duration,
+                        'sequence_order': sequence_order
+                    })
+                    
+                    # Track assignments for load balancing
+                    if worker:
+                        if worker['id'] not in worker_assignments:
+                            worker_assignments[worker['id']] = []
+                        worker_assignments[worker['id']].append({
+                            'order_id': order['order_id'],
+                            'stage': stage,
+                            'start_time': current_time,
+                            'duration': duration
+                        })
+                    else:
+                        queue_lengths[stage] = queue_lengths.get(stage, 0) + 1
+                    
+                    if equipment_item:
+                        if equipment_item['id'] not in equipment_assignments:
+                            equipment_assignments[equipment_item['id']] = []
+                        equipment_assignments[equipment_item['id']].append({
+                            'order_id': order['order_id'],
+                            'stage': stage,
+                            'start_time': current_time,
+                            'duration': duration
+                        })
+                    
+                    # Advance time for next stage
+                    current_time += timedelta(minutes=duration)
+                
+                sequence_order += 1
+        
+        return assignments
+    
+    def sequence_wave_orders(self, wave_id: int, in_memory: bool = False,
+                             workers: Optional[List[Dict]] = None,
+                             equipment: Optional[List[Dict]] = None) -> bool:
+        """
+        Apply enhanced WMS sequencing to a wave.
+        
+        With in_memory, the wave is sequenced from its own assignment state and
+        written back in one batch (see sequence_wave_in_memory). Workers and
+        equipment are read from the database unless given.
+        """
+        if in_memory:
+            return self.sequence_wave_in_memory(wave_id, workers, equipment)
+        
         logger.info(f"Starting enhanced WMS sequencing for wave {wave_id}")
         
         conn = self.get_connection()
@@ -349,94 +495,47 @@ class EnhancedWMSSequencer:
                 
                 # Get orders and resources
                 orders = self.get_wave_orders(wave_id)
-                workers = self.get_available_workers()
-                equipment = self.get_available_equipment()
+                if workers is None:
+                    workers = self.get_available_workers()
+                if equipment is None:
+                    equipment = self.get_available_equipment()
                 
                 if not orders or not workers:
                     logger.warning(f"Insufficient data for wave {wave_id}")
                     return False
                 
-                # Step 1: Sort orders by deadline, priority, and zone efficiency
-                sorted_orders = self.sort_orders_by_criteria(orders)
-                
-                # Step 2: Group orders by zone for basic efficiency
-                zone_groups = self.group_orders_by_zone(sorted_orders)
-                
-                # Step 3: Clear existing assignments for this wave
+                # Step 1: Clear existing assignments for this wave
                 cursor.execute("DELETE FROM wave_assignments WHERE wave_id = %s", (wave_id,))
                 
-                # Step 4: Process orders with enhanced sequencing
-                worker_assignments = {}
-                equipment_assignments = {}
-                current_time = planned_start_time or datetime.now()
-                sequence_order = 1
+                # Step 2: Sort, group and sequence, monitoring queues before each order
+                assignments = self.plan_wave(
+                    orders, workers, equipment, planned_start_time or datetime.now(),
+                    before_order=lambda worker_assignments, _: self.adjust_resource_allocation(
+                        wave_id, workers, worker_assignments)
+                )
                 
-                for zone_group in zone_groups:
-                    logger.info(f"Processing zone group with {len(zone_group)} orders")
-                    
-                    for order in zone_group:
-                        # Monitor queues and adjust resource allocation
-                        self.adjust_resource_allocation(wave_id, workers, worker_assignments)
-                        
-                        # Process each stage for this order
-                        for stage in self.stages:
-                            # Calculate duration
-                            duration = self.calculate_stage_duration(stage, order)
-                            
-                            # Find available worker
-                            worker = self.find_worker_for_stage(stage, workers, worker_assignments)
-                            
-                            # Find available equipment
-                            equipment_item = self.find_equipment_for_stage(stage, equipment, equipment_assignments)
-                            
-                            # Create assignment
-                            cursor.execute("""
-                                INSERT INTO wave_assignments (
-                                    wave_id, order_id, stage, assigned_worker_id, 
-                                    assigned_equipment_id, planned_start_time, 
-                                    planned_duration_minutes, sequence_order
-                                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                            """, (
-                                wave_id, order['order_id'], stage,
-                                worker['id'] if worker else None,
-                                equipment_item['id'] if equipment_item else None,
-                                current_time, duration, sequence_order
-                            ))
-                            
-                            # Track assignments for load balancing
-                            if worker:
-                                if worker['id'] not in worker_assignments:
-                                    worker_assignments[worker['id']] = []
-                                worker_assignments[worker['id']].append({
-                                    'order_id': order['order_id'],
-                                    'stage': stage,
-                                    'start_time': current_time,
-                                    'duration': duration
-                                })
-                            
-                            if equipment_item:
-                                if equipment_item['id'] not in equipment_assignments:
-                                    equipment_assignments[equipment_item['id']] = []
-                                equipment_assignments[equipment_item['id']].append({
-                                    'order_id': order['order_id'],
-                                    'stage': stage,
-                                    'start_time': current_time,
-                                    'duration': duration
-                                })
-                            
-                            # Advance time for next stage
-                            current_time += timedelta(minutes=duration)
-                        
-                        sequence_order += 1
+                for assignment in assignments:
+                    cursor.execute("""
+                        INSERT INTO wave_assignments (
+                            wave_id, order_id, stage, assigned_worker_id, 
+                            assigned_equipment_id, planned_start_time, 
+                            planned_duration_minutes, sequence_order
+                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                    """, (
+                        wave_id, assignment['order_id'], assignment['stage'],
+                        assignment['worker_id'], assignment['equipment_id'],
+                        assignment['start_time'], assignment['duration'], assignment['sequence_order']
+                    ))
                 
                 # Update wave with new order count
                 cursor.execute("""
                     UPDATE waves 
-                    SET total_orders = %s
+                    SET total_orders = %s, updated_at = NOW()
                     WHERE id = %s
                 """, (len(orders), wave_id))
                 
                 conn.commit()
+                WaveSnapshotLoader.invalidate(wave_id)
                 logger.info(f"Successfully sequenced wave {wave_id} with {len(orders)} orders")
                 return True
                 
@@ -445,8 +544,93 @@ class EnhancedWMSSequencer:
                 logger.error(f"Error sequencing wave {wave_id}: {str(e)}")
                 return False
     
-    def sequence_all_waves(self) -> Dict[str, int]:
-        """Apply enhanced sequencing to all waves."""
+    def sequence_wave_in_memory(self, wave_id: int, workers: Optional[List[Dict]] = None,
+                                equipment: Optional[List[Dict]] = None) -> bool:
+        """
+        Sequence a wave entirely in memory and write its assignments in one batch.
+        
+        The order zones are read with one query for the whole wave, queue
+        lengths are tracked from the plan's own assignments instead of being
+        queried before every order, and all wave_assignments rows are inserted
+        with a single multi-row INSERT.
+        """
+        logger.info(f"Starting in-memory WMS sequencing for wave {wave_id}")
+        
+        conn = self.get_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT wave_name, planned_start_time, total_orders
+                    FROM waves WHERE id = %s
+                """, (wave_id,))
+                wave_data = cursor.fetchone()
+            
+            if not wave_data:
+                logger.error(f"Wave {wave_id} not found")
+                return False
+            
+            wave_name, planned_start_time, total_orders = wave_data
+            logger.info(f"Sequencing wave '{wave_name}' with {total_orders} orders")
+            
+            orders = self.get_wave_orders(wave_id)
+            if workers is None:
+                workers = self.get_available_workers()
+            if equipment is None:
+                equipment = self.get_available_equipment()
+            
+            if not orders or not workers:
+                logger.warning(f"Insufficient data for wave {wave_id}")
+                return False
+            
+            planner = self
+            if self.order_zones is None:
+                planner = copy.copy(self)
+                planner.order_zones = self.get_wave_order_zones(wave_id)
+            
+            assignments = planner.plan_wave(
+                orders, workers, equipment, planned_start_time or datetime.now(),
+                before_order=lambda worker_assignments, queue_lengths: self.adjust_resource_allocation(
+                    wave_id, workers, worker_assignments, queue_lengths=queue_lengths)
+            )
+            
+            with conn.cursor() as cursor:
+                cursor.execute("DELETE FROM wave_assignments WHERE wave_id = %s", (wave_id,))
+                execute_values(cursor, """
+                    INSERT INTO wave_assignments (
+                        wave_id, order_id, stage, assigned_worker_id,
+                        assigned_equipment_id, planned_start_time,
+                        planned_duration_minutes, sequence_order
+                    ) VALUES %s
+                """, [(
+                    wave_id, assignment['order_id'], assignment['stage'],
+                    assignment['worker_id'], assignment['equipment_id'],
+                    assignment['start_time'], assignment['duration'], assignment['sequence_order']
+                ) for assignment in assignments], page_size=len(assignments))
+                cursor.execute("""
+                    UPDATE waves
+                    SET total_orders = %s, updated_at = NOW()
+                    WHERE id = %s
+                """, (len(orders), wave_id))
+            
+            conn.commit()
+            WaveSnapshotLoader.invalidate(wave_id)
+            logger.info(f"Successfully sequenced wave {wave_id} with {len(orders)} orders "
+                        f"({len(assignments)} assignments)")
+            return True
+            
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error sequencing wave {wave_id}: {str(e)}")
+            return False
+    
+    def sequence_all_waves(self, max_workers: int = 1, in_memory: bool = False) -> Dict[str, int]:
+        """
+        Apply enhanced sequencing to all waves.
+        
+        With max_workers > 1, waves are sequenced in memory on a thread pool,
+        each on its own connection from a pool of max_workers connections;
+        the workers and equipment are read once for all of them.
+        """
         conn = self.get_connection()
         with conn.cursor() as cursor:
             cursor.execute("""
@@ -463,16 +647,41 @@ class EnhancedWMSSequencer:
             'failed_waves': 0
         }
         
-        for wave_id, wave_name, total_orders in waves:
-            logger.info(f"Processing wave {wave_id}: {wave_name} ({total_orders} orders)")
-            
-            if self.sequence_wave_orders(wave_id):
-                results['successful_waves'] += 1
-            else:
-                results['failed_waves'] += 1
+        if max_workers > 1 and waves:
+            outcomes = self._sequence_waves_pooled([wave[0] for wave in waves], max_workers)
+        else:
+            outcomes = []
+            for wave_id, wave_name, total_orders in waves:
+                logger.info(f"Processing wave {wave_id}: {wave_name} ({total_orders} orders)")
+                outcomes.append(self.sequence_wave_orders(wave_id, in_memory=in_memory))
+        
+        results['successful_waves'] = sum(1 for success in outcomes if success)
+        results['failed_waves'] = len(outcomes) - results['successful_waves']
         
         logger.info(f"Enhanced WMS sequencing completed: {results}")
         return results
+    
+    def _sequence_waves_pooled(self, wave_ids: List[int], max_workers: int) -> List[bool]:
+        """Sequence waves in memory on a thread pool, one pooled connection per running wave."""
+        workers = self.get_available_workers()
+        equipment = self.get_available_equipment()
+        pool = self.open_pool(max_workers)
+        
+        def sequence(wave_id: int) -> bool:
+            conn = pool.getconn()
+            try:
+                # A shallow copy shares the stage configuration but not the connection
+                sequencer = copy.copy(self)
+                sequencer.conn = conn
+                return sequencer.sequence_wave_in_memory(wave_id, workers, equipment)
+            finally:
+                pool.putconn(conn, close=bool(conn.closed))
+        
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                return list(executor.map(sequence, wave_ids))
+        finally:
+            pool.closeall()
 
 
 def main():
@@ -203,4 +203,35 @@ class OptimizationResult(BaseModel):
             "deadline_penalties": self.metrics.total_deadline_penalties,
             "optimization_runtime": self.metrics.optimization_runtime_seconds,
             "solver_status": self.metrics.solver_status
-        } 
\ No newline at end of file
+        } 
+
+class OptimizationJobRequest(BaseModel):
+    """Request to run an optimization as a background job."""
+    kind: str = Field(description="Job kind: 'database', 'run' or 'wave'")
+    params: Dict[str, Any] = Field(default_factory=dict,
+                                   description="Query parameters of the matching optimization endpoint")
+
+
+class WaveBatchRequest(BaseModel):
+    """Waves to optimize in one batch: explicit ids or every wave of a plan version."""
+    wave_ids: Optional[List[int]] = Field(default=None, description="Waves to optimize")
+    plan_version_id: Optional[int] = Field(default=None,
+                                           description="Optimize every wave of this plan version instead")
+    time_limit: int = Field(default=300, gt=0, description="Solver time limit per wave in seconds")
+    warm_start: Optional[str] = Field(default=None, description="Heuristic hinted to CP-SAT ('simple')")
+    stream: bool = Field(default=True, description="Stream per-wave completions as server-sent events")
+
+
+class WaveReplanRequest(BaseModel):
+    """Order delta to apply to a previously solved wave."""
+    previous_solution: Dict[str, Any] = Field(
+        description="'solution' of the previous /optimization/wave or re-plan response")
+    added_order_ids: List[int] = Field(default_factory=list)
+    cancelled_order_ids: List[int] = Field(default_factory=list)
+    reprioritized_orders: Dict[int, str] = Field(default_factory=dict,
+                                                 description="order_id -> 'high', 'medium' or 'low'")
+    replan_time: Optional[datetime] = Field(default=None,
+                                            description="Stages starting before this stay frozen (defaults to now)")
+    time_limit: float = Field(default=10, gt=0, description="Solver time limit in seconds")
+    neighborhood_size: Optional[int] = Field(default=None, ge=0,
+                                             description="Unchanged orders re-solved alongside the changed ones")
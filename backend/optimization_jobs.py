@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Asynchronous optimization jobs.
+
+Solves are submitted as jobs and run in a bounded process pool, so CP-SAT
+searches and their blocking database calls never hold the API event loop or
+the GIL of the API process. Jobs are polled for status and result and can be
+cancelled: queued jobs are dropped, running jobs have their solver stopped
+and keep the best solution found so far.
+"""
+
+import importlib
+import inspect
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config_service import config_service
+
+# Job kind -> synchronous entry point run inside the worker process
+JOB_TARGETS = {
+    "database": "api.main:optimize_database_data",
+    "run": "api.main:run_optimization",
+    "wave": "api.main:optimize_wave"
+}
+
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+def _resolve_target(target: str):
+    module_name, function_name = target.split(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def _run_job(target: str, params: Dict[str, Any], cancel_event) -> Dict[str, Any]:
+    """Worker-process entry point: run the job target, stopping its solver on cancel."""
+    from optimizer import solve_control
+
+    # Cancelled after the pool had already handed the job to this process
+    if cancel_event.is_set():
+        return {}
+
+    solve_control.reset()
+    # The pool outlives configuration changes made through the API since it started
+    config_service.reload_if_changed()
+    finished = threading.Event()
+
+    def watch_cancel():
+        while not finished.is_set():
+            if cancel_event.wait(0.5):
+                solve_control.stop_all_solvers()
+                return
+
+    watcher = threading.Thread(target=watch_cancel, daemon=True)
+    watcher.start()
+    try:
+        return {"result": _resolve_target(target)(**params)}
+    except Exception as e:
+        # HTTPException and friends don't survive pickling; return their status and detail
+        return {
+            "error": str(getattr(e, "detail", e)),
+            "status_code": getattr(e, "status_code", 500)
+        }
+    finally:
+        finished.set()
+
+
+class OptimizationJobManager:
+    """Bounded process pool of optimization jobs with status, result and cancellation."""
+
+    def __init__(self, max_concurrent_solves: int = None, max_queued_jobs: int = None,
+                 max_finished_jobs: int = 100):
+        self.max_concurrent_solves = max_concurrent_solves or config_service.get_value(
+            "optimization.max_concurrent_solves", 2)
+        self.max_queued_jobs = max_queued_jobs or config_service.get_value(
+            "optimization.max_queued_jobs", 20)
+        self.max_finished_jobs = max_finished_jobs
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._sync_manager = None
+
+    def _ensure_started(self):
+        # Started lazily so importing the API doesn't spawn processes
+        if self._executor is None:
+            context = multiprocessing.get_context("spawn")
+            self._sync_manager = context.Manager()
+            self._executor = ProcessPoolExecutor(max_workers=self.max_concurrent_solves, mp_context=context)
+
+    def submit(self, kind: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Queue a job and return its status; raises ValueError for bad input."""
+        params = params or {}
+        if kind not in JOB_TARGETS:
+            raise ValueError(f"Unknown job kind '{kind}'. Use one of: {', '.join(JOB_TARGETS)}")
+        try:
+            inspect.signature(_resolve_target(JOB_TARGETS[kind])).bind(**params)
+        except TypeError as e:
+            raise ValueError(f"Invalid parameters for '{kind}' job: {e}")
+
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if not job["future"].done())
+            if pending >= self.max_queued_jobs:
+                raise JobQueueFullError(f"{pending} jobs pending (limit {self.max_queued_jobs})")
+
+            self._ensure_started()
+            job_id = uuid.uuid4().hex
+            cancel_event = self._sync_manager.Event()
+            job = {
+                "job_id": job_id,
+                "kind": kind,
+                "params": params,
+                "submitted_at": datetime.now(),
+                "finished_at": None,
+                "cancel_requested": False,
+                "cancel_event": cancel_event,
+                "future": self._executor.submit(_run_job, JOB_TARGETS[kind], params, cancel_event)
+            }
+            job["future"].add_done_callback(lambda _: self._mark_finished(job))
+            self._jobs[job_id] = job
+            self._prune_finished()
+
+        return self.status(job_id)
+
+    def _mark_finished(self, job: Dict[str, Any]):
+        job["finished_at"] = datetime.now()
+
+    def _prune_finished(self):
+        finished = [job for job in self._jobs.values() if job["future"].done()]
+        finished.sort(key=lambda job: job["submitted_at"])
+        for job in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job["job_id"]]
+
+    def _state(self, job: Dict[str, Any]) -> str:
+        future = job["future"]
+        if future.cancelled():
+            return "cancelled"
+        if not future.done():
+            if job["cancel_requested"]:
+                return "cancelling"
+            return "running" if future.running() else "queued"
+        if job["cancel_requested"]:
+            return "cancelled"
+        try:
+            outcome = future.result()
+        except Exception:
+            return "failed"
+        return "failed" if "error" in outcome else "completed"
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job status without the result payload, or None for unknown jobs."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        return {
+            "job_id": job_id,
+            "kind": job["kind"],
+            "status": self._state(job),
+            "params": job["params"],
+            "submitted_at": job["submitted_at"],
+            "finished_at": job["finished_at"]
+        }
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        return [self.status(job_id) for job_id in list(self._jobs)]
+
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Status plus result of a finished job, or None for unknown jobs.
+
+        A job cancelled while running still returns the best solution its
+        solver had found; a job cancelled while queued has no result.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        status = self.status(job_id)
+        future = job["future"]
+        if not future.done():
+            return status
+        try:
+            outcome = future.result()
+        except CancelledError:
+            outcome = {}
+        except Exception as e:
+            # The worker process itself died (e.g. out of memory)
+            outcome = {"error": f"Job worker failed: {e}", "status_code": 500}
+        status.update(outcome)
+        return status
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued job or stop the solver of a running one."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if not job["future"].done():
+            job["cancel_requested"] = True
+            if not job["future"].cancel():
+                job["cancel_event"].set()
+        return self.status(job_id)
+
+    def shutdown(self):
+        """Stop running solves and release the worker processes."""
+        if self._executor is None:
+            return
+        for job in self._jobs.values():
+            if not job["future"].done():
+                job["cancel_event"].set()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._sync_manager.shutdown()
+        self._executor = None
+        self._sync_manager = None
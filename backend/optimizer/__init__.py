@@ -2,4 +2,5 @@
 Constraint programming optimization engine for warehouse workflow optimization.
 """
 
-from .wave_optimizer import MultiStageOptimizer, SimpleOptimizer 
\ No newline at end of file
+from .wave_optimizer import MultiStageOptimizer, SimpleOptimizer
+from .rolling_horizon import RollingHorizonOptimizer 
\ No newline at end of file
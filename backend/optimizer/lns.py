@@ -0,0 +1,436 @@
+"""
+Large-neighborhood search around MultiStageOptimizer for waves too large to
+solve monolithically.
+
+The search starts from a resource-feasible list schedule and then keeps
+relaxing a structured neighborhood of orders (one worker's tasks, one time
+window, one zone, or the latest orders) and re-solving only those orders with
+the interval model of MultiStageOptimizer. Every other order stays frozen as
+fixed intervals on its workers and equipment, and the incumbent is hinted, so
+a sub-solve starts from the current schedule. Neighborhood types are drawn
+with adaptive weights that follow how often each type has recently improved
+the schedule.
+
+Memory stays bounded: the incumbent is a few (order x stage) integer arrays,
+and each sub-model holds at most max_neighborhood_orders orders plus the
+frozen intervals, merged where they touch on the same resource. Deadlines are
+soft in the sub-models (late orders are penalized, not forbidden) and their
+horizon stretches past the day when the wave doesn't fit in it, so late
+orders in the starting schedule can be repaired instead of making every
+neighborhood that contains them infeasible.
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import numpy as np
+
+from models.warehouse import StageType
+from models.optimization import OptimizationResult, OptimizationMetrics, OrderSchedule, StageSchedule
+from .wave_optimizer import MultiStageOptimizer, OptimizationConstraints, OptimizationRequirements
+from .zone_decomposition import primary_zone
+from .profiling import OptimizerProfile
+
+
+class LNSOptimizer:
+    """
+    Adaptive large-neighborhood search over the interval model.
+
+    Each iteration draws a neighborhood type with probability proportional to
+    its weight, re-solves up to max_neighborhood_orders orders for at most
+    sub_time_limit seconds and keeps the result if it is no worse. The weight
+    then moves towards the outcome's score by the reaction factor.
+    """
+
+    NEIGHBORHOODS = ("worker", "time_window", "zone", "lateness")
+
+    max_neighborhood_orders = 15  # Orders relaxed per sub-solve; larger ones stall on big waves
+    sub_time_limit = 2.0          # Seconds per sub-solve
+    reaction = 0.3                # How fast neighborhood weights follow recent outcomes
+    min_weight = 0.1              # Keeps every neighborhood type in play
+    # Score of a sub-solve outcome: improved the schedule, kept an equally good one, or rejected
+    outcome_scores = {"improved": 3.0, "accepted": 0.5, "rejected": 0.0}
+
+    def __init__(self, warehouse_config, time_limit_seconds: float = None, max_neighborhood_orders: int = None,
+                 sub_time_limit: float = None, max_iterations: int = None, seed: int = 42):
+        self.warehouse = warehouse_config
+        self.requirements = OptimizationRequirements()
+        self.time_limit_seconds = time_limit_seconds or self.requirements.max_solve_time_seconds
+        self.max_neighborhood_orders = max_neighborhood_orders or self.max_neighborhood_orders
+        self.sub_time_limit = sub_time_limit or self.sub_time_limit
+        self.max_iterations = max_iterations
+        self.seed = seed
+        self.time_granularity = self.requirements.time_granularity_minutes
+
+        self.schedule_base_time = None  # Datetime of slot 0, defaults to now
+        # Shared with every sub-solve so walking times are only loaded once per order
+        self.order_walking_minutes = {}
+        self.walking_times_cache = {}
+        self.neighborhood_stats = {}
+        self.profile = OptimizerProfile(type(self).__name__)
+
+    def optimize_workflow(self, orders, workers, equipment, deadlines):
+        """
+        Build a list schedule, then improve it neighborhood by neighborhood.
+
+        Args:
+            orders: List of Order objects to schedule (any size)
+            workers: List of Worker objects available
+            equipment: List of Equipment objects available
+            deadlines: Dictionary mapping order_id to deadline datetime
+
+        Returns:
+            OptimizationResult with the best schedule found; the objective (same
+            terms as MultiStageOptimizer), its starting value and per-neighborhood
+            statistics are in input_summary
+        """
+        start_time = time.time()
+        profile = self.profile = OptimizerProfile(type(self).__name__)
+        self.rng = random.Random(self.seed)
+        self.base_time = self.schedule_base_time or datetime.now()
+        deadlines = deadlines if isinstance(deadlines, dict) else {}
+        stages = self.requirements.stages
+
+        # Durations and resource candidates of the full wave, computed once
+        planner = self.planner = MultiStageOptimizer(self.warehouse, model_mode="interval")
+        planner.profile = profile
+        planner.order_walking_minutes = self.order_walking_minutes
+        planner.walking_times_cache = self.walking_times_cache
+        self.slots = planner.precompute_stage_durations(orders, stages, self.time_granularity)
+        self.worker_candidates = [[w for w, worker in enumerate(workers) if planner._stage_skill(stage) in worker.skills]
+                                  for stage in stages]
+        self.equipment_candidates = [[e for e, eq in enumerate(equipment)
+                                      if planner._stage_requires_equipment(stage, eq.equipment_type)]
+                                     for stage in stages]
+        self.worker_rates = np.array([worker.hourly_rate for worker in workers] or [0.0], dtype=np.float64)
+        self.has_deadline = np.array([order.id in deadlines for order in orders], dtype=bool)
+        self.deadline_slot = np.array([planner._deadline_to_slot(deadlines[order.id], self.time_granularity)
+                                       if order.id in deadlines else 0 for order in orders], dtype=np.int64)
+        sku_zones = {sku.id: sku.zone for sku in self.warehouse.skus}
+        self.order_zones = np.array([primary_zone(order, sku_zones) for order in orders], dtype=np.int64)
+
+        with profile.phase("initial_schedule"):
+            self._initial_schedule(orders, workers, equipment)
+            self.order_costs = self._order_costs(np.arange(len(orders)), self.start, self.worker, self.equipment)
+        initial_objective = float(self.order_costs.sum())
+        print(f"LNS: {len(orders)} orders, list schedule objective {initial_objective:.1f}, "
+              f"budget {self.time_limit_seconds}s")
+
+        self.neighborhood_stats = {
+            name: {"weight": 1.0, "iterations": 0, "improved": 0, "accepted": 0, "objective_gain": 0.0, "seconds": 0.0}
+            for name in self.NEIGHBORHOODS
+        }
+        improvements = []
+        iteration = 0
+        while orders:
+            remaining = self.time_limit_seconds - (time.time() - start_time)
+            if remaining < 0.1 or (self.max_iterations is not None and iteration >= self.max_iterations):
+                break
+            iteration += 1
+            kind = self._choose_neighborhood()
+            iteration_start = time.time()
+            with profile.phase("neighborhood_selection"):
+                relaxed = getattr(self, f"_{kind}_neighborhood")()
+            outcome, gain = "rejected", 0.0
+            if len(relaxed):
+                outcome, gain = self._solve_neighborhood(relaxed, orders, workers, equipment, deadlines,
+                                                         min(self.sub_time_limit, remaining))
+            self._record_outcome(kind, outcome, gain, time.time() - iteration_start)
+            if outcome == "improved":
+                improvements.append({"iteration": iteration, "neighborhood": kind,
+                                     "elapsed_seconds": round(time.time() - start_time, 3),
+                                     "objective": float(self.order_costs.sum())})
+
+        objective = float(self.order_costs.sum())
+        print(f"LNS: {iteration} iterations, objective {initial_objective:.1f} -> {objective:.1f}")
+        profile.counts.update(orders=len(orders), workers=len(workers), equipment=len(equipment), iterations=iteration)
+        with profile.phase("extraction"):
+            result = self._build_result(orders, workers, equipment, time.time() - start_time)
+        result.input_summary.update({
+            "objective": objective,
+            "initial_objective": initial_objective,
+            "iterations": iteration,
+            "neighborhoods": self.neighborhood_stats,
+            "improvements": improvements,
+            "profile": profile.to_dict()
+        })
+        return result
+
+    def _initial_schedule(self, orders, workers, equipment):
+        """
+        Earliest-deadline-first list schedule on the slot grid.
+
+        Each stage goes to the qualified worker and the matching equipment
+        unit that free up first; equipment units are tracked as one lane per
+        unit of capacity. Busy times only grow, so nothing is double-booked.
+        """
+        num_orders, num_stages = self.slots.shape
+        self.start = np.zeros((num_orders, num_stages), dtype=np.int64)
+        self.worker = np.full((num_orders, num_stages), -1, dtype=np.int64)
+        self.equipment = np.full((num_orders, num_stages), -1, dtype=np.int64)
+        worker_free = [0] * len(workers)
+        lane_free = [[0] * max(1, eq.capacity) for eq in equipment]
+
+        sequence = sorted(range(num_orders), key=lambda o: (not self.has_deadline[o], self.deadline_slot[o],
+                                                            orders[o].priority))
+        for o in sequence:
+            ready = 0
+            for s in range(num_stages):
+                duration = int(self.slots[o, s])
+                w = min(self.worker_candidates[s], key=lambda w: worker_free[w], default=-1)
+                e, lane = min(((e, lane) for e in self.equipment_candidates[s] for lane in range(len(lane_free[e]))),
+                              key=lambda unit: lane_free[unit[0]][unit[1]], default=(-1, -1))
+                begin = max(ready, worker_free[w] if w >= 0 else 0, lane_free[e][lane] if e >= 0 else 0)
+                if w >= 0:
+                    worker_free[w] = begin + duration
+                if e >= 0:
+                    lane_free[e][lane] = begin + duration
+                self.start[o, s], self.worker[o, s], self.equipment[o, s] = begin, w, e
+                ready = begin + duration
+
+    def _order_costs(self, rows, start, worker, equipment) -> np.ndarray:
+        """Per-order value of MultiStageOptimizer's objective (late penalty, slot labor cost, equipment use)."""
+        weights = OptimizationConstraints.get_objective_weights()
+        ship_stage = self.requirements.stages.index(StageType.SHIP)
+        late = self.has_deadline[rows] & (start[:, ship_stage] > self.deadline_slot[rows])
+        rates = np.where(worker >= 0, self.worker_rates[np.maximum(worker, 0)], 0.0)
+        labor = (rates * self.slots[rows]).sum(axis=1)
+        equipment_used = (equipment >= 0).sum(axis=1)
+        return (weights["deadline_violation_penalty"] * late
+                + weights["labor_cost_multiplier"] * labor
+                + weights["equipment_utilization_weight"] * equipment_used)
+
+    def _choose_neighborhood(self) -> str:
+        weights = [self.neighborhood_stats[name]["weight"] for name in self.NEIGHBORHOODS]
+        return self.rng.choices(self.NEIGHBORHOODS, weights=weights)[0]
+
+    def _record_outcome(self, kind: str, outcome: str, gain: float, seconds: float):
+        stats = self.neighborhood_stats[kind]
+        stats["iterations"] += 1
+        stats["seconds"] += seconds
+        stats["objective_gain"] += gain
+        if outcome != "rejected":
+            stats[outcome] += 1
+        stats["weight"] = max(self.min_weight,
+                              (1 - self.reaction) * stats["weight"] + self.reaction * self.outcome_scores[outcome])
+
+    def _run_of(self, rows: np.ndarray) -> np.ndarray:
+        """At most max_neighborhood_orders of rows, as a random run of consecutive starts."""
+        rows = rows[np.argsort(self.start[rows, 0], kind="stable")]
+        if len(rows) <= self.max_neighborhood_orders:
+            return rows
+        offset = self.rng.randrange(len(rows) - self.max_neighborhood_orders + 1)
+        return rows[offset:offset + self.max_neighborhood_orders]
+
+    def _worker_neighborhood(self) -> np.ndarray:
+        """Orders with a stage on one worker."""
+        busy = np.unique(self.worker[self.worker >= 0])
+        if not len(busy):
+            return busy
+        w = busy[self.rng.randrange(len(busy))]
+        return self._run_of(np.nonzero((self.worker == w).any(axis=1))[0])
+
+    def _time_window_neighborhood(self) -> np.ndarray:
+        """Orders with a stage starting closest to a random pivot slot."""
+        pivot = self.start[self.rng.randrange(self.start.shape[0]), self.rng.randrange(self.start.shape[1])]
+        distance = np.abs(self.start - pivot).min(axis=1)
+        return np.argsort(distance, kind="stable")[:self.max_neighborhood_orders]
+
+    def _zone_neighborhood(self) -> np.ndarray:
+        """Orders whose picks are mostly in one zone."""
+        zones = np.unique(self.order_zones)
+        zone = zones[self.rng.randrange(len(zones))]
+        return self._run_of(np.nonzero(self.order_zones == zone)[0])
+
+    def _lateness_neighborhood(self) -> np.ndarray:
+        """A sample of the orders shipping latest relative to their deadline."""
+        ship_stage = self.requirements.stages.index(StageType.SHIP)
+        rows = np.nonzero(self.has_deadline)[0]
+        lateness = self.start[rows, ship_stage] - self.deadline_slot[rows]
+        latest = rows[np.argsort(-lateness, kind="stable")[:2 * self.max_neighborhood_orders]]
+        size = min(len(latest), self.max_neighborhood_orders)
+        return np.array(sorted(self.rng.sample(latest.tolist(), size)), dtype=np.int64)
+
+    def _solve_neighborhood(self, relaxed, orders, workers, equipment, deadlines, time_limit):
+        """Re-solve the relaxed orders around the frozen rest; returns (outcome, objective gain)."""
+        relaxed_mask = np.zeros(len(orders), dtype=bool)
+        relaxed_mask[relaxed] = True
+        sub_orders = [orders[o] for o in relaxed]
+
+        with self.profile.phase("neighborhood_build"):
+            frozen = self._frozen_commitments(relaxed_mask, workers, equipment)
+            hint = self._stage_assignments(relaxed, orders, workers, equipment)
+        # Probing the thousands of frozen intervals can eat the whole sub-solve budget in presolve
+        sub = MultiStageOptimizer(self.warehouse, model_mode="interval",
+                                  solver_parameters={"cp_model_probing_level": 0})
+        sub.requirements.max_orders_per_wave = len(sub_orders)
+        sub.requirements.max_workers = len(workers)
+        sub.time_granularity = self.time_granularity
+        sub.schedule_base_time = self.base_time
+        sub.order_walking_minutes = self.order_walking_minutes
+        sub.walking_times_cache = self.walking_times_cache
+        sub.soft_deadlines = True
+        # An overloaded wave spills past the day; leave room to re-insert the relaxed orders after it
+        horizon_slots = int((self.start + self.slots).max()) + int(self.slots[relaxed].sum())
+        sub.horizon_hours = max(24, horizon_slots * self.time_granularity / 60)
+        sub.optimize_workflow(sub_orders, workers, equipment,
+                              {order.id: deadlines[order.id] for order in sub_orders if order.id in deadlines},
+                              fixed_commitments=frozen, time_limit_seconds=time_limit, solution_hint=hint)
+        self.profile.absorb(sub.profile)
+        if sub.solve_stats.get("status") not in ("OPTIMAL", "FEASIBLE"):
+            return "rejected", 0.0
+
+        stage_index = {stage: s for s, stage in enumerate(self.requirements.stages)}
+        row_of = {order.id: r for r, order in enumerate(sub_orders)}
+        worker_index = {worker.id: w for w, worker in enumerate(workers)}
+        equipment_index = {eq.id: e for e, eq in enumerate(equipment)}
+        start = self.start[relaxed].copy()
+        worker = np.full_like(start, -1)
+        equipment_choice = np.full_like(start, -1)
+        for assignment in sub.stage_assignments:
+            r, s = row_of[assignment['order_id']], stage_index[assignment['stage']]
+            start[r, s] = assignment['start_slot']
+            worker[r, s] = worker_index.get(assignment['worker_id'], -1)
+            equipment_choice[r, s] = equipment_index.get(assignment['equipment_id'], -1)
+
+        costs = self._order_costs(relaxed, start, worker, equipment_choice)
+        gain = float(self.order_costs[relaxed].sum() - costs.sum())
+        if gain < -1e-6:
+            return "rejected", 0.0
+        self.start[relaxed], self.worker[relaxed], self.equipment[relaxed] = start, worker, equipment_choice
+        self.order_costs[relaxed] = costs
+        return ("improved", gain) if gain > 1e-6 else ("accepted", 0.0)
+
+    def _frozen_commitments(self, relaxed_mask, workers, equipment) -> List[Dict]:
+        """
+        Busy intervals of every order outside the neighborhood, as fixed commitments.
+
+        Touching intervals on the same worker (or unit-capacity equipment) are
+        merged, which keeps densely packed schedules to a few intervals per resource.
+        """
+        commitments = []
+        frozen = ~relaxed_mask[:, None] & (self.slots > 0)
+        for choice, resources, key in ((self.worker, workers, "worker_id"), (self.equipment, equipment, "equipment_id")):
+            mask = frozen & (choice >= 0)
+            resource_ids, begin_slots, lengths = choice[mask], self.start[mask], self.slots[mask]
+            order = np.lexsort((begin_slots, resource_ids))
+            merged = None
+            for resource_id, begin_slot, length in zip(resource_ids[order].tolist(), begin_slots[order].tolist(),
+                                                       lengths[order].tolist()):
+                mergeable = key == "worker_id" or resources[resource_id].capacity == 1
+                if (merged is not None and merged[0] == resource_id and mergeable
+                        and merged[1] + merged[2] == begin_slot):
+                    merged[2] += length
+                    continue
+                if merged is not None:
+                    commitments.append({"start_slot": merged[1], "slots": merged[2], key: resources[merged[0]].id})
+                merged = [resource_id, begin_slot, length]
+            if merged is not None:
+                commitments.append({"start_slot": merged[1], "slots": merged[2], key: resources[merged[0]].id})
+        return commitments
+
+    def _stage_assignments(self, rows, orders, workers, equipment) -> List[Dict]:
+        """The incumbent of the given orders in MultiStageOptimizer.stage_assignments form."""
+        assignments = []
+        for o in rows.tolist():
+            for s, stage in enumerate(self.requirements.stages):
+                w, e = int(self.worker[o, s]), int(self.equipment[o, s])
+                assignments.append({
+                    "order_id": orders[o].id,
+                    "stage": stage,
+                    "start_slot": int(self.start[o, s]),
+                    "slots": int(self.slots[o, s]),
+                    "worker_id": workers[w].id if w >= 0 else None,
+                    "equipment_id": equipment[e].id if e >= 0 else None
+                })
+        return assignments
+
+    def _build_result(self, orders, workers, equipment, optimization_time) -> OptimizationResult:
+        """Turn the incumbent arrays into an OptimizationResult."""
+        stages = self.requirements.stages
+        ship_stage = stages.index(StageType.SHIP)
+        minutes = self.planner.stage_duration_minutes
+        total_labor_cost = 0.0
+        total_equipment_cost = 0.0
+        total_deadline_penalties = 0.0
+        on_time_orders = 0
+        order_schedules = []
+
+        for o, order in enumerate(orders):
+            order_schedule = OrderSchedule(
+                order_id=order.id,
+                customer_id=order.customer_id,
+                priority=order.priority,
+                shipping_deadline=order.shipping_deadline,
+                stages=[]
+            )
+            for s, stage in enumerate(stages):
+                w, e = int(self.worker[o, s]), int(self.equipment[o, s])
+                duration = float(minutes[o, s])
+                stage_start = self.base_time + timedelta(minutes=int(self.start[o, s]) * self.time_granularity)
+                if w >= 0:
+                    total_labor_cost += duration * workers[w].hourly_rate / 60
+                if e >= 0:
+                    total_equipment_cost += duration * equipment[e].hourly_cost / 60
+                order_schedule.stages.append(StageSchedule(
+                    order_id=order.id,
+                    stage_type=stage,
+                    start_time=stage_start,
+                    end_time=stage_start + timedelta(minutes=duration),
+                    duration_minutes=duration,
+                    assigned_worker_id=workers[w].id if w >= 0 else None,
+                    assigned_equipment_id=equipment[e].id if e >= 0 else None
+                ))
+            order_schedules.append(order_schedule)
+
+            ship_end = order_schedule.stages[ship_stage].end_time
+            deadline = order.shipping_deadline
+            if deadline is not None and deadline.tzinfo is not None:
+                deadline = deadline.replace(tzinfo=None)
+            if deadline is None or ship_end <= deadline:
+                on_time_orders += 1
+            else:
+                total_deadline_penalties += 1000  # Same late-order penalty as MultiStageOptimizer
+
+        total_orders = len(orders)
+        total_processing_time = float(minutes.sum()) if total_orders else 0.0
+        metrics = OptimizationMetrics(
+            total_orders=total_orders,
+            on_time_orders=on_time_orders,
+            late_orders=total_orders - on_time_orders,
+            on_time_percentage=(on_time_orders / total_orders * 100) if total_orders > 0 else 0,
+            total_labor_cost=total_labor_cost,
+            total_equipment_cost=total_equipment_cost,
+            total_deadline_penalties=total_deadline_penalties,
+            total_cost=total_labor_cost + total_equipment_cost + total_deadline_penalties,
+            average_order_processing_time=total_processing_time / total_orders if total_orders > 0 else 0,
+            total_processing_time=total_processing_time,
+            optimization_runtime_seconds=optimization_time,
+            solver_status="FEASIBLE"
+        )
+
+        return OptimizationResult(
+            order_schedules=order_schedules,
+            worker_schedules=[],
+            equipment_schedules=[],
+            metrics=metrics,
+            optimization_start_time=datetime.now(),
+            optimization_end_time=datetime.now(),
+            input_summary={
+                "total_orders": total_orders,
+                "total_workers": len(workers),
+                "total_equipment": len(equipment),
+                "optimization_horizon_hours": max(24, int((self.start + self.slots).max(initial=0)) * self.time_granularity / 60),
+                "model_mode": "interval",
+                "solve_mode": "lns",
+                "time_limit_seconds": self.time_limit_seconds,
+                "max_neighborhood_orders": self.max_neighborhood_orders,
+                "sub_time_limit_seconds": self.sub_time_limit
+            }
+        )
+
+    def generate_explanation(self, solution):
+        iterations = solution.input_summary.get("iterations", 0)
+        return f"List schedule improved by {iterations} large-neighborhood CP-SAT re-solves."
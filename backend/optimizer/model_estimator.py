@@ -0,0 +1,289 @@
+"""
+Model-size estimates and admission control for optimization requests.
+
+Building a CP-SAT model is where an oversized request runs out of memory,
+long before the solver time limit matters. The estimator predicts the
+variable and constraint counts of a request from its order, worker and
+equipment counts with the same loops the model builders run, and turns them
+into memory and build-time predictions with per-optimizer coefficients
+fitted to benchmark_optimizers.py results. admit() checks a request against
+the configured memory and build-time budgets and walks the DOWNGRADES chain
+to a cheaper optimizer, or rejects the request when nothing fits.
+
+The counts ignore horizon tightening and sparse skill matching, so the
+calibrated size factors scale them to what the builders actually create.
+"""
+
+import json
+import math
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional
+
+from config_service import config_service
+from .wave_optimizer import OptimizationRequirements
+
+STAGES = len(OptimizationRequirements.stages)
+# Stages that take one unit of equipment (pick cart, packing station, label printer, dock door)
+EQUIPMENT_STAGES = 4
+# Equipment types in the warehouse; each equipment stage can use the units of one of them
+EQUIPMENT_TYPES = 5
+
+# Optimizer -> coefficients fitted with calibrate() on a full-ladder benchmark run:
+# counted variables/constraints -> built ones, model MB and build seconds per 1000 built
+DEFAULT_CALIBRATION = {
+    "multi_stage_time_indexed": {"variables": 0.926, "constraints": 0.925,
+                                 "mb_per_thousand": 1.04, "build_seconds_per_thousand": 0.0226},
+    "multi_stage_interval": {"variables": 0.415, "constraints": 0.433,
+                             "mb_per_thousand": 2.29, "build_seconds_per_thousand": 0.0424},
+    "multi_stage_skill_class": {"variables": 0.415, "constraints": 0.433,
+                                "mb_per_thousand": 2.25, "build_seconds_per_thousand": 0.0408},
+    "wave_constraint": {"variables": 1.0, "constraints": 1.323,
+                        "mb_per_thousand": 3.19, "build_seconds_per_thousand": 0.0453}
+}
+
+# Optimizer -> next cheaper optimizer tried when a request is over budget
+DOWNGRADES = {
+    "multi_stage_time_indexed": "multi_stage_interval",
+    "multi_resolution": "multi_stage_interval",
+    "portfolio": "multi_stage_interval",
+    "multi_stage_interval": "multi_stage_skill_class",
+    "multi_stage_skill_class": "rolling_horizon",
+    "zone_decomposition": "rolling_horizon",
+    "rolling_horizon": "lns",
+    "wave_constraint": "simple_wave"
+}
+
+# Optimizers that build no CP model at all
+HEURISTICS = ("simple", "simple_wave")
+
+
+def _multi_stage_counts(model_mode: str, orders: int, workers: int, equipment: int, slots: int) -> Dict[str, int]:
+    """Variables and constraints MultiStageOptimizer.optimize_workflow creates, before tightening."""
+    stage_equipment = equipment / EQUIPMENT_TYPES * EQUIPMENT_STAGES  # matching (stage, unit) pairs per order
+    variables = orders * STAGES + orders  # start times and late flags
+    constraints = orders * (STAGES - 1) + 3 * orders  # precedence, late reification and hard deadline
+    if model_mode == "time_indexed":
+        # Dense assignments, then two booleans and four constraints per resource, stage and slot
+        active = orders * slots * (STAGES * workers + stage_equipment)
+        variables += orders * STAGES * (workers + equipment) + 2 * active
+        constraints += 4 * active + slots * (workers + equipment) + orders * STAGES * workers
+    else:
+        # Sparse assignments with one optional interval each; skill_class counts worker classes
+        assignments = orders * (STAGES * workers + stage_equipment)
+        variables += assignments
+        constraints += assignments + orders * (STAGES + EQUIPMENT_STAGES) + workers + equipment
+    return {"variables": int(variables), "constraints": int(constraints)}
+
+
+def _wave_constraint_counts(orders: int, workers: int, equipment: int) -> Dict[str, int]:
+    """
+    Variables and constraints WaveConstraintOptimizer.create_optimization_model creates.
+
+    Its capacity loop runs once per worker row of the wave (one per skill), so
+    with workers counted once each the constraints come out low by the average
+    number of skills; the calibration makes up for it.
+    """
+    variables = 3 * orders * STAGES + orders + 3
+    intervals = orders * STAGES * (workers + equipment)
+    constraints = (intervals + STAGES * (workers + equipment) + orders * (STAGES - 1)
+                   + 2 * orders + orders * STAGES + 3)
+    return {"variables": int(variables), "constraints": int(constraints)}
+
+
+def counted_model_size(optimizer: str, orders: int, workers: int, equipment: int,
+                       granularity_minutes: int, truncate: bool = True) -> Dict[str, int]:
+    """
+    Uncalibrated counts of a monolithic model ("multi_stage_<mode>" or "wave_constraint").
+
+    MultiStageOptimizer truncates a wave to max_orders_per_wave orders and
+    max_workers workers; the benchmark lifts both limits, so its runs are
+    counted with truncate=False.
+    """
+    if optimizer == "wave_constraint":
+        return _wave_constraint_counts(orders, workers, equipment)
+    if truncate:
+        requirements = OptimizationRequirements()
+        orders = min(orders, requirements.max_orders_per_wave)
+        workers = min(workers, requirements.max_workers)
+    slots = math.ceil(24 * 60 / granularity_minutes)
+    return _multi_stage_counts(optimizer[len("multi_stage_"):], orders, workers, equipment, slots)
+
+
+def estimate_model_size(optimizer: str, orders: int, workers: int, equipment: int,
+                        granularity_minutes: int = None, calibration: Dict[str, Dict[str, float]] = None) -> Dict[str, Any]:
+    """
+    Predict the model size, memory and build time of an optimization request.
+
+    Args:
+        optimizer: Benchmark name ("multi_stage_time_indexed", "wave_constraint", "lns", ...)
+            or "rolling_horizon"/"portfolio"
+        orders, workers, equipment: Request size
+        granularity_minutes: Slot size of the MultiStageOptimizer models (default 15)
+        calibration: Coefficients per monolithic model (default load_calibration())
+
+    Returns:
+        Dict with variables, constraints, memory_mb and build_seconds. Decomposed
+        optimizers report their largest sub-model for memory (the ones that run
+        at the same time, for the portfolio) and their total build time.
+    """
+    calibration = calibration or load_calibration()
+    granularity_minutes = granularity_minutes or OptimizationRequirements.time_granularity_minutes
+
+    def monolithic(name, num_orders, num_granularity=granularity_minutes):
+        counted = counted_model_size(name, num_orders, workers, equipment, num_granularity)
+        coefficients = calibration[name]
+        variables = counted["variables"] * coefficients["variables"]
+        constraints = counted["constraints"] * coefficients["constraints"]
+        thousands = (variables + constraints) / 1000
+        return {"variables": int(variables), "constraints": int(constraints),
+                "memory_mb": thousands * coefficients["mb_per_thousand"],
+                "build_seconds": thousands * coefficients["build_seconds_per_thousand"]}
+
+    if optimizer in HEURISTICS:
+        estimate = {"variables": 0, "constraints": 0, "memory_mb": 0.0, "build_seconds": 0.0}
+    elif optimizer in calibration:
+        estimate = monolithic(optimizer, orders)
+    elif optimizer == "rolling_horizon":
+        from .rolling_horizon import RollingHorizonOptimizer
+        window = min(orders, RollingHorizonOptimizer.window_size)
+        windows = max(1, math.ceil((orders - RollingHorizonOptimizer.window_overlap)
+                                   / (window - RollingHorizonOptimizer.window_overlap))) if orders > window else 1
+        estimate = monolithic("multi_stage_interval", window)
+        estimate["build_seconds"] *= windows
+    elif optimizer == "lns":
+        from .lns import LNSOptimizer
+        # One small sub-model at a time; the frozen rest adds at most one interval per stage
+        estimate = monolithic("multi_stage_interval", min(orders, LNSOptimizer.max_neighborhood_orders))
+        estimate["constraints"] += orders * STAGES
+    elif optimizer == "zone_decomposition":
+        # The downstream model covers every order; the per-zone pick models are smaller
+        estimate = monolithic("multi_stage_interval", orders)
+    elif optimizer == "multi_resolution":
+        from .multi_resolution import MultiResolutionOptimizer
+        # The coarse level is the full model; finer levels only cover windows around it
+        estimate = monolithic("multi_stage_time_indexed", orders, MultiResolutionOptimizer.granularities[0])
+    elif optimizer == "portfolio":
+        from .portfolio import PortfolioOptimizer
+        members = [PortfolioOptimizer.CP_PRESETS[m]["model_mode"] for m in PortfolioOptimizer.DEFAULT_MEMBERS
+                   if m in PortfolioOptimizer.CP_PRESETS]
+        sizes = [monolithic(f"multi_stage_{mode}", orders) for mode in members]
+        # Members build and solve in parallel processes
+        estimate = {"variables": max(s["variables"] for s in sizes),
+                    "constraints": max(s["constraints"] for s in sizes),
+                    "memory_mb": sum(s["memory_mb"] for s in sizes),
+                    "build_seconds": max(s["build_seconds"] for s in sizes)}
+    else:
+        raise ValueError(f"No model-size formula for optimizer '{optimizer}'")
+
+    return {
+        "optimizer": optimizer,
+        "orders": orders,
+        "workers": workers,
+        "equipment": equipment,
+        "granularity_minutes": granularity_minutes,
+        **estimate
+    }
+
+
+def admission_budgets() -> Dict[str, Any]:
+    """Memory and build-time budgets of a single request, from the application config."""
+    return {
+        "max_model_memory_mb": config_service.get_value("optimization.max_model_memory_mb", 2048),
+        "max_model_build_seconds": config_service.get_value("optimization.max_model_build_seconds", 120),
+        "downgrade_oversized_requests": config_service.get_value("optimization.downgrade_oversized_requests", True)
+    }
+
+
+def admit(optimizer: str, orders: int, workers: int, equipment: int, granularity_minutes: int = None,
+          budgets: Dict[str, Any] = None, calibration: Dict[str, Dict[str, float]] = None) -> Dict[str, Any]:
+    """
+    Decide whether a request may run, and with which optimizer.
+
+    Returns:
+        Dict with the optimizer to run (None when rejected), whether it was
+        downgraded or rejected and why, the budgets, and the estimate of every
+        optimizer tried in order
+    """
+    budgets = budgets or admission_budgets()
+    estimates = []
+    candidate = optimizer
+    while candidate is not None:
+        estimate = estimate_model_size(candidate, orders, workers, equipment, granularity_minutes, calibration)
+        estimates.append(estimate)
+        over = []
+        if estimate["memory_mb"] > budgets["max_model_memory_mb"]:
+            over.append(f"{estimate['memory_mb']:.0f}MB > {budgets['max_model_memory_mb']}MB memory")
+        if estimate["build_seconds"] > budgets["max_model_build_seconds"]:
+            over.append(f"{estimate['build_seconds']:.0f}s > {budgets['max_model_build_seconds']}s build")
+        if not over:
+            return {
+                "optimizer": candidate,
+                "requested_optimizer": optimizer,
+                "downgraded": candidate != optimizer,
+                "rejected": False,
+                "reason": None if candidate == optimizer else f"{optimizer} over budget, running {candidate}",
+                "budgets": budgets,
+                "estimates": estimates
+            }
+        reason = f"{candidate} would exceed the budget ({', '.join(over)})"
+        candidate = DOWNGRADES.get(candidate) if budgets["downgrade_oversized_requests"] else None
+
+    return {
+        "optimizer": None,
+        "requested_optimizer": optimizer,
+        "downgraded": False,
+        "rejected": True,
+        "reason": reason,
+        "budgets": budgets,
+        "estimates": estimates
+    }
+
+
+def calibrate(results: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """
+    Fit the coefficients of every monolithic model from benchmark_optimizers.py records.
+
+    Each coefficient is a ratio of sums over the rungs that built a model, so
+    the largest rungs, where the budgets matter, weigh the most.
+    """
+    totals: Dict[str, Dict[str, float]] = {}
+    for record in results:
+        name = record.get("optimizer")
+        model_size = record.get("model_size") or {}
+        if name not in DEFAULT_CALIBRATION or not model_size.get("variables") or record.get("build_seconds") is None:
+            continue
+        counted = counted_model_size(name, record["orders"], record["workers"], record["equipment"],
+                                     record["granularity_minutes"], truncate=False)
+        built = (model_size["variables"] + model_size["constraints"]) / 1000
+        total = totals.setdefault(name, dict.fromkeys(
+            ("counted_variables", "variables", "counted_constraints", "constraints", "thousands", "mb", "seconds"), 0.0))
+        total["counted_variables"] += counted["variables"]
+        total["variables"] += model_size["variables"]
+        total["counted_constraints"] += counted["constraints"]
+        total["constraints"] += model_size["constraints"]
+        total["thousands"] += built
+        total["mb"] += max(0.0, (record.get("peak_rss_mb") or 0.0) - (record.get("baseline_rss_mb") or 0.0))
+        total["seconds"] += record["build_seconds"]
+
+    calibration = {name: dict(coefficients) for name, coefficients in DEFAULT_CALIBRATION.items()}
+    for name, total in totals.items():
+        calibration[name] = {
+            "variables": total["variables"] / total["counted_variables"],
+            "constraints": total["constraints"] / total["counted_constraints"],
+            "mb_per_thousand": total["mb"] / total["thousands"],
+            "build_seconds_per_thousand": total["seconds"] / total["thousands"]
+        }
+    return calibration
+
+
+def load_calibration(path: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    """Calibrate from a benchmark results file (optimization.model_calibration_file), else the defaults."""
+    path = path or config_service.get_value("optimization.model_calibration_file")
+    return _calibration_from_file(path) if path else DEFAULT_CALIBRATION
+
+
+@lru_cache(maxsize=4)
+def _calibration_from_file(path: str) -> Dict[str, Dict[str, float]]:
+    with open(path) as f:
+        document = json.load(f)
+    return calibrate(document.get("results", []))
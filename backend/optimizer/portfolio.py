@@ -0,0 +1,479 @@
+"""
+Parallel portfolio over the wave optimizers.
+
+The heuristics (SimpleWaveOptimizer and the EnhancedWMSSequencer sequencing
+logic) and MultiStageOptimizer under several CP-SAT presets race in separate
+processes on the same wave, all under one wall-clock budget. Every plan is
+checked against the hard constraints and scored the same way: late orders
+first, then makespan, then labor cost. The best feasible plan at the deadline
+wins, so a CP-SAT run that finds nothing no longer costs the whole time limit
+before a heuristic plan is available.
+"""
+
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from multiprocessing.connection import wait
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.warehouse import StageType
+from models.optimization import OptimizationResult, OptimizationMetrics, OrderSchedule, StageSchedule
+from .wave_optimizer import MultiStageOptimizer, OptimizationRequirements
+from .profiling import OptimizerProfile
+from .warm_start import sequencer_plan
+
+# Priority labels used by the wave-level heuristics (same mapping as get_wave_data)
+PRIORITY_LABELS = {1: 'high', 2: 'high', 3: 'medium', 4: 'low', 5: 'low'}
+
+
+class PortfolioOptimizer:
+    """
+    Races heuristics and CP-SAT presets and keeps the best feasible plan.
+
+    Plans are compared on slot-rounded stage durations, the ones the CP
+    model reserves, so every member schedules the same work.
+    """
+
+    # Preset -> MultiStageOptimizer keyword arguments
+    CP_PRESETS = {
+        "cp_interval": {"model_mode": "interval"},
+        "cp_interval_warm_start": {"model_mode": "interval", "warm_start": "simple"},
+        "cp_interval_no_lp": {"model_mode": "interval", "solver_parameters": {"linearization_level": 0}},
+        "cp_skill_class": {"model_mode": "skill_class"},
+        "cp_time_indexed": {"model_mode": "time_indexed"}
+    }
+    HEURISTICS = ("simple_wave", "wms_sequencer")
+    # The time-indexed model is left out by default: it needs gigabytes beyond ~100 orders
+    DEFAULT_MEMBERS = ("simple_wave", "wms_sequencer", "cp_interval", "cp_interval_warm_start",
+                       "cp_interval_no_lp", "cp_skill_class")
+
+    def __init__(self, warehouse_config, members: Optional[List[str]] = None,
+                 time_budget_seconds: float = None):
+        self.warehouse = warehouse_config
+        self.requirements = OptimizationRequirements()
+        self.members = list(members or self.DEFAULT_MEMBERS)
+        self.time_budget_seconds = time_budget_seconds or self.requirements.max_solve_time_seconds
+
+        unknown = [m for m in self.members if m not in self.HEURISTICS and m not in self.CP_PRESETS]
+        if unknown:
+            raise ValueError(f"Unknown portfolio members: {', '.join(unknown)}. "
+                             f"Use {self.HEURISTICS + tuple(self.CP_PRESETS)}")
+        if not self.members:
+            raise ValueError("A portfolio needs at least one member")
+
+        self.schedule_base_time = None  # Datetime of minute 0, defaults to now
+        self.member_reports = []
+        self.profile = OptimizerProfile(type(self).__name__)
+
+    def optimize_workflow(self, orders, workers, equipment, deadlines):
+        """
+        Race all members on the wave and return the winning plan.
+
+        Args:
+            orders: List of Order objects to schedule
+            workers: List of Worker objects available
+            equipment: List of Equipment objects available
+            deadlines: Dictionary mapping order_id to deadline datetime
+
+        Returns:
+            OptimizationResult of the best feasible plan, with every member's
+            status, timing, objective and score in input_summary["portfolio"]
+        """
+        start_time = time.time()
+        deadline_at = start_time + self.time_budget_seconds
+        profile = self.profile = OptimizerProfile(type(self).__name__)
+        base_time = self.schedule_base_time or datetime.now()
+
+        # Same limits the CP members apply, so every member sees the same wave
+        orders = orders[:self.requirements.max_orders_per_wave]
+        workers = workers[:self.requirements.max_workers]
+        stages = self.requirements.stages
+        deadlines = deadlines if isinstance(deadlines, dict) else {}
+
+        # Durations and walking times are computed once and shipped to every member
+        planner = MultiStageOptimizer(self.warehouse)
+        planner.profile = profile
+        planner.precompute_stage_durations(orders, stages, planner.time_granularity)
+        stage_minutes = (planner.stage_duration_slots * planner.time_granularity).tolist()
+
+        cp_members = [m for m in self.members if m in self.CP_PRESETS]
+        payload = {
+            "warehouse": self.warehouse,
+            "orders": orders,
+            "workers": workers,
+            "equipment": equipment,
+            "deadlines": deadlines,
+            "stage_minutes": stage_minutes,
+            "order_walking_minutes": planner.order_walking_minutes,
+            "base_time": base_time,
+            "deadline_at": deadline_at,
+            # Split the cores between the CP members instead of oversubscribing them
+            "cp_threads": max(1, (os.cpu_count() or 1) // max(1, len(cp_members)))
+        }
+
+        with profile.phase("race"):
+            outcomes = self._race(payload, deadline_at)
+
+        with profile.phase("validation"):
+            self.member_reports = []
+            best = None
+            for member in self.members:
+                outcome = outcomes[member]
+                report = {
+                    "member": member,
+                    "status": outcome.get("status"),
+                    "elapsed_seconds": outcome.get("elapsed_seconds"),
+                    "objective": outcome.get("objective"),
+                    "feasible": False
+                }
+                if outcome.get("error"):
+                    report["error"] = outcome["error"]
+                plan = outcome.get("plan")
+                if plan is not None:
+                    violations = validate_plan(plan, orders, workers, equipment)
+                    report["score"] = score_plan(plan, orders, workers, base_time)
+                    report["violations"] = violations[:10]
+                    report["violation_count"] = len(violations)
+                    report["feasible"] = not violations
+                    if report["feasible"] and (best is None or _score_key(report["score"]) < _score_key(best[0]["score"])):
+                        best = (report, plan)
+                self.member_reports.append(report)
+
+        optimization_time = time.time() - start_time
+        winner = best[0]["member"] if best else None
+        print(f"Portfolio finished in {optimization_time:.2f}s of {self.time_budget_seconds}s, winner: {winner}")
+        for report in self.member_reports:
+            print(f"  {report['member']:<24} {report['status']:<10} "
+                  f"{report['elapsed_seconds'] if report['elapsed_seconds'] is not None else '-'}s "
+                  f"feasible={report['feasible']} score={report.get('score')}")
+
+        with profile.phase("extraction"):
+            result = self._build_result(best, orders, workers, equipment, base_time, optimization_time)
+        profile.counts.update(orders=len(orders), workers=len(workers), equipment=len(equipment),
+                              members=len(self.members))
+        result.input_summary["profile"] = profile.to_dict()
+        return result
+
+    def _race(self, payload: Dict[str, Any], deadline_at: float) -> Dict[str, Dict[str, Any]]:
+        """Run every member in its own process until all report or the budget is spent."""
+        context = multiprocessing.get_context("spawn")
+        running = {}
+        for member in self.members:
+            parent_conn, child_conn = context.Pipe(duplex=False)
+            process = context.Process(target=_run_member, args=(child_conn, member, payload), daemon=True)
+            process.start()
+            child_conn.close()
+            running[parent_conn] = (member, process)
+
+        outcomes = {}
+        while running:
+            ready = wait(list(running), timeout=max(0.0, deadline_at - time.time()))
+            if not ready:
+                break
+            for conn in ready:
+                member, process = running.pop(conn)
+                try:
+                    outcomes[member] = conn.recv()
+                except EOFError:
+                    outcomes[member] = {"status": "crashed", "error": f"Member process exited with code {process.exitcode}"}
+                process.join()
+
+            # An optimal CP-SAT solution can't be beaten by the other CP presets, which share its objective
+            if any(outcome.get("status") == "OPTIMAL" for outcome in outcomes.values()):
+                for conn, (member, process) in list(running.items()):
+                    if member in self.CP_PRESETS:
+                        process.terminate()
+                        process.join()
+                        del running[conn]
+                        outcomes[member] = {"status": "stopped", "error": "Another CP-SAT preset proved optimality"}
+
+        for conn, (member, process) in running.items():
+            process.terminate()
+            process.join()
+            outcomes[member] = {"status": "timeout", "error": "No plan within the time budget"}
+        return outcomes
+
+    def _build_result(self, best: Optional[Tuple[Dict, List[Dict]]], orders, workers, equipment,
+                      base_time: datetime, optimization_time: float) -> OptimizationResult:
+        """Turn the winning plan into an OptimizationResult."""
+        rows_by_order = {}
+        for row in (best[1] if best else []):
+            rows_by_order.setdefault(row['order_id'], []).append(row)
+        worker_rates = {worker.id: worker.hourly_rate for worker in workers}
+        equipment_rates = {eq.id: eq.hourly_cost for eq in equipment}
+
+        order_schedules = []
+        total_labor_cost = 0.0
+        total_equipment_cost = 0.0
+        for order in orders:
+            if order.id not in rows_by_order:
+                continue
+            order_schedule = OrderSchedule(
+                order_id=order.id,
+                customer_id=order.customer_id,
+                priority=order.priority,
+                shipping_deadline=order.shipping_deadline,
+                stages=[]
+            )
+            for row in sorted(rows_by_order[order.id], key=lambda r: r['start_minute']):
+                duration = row['end_minute'] - row['start_minute']
+                total_labor_cost += duration * worker_rates.get(row['worker_id'], 0.0) / 60
+                total_equipment_cost += duration * equipment_rates.get(row['equipment_id'], 0.0) / 60
+                order_schedule.stages.append(StageSchedule(
+                    order_id=order.id,
+                    stage_type=StageType(row['stage']),
+                    start_time=base_time + timedelta(minutes=row['start_minute']),
+                    end_time=base_time + timedelta(minutes=row['end_minute']),
+                    duration_minutes=duration,
+                    assigned_worker_id=row['worker_id'],
+                    assigned_equipment_id=row['equipment_id']
+                ))
+            order_schedules.append(order_schedule)
+
+        score = best[0]["score"] if best else None
+        total_orders = len(order_schedules)
+        late_orders = score["late_orders"] if score else 0
+        total_deadline_penalties = late_orders * 1000.0  # Same late-order penalty as MultiStageOptimizer
+        total_processing_time = sum(st.duration_minutes for o in order_schedules for st in o.stages)
+        winner_status = best[0]["status"] if best else "NO_FEASIBLE_PLAN"
+
+        metrics = OptimizationMetrics(
+            total_orders=total_orders,
+            on_time_orders=total_orders - late_orders,
+            late_orders=late_orders,
+            on_time_percentage=score["on_time_percentage"] if score else 0,
+            total_labor_cost=total_labor_cost,
+            total_equipment_cost=total_equipment_cost,
+            total_deadline_penalties=total_deadline_penalties,
+            total_cost=total_labor_cost + total_equipment_cost + total_deadline_penalties,
+            average_order_processing_time=total_processing_time / total_orders if total_orders > 0 else 0,
+            total_processing_time=total_processing_time,
+            optimization_runtime_seconds=optimization_time,
+            solver_status=winner_status if winner_status in ("OPTIMAL", "FEASIBLE", "NO_FEASIBLE_PLAN") else "FEASIBLE"
+        )
+
+        return OptimizationResult(
+            order_schedules=order_schedules,
+            worker_schedules=[],
+            equipment_schedules=[],
+            metrics=metrics,
+            optimization_start_time=datetime.now(),
+            optimization_end_time=datetime.now(),
+            input_summary={
+                "total_orders": len(orders),
+                "total_workers": len(workers),
+                "total_equipment": len(equipment),
+                "optimization_horizon_hours": 24,
+                "solve_mode": "portfolio",
+                "portfolio": {
+                    "winner": best[0]["member"] if best else None,
+                    "time_budget_seconds": self.time_budget_seconds,
+                    "elapsed_seconds": optimization_time,
+                    "members": self.member_reports
+                }
+            }
+        )
+
+    def generate_explanation(self, solution):
+        portfolio = solution.input_summary.get("portfolio", {})
+        feasible = sum(1 for report in portfolio.get("members", []) if report["feasible"])
+        return (f"Portfolio of {len(portfolio.get('members', []))} optimizers; {feasible} produced a feasible plan "
+                f"and {portfolio.get('winner')} had the best one.")
+
+
+def _score_key(score: Dict[str, float]) -> Tuple[float, float, float]:
+    return score["late_orders"], score["makespan_minutes"], score["labor_cost"]
+
+
+def score_plan(plan: List[Dict], orders, workers, base_time: datetime) -> Dict[str, float]:
+    """Late orders, on-time rate, makespan and labor cost of a plan."""
+    worker_rates = {worker.id: worker.hourly_rate for worker in workers}
+    completion = {}
+    labor_cost = 0.0
+    for row in plan:
+        completion[row['order_id']] = max(completion.get(row['order_id'], 0), row['end_minute'])
+        labor_cost += (row['end_minute'] - row['start_minute']) * worker_rates.get(row['worker_id'], 0.0) / 60
+
+    late_orders = 0
+    for order in orders:
+        deadline = order.shipping_deadline.replace(tzinfo=None)
+        if order.id not in completion or base_time + timedelta(minutes=completion[order.id]) > deadline:
+            late_orders += 1
+    return {
+        "late_orders": late_orders,
+        "on_time_percentage": (len(orders) - late_orders) / len(orders) * 100 if orders else 0,
+        "makespan_minutes": max(completion.values(), default=0),
+        "labor_cost": round(labor_cost, 2)
+    }
+
+
+def validate_plan(plan: List[Dict], orders, workers, equipment) -> List[str]:
+    """
+    Hard-constraint violations of a plan: missing stages, stage precedence,
+    unqualified or double-booked workers, equipment of a type the stage
+    can't use (MultiStageOptimizer._stage_requires_equipment) and equipment
+    over capacity.
+    """
+    violations = []
+    stages = [stage.value for stage in OptimizationRequirements.stages]
+    skills = {worker.id: {skill.value for skill in worker.skills} for worker in workers}
+    capacities = {eq.id: eq.capacity for eq in equipment}
+    equipment_types = {eq.id: eq.equipment_type for eq in equipment}
+    stage_skill = {stage.value: MultiStageOptimizer._stage_skill(None, stage).value for stage in OptimizationRequirements.stages}
+
+    rows = {(row['order_id'], row['stage']): row for row in plan}
+    for order in orders:
+        previous_end = None
+        for stage in stages:
+            row = rows.get((order.id, stage))
+            if row is None:
+                violations.append(f"order {order.id}: {stage} not scheduled")
+                break
+            if previous_end is not None and row['start_minute'] < previous_end:
+                violations.append(f"order {order.id}: {stage} starts before the previous stage ends")
+            previous_end = row['end_minute']
+
+    by_worker = {}
+    by_equipment = {}
+    for row in plan:
+        if row['worker_id'] is None:
+            violations.append(f"order {row['order_id']}: {row['stage']} has no worker")
+        elif stage_skill[row['stage']] not in skills.get(row['worker_id'], set()):
+            violations.append(f"order {row['order_id']}: worker {row['worker_id']} lacks the {row['stage']} skill")
+        else:
+            by_worker.setdefault(row['worker_id'], []).append(row)
+        if row['equipment_id'] is not None:
+            equipment_type = equipment_types.get(row['equipment_id'])
+            if not MultiStageOptimizer._stage_requires_equipment(None, StageType(row['stage']), equipment_type):
+                violations.append(f"order {row['order_id']}: {row['stage']} can't use equipment "
+                                  f"{row['equipment_id']} ({getattr(equipment_type, 'value', 'unknown')})")
+            by_equipment.setdefault(row['equipment_id'], []).append(row)
+
+    for worker_id, worker_rows in by_worker.items():
+        if _peak_usage(worker_rows) > 1:
+            violations.append(f"worker {worker_id} is double-booked")
+    for equipment_id, equipment_rows in by_equipment.items():
+        if _peak_usage(equipment_rows) > capacities.get(equipment_id, 1):
+            violations.append(f"equipment {equipment_id} is over capacity")
+    return violations
+
+
+def _peak_usage(rows: List[Dict]) -> int:
+    # Ends sort before starts at the same minute, so back-to-back stages don't overlap
+    events = sorted([(row['start_minute'], 1) for row in rows] + [(row['end_minute'], -1) for row in rows])
+    usage = peak = 0
+    for _, delta in events:
+        usage += delta
+        peak = max(peak, usage)
+    return peak
+
+
+def _run_member(conn, member: str, payload: Dict[str, Any]):
+    """Member process entry point: plan the wave and send back the outcome."""
+    # CP-SAT search logs and per-order heuristic logging would flood the API output
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, sys.stdout.fileno())  # CP-SAT logs from C++, bypassing sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    logging.disable(logging.WARNING)
+    member_start = time.time()
+    try:
+        if member == "simple_wave":
+            outcome = _plan_simple_wave(payload)
+        elif member == "wms_sequencer":
+            outcome = _plan_wms_sequencer(payload)
+        else:
+            outcome = _plan_cp(member, payload)
+    except Exception as e:
+        outcome = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+    outcome["elapsed_seconds"] = round(time.time() - member_start, 3)
+    try:
+        conn.send(outcome)
+    finally:
+        conn.close()
+
+
+def _plan_simple_wave(payload: Dict[str, Any]) -> Dict[str, Any]:
+    from .simple_wave_optimizer import SimpleWaveOptimizer
+
+    stages = OptimizationRequirements.stages
+    wave_data = {
+        'wave_data': [{
+            'order_id': order.id,
+            'priority': PRIORITY_LABELS.get(order.priority, 'medium'),
+            'shipping_deadline': order.shipping_deadline,
+            'stage_durations': {stage.value: payload["stage_minutes"][o][s] for s, stage in enumerate(stages)}
+        } for o, order in enumerate(payload["orders"])],
+        'workers': [{'id': worker.id, 'skill_name': skill.value}
+                    for worker in payload["workers"] for skill in worker.skills],
+        'equipment': [{'id': eq.id, 'equipment_type': eq.equipment_type.value} for eq in payload["equipment"]]
+    }
+    result = SimpleWaveOptimizer().optimize_wave(wave_data)
+    if result.get("error"):
+        return {"status": "error", "error": result["error"]}
+    plan = [{
+        'order_id': order_schedule['order_id'],
+        'stage': stage['stage'],
+        'start_minute': stage['start_time'],
+        'end_minute': stage['end_time'],
+        'worker_id': stage['worker_id'],
+        'equipment_id': stage['equipment_id']
+    } for order_schedule in result["solution"]["schedule"] for stage in order_schedule['stages']]
+    return {"status": "FEASIBLE", "plan": plan, "objective": result["objective_value"]}
+
+
+def _plan_wms_sequencer(payload: Dict[str, Any]) -> Dict[str, Any]:
+    stages = OptimizationRequirements.stages
+    orders = [{
+        'order_id': order.id,
+        'priority': order.priority,
+        'shipping_deadline': order.shipping_deadline,
+        'stage_durations': {stage.value: payload["stage_minutes"][o][s] for s, stage in enumerate(stages)}
+    } for o, order in enumerate(payload["orders"])]
+    workers = [{'id': worker.id, 'name': worker.name, 'skills': [skill.value for skill in worker.skills]}
+               for worker in payload["workers"]]
+    equipment = [{'id': eq.id, 'equipment_type': eq.equipment_type.value, 'capacity': eq.capacity}
+                 for eq in payload["equipment"]]
+
+    # Sequence with this warehouse's skill names rather than the WMS database's
+    stage_skills = {stage.value: [MultiStageOptimizer._stage_skill(None, stage).value] for stage in stages}
+    assignments = sequencer_plan(orders, workers, equipment, stage_skills, payload["base_time"])
+    plan = [{
+        'order_id': assignment['order_id'],
+        'stage': assignment['stage'],
+        'start_minute': assignment['start_minute'],
+        'end_minute': assignment['start_minute'] + assignment['duration'],
+        'worker_id': assignment['worker_id'],
+        'equipment_id': assignment['equipment_id']
+    } for assignment in assignments]
+    return {"status": "FEASIBLE", "plan": plan, "objective": None}
+
+
+def _plan_cp(member: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    preset = dict(PortfolioOptimizer.CP_PRESETS[member])
+    preset["solver_parameters"] = dict(preset.get("solver_parameters", {}), num_workers=payload["cp_threads"])
+    optimizer = MultiStageOptimizer(payload["warehouse"], **preset)
+    optimizer.order_walking_minutes = payload["order_walking_minutes"]
+    optimizer.schedule_base_time = payload["base_time"]
+
+    # Leave time to extract and send the solution before the portfolio deadline
+    remaining = payload["deadline_at"] - time.time()
+    time_limit = max(0.1, remaining - min(2.0, remaining * 0.1))
+    optimizer.optimize_workflow(payload["orders"], payload["workers"], payload["equipment"],
+                                payload["deadlines"], time_limit_seconds=time_limit)
+
+    stats = optimizer.solve_stats
+    if stats.get("status") not in ("OPTIMAL", "FEASIBLE"):
+        return {"status": stats.get("status"), "objective": None}
+    granularity = optimizer.time_granularity
+    plan = [{
+        'order_id': assignment['order_id'],
+        'stage': assignment['stage'].value,
+        'start_minute': assignment['start_slot'] * granularity,
+        'end_minute': (assignment['start_slot'] + assignment['slots']) * granularity,
+        'worker_id': assignment['worker_id'],
+        'equipment_id': assignment['equipment_id']
+    } for assignment in optimizer.stage_assignments]
+    return {"status": stats["status"], "plan": plan, "objective": stats["objective"]}
@@ -0,0 +1,101 @@
+"""
+Phase timing and model-size instrumentation for the optimizers.
+
+Every optimizer keeps an OptimizerProfile per run. Phases are timed either
+with the phase() context manager or, inside long linear builders, with
+lap(), which charges the time since the previous lap to the named phase.
+The profile is returned with each result and persisted with the run.
+"""
+
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from ortools.sat.python import cp_model
+
+
+class OptimizerProfile:
+    """Per-run phase timings, model size and CP-SAT search statistics."""
+
+    def __init__(self, optimizer_name: str):
+        self.optimizer = optimizer_name
+        self.started_at = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.model_size: Dict[str, Any] = {}
+        self.solver_stats: Dict[str, Any] = {}
+        self.counts: Dict[str, int] = {}
+        self._lap_start = self.started_at
+
+    @contextmanager
+    def phase(self, name: str):
+        phase_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, time.perf_counter() - phase_start)
+            self._lap_start = time.perf_counter()
+
+    def lap(self, name: str):
+        """Charge the time since the previous lap (or phase) to name."""
+        now = time.perf_counter()
+        self._add(name, now - self._lap_start)
+        self._lap_start = now
+
+    def reset_lap(self):
+        self._lap_start = time.perf_counter()
+
+    def _add(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def absorb(self, other: "OptimizerProfile"):
+        """Add the phase times and counts of a sub-solve (e.g. one rolling-horizon window)."""
+        for name, seconds in other.phases.items():
+            self._add(name, seconds)
+        for name, value in other.counts.items():
+            self.counts[name] = self.counts.get(name, 0) + value
+        for name in ("variables", "booleans", "integers", "constraints"):
+            if name in other.model_size:
+                self.model_size[name] = self.model_size.get(name, 0) + other.model_size[name]
+
+    def record_model(self, model: cp_model.CpModel):
+        """Count variables, booleans and constraints (by type) of a built CP model."""
+        proto = model.Proto()
+        booleans = sum(1 for var in proto.variables if list(var.domain) == [0, 1])
+        constraint_types = Counter(constraint.WhichOneof("constraint") for constraint in proto.constraints)
+        self.model_size = {
+            "variables": len(proto.variables),
+            "booleans": booleans,
+            "integers": len(proto.variables) - booleans,
+            "constraints": len(proto.constraints),
+            "constraints_by_type": dict(constraint_types)
+        }
+
+    def record_solver(self, solver: cp_model.CpSolver, status, objective: Optional[float] = None,
+                      best_bound: Optional[float] = None):
+        """Keep the CP-SAT search statistics of the solve."""
+        gap = None
+        if objective is not None and best_bound is not None:
+            gap = abs(objective - best_bound) / max(abs(objective), 1e-9)
+        self.solver_stats = {
+            "status": solver.StatusName(status),
+            "wall_time_seconds": solver.WallTime(),
+            "user_time_seconds": solver.UserTime(),
+            "branches": solver.NumBranches(),
+            "conflicts": solver.NumConflicts(),
+            "objective": objective,
+            "best_bound": best_bound,
+            "gap": gap
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = time.perf_counter() - self.started_at
+        return {
+            "optimizer": self.optimizer,
+            "total_seconds": total,
+            "phases": dict(self.phases),
+            "unaccounted_seconds": max(0.0, total - sum(self.phases.values())),
+            "model_size": self.model_size,
+            "solver": self.solver_stats,
+            "counts": self.counts
+        }
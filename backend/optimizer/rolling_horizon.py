@@ -0,0 +1,258 @@
+"""
+Rolling-horizon decomposition for waves larger than max_orders_per_wave.
+
+Orders are sorted by shipping deadline and split into overlapping windows.
+Each window is solved with the interval model of MultiStageOptimizer while
+the stages committed by earlier windows are frozen as fixed intervals on
+their workers and equipment. Deadlines are soft, so a window that cannot
+ship every order on time still schedules them, and a window that fails is
+retried for its committed orders on a longer horizon. The committed parts
+of all windows are then stitched into a single OptimizationResult.
+"""
+
+import time
+from datetime import datetime
+from typing import List
+
+from models.warehouse import StageType
+from models.optimization import OptimizationResult, OptimizationMetrics
+from .wave_optimizer import MultiStageOptimizer, OptimizationRequirements
+from .profiling import OptimizerProfile
+
+
+class RollingHorizonOptimizer:
+    """
+    Solves large waves window by window under one overall time budget.
+
+    Each window holds window_size orders; the last window_overlap orders of a
+    window are re-solved by the next one instead of being committed, so early
+    decisions can still adapt to the orders that follow them.
+    """
+
+    window_size = 50      # Orders per CP-SAT window
+    window_overlap = 10   # Orders shared with the following window
+
+    def __init__(self, warehouse_config, window_size: int = None, window_overlap: int = None,
+                 time_limit_seconds: float = None):
+        self.warehouse = warehouse_config
+        self.requirements = OptimizationRequirements()
+        self.window_size = window_size or self.window_size
+        self.window_overlap = self.window_overlap if window_overlap is None else window_overlap
+        self.time_limit_seconds = time_limit_seconds or self.requirements.max_solve_time_seconds
+
+        if self.window_overlap >= self.window_size:
+            raise ValueError("window_overlap must be smaller than window_size")
+
+        # Shared across windows so walking times are only loaded once per order
+        self.order_walking_minutes = {}
+        self.walking_times_cache = {}
+        self.window_reports = []
+        self.profile = OptimizerProfile(type(self).__name__)
+
+    def optimize_workflow(self, orders, workers, equipment, deadlines):
+        """
+        Schedule all orders window by window.
+
+        Args:
+            orders: List of Order objects to schedule (any size)
+            workers: List of Worker objects available
+            equipment: List of Equipment objects available
+            deadlines: Dictionary mapping order_id to deadline datetime
+
+        Returns:
+            OptimizationResult covering every committed order, with per-window
+            quality in input_summary["windows"]
+        """
+        start_time = time.time()
+        base_time = datetime.now()
+        sorted_orders = sorted(orders, key=lambda order: self._naive(order.shipping_deadline))
+        windows = self._build_windows(len(sorted_orders))
+
+        print(f"Rolling horizon: {len(sorted_orders)} orders in {len(windows)} windows "
+              f"(size {self.window_size}, overlap {self.window_overlap}, budget {self.time_limit_seconds}s)")
+
+        commitments = []
+        order_schedules = []
+        unscheduled_order_ids = []
+        self.window_reports = []
+        self.profile = OptimizerProfile(type(self).__name__)
+
+        for index, (window_start, window_end, commit_end) in enumerate(windows):
+            window_orders = sorted_orders[window_start:window_end]
+            committed_ids = {order.id for order in sorted_orders[window_start:commit_end]}
+            window_deadlines = {order.id: deadlines[order.id] for order in window_orders if order.id in deadlines} \
+                if isinstance(deadlines, dict) else {}
+
+            # Split what is left of the budget evenly over the remaining windows
+            remaining_budget = self.time_limit_seconds - (time.time() - start_time)
+            window_time_limit = max(0.1, remaining_budget / (len(windows) - index))
+
+            window_optimizer, window_result = self._solve_window(
+                window_orders, workers, equipment, window_deadlines, commitments, window_time_limit, base_time
+            )
+            stats = window_optimizer.solve_stats
+            if stats.get("status") not in ("OPTIMAL", "FEASIBLE"):
+                # Retry just the orders this window commits, on a horizon long enough to run them one
+                # after another after everything committed so far, with the budget not reserved for later windows
+                committed_orders = [order for order in window_orders if order.id in committed_ids]
+                retry_time_limit = max(1.0, self.time_limit_seconds - (time.time() - start_time)
+                                       - window_time_limit * (len(windows) - index - 1))
+                print(f"Window {index + 1}/{len(windows)}: {stats.get('status')}, "
+                      f"retrying its {len(committed_orders)} committed orders")
+                window_optimizer, window_result = self._solve_window(
+                    committed_orders, workers, equipment, window_deadlines, commitments, retry_time_limit,
+                    base_time, self._retry_horizon_hours(window_optimizer, window_orders, committed_ids, commitments)
+                )
+                stats = {**window_optimizer.solve_stats, "retried": True}
+            solved = stats.get("status") in ("OPTIMAL", "FEASIBLE")
+
+            if solved:
+                commitments.extend(a for a in window_optimizer.stage_assignments if a['order_id'] in committed_ids)
+                order_schedules.extend(o for o in window_result.order_schedules if o.order_id in committed_ids)
+            else:
+                unscheduled_order_ids.extend(sorted(committed_ids))
+
+            self.window_reports.append({
+                "window": index,
+                "orders": len(window_orders),
+                "committed_orders": len(committed_ids),
+                "time_limit_seconds": round(window_time_limit, 3),
+                "horizon_hours": window_optimizer.horizon_hours,
+                "build_seconds": window_optimizer.model_build_seconds,
+                **stats,
+                "profile": window_optimizer.profile.to_dict()
+            })
+            print(f"Window {index + 1}/{len(windows)}: {stats.get('status')} "
+                  f"objective={stats.get('objective')} gap={stats.get('gap')}")
+
+        self.profile.counts["windows"] = len(windows)
+        self.profile.counts["orders"] = len(sorted_orders)
+        with self.profile.phase("stitching"):
+            result = self._stitch_result(order_schedules, unscheduled_order_ids, workers, equipment,
+                                         time.time() - start_time, len(sorted_orders))
+        result.input_summary["profile"] = self.profile.to_dict()
+        return result
+
+    def _solve_window(self, orders, workers, equipment, deadlines, commitments, time_limit_seconds, base_time,
+                      horizon_hours: float = 24):
+        """
+        Solve one window around the frozen commitments.
+
+        Deadlines are soft, as in LNS: a window that cannot ship every order
+        on time still schedules them all, and lateness is penalized instead.
+        """
+        window_optimizer = MultiStageOptimizer(self.warehouse, model_mode="interval")
+        window_optimizer.requirements.max_orders_per_wave = len(orders)
+        window_optimizer.order_walking_minutes = self.order_walking_minutes
+        window_optimizer.walking_times_cache = self.walking_times_cache
+        window_optimizer.schedule_base_time = base_time
+        window_optimizer.soft_deadlines = True
+        window_optimizer.horizon_hours = horizon_hours
+
+        result = window_optimizer.optimize_workflow(
+            orders, workers, equipment, deadlines,
+            fixed_commitments=commitments, time_limit_seconds=time_limit_seconds
+        )
+        self.profile.absorb(window_optimizer.profile)
+        return window_optimizer, result
+
+    @staticmethod
+    def _retry_horizon_hours(window_optimizer, window_orders, committed_ids, commitments) -> float:
+        """Hours to fit the committed orders serially after every frozen commitment."""
+        busy_until = max((a['start_slot'] + a['slots'] for a in commitments), default=0)
+        slots = window_optimizer.stage_duration_slots
+        serial = sum(int(slots[o].sum()) for o, order in enumerate(window_orders)
+                     if order.id in committed_ids) if slots is not None else 0
+        return max(2 * window_optimizer.horizon_hours,
+                   (busy_until + serial) * window_optimizer.time_granularity / 60)
+
+    def _build_windows(self, num_orders: int) -> List[tuple]:
+        """Return (start, end, commit_end) index triples over the deadline-sorted orders."""
+        windows = []
+        step = self.window_size - self.window_overlap
+        window_start = 0
+
+        while window_start < num_orders:
+            window_end = min(window_start + self.window_size, num_orders)
+            commit_end = window_end if window_end == num_orders else window_start + step
+            windows.append((window_start, window_end, commit_end))
+            window_start = commit_end
+
+        return windows
+
+    def _stitch_result(self, order_schedules, unscheduled_order_ids, workers, equipment,
+                       optimization_time, total_input_orders) -> OptimizationResult:
+        """Combine committed window schedules into one OptimizationResult."""
+        worker_rates = {worker.id: worker.hourly_rate for worker in workers}
+        equipment_rates = {eq.id: eq.hourly_cost for eq in equipment}
+
+        total_labor_cost = 0.0
+        total_equipment_cost = 0.0
+        total_deadline_penalties = 0.0
+        on_time_orders = 0
+
+        for order_schedule in order_schedules:
+            for stage in order_schedule.stages:
+                if stage.assigned_worker_id in worker_rates:
+                    total_labor_cost += stage.duration_minutes * worker_rates[stage.assigned_worker_id] / 60
+                if stage.assigned_equipment_id in equipment_rates:
+                    total_equipment_cost += stage.duration_minutes * equipment_rates[stage.assigned_equipment_id] / 60
+
+            ship = next(st for st in order_schedule.stages if st.stage_type == StageType.SHIP)
+            if self._naive(ship.end_time) <= self._naive(order_schedule.shipping_deadline):
+                on_time_orders += 1
+            else:
+                total_deadline_penalties += 1000  # Same late-order penalty as MultiStageOptimizer
+
+        total_orders = len(order_schedules)
+        total_processing_time = sum(st.duration_minutes for o in order_schedules for st in o.stages)
+        all_solved = not unscheduled_order_ids
+
+        metrics = OptimizationMetrics(
+            total_orders=total_orders,
+            on_time_orders=on_time_orders,
+            late_orders=total_orders - on_time_orders,
+            on_time_percentage=(on_time_orders / total_orders * 100) if total_orders > 0 else 0,
+            total_labor_cost=total_labor_cost,
+            total_equipment_cost=total_equipment_cost,
+            total_deadline_penalties=total_deadline_penalties,
+            total_cost=total_labor_cost + total_equipment_cost + total_deadline_penalties,
+            average_order_processing_time=total_processing_time / total_orders if total_orders > 0 else 0,
+            total_processing_time=total_processing_time,
+            optimization_runtime_seconds=optimization_time,
+            solver_status="FEASIBLE" if all_solved else "PARTIAL"
+        )
+
+        return OptimizationResult(
+            order_schedules=order_schedules,
+            worker_schedules=[],
+            equipment_schedules=[],
+            metrics=metrics,
+            optimization_start_time=datetime.now(),
+            optimization_end_time=datetime.now(),
+            input_summary={
+                "total_orders": total_input_orders,
+                "total_workers": len(workers),
+                "total_equipment": len(equipment),
+                # Retried windows may run past the day
+                "optimization_horizon_hours": max([24] + [w["horizon_hours"] for w in self.window_reports]),
+                "model_mode": "interval",
+                "solve_mode": "rolling_horizon",
+                "window_size": self.window_size,
+                "window_overlap": self.window_overlap,
+                "time_limit_seconds": self.time_limit_seconds,
+                "unscheduled_order_ids": unscheduled_order_ids,
+                "windows": self.window_reports
+            }
+        )
+
+    @staticmethod
+    def _naive(value):
+        """Strip timezone info so deadlines from the database compare with naive datetimes."""
+        if isinstance(value, datetime) and value.tzinfo is not None:
+            return value.replace(tzinfo=None)
+        return value
+
+    def generate_explanation(self, solution):
+        windows = solution.input_summary.get("windows", [])
+        return f"Rolling-horizon schedule stitched from {len(windows)} CP-SAT windows."
@@ -5,12 +5,95 @@ This provides a basic scheduling algorithm that can be used as a backup
 when the more complex OR-Tools optimizer encounters issues.
 """
 
+import heapq
 import logging
 import time
 from typing import Dict, List, Tuple
 from datetime import datetime, timedelta
 import random
 
+from .profiling import OptimizerProfile
+
+
+class _FirstFreeIndex:
+    """
+    Min segment tree over the worker rows of one skill class, in list order.
+    
+    Finds the first row whose worker is free by a given time in O(log n),
+    which is what the linear first-fit scan over the workers returned. Leaves
+    are refreshed lazily: a leaf never holds a later time than its worker's
+    actual availability, so a row found by the tree is only checked against
+    the availability, and refreshed and searched past if the worker is busy.
+    """
+    
+    def __init__(self, worker_ids: List, available_at: Dict):
+        self.worker_ids = worker_ids
+        self.available_at = available_at
+        self.size = 1 << max(0, (len(worker_ids) - 1).bit_length())
+        leaves = [available_at[worker_id] for worker_id in worker_ids]
+        leaves += [float('inf')] * (self.size - len(leaves))
+        self.tree = [0] * self.size + leaves
+        for node in range(self.size - 1, 0, -1):
+            self.tree[node] = min(self.tree[2 * node], self.tree[2 * node + 1])
+    
+    def _update(self, position: int, available_at: float):
+        tree = self.tree
+        node = position + self.size
+        tree[node] = available_at
+        node //= 2
+        while node:
+            left, right = tree[2 * node], tree[2 * node + 1]
+            smallest = left if left < right else right
+            if tree[node] == smallest:
+                break  # Nothing above changes either
+            tree[node] = smallest
+            node //= 2
+    
+    def first_free(self, ready_at: float):
+        """Id of the worker of the first row free by ready_at, or None."""
+        tree = self.tree
+        size = self.size
+        while tree[1] <= ready_at:
+            node = 1
+            while node < size:
+                node = 2 * node if tree[2 * node] <= ready_at else 2 * node + 1
+            worker_id = self.worker_ids[node - size]
+            available_at = self.available_at[worker_id]
+            if available_at <= ready_at:
+                return worker_id
+            self._update(node - size, available_at)
+        return None
+
+
+class _AvailabilityHeap:
+    """
+    Min-heap of resources by availability time, ties going to the first in list order.
+    
+    Availability only ever grows, so updates just set available_at and an
+    entry never holds a later time than its resource's. Outdated entries are
+    refreshed when they reach the top, like the leaves of _FirstFreeIndex.
+    """
+    
+    def __init__(self, resource_ids: List):
+        self.available_at = {}
+        self.heap = []
+        for position, resource_id in enumerate(resource_ids):
+            if resource_id not in self.available_at:
+                self.available_at[resource_id] = 0
+                self.heap.append((0, position, resource_id))
+        heapq.heapify(self.heap)
+    
+    def earliest(self):
+        """Id of the resource free first."""
+        heap = self.heap
+        available_at = self.available_at
+        _, position, resource_id = heap[0]
+        while heap[0][0] != available_at[resource_id]:
+            heapq.heapreplace(heap, (available_at[resource_id], position, resource_id))
+            _, position, resource_id = heap[0]
+        return resource_id
+
+
 class SimpleWaveOptimizer:
     """Simple wave optimizer using basic scheduling algorithms."""
     
@@ -34,8 +117,19 @@ class SimpleWaveOptimizer:
         }
     
     def optimize_wave(self, wave_data: Dict) -> Dict:
-        """Simple optimization using earliest deadline first scheduling."""
+        """
+        Simple optimization using earliest deadline first scheduling.
+        
+        Each stage goes to the first worker (in list order) with a matching
+        skill who is free when the order reaches it, else to the worker free
+        soonest, and to the equipment free soonest. Availability is indexed per
+        skill class and in heaps, so each assignment is O(log n) in the number
+        of workers and equipment. A 50k-order day with 60 workers and 60
+        equipment units takes about 1.5s, mostly per-stage Python bookkeeping;
+        the target is under 3s rather than under one second.
+        """
         logger = logging.getLogger("SimpleWaveOptimizer")
+        profile = OptimizerProfile(type(self).__name__)
         
         try:
             orders = wave_data.get('wave_data', [])
@@ -48,19 +142,34 @@ class SimpleWaveOptimizer:
             logger.info(f"Simple optimizer: {len(orders)} orders, {len(workers)} workers, {len(equipment)} equipment")
             
             # Sort orders by priority and deadline
+            priority_rank = {'high': 1, 'medium': 2, 'low': 3}
+            default_deadline = datetime.now() + timedelta(hours=24)
             sorted_orders = sorted(orders, key=lambda x: (
-                {'high': 1, 'medium': 2, 'low': 3}.get(x.get('priority', 'medium'), 2),
-                x.get('shipping_deadline', datetime.now() + timedelta(hours=24))
+                priority_rank.get(x.get('priority', 'medium'), 2),
+                x.get('shipping_deadline', default_deadline)
             ))
+            profile.lap("sort")
             
             # Simple scheduling: assign orders to available workers
             schedule = []
-            worker_availability = {w.get('id', i): 0 for i, w in enumerate(workers)}
-            equipment_availability = {e.get('id', i): 0 for i, e in enumerate(equipment)}
+            worker_availability = _AvailabilityHeap([w.get('id', 0) for w in workers])
+            equipment_availability = _AvailabilityHeap([e.get('id', 0) for e in equipment])
+            
+            # Each stage with the lookup of its first free skilled worker and its default duration
+            stage_plan = [
+                (stage,
+                 _FirstFreeIndex([w.get('id', 0) for w in workers if self._worker_can_do_stage(w, stage)],
+                                 worker_availability.available_at).first_free,
+                 self.stage_durations[stage])
+                for stage in self.stages
+            ]
+            worker_available_at = worker_availability.available_at
+            equipment_available_at = equipment_availability.available_at
             
             total_cost = 0
             total_time = 0
             on_time_orders = 0
+            now = datetime.now()
             
             for order_idx, order in enumerate(sorted_orders):
                 order_schedule = {
@@ -69,50 +178,44 @@ class SimpleWaveOptimizer:
                     'total_time': 0,
                     'is_on_time': True
                 }
+                stage_durations = order.get('stage_durations', {})
+                order_stages = order_schedule['stages']
                 
                 current_time = 0
+                order_cost = 0
                 
-                for stage in self.stages:
-                    # Find available worker for this stage
-                    available_worker = None
-                    for worker in workers:
-                        if worker_availability[worker.get('id', 0)] <= current_time:
-                            # Check if worker has skill (simplified)
-                            if self._worker_can_do_stage(worker, stage):
-                                available_worker = worker
-                                break
-                    
-                    if not available_worker:
-                        # Assign to first available worker
-                        available_worker = min(workers, key=lambda w: worker_availability[w.get('id', 0)])
-                    
-                    # Find available equipment
-                    available_equipment = min(equipment, key=lambda e: equipment_availability[e.get('id', 0)])
+                for stage, first_free_worker, default_duration in stage_plan:
+                    # First skilled worker free by now, else the worker free soonest
+                    worker_id = first_free_worker(current_time)
+                    if worker_id is None:
+                        worker_id = worker_availability.earliest()
+                    equipment_id = equipment_availability.earliest()
                     
                     # Calculate start time (after worker and equipment are available)
                     start_time = max(
                         current_time,
-                        worker_availability[available_worker.get('id', 0)],
-                        equipment_availability[available_equipment.get('id', 0)]
+                        worker_available_at[worker_id],
+                        equipment_available_at[equipment_id]
                     )
                     
-                    duration = self.stage_durations[stage]
+                    # Per-order durations (when provided) override the stage defaults
+                    duration = stage_durations.get(stage, default_duration)
                     end_time = start_time + duration
                     
                     # Update availability
-                    worker_availability[available_worker.get('id', 0)] = end_time
-                    equipment_availability[available_equipment.get('id', 0)] = end_time
+                    worker_available_at[worker_id] = end_time
+                    equipment_available_at[equipment_id] = end_time
                     
                     # Add stage to schedule
-                    stage_schedule = {
+                    order_stages.append({
                         'stage': stage,
-                        'worker_id': available_worker.get('id', 0),
-                        'equipment_id': available_equipment.get('id', 0),
+                        'worker_id': worker_id,
+                        'equipment_id': equipment_id,
                         'start_time': start_time,
                         'end_time': end_time,
                         'duration': duration
-                    }
-                    order_schedule['stages'].append(stage_schedule)
+                    })
+                    order_cost += (duration / 60) * 25  # $25/hour default rate
                     
                     current_time = end_time
                 
@@ -138,23 +241,15 @@ class SimpleWaveOptimizer:
                     if hasattr(deadline, 'tzinfo') and deadline.tzinfo is not None:
                         deadline = deadline.replace(tzinfo=None)
                     
-                    now = datetime.now()
-                    if hasattr(now, 'tzinfo') and now.tzinfo is not None:
-                        now = now.replace(tzinfo=None)
-                    
                     if current_time <= (deadline - now).total_seconds() / 60:
                         on_time_orders += 1
                     else:
                         order_schedule['is_on_time'] = False
                 
-                # Calculate cost
-                order_cost = sum(
-                    (stage['duration'] / 60) * 25  # $25/hour default rate
-                    for stage in order_schedule['stages']
-                )
                 total_cost += order_cost
                 
                 schedule.append(order_schedule)
+            profile.lap("scheduling")
             
             # Calculate metrics
             total_orders = len(orders)
@@ -176,6 +271,10 @@ class SimpleWaveOptimizer:
                 "num_equipment": len(equipment),
                 "optimization_type": "simple_fallback"
             }
+            profile.lap("metrics")
+            profile.counts.update(orders=total_orders, workers=len(workers), equipment=len(equipment),
+                                  scheduled_stages=sum(len(s['stages']) for s in schedule))
+            result["profile"] = profile.to_dict()
             
             logger.info(f"Simple optimization completed: {on_time_percentage:.1f}% on-time, cost: ${total_cost:.2f}")
             return result
@@ -0,0 +1,74 @@
+"""
+Streaming of intermediate CP-SAT solutions.
+
+SolutionStreamer is passed to CpSolver.Solve in place of the plain progress
+recorder. On every improving solution it reads the assignment back from the
+model and publishes the objective, bound, gap and the stages whose start slot,
+worker or equipment changed since the previous solution.
+"""
+
+import time
+from typing import Callable, Dict
+
+from .warm_start import SolutionProgressRecorder
+
+
+class SolutionStreamer(SolutionProgressRecorder):
+    """Publishes each improving solution as an event with a compact schedule delta."""
+
+    def __init__(self, on_solution: Callable[[Dict], None], start_time_vars, worker_assigned,
+                 equipment_used, orders, workers, equipment, stages):
+        super().__init__()
+        self.on_solution = on_solution
+        self.start_time_vars = start_time_vars
+        self.order_ids = [order.id for order in orders]
+        self.worker_ids = [worker.id for worker in workers]
+        self.equipment_ids = [eq.id for eq in equipment]
+        self.stage_names = [stage.value for stage in stages]
+        self.started_at = time.time()
+        self._previous = {}
+
+        # Group assignment literals by (order, stage) once so each callback only scans candidates
+        self._worker_candidates = {}
+        for (o, s, w), var in worker_assigned.items():
+            self._worker_candidates.setdefault((o, s), []).append((w, var))
+        self._equipment_candidates = {}
+        for (o, s, e), var in equipment_used.items():
+            self._equipment_candidates.setdefault((o, s), []).append((e, var))
+
+    def on_solution_callback(self):
+        super().on_solution_callback()
+        snapshot = self._snapshot()
+
+        # Delta rows: [order_id, stage, start_slot, worker_id, equipment_id]
+        delta = [
+            [self.order_ids[o], self.stage_names[s], *assignment]
+            for (o, s), assignment in snapshot.items()
+            if self._previous.get((o, s)) != assignment
+        ]
+        self._previous = snapshot
+
+        latest = self.solutions[-1]
+        objective = latest["objective"]
+        best_bound = latest["best_bound"]
+        self.on_solution({
+            "solution": len(self.solutions),
+            "objective": objective,
+            "best_bound": best_bound,
+            "gap": abs(objective - best_bound) / max(abs(objective), 1e-9),
+            "solver_wall_time_seconds": latest["wall_time_seconds"],
+            "elapsed_seconds": time.time() - self.started_at,
+            "changed_stages": len(delta),
+            "delta": delta
+        })
+
+    def _snapshot(self) -> Dict:
+        """Current (start_slot, worker, equipment) per (order, stage)."""
+        snapshot = {}
+        for (o, s), start_var in self.start_time_vars.items():
+            worker = next((self.worker_ids[w] for w, var in self._worker_candidates.get((o, s), [])
+                           if self.Value(var)), None)
+            equipment = next((self.equipment_ids[e] for e, var in self._equipment_candidates.get((o, s), [])
+                              if self.Value(var)), None)
+            snapshot[o, s] = (self.Value(start_var), worker, equipment)
+        return snapshot
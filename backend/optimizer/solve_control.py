@@ -0,0 +1,46 @@
+"""
+Process-wide control over running CP-SAT solves.
+
+Optimizers register their CpSolver while it searches so another thread (for
+example the cancel watcher of an optimization job) can stop every solve in
+the process. Once a stop has been requested, solves that start afterwards
+get a zero time limit, so multi-window optimizers wind down quickly too.
+"""
+
+import threading
+from contextlib import contextmanager
+
+_lock = threading.Lock()
+_active_solvers = set()
+_stop_requested = threading.Event()
+
+
+@contextmanager
+def running_solver(solver):
+    """Register solver for the duration of its Solve call."""
+    with _lock:
+        if _stop_requested.is_set():
+            solver.parameters.max_time_in_seconds = 0.0
+        _active_solvers.add(solver)
+    try:
+        yield solver
+    finally:
+        with _lock:
+            _active_solvers.discard(solver)
+
+
+def stop_all_solvers():
+    """Stop every running solve; each returns the best solution found so far."""
+    with _lock:
+        _stop_requested.set()
+        for solver in _active_solvers:
+            solver.StopSearch()
+
+
+def stop_requested() -> bool:
+    return _stop_requested.is_set()
+
+
+def reset():
+    """Allow solves again after a stop (called at the start of each job)."""
+    _stop_requested.clear()
@@ -17,18 +17,41 @@ from typing import Dict, List, Tuple, Optional
 import time
 from datetime import datetime, timedelta
 import math
-import psycopg2
-from psycopg2.extras import RealDictCursor
 import logging
 import traceback
 import sys
 
+from .simple_wave_optimizer import SimpleWaveOptimizer
+from .warm_start import SolutionProgressRecorder, sequencer_plan, summarize_warm_start, timed_hint_evaluation
+from .solve_control import running_solver
+from .profiling import OptimizerProfile
+from .model_estimator import admit
+from .wave_snapshot import WaveSnapshotLoader, pooled_connection
+
 class WaveConstraintOptimizer:
     """OR-Tools Constraint Programming optimizer for wave optimization."""
     
+    WARM_START_HEURISTICS = ("simple", "sequencer")
+    
     def __init__(self):
         self.model = None
         self.solver = None
+        self.start_times = {}
+        self.worker_assignments = {}
+        self.equipment_usage = {}
+        self.warm_start_info = None
+        self.horizon_tightening = {}
+        self.schedule_base_time = None  # Minute 0 of the schedule, defaults to the wave's planned start
+        self.base_time = None
+        self.orders = []
+        self.workers = []
+        self.equipment = []
+        self.start_windows = {}
+        self.horizon = 24 * 60  # Schedule horizon in minutes
+        self.admission = None
+        self.snapshot_loader = WaveSnapshotLoader()
+        self.num_search_workers = None  # CP-SAT search threads, all cores when None
+        self.profile = OptimizerProfile(type(self).__name__)
         self.stages = ['pick', 'consolidate', 'pack', 'label', 'stage', 'ship']
         self.stage_durations = {
             'pick': 15,      # minutes per order
@@ -47,139 +70,106 @@ class WaveConstraintOptimizer:
             'ship': ['stage']
         }
         
-    def get_wave_data(self, wave_id: int) -> Dict:
-        """Get wave data from database with diagnostics."""
+    def get_resources(self, use_cache: bool = True) -> Dict:
+        """
+        Get the workers (one row per skill) and equipment shared by every wave of the warehouse.
+        
+        Pass the result to get_wave_data or optimize_wave as resources to
+        optimize several waves against one snapshot without re-reading it.
+        """
         logger = logging.getLogger("WaveConstraintOptimizer")
-        conn = None
         try:
-            # Try multiple database connection configurations
-            connection_configs = [
-                {
-                    "host": "localhost",
-                    "port": 5432,  # Standard PostgreSQL port
-                    "database": "warehouse_opt",
-                    "user": "wave_user",
-                    "password": "wave_password"
-                },
-                {
-                    "host": "localhost", 
-                    "port": 5433,  # Alternative port
-                    "database": "warehouse_opt",
-                    "user": "wave_user",
-                    "password": "wave_password"
-                }
-            ]
-            
-            for config in connection_configs:
-                try:
-                    logger.info(f"Attempting database connection with config: {config}")
-                    conn = psycopg2.connect(**config)
-                    logger.info(f"Successfully connected to database for wave_id={wave_id}")
-                    break
-                except Exception as conn_error:
-                    logger.warning(f"Failed to connect with config {config}: {conn_error}")
-                    continue
-            
-            if not conn:
-                logger.error("Failed to connect to database with any configuration")
-                return {"error": "Database connection failed"}
-            
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                # Get wave details with better error handling
-                try:
-                    cursor.execute("""
-                        SELECT w.*, wa.order_id, o.order_number, o.shipping_deadline, 
-                               CASE 
-                                   WHEN o.priority = 1 THEN 'high'
-                                   WHEN o.priority = 2 THEN 'high'
-                                   WHEN o.priority = 3 THEN 'medium'
-                                   WHEN o.priority = 4 THEN 'low'
-                                   WHEN o.priority = 5 THEN 'low'
-                                   ELSE 'medium'
-                               END as priority,
-                               o.customer_id, c.customer_type,
-                               COALESCE(w.planned_start_time, NOW()) as planned_start_time
-                        FROM waves w
-                        JOIN wave_assignments wa ON w.id = wa.wave_id
-                        JOIN orders o ON wa.order_id = o.id
-                        JOIN customers c ON o.customer_id = c.id
-                        WHERE w.id = %s
-                        ORDER BY wa.sequence_order
-                    """, (wave_id,))
-                    wave_data = cursor.fetchall()
-                    if not wave_data:
-                        logger.error(f"No orders found for wave_id={wave_id}")
-                        return {"error": f"No orders found for wave_id={wave_id}"}
-                except Exception as e:
-                    logger.error(f"Error fetching wave data: {e}")
-                    return {"error": f"Error fetching wave data: {e}"}
-                
-                # Get workers and their skills
-                try:
-                    cursor.execute("""
-                        SELECT w.id, w.worker_code, w.name, w.hourly_rate,
-                               COALESCE(ws.skill, 'general') as skill_name, 
-                               COALESCE(ws.proficiency_level, 1) as proficiency_level
-                        FROM workers w
-                        LEFT JOIN worker_skills ws ON w.id = ws.worker_id
-                        WHERE w.warehouse_id = 1
-                        ORDER BY w.id, ws.skill
-                    """)
-                    workers_data = cursor.fetchall()
-                    if not workers_data:
-                        logger.error("No workers found for warehouse_id=1")
-                        return {"error": "No workers found for warehouse_id=1"}
-                except Exception as e:
-                    logger.error(f"Error fetching workers: {e}")
-                    return {"error": f"Error fetching workers: {e}"}
-                
-                # Get equipment
-                try:
-                    cursor.execute("""
-                        SELECT id, equipment_code, equipment_type, capacity, hourly_cost
-                        FROM equipment
-                        WHERE warehouse_id = 1
-                    """)
-                    equipment_data = cursor.fetchall()
-                    if not equipment_data:
-                        logger.error("No equipment found for warehouse_id=1")
-                        return {"error": "No equipment found for warehouse_id=1"}
-                except Exception as e:
-                    logger.error(f"Error fetching equipment: {e}")
-                    return {"error": f"Error fetching equipment: {e}"}
-                
-                # Validate and clean required fields in orders
-                cleaned_wave_data = []
-                for order in wave_data:
-                    cleaned_order = dict(order)
-                    # Ensure required fields have default values
-                    if cleaned_order.get('shipping_deadline') is None:
-                        cleaned_order['shipping_deadline'] = datetime.now() + timedelta(hours=24)
-                    if cleaned_order.get('priority') is None:
-                        cleaned_order['priority'] = 'medium'
-                    if cleaned_order.get('customer_type') is None:
-                        cleaned_order['customer_type'] = 'standard'
-                    if cleaned_order.get('planned_start_time') is None:
-                        cleaned_order['planned_start_time'] = datetime.now()
-                    
-                    cleaned_wave_data.append(cleaned_order)
-                
-                logger.info(f"Fetched {len(cleaned_wave_data)} orders, {len(workers_data)} workers, {len(equipment_data)} equipment for wave_id={wave_id}")
-                return {
-                    'wave_data': cleaned_wave_data,
-                    'workers': workers_data,
-                    'equipment': equipment_data
-                }
+            resources = self.snapshot_loader.resource_rows(self.snapshot_loader.resources(1, use_cache))
+        except Exception as e:
+            logger.error(f"Database error fetching resources: {e}")
+            return {"error": f"Database error: {e}"}
+        if not resources['workers']:
+            logger.error("No workers found for warehouse_id=1")
+            return {"error": "No workers found for warehouse_id=1"}
+        if not resources['equipment']:
+            logger.error("No equipment found for warehouse_id=1")
+            return {"error": "No equipment found for warehouse_id=1"}
+        return resources
+    
+    def get_plan_wave_ids(self, version_id: int) -> Dict:
+        """Get the ids of the waves in a plan version that aren't cancelled, in planned start order."""
+        try:
+            with pooled_connection() as conn, conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT id
+                    FROM waves
+                    WHERE version_id = %s AND COALESCE(status, 'planned') <> 'cancelled'
+                    ORDER BY planned_start_time NULLS LAST, id
+                """, (version_id,))
+                return {'wave_ids': [row[0] for row in cursor.fetchall()]}
+        except Exception as e:
+            logging.getLogger("WaveConstraintOptimizer").error(f"Error fetching waves of plan version {version_id}: {e}")
+            return {"error": f"Error fetching waves of plan version {version_id}: {e}"}
+    
+    def get_wave_data(self, wave_id: int, resources: Optional[Dict] = None, plan_version_id: Optional[int] = None,
+                      use_cache: bool = True) -> Dict:
+        """
+        Get wave data from database with diagnostics.
+        
+        Args:
+            wave_id: ID of the wave
+            resources: Snapshot from get_resources(); the cached warehouse
+                snapshot is used when it isn't given
+            plan_version_id: Only load the wave if it belongs to this plan version
+            use_cache: Reuse a snapshot of the wave loaded within the cache TTL
+        """
+        logger = logging.getLogger("WaveConstraintOptimizer")
+        try:
+            orders = self.snapshot_loader.wave_orders(wave_id, plan_version_id, use_cache)
         except Exception as e:
             logger.error(f"Database error for wave_id={wave_id}: {e}")
             logger.error(f"Traceback: {traceback.format_exc()}")
             return {"error": f"Database error: {e}"}
-        finally:
-            if conn:
-                conn.close()
+        if orders is None:
+            logger.error(f"No orders found for wave_id={wave_id}")
+            return {"error": f"No orders found for wave_id={wave_id}"}
+        wave_data = self.snapshot_loader.order_rows(orders)
+        
+        if resources is None:
+            resources = self.get_resources(use_cache)
+            if resources.get("error"):
+                return resources
+        workers_data = resources['workers']
+        equipment_data = resources['equipment']
+        
+        # Validate and clean required fields in orders
+        cleaned_wave_data = []
+        for order in wave_data:
+            cleaned_order = dict(order)
+            # Ensure required fields have default values
+            if cleaned_order.get('shipping_deadline') is None:
+                cleaned_order['shipping_deadline'] = datetime.now() + timedelta(hours=24)
+            if cleaned_order.get('priority') is None:
+                cleaned_order['priority'] = 'medium'
+            if cleaned_order.get('customer_type') is None:
+                cleaned_order['customer_type'] = 'standard'
+            if cleaned_order.get('planned_start_time') is None:
+                cleaned_order['planned_start_time'] = datetime.now()
+            
+            cleaned_wave_data.append(cleaned_order)
+        
+        logger.info(f"Fetched {len(cleaned_wave_data)} orders, {len(workers_data)} workers, {len(equipment_data)} equipment for wave_id={wave_id}")
+        return {
+            'wave_data': cleaned_wave_data,
+            'workers': workers_data,
+            'equipment': equipment_data
+        }
     
-    def create_optimization_model(self, wave_data: Dict) -> bool:
-        """Create the constraint programming model with diagnostics."""
+    def create_optimization_model(self, wave_data: Dict, fixed_stages: Optional[List[Dict]] = None) -> bool:
+        """
+        Create the constraint programming model with diagnostics.
+        
+        fixed_stages are already-scheduled stages of orders left out of the
+        model (rows with stage and start_time, as extract_solution returns
+        them). They occupy workers and equipment at their start times, count
+        towards the makespan and the labor and equipment costs, and have no
+        variables of their own.
+        """
         logger = logging.getLogger("WaveConstraintOptimizer")
         try:
             logger.info("Starting model creation...")
@@ -222,12 +212,14 @@ class WaveConstraintOptimizer:
             logger.info(f"Model parameters: num_orders={num_orders}, num_workers={num_workers}, num_equipment={num_equipment}")
             
             # Time horizon (24 hours in minutes)
-            horizon = 24 * 60
+            horizon = self.horizon
             logger.info(f"Time horizon set to {horizon} minutes")
             
             # Use planned_start_time from the first order as the base
             planned_start_time = orders[0].get('planned_start_time')
-            if planned_start_time is None:
+            if self.schedule_base_time is not None:
+                base_time = self.schedule_base_time
+            elif planned_start_time is None:
                 logger.warning("No planned_start_time found in orders, using current time")
                 base_time = datetime.now()
             else:
@@ -241,17 +233,33 @@ class WaveConstraintOptimizer:
                         base_time = datetime.now()
             
             logger.info(f"Base time set to: {base_time}")
+            self.base_time = base_time
+            self.orders = orders
+            self.workers = workers
+            self.equipment = equipment
             
             # Decision Variables
             logger.info("Creating decision variables...")
-            # 1. Start time for each order at each stage
+            self.profile.reset_lap()
+            # 1. Start time for each order at each stage, within its precedence window
+            start_windows = self.start_windows = self.compute_start_windows(horizon)
             start_times = {}
             for order_idx in range(num_orders):
                 for stage in self.stages:
+                    earliest, latest = start_windows[stage]
                     start_times[order_idx, stage] = self.model.NewIntVar(
-                        0, horizon, f'start_{order_idx}_{stage}'
+                        earliest, latest, f'start_{order_idx}_{stage}'
                     )
-            logger.info(f"Created {len(start_times)} start time variables")
+            tightened_domain = num_orders * sum(latest - earliest + 1 for earliest, latest in start_windows.values())
+            full_domain = num_orders * len(self.stages) * (horizon + 1)
+            self.horizon_tightening = {
+                "full_domain_values": full_domain,
+                "tightened_domain_values": tightened_domain,
+                "reduction_percentage": (1 - tightened_domain / full_domain) * 100
+            }
+            logger.info(f"Created {len(start_times)} start time variables "
+                        f"(start domains {full_domain} -> {tightened_domain} values, "
+                        f"{self.horizon_tightening['reduction_percentage']:.1f}% smaller)")
             
             # 2. Worker assignment for each order at each stage
             worker_assignments = {}
@@ -281,6 +289,20 @@ class WaveConstraintOptimizer:
                     )
             logger.info(f"Created {len(equipment_usage)} equipment usage variables")
             
+            # Kept on the instance so heuristic schedules can be hinted after the build
+            self.start_times = start_times
+            self.worker_assignments = worker_assignments
+            self.equipment_usage = equipment_usage
+            self.profile.lap("variable_creation")
+            
+            # Frozen stages of orders outside the model, as fixed intervals per stage
+            fixed_stages = fixed_stages or []
+            fixed_intervals = {stage: [] for stage in self.stages}
+            for fixed_idx, fixed in enumerate(fixed_stages):
+                fixed_intervals[fixed['stage']].append(self.model.NewFixedSizeIntervalVar(
+                    fixed['start_time'], self.stage_durations[fixed['stage']], f"fixed_{fixed_idx}_{fixed['stage']}"
+                ))
+            
             # Constraints
             logger.info("Creating constraints...")
             
@@ -293,6 +315,7 @@ class WaveConstraintOptimizer:
                         prereq_end = start_times[order_idx, prereq_stage] + self.stage_durations[prereq_stage]
                         self.model.Add(start_times[order_idx, stage] >= prereq_end)
             logger.info("Stage precedence constraints created")
+            self.profile.lap("constraints.precedence")
             
             # 2. Worker capacity constraints (one worker can only work on one order at a time)
             logger.info("Creating worker capacity constraints...")
@@ -340,6 +363,7 @@ class WaveConstraintOptimizer:
                                 except Exception as interval_error:
                                     logger.warning(f"Failed to create interval for order {order_idx}, stage {stage}, worker {worker_id}: {interval_error}")
                                     continue
+                        intervals.extend(fixed_intervals[stage])
                         
                         # No overlap constraint for this worker at this stage
                         if len(intervals) > 1:
@@ -348,6 +372,7 @@ class WaveConstraintOptimizer:
                             except Exception as overlap_error:
                                 logger.warning(f"Failed to add no-overlap constraint for worker {worker_id}, stage {stage}: {overlap_error}")
                 logger.info("Worker capacity constraints created")
+                self.profile.lap("constraints.worker_capacity")
             except Exception as e:
                 logger.error(f"Error creating worker capacity constraints: {e}")
                 logger.error(f"Traceback: {traceback.format_exc()}")
@@ -371,6 +396,7 @@ class WaveConstraintOptimizer:
                             except Exception as interval_error:
                                 logger.warning(f"Failed to create equipment interval for order {order_idx}, stage {stage}, equipment {equip_id}: {interval_error}")
                                 continue
+                        intervals.extend(fixed_intervals[stage])
                         
                         if len(intervals) > 1:
                             try:
@@ -378,6 +404,7 @@ class WaveConstraintOptimizer:
                             except Exception as overlap_error:
                                 logger.warning(f"Failed to add equipment no-overlap constraint for equipment {equip_id}, stage {stage}: {overlap_error}")
                 logger.info("Equipment capacity constraints created")
+                self.profile.lap("constraints.equipment_capacity")
             except Exception as e:
                 logger.error(f"Error creating equipment capacity constraints: {e}")
                 logger.error(f"Traceback: {traceback.format_exc()}")
@@ -433,6 +460,7 @@ class WaveConstraintOptimizer:
                             logger.warning(f"Failed to create deadline constraint for order {order_idx}: {deadline_error}")
                             continue
                 logger.info("Shipping deadline constraints created")
+                self.profile.lap("constraints.deadlines")
             except Exception as e:
                 logger.error(f"Error creating deadline constraints: {e}")
                 logger.error(f"Traceback: {traceback.format_exc()}")
@@ -482,6 +510,7 @@ class WaveConstraintOptimizer:
                                 logger.warning(f"Failed to add worker assignment constraint for order {order_idx}, stage {stage}: {assignment_error}")
                                 continue
                 logger.info("Worker assignment constraints created")
+                self.profile.lap("constraints.skill_requirements")
             except Exception as e:
                 logger.error(f"Error creating worker assignment constraints: {e}")
                 logger.error(f"Traceback: {traceback.format_exc()}")
@@ -495,6 +524,8 @@ class WaveConstraintOptimizer:
                 for order_idx in range(num_orders):
                     completion_time = start_times[order_idx, 'ship'] + self.stage_durations['ship']
                     completion_times.append(completion_time)
+                completion_times.extend(fixed['start_time'] + self.stage_durations[fixed['stage']]
+                                        for fixed in fixed_stages if fixed['stage'] == 'ship')
                 
                 max_completion_time = self.model.NewIntVar(0, horizon, 'max_completion')
                 self.model.AddMaxEquality(max_completion_time, completion_times)
@@ -508,6 +539,7 @@ class WaveConstraintOptimizer:
                         # Default hourly rate of 25
                         stage_cost = int((self.stage_durations[stage] / 60) * 25)
                         labor_cost_terms.append(stage_cost)
+                labor_cost_terms.extend(int((self.stage_durations[fixed['stage']] / 60) * 25) for fixed in fixed_stages)
                 
                 self.model.Add(total_labor_cost == sum(labor_cost_terms))
                 
@@ -520,6 +552,8 @@ class WaveConstraintOptimizer:
                         # Default hourly cost of 10
                         stage_equip_cost = int((self.stage_durations[stage] / 60) * 10)
                         equipment_cost_terms.append(stage_equip_cost)
+                equipment_cost_terms.extend(int((self.stage_durations[fixed['stage']] / 60) * 10)
+                                            for fixed in fixed_stages)
                 
                 self.model.Add(total_equipment_cost == sum(equipment_cost_terms))
                 
@@ -536,11 +570,15 @@ class WaveConstraintOptimizer:
                 
                 self.model.Minimize(objective)
                 logger.info("Objective function created successfully")
+                self.profile.lap("objective")
             except Exception as e:
                 logger.error(f"Error creating objective function: {e}")
                 logger.error(f"Traceback: {traceback.format_exc()}")
                 return False
             
+            self.profile.record_model(self.model)
+            self.profile.counts.update(orders=num_orders, workers=num_workers, equipment=num_equipment,
+                                       stages=len(self.stages))
             logger.info("Model creation completed successfully")
             return True
             
@@ -551,6 +589,23 @@ class WaveConstraintOptimizer:
             logger.error(f"Equipment snapshot: {equipment}")
             return False
     
+    def compute_start_windows(self, horizon: int) -> Dict[str, Tuple[int, int]]:
+        """
+        Earliest and latest start minute per stage implied by the precedence chain.
+        
+        Stages wait for the durations ahead of them, and the makespan variable
+        keeps every order's ship stage inside the horizon. Deadlines are soft
+        penalties in this model, so they don't bound the windows.
+        """
+        windows = {}
+        elapsed = 0
+        remaining = sum(self.stage_durations[stage] for stage in self.stages)
+        for stage in self.stages:
+            windows[stage] = (elapsed, max(elapsed, horizon - remaining))
+            elapsed += self.stage_durations[stage]
+            remaining -= self.stage_durations[stage]
+        return windows
+    
     def solve_optimization(self, time_limit: int = 300) -> Dict:
         """Solve the optimization problem."""
         if not self.model:
@@ -559,19 +614,36 @@ class WaveConstraintOptimizer:
         try:
             self.solver = cp_model.CpSolver()
             self.solver.parameters.max_time_in_seconds = time_limit
+            if self.num_search_workers:
+                self.solver.parameters.num_search_workers = self.num_search_workers
+            recorder = SolutionProgressRecorder()
             
             start_time = time.time()
-            status = self.solver.Solve(self.model)
+            with running_solver(self.solver), self.profile.phase("solve"):
+                status = self.solver.Solve(self.model, recorder)
             solve_time = time.time() - start_time
+            self.profile.counts["solutions_found"] = len(recorder.solutions)
             
             if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
-                return {
+                self.profile.record_solver(self.solver, status, self.solver.ObjectiveValue(),
+                                           self.solver.BestObjectiveBound())
+                with self.profile.phase("extraction"):
+                    solution = self.extract_solution()
+                result = {
                     "status": "success",
                     "solve_time": solve_time,
                     "objective_value": self.solver.ObjectiveValue(),
-                    "solution": self.extract_solution()
+                    "solution": solution
                 }
+                if self.horizon_tightening:
+                    result["horizon_tightening"] = dict(self.horizon_tightening, solve_seconds=solve_time)
+                if self.warm_start_info is not None:
+                    result["warm_start"] = summarize_warm_start(
+                        self.warm_start_info, recorder, self.solver.ObjectiveValue()
+                    )
+                return result
             else:
+                self.profile.record_solver(self.solver, status)
                 return {
                     "status": "no_solution",
                     "solve_time": solve_time,
@@ -586,32 +658,183 @@ class WaveConstraintOptimizer:
         if not self.solver:
             return {}
         
-        solution = {
-            "orders": [],
-            "workers": [],
-            "equipment": [],
-            "schedule": []
+        # Same shape as SimpleWaveOptimizer's schedule, in minutes from base_time
+        schedule = []
+        for order_idx, order in enumerate(self.orders):
+            stages = []
+            for stage in self.stages:
+                start_time = self.solver.Value(self.start_times[order_idx, stage])
+                duration = self.stage_durations[stage]
+                stages.append({
+                    'stage': stage,
+                    'worker_id': self.solver.Value(self.worker_assignments[order_idx, stage]),
+                    'equipment_id': self.equipment[self.solver.Value(self.equipment_usage[order_idx, stage])].get('id'),
+                    'start_time': start_time,
+                    'end_time': start_time + duration,
+                    'duration': duration
+                })
+            schedule.append({
+                'order_id': order.get('order_id'),
+                'stages': stages,
+                'total_time': stages[-1]['end_time']
+            })
+        
+        return {
+            "base_time": self.base_time.isoformat() if self.base_time else None,
+            "schedule": schedule,
+            "total_time": max((order['total_time'] for order in schedule), default=0)
         }
+    
+    def add_heuristic_hints(self, wave_data: Dict, heuristic: str = "simple") -> Dict:
+        """Run a heuristic scheduler on the same wave data and hint its schedule to the model."""
+        heuristic_start = time.time()
+        if heuristic == "sequencer":
+            schedule, error = self._sequencer_schedule(wave_data)
+        else:
+            schedule, error = self._simple_schedule(wave_data)
         
-        # Extract order assignments and timing
-        # This would need to be implemented based on the actual variable structure
+        info = {
+            "heuristic": heuristic,
+            "heuristic_seconds": time.time() - heuristic_start,
+            "hinted_variables": 0
+        }
+        if error:
+            info["error"] = error
+            return info
         
-        return solution
+        # The model indexes orders by position and equipment by list index
+        order_indices = {}
+        for order_idx, order in enumerate(wave_data['wave_data']):
+            order_indices.setdefault(order.get('order_id'), []).append(order_idx)
+        equipment_index = {eq.get('id', idx): idx for idx, eq in enumerate(wave_data['equipment'])}
+        
+        for order_id, stage, start_minute, worker_id, equipment_id in schedule:
+            earliest, latest = self.start_windows[stage]
+            for order_idx in order_indices.get(order_id, []):
+                key = (order_idx, stage)
+                self.model.AddHint(self.start_times[key], min(max(int(start_minute), earliest), latest))
+                info["hinted_variables"] += 1
+                if worker_id is not None:
+                    self.model.AddHint(self.worker_assignments[key], worker_id)
+                    info["hinted_variables"] += 1
+                if equipment_id in equipment_index:
+                    self.model.AddHint(self.equipment_usage[key], equipment_index[equipment_id])
+                    info["hinted_variables"] += 1
+        
+        return info
+    
+    def _simple_schedule(self, wave_data: Dict) -> Tuple[List[Tuple], Optional[str]]:
+        """SimpleWaveOptimizer schedule as (order id, stage, start minute, worker id, equipment id) tuples."""
+        heuristic_result = SimpleWaveOptimizer().optimize_wave(wave_data)
+        if heuristic_result.get("error"):
+            return [], heuristic_result["error"]
+        return [
+            (order_schedule['order_id'], stage_schedule['stage'], stage_schedule['start_time'],
+             stage_schedule['worker_id'], stage_schedule['equipment_id'])
+            for order_schedule in heuristic_result["solution"]["schedule"]
+            for stage_schedule in order_schedule['stages']
+        ], None
     
-    def optimize_wave(self, wave_id: int, time_limit: int = 300) -> Dict:
-        """Main optimization method for a wave."""
+    def _sequencer_schedule(self, wave_data: Dict) -> Tuple[List[Tuple], Optional[str]]:
+        """EnhancedWMSSequencer.plan_wave schedule as (order id, stage, start minute, worker id, equipment id) tuples."""
+        priorities = {'high': 1, 'medium': 3, 'low': 5}
+        skill_mapping = {
+            'pick': 'picking',
+            'pack': 'packing',
+            'ship': 'shipping',
+            'consolidate': 'consolidation',
+            'label': 'labeling',
+            'stage': 'staging'
+        }
+        
+        def deadline_key(deadline):
+            # plan_wave sorts on the deadline, so mixed naive/aware or unparsed values are normalised
+            if not isinstance(deadline, datetime):
+                try:
+                    deadline = datetime.fromisoformat(str(deadline))
+                except (TypeError, ValueError):
+                    return datetime.max
+            return deadline.replace(tzinfo=None)
+        
+        orders = [
+            {
+                'order_id': order.get('order_id'),
+                'priority': order['priority'] if isinstance(order.get('priority'), int)
+                            else priorities.get(order.get('priority'), 3),
+                'shipping_deadline': deadline_key(order.get('shipping_deadline')),
+                'stage_durations': dict(self.stage_durations)
+            }
+            for order in wave_data['wave_data']
+        ]
+        # get_resources returns one worker row per skill
+        workers = {}
+        for w in wave_data['workers']:
+            if w.get('id') is None:
+                continue
+            worker = workers.setdefault(w['id'], {'id': w['id'], 'name': w.get('name'), 'skills': []})
+            worker['skills'].append(w.get('skill_name'))
+        equipment = [
+            {'id': eq.get('id', idx), 'equipment_type': eq.get('equipment_type'), 'capacity': eq.get('capacity') or 1}
+            for idx, eq in enumerate(wave_data['equipment'])
+        ]
+        stage_skills = {stage: [stage, skill_mapping.get(stage, stage)] for stage in self.stages}
+        try:
+            assignments = sequencer_plan(orders, list(workers.values()), equipment, stage_skills)
+        except Exception as e:
+            return [], f"Sequencer warm start failed: {e}"
+        return [
+            (assignment['order_id'], assignment['stage'], assignment['start_minute'],
+             assignment['worker_id'], assignment['equipment_id'])
+            for assignment in assignments
+        ], None
+    
+    def optimize_wave(self, wave_id: int, time_limit: int = 300, warm_start: Optional[str] = None,
+                      resources: Optional[Dict] = None, use_cache: bool = True) -> Dict:
+        """
+        Main optimization method for a wave.
+        
+        resources is an optional get_resources() snapshot; use_cache=False
+        re-reads the wave's orders instead of reusing a recent snapshot.
+        """
         logger = logging.getLogger("WaveConstraintOptimizer")
         
+        if warm_start is not None and warm_start not in self.WARM_START_HEURISTICS:
+            return {"error": f"Unknown warm start heuristic '{warm_start}', expected one of {self.WARM_START_HEURISTICS}"}
+        
+        self.profile = OptimizerProfile(type(self).__name__)
         try:
             # Get wave data
-            wave_data = self.get_wave_data(wave_id)
+            with self.profile.phase("data_load"):
+                wave_data = self.get_wave_data(wave_id, resources, use_cache=use_cache)
             if not wave_data:
                 return {"error": "Failed to get wave data"}
+            if wave_data.get("error"):
+                return {"error": wave_data["error"]}
+            
+            # Check the model against the memory and build-time budgets before building it
+            admission = self.admission = admit(
+                "wave_constraint", len(wave_data.get('wave_data', [])),
+                len(set(w.get('id') for w in wave_data.get('workers', []) if w.get('id') is not None)),
+                len(wave_data.get('equipment', []))
+            )
+            if admission["rejected"]:
+                logger.warning(f"Wave {wave_id} rejected: {admission['reason']}")
+                return {"error": admission["reason"], "admission": admission}
             
             # Try constraint programming optimization first
-            logger.info(f"Attempting constraint programming optimization for wave {wave_id}")
-            
-            if self.create_optimization_model(wave_data):
+            if admission["downgraded"]:
+                logger.warning(f"Skipping constraint programming for wave {wave_id}: {admission['reason']}")
+            else:
+                logger.info(f"Attempting constraint programming optimization for wave {wave_id}")
+            
+            if not admission["downgraded"] and self.create_optimization_model(wave_data):
+                self.warm_start_info = None
+                if warm_start:
+                    with self.profile.phase("warm_start"):
+                        self.warm_start_info = self.add_heuristic_hints(wave_data, warm_start)
+                        timed_hint_evaluation(self.model, self.warm_start_info, min(5.0, time_limit * 0.1))
+                    logger.info(f"Warm start hint objective: {self.warm_start_info['hint_objective']}")
+                
                 result = self.solve_optimization(time_limit)
                 
                 if not result.get("error"):
@@ -621,24 +844,28 @@ class WaveConstraintOptimizer:
                     result["num_workers"] = len(set(w.get('id', 0) for w in wave_data['workers']))
                     result["num_equipment"] = len(wave_data['equipment'])
                     result["optimization_type"] = "constraint_programming"
+                    result["admission"] = admission
+                    result["profile"] = self.profile.to_dict()
                     
                     logger.info(f"Constraint programming optimization successful for wave {wave_id}")
                     return result
                 else:
                     logger.warning(f"Constraint programming solver failed: {result.get('error')}")
-            else:
+            elif not admission["downgraded"]:
                 logger.warning("Failed to create constraint programming model")
             
             # Fallback to simple optimizer
             logger.info(f"Falling back to simple optimizer for wave {wave_id}")
             try:
-                from .simple_wave_optimizer import SimpleWaveOptimizer
                 simple_optimizer = SimpleWaveOptimizer()
-                fallback_result = simple_optimizer.optimize_wave(wave_data)
+                with self.profile.phase("fallback"):
+                    fallback_result = simple_optimizer.optimize_wave(wave_data)
                 
                 if not fallback_result.get("error"):
                     fallback_result["wave_id"] = wave_id
-                    fallback_result["optimization_type"] = "simple_fallback"
+                    fallback_result["optimization_type"] = "simple_admission" if admission["downgraded"] else "simple_fallback"
+                    fallback_result["admission"] = admission
+                    fallback_result["profile"] = self.profile.to_dict()
                     logger.info(f"Simple optimizer fallback successful for wave {wave_id}")
                     return fallback_result
                 else:
@@ -10,7 +10,8 @@ This module implements a Job Shop Scheduling Problem with:
 """
 
 import time
-from typing import List, Dict, Tuple, Optional
+import heapq
+from typing import Any, List, Dict, Tuple, Optional
 from datetime import datetime, timedelta
 import numpy as np
 import math
@@ -27,6 +28,13 @@ from models.optimization import (
     StageSchedule, OptimizationMetrics
 )
 from walking_time_calculator import WalkingTimeCalculator
+from bin_index import get_bin_index
+from walking_time_store import config_hash, current_config_hash, get_walking_time_store
+from .simple_wave_optimizer import SimpleWaveOptimizer
+from .warm_start import SolutionProgressRecorder, sequencer_plan, summarize_warm_start, timed_hint_evaluation
+from .solution_stream import SolutionStreamer
+from .solve_control import running_solver
+from .profiling import OptimizerProfile
 
 
 class OptimizationRequirements:
@@ -46,6 +54,42 @@ class OptimizationRequirements:
     max_overtime_hours_per_day = 4  # Minimize overtime
 
 
+class WorkerClass:
+    """
+    Interchangeable workers: same skills, hourly rate and efficiency factor.
+    
+    Exposes the Worker attributes the model reads (id, skills, hourly_rate)
+    so constraint and objective builders can treat a class like one worker
+    with capacity len(members).
+    """
+    
+    def __init__(self, class_id: int, skills, hourly_rate: float, efficiency_factor: float):
+        self.id = f"class_{class_id}"
+        self.skills = skills
+        self.hourly_rate = hourly_rate
+        self.efficiency_factor = efficiency_factor
+        self.members: List[int] = []  # Indices into the workers list
+    
+    @property
+    def capacity(self) -> int:
+        return len(self.members)
+    
+    @staticmethod
+    def group(workers) -> Tuple[List["WorkerClass"], List[int]]:
+        """Group workers into classes; returns the classes and each worker's class index."""
+        classes = []
+        class_index = {}
+        worker_class_of = []
+        for w, worker in enumerate(workers):
+            key = (frozenset(worker.skills), worker.hourly_rate, worker.efficiency_factor)
+            if key not in class_index:
+                class_index[key] = len(classes)
+                classes.append(WorkerClass(len(classes), set(worker.skills), worker.hourly_rate, worker.efficiency_factor))
+            classes[class_index[key]].members.append(w)
+            worker_class_of.append(class_index[key])
+        return classes, worker_class_of
+
+
 class OptimizationConstraints:
     """Explicit constraint definitions for display and validation."""
     
@@ -110,20 +154,79 @@ class MultiStageOptimizer:
     - start_time[order_id, stage] = when each stage starts for each order
     - worker_assigned[order_id, stage, worker_id] = binary assignment
     - equipment_used[order_id, stage, equipment_id] = equipment allocation
+    
+    Model modes:
+    - "time_indexed": per-slot reified busy indicators for every worker and
+      equipment (model size grows with the time horizon)
+    - "interval": optional interval variables with AddNoOverlap per worker and
+      AddCumulative per equipment (model size grows with orders x resources)
+    - "skill_class": like "interval", but interchangeable workers are grouped
+      into WorkerClass capacities (AddCumulative per class) and individuals are
+      assigned in a post-pass (model size grows with orders x worker classes)
+    
+    Warm start:
+    - "simple": SimpleWaveOptimizer list schedule fed to CP-SAT via AddHint
+    - "sequencer": EnhancedWMSSequencer.plan_wave schedule (in memory) fed the same way
     """
     
-    def __init__(self, warehouse_config):
+    MODEL_MODES = ("time_indexed", "interval", "skill_class")
+    WARM_START_HEURISTICS = ("simple", "sequencer")
+    
+    def __init__(self, warehouse_config, model_mode: str = "time_indexed", warm_start: Optional[str] = None,
+                 tighten_horizon: bool = True, solver_parameters: Optional[Dict[str, Any]] = None):
+        if model_mode not in self.MODEL_MODES:
+            raise ValueError(f"Unknown model mode '{model_mode}', expected one of {self.MODEL_MODES}")
+        if warm_start is not None and warm_start not in self.WARM_START_HEURISTICS:
+            raise ValueError(f"Unknown warm start heuristic '{warm_start}', expected one of {self.WARM_START_HEURISTICS}")
+        unknown_parameters = set(solver_parameters or {}) - set(sat_parameters_pb2.SatParameters.DESCRIPTOR.fields_by_name)
+        if unknown_parameters:
+            raise ValueError(f"Unknown CP-SAT parameters: {', '.join(sorted(unknown_parameters))}")
+        
         self.model = cp_model.CpModel()
         self.warehouse = warehouse_config
         self.requirements = OptimizationRequirements()
         self.constraints = OptimizationConstraints()
         self.time_granularity = self.requirements.time_granularity_minutes
+        self.model_mode = model_mode
+        self.warm_start = warm_start
+        self.tighten_horizon = tighten_horizon
+        self.soft_deadlines = False  # Only penalize late orders instead of requiring them to ship on time
+        self.horizon_hours = 24  # Scheduling horizon from slot 0
+        self.solver_parameters = solver_parameters or {}  # CP-SAT SatParameters overrides
         
         # Initialize walking time calculator
         self.walking_calculator = WalkingTimeCalculator()
         self.walking_times_cache = {}  # Cache for walking times between bins
+        self.order_walking_minutes = {}  # Cache for total pick walking time per order
+        # walking_time parameters the caches were filled with
+        self.walking_config_hash = config_hash(self.walking_calculator.walking_parameters())
+        self.db_round_trips = 0
+        
+        # Immutable (order x stage) duration table, filled by precompute_stage_durations
+        self.stage_duration_minutes = None
+        self.stage_duration_slots = None
+        self.duration_precompute_seconds = 0.0
+        self.model_build_seconds = 0.0
+        self.worker_assignment_variables = 0
+        
+        # (order x stage) start-slot windows, filled by compute_start_windows
+        self.start_earliest = None
+        self.start_latest = None
+        self.horizon_tightening = {}
+        self.worker_classes = None  # WorkerClass list in skill_class mode
+        self.worker_class_of = None
+        
+        # Solver outcome of the last optimize_workflow call
+        self.schedule_base_time = None  # Datetime of slot 0, defaults to now
+        self.solve_stats = {}
+        self.stage_assignments = []
+        self.warm_start_info = None
+        self.active_solver = None
+        self.profile = OptimizerProfile(type(self).__name__)
 
-    def optimize_workflow(self, orders, workers, equipment, deadlines):
+    def optimize_workflow(self, orders, workers, equipment, deadlines,
+                          fixed_commitments=None, time_limit_seconds=None, on_solution=None,
+                          release_slots=None, solution_hint=None, start_windows=None):
         """
         Main optimization method implementing the constraint programming model.
         
@@ -132,74 +235,187 @@ class MultiStageOptimizer:
             workers: List of Worker objects available
             equipment: List of Equipment objects available
             deadlines: Dictionary mapping order_id to deadline datetime
+            fixed_commitments: Optional stage assignments (as in stage_assignments) that
+                already occupy workers and equipment; interval model only
+            time_limit_seconds: Optional solver time limit overriding the requirements
+            on_solution: Optional callable receiving an event dict for every improving
+                solution (objective, bound, gap and the stages changed since the last one)
+            release_slots: Optional dict mapping order_id to the slot before which its
+                first stage can't start (e.g. when an upstream stage was scheduled separately)
+            solution_hint: Optional stage assignments (as in stage_assignments) hinted to CP-SAT,
+                e.g. the incumbent of a large-neighborhood search
+            start_windows: Optional dict mapping order_id to {stage: (earliest, latest)} start
+                slots that narrow the start windows further (e.g. around a coarser solve)
             
         Returns:
             OptimizationResult with complete schedule and metrics
         """
         start_time = time.time()
+        if fixed_commitments and self.model_mode != "interval":
+            raise ValueError("fixed_commitments require the interval model mode")
+        profile = self.profile = OptimizerProfile(type(self).__name__)
         
         # Initialize model
         model = self.model
         stages = self.requirements.stages
         time_granularity = self.time_granularity
-        max_time_slots = math.ceil(24 * 60 / time_granularity)  # 24h horizon
+        max_time_slots = math.ceil(self.horizon_hours * 60 / time_granularity)
         num_orders = min(len(orders), self.requirements.max_orders_per_wave)
         num_workers = min(len(workers), self.requirements.max_workers)
+        if num_orders < len(orders):
+            print(f"Warning: truncating {len(orders)} orders to max_orders_per_wave={num_orders}; "
+                  f"use RollingHorizonOptimizer for larger waves")
+        orders = orders[:num_orders]
+        workers = workers[:num_workers]
+
+        print(f"Optimizing {num_orders} orders with {num_workers} workers over {max_time_slots} time slots ({self.model_mode} model)")
+
+        # 1. Precompute stage durations and start windows once for all constraint builders
+        self.precompute_stage_durations(orders, stages, time_granularity)
+        with profile.phase("horizon_tightening"):
+            self.compute_start_windows(orders, stages, deadlines, time_granularity, max_time_slots,
+                                       release_slots, start_windows)
 
-        print(f"Optimizing {num_orders} orders with {num_workers} workers over {max_time_slots} time slots")
+        # Skill-class mode schedules against interchangeable worker classes
+        model_workers = workers
+        if self.model_mode == "skill_class":
+            self.worker_classes, self.worker_class_of = WorkerClass.group(workers)
+            model_workers = self.worker_classes
+            print(f"Grouped {num_workers} workers into {len(self.worker_classes)} skill classes")
+        sparse_assignments = self.model_mode in ("interval", "skill_class")
 
-        # 1. Create decision variables
+        # 2. Create decision variables
         start_time_vars = {}
         worker_assigned = {}
         equipment_used = {}
         overtime_vars = {}
 
-        for o, order in enumerate(orders[:num_orders]):
+        profile.reset_lap()
+        for o, order in enumerate(orders):
             for s, stage in enumerate(stages):
-                start_time_vars[o, s] = model.NewIntVar(0, max_time_slots - 1, f"start_{o}_{stage}")
-                for w, worker in enumerate(workers[:num_workers]):
+                start_time_vars[o, s] = model.NewIntVar(
+                    int(self.start_earliest[o, s]), int(self.start_latest[o, s]), f"start_{o}_{stage}"
+                )
+                for w, worker in enumerate(model_workers):
+                    # The interval models only create assignments that can be chosen
+                    if sparse_assignments and self._stage_skill(stage) not in worker.skills:
+                        continue
                     worker_assigned[o, s, w] = model.NewBoolVar(f"worker_{o}_{stage}_{w}")
                 for e, eq in enumerate(equipment):
+                    if sparse_assignments and not self._stage_requires_equipment(stage, eq.equipment_type):
+                        continue
                     equipment_used[o, s, e] = model.NewBoolVar(f"equip_{o}_{stage}_{e}")
+        self.worker_assignment_variables = len(worker_assigned)
+        profile.lap("variable_creation")
 
-        # 2. Add business constraints
+        # 3. Add business constraints (timed per constraint family)
         self._add_stage_precedence_constraints(model, start_time_vars, orders, stages, time_granularity)
-        self._add_worker_capacity_constraints(model, start_time_vars, worker_assigned, orders, workers, stages, time_granularity)
-        self._add_equipment_capacity_constraints(model, start_time_vars, equipment_used, orders, equipment, stages, time_granularity)
-        self._add_skill_requirement_constraints(model, worker_assigned, orders, workers, stages)
+        profile.lap("constraints.precedence")
+        if self.model_mode == "interval":
+            worker_fixed, equipment_fixed = self._index_fixed_commitments(fixed_commitments or [], workers, equipment)
+            self._add_worker_no_overlap_constraints(model, start_time_vars, worker_assigned, orders, workers, stages, time_granularity, worker_fixed)
+            profile.lap("constraints.worker_capacity")
+            self._add_equipment_cumulative_constraints(model, start_time_vars, equipment_used, orders, equipment, stages, time_granularity, equipment_fixed)
+        elif self.model_mode == "skill_class":
+            self._add_worker_class_cumulative_constraints(model, start_time_vars, worker_assigned, orders, model_workers, stages)
+            profile.lap("constraints.worker_capacity")
+            self._add_equipment_cumulative_constraints(model, start_time_vars, equipment_used, orders, equipment, stages, time_granularity)
+        else:
+            self._add_worker_capacity_constraints(model, start_time_vars, worker_assigned, orders, workers, stages, time_granularity)
+            profile.lap("constraints.worker_capacity")
+            self._add_equipment_capacity_constraints(model, start_time_vars, equipment_used, orders, equipment, stages, time_granularity)
+        profile.lap("constraints.equipment_capacity")
+        self._add_skill_requirement_constraints(model, worker_assigned, orders, model_workers, stages)
+        profile.lap("constraints.skill_requirements")
         self._add_deadline_constraints(model, start_time_vars, orders, stages, deadlines, time_granularity)
+        profile.lap("constraints.deadlines")
 
-        # 3. Set multi-objective function
+        # 4. Set multi-objective function
         objective_terms = self._build_objective_function(
             model, start_time_vars, worker_assigned, equipment_used, 
-            orders, workers, equipment, stages, time_granularity, deadlines
+            orders, model_workers, equipment, stages, time_granularity, deadlines
         )
         
         model.Minimize(sum(objective_terms))
+        profile.lap("objective")
+        profile.record_model(model)
+        profile.counts.update(orders=num_orders, workers=num_workers, equipment=len(equipment), stages=len(stages))
+        self.model_build_seconds = time.time() - start_time
+        print(f"Model built in {self.model_build_seconds:.2f}s "
+              f"(duration precompute {self.duration_precompute_seconds:.2f}s, {self.db_round_trips} DB round-trips)")
+
+        time_limit = time_limit_seconds or self.requirements.max_solve_time_seconds
+        self.warm_start_info = None
+        if self.warm_start:
+            with profile.phase("warm_start"):
+                self.warm_start_info = self._add_heuristic_hints(
+                    model, start_time_vars, worker_assigned, equipment_used,
+                    orders, workers, equipment, stages, time_granularity, max_time_slots
+                )
+                timed_hint_evaluation(model, self.warm_start_info, min(5.0, time_limit * 0.1))
+            print(f"Warm start hint objective: {self.warm_start_info['hint_objective']}")
+        elif solution_hint:
+            with profile.phase("warm_start"):
+                self._add_assignment_hints(model, start_time_vars, worker_assigned, equipment_used,
+                                           orders, workers, equipment, stages, solution_hint)
 
-        # 4. Solve with time limit
+        # 5. Solve with time limit
         solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = self.requirements.max_solve_time_seconds
+        solver.parameters.max_time_in_seconds = time_limit
         solver.parameters.log_search_progress = True
+        for name, value in self.solver_parameters.items():
+            setattr(solver.parameters, name, value)
+        if on_solution:
+            recorder = SolutionStreamer(on_solution, start_time_vars, worker_assigned, equipment_used,
+                                        orders, model_workers, equipment, stages)
+        else:
+            recorder = SolutionProgressRecorder()
         
-        print(f"Starting optimization with {self.requirements.max_solve_time_seconds}s time limit...")
-        status = solver.Solve(model)
+        print(f"Starting optimization with {time_limit}s time limit...")
+        self.active_solver = solver
+        try:
+            with running_solver(solver), profile.phase("solve"):
+                status = solver.Solve(model, recorder)
+        finally:
+            self.active_solver = None
         
         optimization_time = time.time() - start_time
+        self.solve_stats = self._collect_solve_stats(solver, status)
+        profile.record_solver(solver, status, self.solve_stats["objective"], self.solve_stats["best_bound"])
+        profile.counts["solutions_found"] = len(recorder.solutions)
+        self.stage_assignments = []
+        # Compare against a tighten_horizon=False run of the same input for the speedup
+        self.horizon_tightening["solve_wall_time_seconds"] = self.solve_stats["wall_time_seconds"]
+        print(f"Solve took {self.solve_stats['wall_time_seconds']:.2f}s with horizon tightening "
+              f"{'on' if self.tighten_horizon else 'off'} "
+              f"({self.horizon_tightening['reduction_percentage']:.1f}% smaller start domains)")
+        if self.warm_start_info is not None:
+            summarize_warm_start(self.warm_start_info, recorder, self.solve_stats["objective"])
         
-        # 5. Extract and validate solution
+        # 6. Extract and validate solution
         if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
             print(f"Optimization failed with status: {status}")
             # Fall back to simple optimizer for demo purposes
-            return self._fallback_optimization(orders, workers, equipment, deadlines)
+            with profile.phase("fallback"):
+                result = self._fallback_optimization(orders, workers, equipment, deadlines)
+            result.input_summary["profile"] = profile.to_dict()
+            return result
         
         print(f"Optimization completed in {optimization_time:.2f}s with status: {status}")
         
-        # 6. Return human-readable results with explanations
-        result = self._extract_solution(
-            solver, start_time_vars, worker_assigned, equipment_used, 
-            orders, workers, equipment, stages, time_granularity, optimization_time, status
-        )
+        # 7. Return human-readable results with explanations
+        with profile.phase("extraction"):
+            worker_choice = None
+            if self.model_mode == "skill_class":
+                worker_choice = self._assign_class_members(solver, start_time_vars, worker_assigned, orders, stages)
+            result = self._extract_solution(
+                solver, start_time_vars, worker_assigned, equipment_used, 
+                orders, workers, equipment, stages, time_granularity, optimization_time, status,
+                worker_choice
+            )
+        if self.warm_start_info is not None:
+            result.input_summary["warm_start"] = self.warm_start_info
+        result.input_summary["profile"] = profile.to_dict()
         
         return result
 
@@ -207,24 +423,24 @@ class MultiStageOptimizer:
         """Constraint 1: Stage precedence - can't pack before picking"""
         for o, order in enumerate(orders):
             for s in range(len(stages) - 1):
-                duration = self._stage_duration(order, stages[s])
                 model.Add(
                     start_time_vars[o, s + 1] >= 
-                    start_time_vars[o, s] + math.ceil(duration / time_granularity)
+                    start_time_vars[o, s] + int(self.stage_duration_slots[o, s])
                 )
 
     def _add_worker_capacity_constraints(self, model, start_time_vars, worker_assigned, orders, workers, stages, time_granularity):
         """Constraint 2: Worker capacity - no double-booking workers"""
-        max_time_slots = math.ceil(24 * 60 / time_granularity)  # 24h horizon
+        max_time_slots = math.ceil(self.horizon_hours * 60 / time_granularity)
         
         for w, worker in enumerate(workers):
             for t in range(max_time_slots):
                 active_assignments = []
                 for o, order in enumerate(orders):
                     for s, stage in enumerate(stages):
-                        duration = self._stage_duration(order, stage)
+                        if not self._slot_in_window(o, s, t):
+                            continue
                         slot_start = start_time_vars[o, s]
-                        slot_end = slot_start + math.ceil(duration / time_granularity)
+                        slot_end = slot_start + int(self.stage_duration_slots[o, s])
                         
                         # Worker is busy if assigned and time slot overlaps
                         is_active = model.NewBoolVar(f"active_{o}_{s}_{w}_{t}")
@@ -244,17 +460,16 @@ class MultiStageOptimizer:
 
     def _add_equipment_capacity_constraints(self, model, start_time_vars, equipment_used, orders, equipment, stages, time_granularity):
         """Constraint 3: Equipment limits - respect capacity constraints"""
-        max_time_slots = math.ceil(24 * 60 / time_granularity)  # 24h horizon
+        max_time_slots = math.ceil(self.horizon_hours * 60 / time_granularity)
         
         for e, eq in enumerate(equipment):
             for t in range(max_time_slots):
                 active_usage = []
                 for o, order in enumerate(orders):
                     for s, stage in enumerate(stages):
-                        if self._stage_requires_equipment(stage, eq.equipment_type):
-                            duration = self._stage_duration(order, stage)
+                        if self._stage_requires_equipment(stage, eq.equipment_type) and self._slot_in_window(o, s, t):
                             slot_start = start_time_vars[o, s]
-                            slot_end = slot_start + math.ceil(duration / time_granularity)
+                            slot_end = slot_start + int(self.stage_duration_slots[o, s])
                             
                             # Equipment is in use if assigned and time slot overlaps
                             is_active = model.NewBoolVar(f"equip_active_{o}_{s}_{e}_{t}")
@@ -272,17 +487,273 @@ class MultiStageOptimizer:
                 if active_usage:
                     model.Add(sum(active_usage) <= eq.capacity)
 
+    def _add_heuristic_hints(self, model, start_time_vars, worker_assigned, equipment_used,
+                             orders, workers, equipment, stages, time_granularity, max_time_slots):
+        """Run the warm-start heuristic's list scheduler and hint its schedule to CP-SAT."""
+        heuristic_start = time.time()
+        # Express the model's slot durations in minutes so heuristic times land on slot boundaries
+        stage_minutes = [
+            {stage.value: int(self.stage_duration_slots[o, s]) * time_granularity for s, stage in enumerate(stages)}
+            for o in range(len(orders))
+        ]
+        if self.warm_start == "sequencer":
+            schedule, error = self._sequencer_schedule(orders, workers, equipment, stages, stage_minutes)
+        else:
+            schedule, error = self._simple_schedule(orders, workers, equipment, stage_minutes)
+        
+        info = {
+            "heuristic": self.warm_start,
+            "heuristic_seconds": time.time() - heuristic_start,
+            "hinted_variables": 0
+        }
+        if error:
+            info["error"] = error
+            return info
+        
+        stage_index = {stage.value: s for s, stage in enumerate(stages)}
+        hinted_workers = {}
+        hinted_equipment = {}
+        for o, stage_value, start_minute, worker_id, equipment_id in schedule:
+            s = stage_index[stage_value]
+            start_slot = min(int(start_minute) // time_granularity, max_time_slots - 1)
+            model.AddHint(start_time_vars[o, s], start_slot)
+            if worker_id is not None:
+                hinted_workers[o, s] = (self.worker_class_of[worker_id]
+                                        if self.model_mode == "skill_class" else worker_id)
+            hinted_equipment[o, s] = equipment_id
+            info["hinted_variables"] += 1
+        
+        # Assignment literals: the heuristic's choice is 1, every other candidate 0. The heuristics
+        # may leave a stage without a resource or fall back to an unqualified one; those stages are
+        # left unhinted so the solver picks a valid resource itself.
+        for assigned, hinted in ((worker_assigned, hinted_workers), (equipment_used, hinted_equipment)):
+            for (o, s, r), var in assigned.items():
+                if (o, s, hinted.get((o, s))) in assigned:
+                    model.AddHint(var, 1 if hinted[o, s] == r else 0)
+                    info["hinted_variables"] += 1
+        
+        return info
+
+    def _simple_schedule(self, orders, workers, equipment, stage_minutes):
+        """SimpleWaveOptimizer schedule as (order, stage, start minute, worker, equipment) index tuples."""
+        priority_labels = {1: 'high', 2: 'high', 3: 'medium', 4: 'low', 5: 'low'}
+        wave_data = {
+            'wave_data': [
+                {
+                    'order_id': o,
+                    'priority': priority_labels.get(order.priority, 'medium'),
+                    'shipping_deadline': order.shipping_deadline,
+                    'stage_durations': stage_minutes[o]
+                }
+                for o, order in enumerate(orders)
+            ],
+            'workers': [
+                {'id': w, 'skill_name': skill.value}
+                for w, worker in enumerate(workers)
+                for skill in (worker.skills or ['general'])
+            ],
+            'equipment': [{'id': e, 'equipment_type': eq.equipment_type.value} for e, eq in enumerate(equipment)]
+        }
+        heuristic_result = SimpleWaveOptimizer().optimize_wave(wave_data)
+        if heuristic_result.get("error"):
+            return [], heuristic_result["error"]
+        
+        return [
+            (order_schedule['order_id'], stage_schedule['stage'], stage_schedule['start_time'],
+             stage_schedule['worker_id'], stage_schedule['equipment_id'])
+            for order_schedule in heuristic_result["solution"]["schedule"]
+            for stage_schedule in order_schedule['stages']
+        ], None
+
+    def _sequencer_schedule(self, orders, workers, equipment, stages, stage_minutes):
+        """EnhancedWMSSequencer.plan_wave schedule as (order, stage, start minute, worker, equipment) index tuples."""
+        sequencer_orders = [
+            {
+                'order_id': o,
+                'priority': order.priority,
+                'shipping_deadline': order.shipping_deadline,
+                'stage_durations': stage_minutes[o]
+            }
+            for o, order in enumerate(orders)
+        ]
+        sequencer_workers = [
+            {'id': w, 'name': worker.name, 'skills': [skill.value for skill in worker.skills]}
+            for w, worker in enumerate(workers)
+        ]
+        sequencer_equipment = [
+            {'id': e, 'equipment_type': eq.equipment_type.value, 'capacity': eq.capacity}
+            for e, eq in enumerate(equipment)
+        ]
+        stage_skills = {stage.value: [self._stage_skill(stage).value] for stage in stages}
+        assignments = sequencer_plan(sequencer_orders, sequencer_workers, sequencer_equipment, stage_skills)
+        return [
+            (assignment['order_id'], assignment['stage'], assignment['start_minute'],
+             assignment['worker_id'], assignment['equipment_id'])
+            for assignment in assignments
+        ], None
+
+    def _add_assignment_hints(self, model, start_time_vars, worker_assigned, equipment_used,
+                              orders, workers, equipment, stages, assignments):
+        """Hint stage assignments (start slot, worker and equipment) to CP-SAT; returns the hinted variable count."""
+        order_index = {order.id: o for o, order in enumerate(orders)}
+        stage_index = {stage: s for s, stage in enumerate(stages)}
+        worker_index = {worker.id: w for w, worker in enumerate(workers)}
+        equipment_index = {eq.id: e for e, eq in enumerate(equipment)}
+        hinted_workers = {}
+        hinted_equipment = {}
+        hinted = 0
+        
+        for assignment in assignments:
+            key = (order_index.get(assignment['order_id']), stage_index.get(assignment['stage']))
+            if key not in start_time_vars:
+                continue
+            model.AddHint(start_time_vars[key], assignment['start_slot'])
+            hinted += 1
+            if assignment.get('worker_id') in worker_index:
+                w = worker_index[assignment['worker_id']]
+                hinted_workers[key] = self.worker_class_of[w] if self.model_mode == "skill_class" else w
+            if assignment.get('equipment_id') in equipment_index:
+                hinted_equipment[key] = equipment_index[assignment['equipment_id']]
+        
+        for assigned, chosen in ((worker_assigned, hinted_workers), (equipment_used, hinted_equipment)):
+            for (o, s, r), var in assigned.items():
+                if (o, s) in chosen:
+                    model.AddHint(var, 1 if chosen[o, s] == r else 0)
+                    hinted += 1
+        
+        return hinted
+
+    def _index_fixed_commitments(self, fixed_commitments, workers, equipment):
+        """Group previously committed (start_slot, slots) intervals by worker and equipment index."""
+        worker_index = {worker.id: w for w, worker in enumerate(workers)}
+        equipment_index = {eq.id: e for e, eq in enumerate(equipment)}
+        worker_fixed = {}
+        equipment_fixed = {}
+        
+        for commitment in fixed_commitments:
+            interval = (commitment['start_slot'], commitment['slots'])
+            if commitment.get('worker_id') in worker_index:
+                worker_fixed.setdefault(worker_index[commitment['worker_id']], []).append(interval)
+            if commitment.get('equipment_id') in equipment_index:
+                equipment_fixed.setdefault(equipment_index[commitment['equipment_id']], []).append(interval)
+        
+        return worker_fixed, equipment_fixed
+
+    def _add_worker_no_overlap_constraints(self, model, start_time_vars, worker_assigned, orders, workers, stages, time_granularity, worker_fixed=None):
+        """Constraint 2 (interval model): Worker capacity via optional intervals and NoOverlap"""
+        worker_intervals = {w: [] for w in range(len(workers))}
+        for w, fixed in (worker_fixed or {}).items():
+            for i, (start_slot, slots) in enumerate(fixed):
+                worker_intervals[w].append(model.NewFixedSizeIntervalVar(start_slot, slots, f"worker_fixed_{w}_{i}"))
+        
+        for o, order in enumerate(orders):
+            for s, stage in enumerate(stages):
+                slots = int(self.stage_duration_slots[o, s])
+                candidates = [w for w in range(len(workers)) if (o, s, w) in worker_assigned]
+                
+                # Every stage is handled by exactly one qualified worker
+                if candidates:
+                    model.AddExactlyOne(worker_assigned[o, s, w] for w in candidates)
+                
+                for w in candidates:
+                    worker_intervals[w].append(model.NewOptionalFixedSizeIntervalVar(
+                        start_time_vars[o, s], slots, worker_assigned[o, s, w],
+                        f"worker_interval_{o}_{stage}_{w}"
+                    ))
+        
+        for w, intervals in worker_intervals.items():
+            if len(intervals) > 1:
+                model.AddNoOverlap(intervals)
+
+    def _add_equipment_cumulative_constraints(self, model, start_time_vars, equipment_used, orders, equipment, stages, time_granularity, equipment_fixed=None):
+        """Constraint 3 (interval model): Equipment capacity via optional intervals and Cumulative"""
+        equipment_intervals = {e: [] for e in range(len(equipment))}
+        for e, fixed in (equipment_fixed or {}).items():
+            for i, (start_slot, slots) in enumerate(fixed):
+                equipment_intervals[e].append(model.NewFixedSizeIntervalVar(start_slot, slots, f"equip_fixed_{e}_{i}"))
+        
+        for o, order in enumerate(orders):
+            for s, stage in enumerate(stages):
+                slots = int(self.stage_duration_slots[o, s])
+                candidates = [e for e in range(len(equipment)) if (o, s, e) in equipment_used]
+                
+                # Stages that need equipment use exactly one matching unit
+                if candidates:
+                    model.AddExactlyOne(equipment_used[o, s, e] for e in candidates)
+                
+                for e in candidates:
+                    equipment_intervals[e].append(model.NewOptionalFixedSizeIntervalVar(
+                        start_time_vars[o, s], slots, equipment_used[o, s, e],
+                        f"equip_interval_{o}_{stage}_{e}"
+                    ))
+        
+        for e, intervals in equipment_intervals.items():
+            if intervals:
+                model.AddCumulative(intervals, [1] * len(intervals), equipment[e].capacity)
+
+    def _add_worker_class_cumulative_constraints(self, model, start_time_vars, worker_assigned, orders, worker_classes, stages):
+        """Constraint 2 (skill-class model): Worker class capacity via optional intervals and Cumulative"""
+        class_intervals = {c: [] for c in range(len(worker_classes))}
+        
+        for o, order in enumerate(orders):
+            for s, stage in enumerate(stages):
+                slots = int(self.stage_duration_slots[o, s])
+                candidates = [c for c in range(len(worker_classes)) if (o, s, c) in worker_assigned]
+                
+                # Every stage is handled by exactly one qualified class
+                if candidates:
+                    model.AddExactlyOne(worker_assigned[o, s, c] for c in candidates)
+                
+                for c in candidates:
+                    class_intervals[c].append(model.NewOptionalFixedSizeIntervalVar(
+                        start_time_vars[o, s], slots, worker_assigned[o, s, c],
+                        f"class_interval_{o}_{stage}_{c}"
+                    ))
+        
+        for c, intervals in class_intervals.items():
+            if intervals:
+                model.AddCumulative(intervals, [1] * len(intervals), worker_classes[c].capacity)
+
+    def _assign_class_members(self, solver, start_time_vars, worker_assigned, orders, stages):
+        """
+        Post-pass for the skill-class model: hand each class-level stage to a member.
+        
+        Stages of a class are taken in start order and given to the member that
+        frees up first. Because the class never runs more stages at once than it
+        has members, that member is always free when the stage starts.
+        
+        Returns:
+            Dict mapping (order index, stage index) to a worker index
+        """
+        class_stages = {c: [] for c in range(len(self.worker_classes))}
+        for (o, s, c), assigned in worker_assigned.items():
+            if solver.Value(assigned):
+                class_stages[c].append((solver.Value(start_time_vars[o, s]), int(self.stage_duration_slots[o, s]), o, s))
+        
+        worker_choice = {}
+        for c, class_stage_list in class_stages.items():
+            free_members = [(0, w) for w in self.worker_classes[c].members]  # (free from slot, worker index)
+            heapq.heapify(free_members)
+            for start_slot, slots, o, s in sorted(class_stage_list):
+                free_from, w = heapq.heappop(free_members)
+                worker_choice[o, s] = w
+                heapq.heappush(free_members, (max(free_from, start_slot + slots), w))
+        
+        return worker_choice
+
     def _add_skill_requirement_constraints(self, model, worker_assigned, orders, workers, stages):
         """Constraint 4: Skill requirements - workers can only do tasks they're qualified for"""
         for o, order in enumerate(orders):
             for s, stage in enumerate(stages):
                 required_skill = self._stage_skill(stage)
                 for w, worker in enumerate(workers):
-                    if required_skill not in worker.skills:
+                    if (o, s, w) in worker_assigned and required_skill not in worker.skills:
                         model.Add(worker_assigned[o, s, w] == 0)
 
     def _add_deadline_constraints(self, model, start_time_vars, orders, stages, deadlines, time_granularity):
         """Constraint 5: Shipping deadlines - all orders must complete before deadline"""
+        if self.soft_deadlines:
+            return
         for o, order in enumerate(orders):
             ship_stage = stages.index(StageType.SHIP)
             if order.id in deadlines:
@@ -311,22 +782,15 @@ class MultiStageOptimizer:
         
         # Labor costs (regular + overtime)
         labor_costs = []
-        for o, order in enumerate(orders):
-            for s, stage in enumerate(stages):
-                for w, worker in enumerate(workers):
-                    duration = self._stage_duration(order, stage)
-                    slots = math.ceil(duration / time_granularity)
-                    labor_costs.append(worker_assigned[o, s, w] * slots * worker.hourly_rate)
+        for (o, s, w), assigned in worker_assigned.items():
+            slots = int(self.stage_duration_slots[o, s])
+            labor_costs.append(assigned * slots * workers[w].hourly_rate)
         
         if labor_costs:
             objective_terms.append(weights["labor_cost_multiplier"] * sum(labor_costs))
         
         # Equipment utilization efficiency
-        equipment_util = []
-        for o, order in enumerate(orders):
-            for s, stage in enumerate(stages):
-                for e, eq in enumerate(equipment):
-                    equipment_util.append(equipment_used[o, s, e])
+        equipment_util = list(equipment_used.values())
         
         if equipment_util:
             objective_terms.append(weights["equipment_utilization_weight"] * sum(equipment_util))
@@ -334,8 +798,16 @@ class MultiStageOptimizer:
         return objective_terms
 
     def _extract_solution(self, solver, start_time_vars, worker_assigned, equipment_used, 
-                         orders, workers, equipment, stages, time_granularity, optimization_time, status):
+                         orders, workers, equipment, stages, time_granularity, optimization_time, status,
+                         worker_choice=None):
         """Extract solution and create OptimizationResult"""
+        # (order, stage) -> worker index; precomputed by the skill-class post-pass
+        if worker_choice is None:
+            worker_choice = {}
+            for (o, s, w), assigned in worker_assigned.items():
+                if solver.Value(assigned):
+                    worker_choice.setdefault((o, s), w)
+        
         # Calculate metrics
         total_orders = len(orders)
         on_time_orders = 0
@@ -347,6 +819,7 @@ class MultiStageOptimizer:
         order_schedules = []
         worker_schedules = []
         equipment_schedules = []
+        base_time = self.schedule_base_time or datetime.now()
         
         for o, order in enumerate(orders):
             order_schedule = OrderSchedule(
@@ -359,22 +832,21 @@ class MultiStageOptimizer:
             
             for s, stage in enumerate(stages):
                 start_slot = solver.Value(start_time_vars[o, s])
-                start_time = datetime.now() + timedelta(minutes=start_slot * time_granularity)
-                duration = self._stage_duration(order, stage)
+                start_time = base_time + timedelta(minutes=start_slot * time_granularity)
+                duration = float(self.stage_duration_minutes[o, s])
                 end_time = start_time + timedelta(minutes=duration)
                 
                 # Find assigned worker
                 assigned_worker_id = None
-                for w, worker in enumerate(workers):
-                    if solver.Value(worker_assigned[o, s, w]):
-                        assigned_worker_id = worker.id
-                        total_labor_cost += duration * worker.hourly_rate / 60
-                        break
+                if (o, s) in worker_choice:
+                    worker = workers[worker_choice[o, s]]
+                    assigned_worker_id = worker.id
+                    total_labor_cost += duration * worker.hourly_rate / 60
                 
                 # Find used equipment
                 assigned_equipment_id = None
                 for e, eq in enumerate(equipment):
-                    if solver.Value(equipment_used[o, s, e]):
+                    if (o, s, e) in equipment_used and solver.Value(equipment_used[o, s, e]):
                         assigned_equipment_id = eq.id
                         total_equipment_cost += duration * eq.hourly_cost / 60
                         break
@@ -389,13 +861,23 @@ class MultiStageOptimizer:
                     assigned_equipment_id=assigned_equipment_id
                 )
                 order_schedule.stages.append(stage_schedule)
+                
+                # Raw slot-level assignment, reusable as a fixed commitment
+                self.stage_assignments.append({
+                    'order_id': order.id,
+                    'stage': stage,
+                    'start_slot': start_slot,
+                    'slots': int(self.stage_duration_slots[o, s]),
+                    'worker_id': assigned_worker_id,
+                    'equipment_id': assigned_equipment_id
+                })
             
             order_schedules.append(order_schedule)
             
             # Check if on time
             ship_stage = stages.index(StageType.SHIP)
             ship_start = solver.Value(start_time_vars[o, ship_stage]) * time_granularity
-            ship_completion_time = datetime.now() + timedelta(minutes=ship_start + self._stage_duration(order, StageType.SHIP))
+            ship_completion_time = base_time + timedelta(minutes=ship_start + float(self.stage_duration_minutes[o, ship_stage]))
             
             # Ensure both datetimes are timezone-naive for comparison
             if ship_completion_time.tzinfo is not None:
@@ -411,15 +893,7 @@ class MultiStageOptimizer:
                 total_deadline_penalties += 1000  # High penalty for late orders
         
         # Calculate walking time metrics
-        total_walking_time = 0.0
-        for order_schedule in order_schedules:
-            for stage_schedule in order_schedule.stages:
-                if stage_schedule.stage_type == StageType.PICK:
-                    # Get the order object to calculate walking time
-                    order = next((o for o in orders if o.id == order_schedule.order_id), None)
-                    if order:
-                        walking_time = self._calculate_total_walking_time(order)
-                        total_walking_time += walking_time
+        total_walking_time = sum(self._calculate_total_walking_time(order) for order in orders)
         
         # Create metrics
         metrics = OptimizationMetrics(
@@ -454,10 +928,40 @@ class MultiStageOptimizer:
                 "total_orders": total_orders,
                 "total_workers": len(workers),
                 "total_equipment": len(equipment),
-                "optimization_horizon_hours": 24
+                "optimization_horizon_hours": self.horizon_hours,
+                "model_mode": self.model_mode,
+                "worker_assignment_variables": self.worker_assignment_variables,
+                "worker_classes": len(self.worker_classes) if self.model_mode == "skill_class" else None,
+                "horizon_tightening": self.horizon_tightening,
+                "model_build_seconds": self.model_build_seconds,
+                "duration_precompute_seconds": self.duration_precompute_seconds,
+                "db_round_trips": self.db_round_trips
             }
         )
 
+    def stop_search(self):
+        """Stop a running solve early; it returns the best solution found so far."""
+        solver = self.active_solver
+        if solver is not None:
+            solver.StopSearch()
+
+    def _collect_solve_stats(self, solver, status):
+        """Summarize the CP-SAT response (objective, bound, relative gap)."""
+        stats = {
+            "status": solver.StatusName(status),
+            "wall_time_seconds": solver.WallTime(),
+            "objective": None,
+            "best_bound": None,
+            "gap": None
+        }
+        if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+            objective = solver.ObjectiveValue()
+            best_bound = solver.BestObjectiveBound()
+            stats["objective"] = objective
+            stats["best_bound"] = best_bound
+            stats["gap"] = abs(objective - best_bound) / max(abs(objective), 1e-9)
+        return stats
+
     def _fallback_optimization(self, orders, workers, equipment, deadlines):
         """Fallback to simple optimizer if constraint programming fails"""
         print("Falling back to simple optimizer...")
@@ -496,6 +1000,168 @@ class MultiStageOptimizer:
         
         return "\n".join(explanations) if explanations else "Optimization completed with standard resource allocation."
 
+    def precompute_stage_durations(self, orders, stages, time_granularity):
+        """
+        Build the immutable (order x stage) duration table read by every constraint builder.
+        
+        Bin locations for all orders are bulk-loaded first, so the build phase
+        no longer opens a database connection per (order, stage, worker, slot).
+        """
+        precompute_start = time.time()
+        with self.profile.phase("data_load"):
+            self._load_order_walking_times(orders)
+        
+        with self.profile.phase("duration_precompute"):
+            minutes = np.zeros((len(orders), len(stages)), dtype=np.float64)
+            for o, order in enumerate(orders):
+                for s, stage in enumerate(stages):
+                    minutes[o, s] = self._stage_duration(order, stage)
+            slots = np.ceil(minutes / time_granularity).astype(np.int64)
+        
+        minutes.setflags(write=False)
+        slots.setflags(write=False)
+        self.stage_duration_minutes = minutes
+        self.stage_duration_slots = slots
+        self.duration_precompute_seconds = time.time() - precompute_start
+        return slots
+
+    def compute_start_windows(self, orders, stages, deadlines, time_granularity, max_time_slots,
+                              release_slots=None, start_windows=None):
+        """
+        Tighten every start-time domain to the window implied by the model itself.
+        
+        A stage cannot start before the stages ahead of it in the precedence
+        chain are done (earliest), and must leave room for the stages after it
+        before the ship stage hits its hard deadline (unless deadlines are soft)
+        or the horizon (latest).
+        Both bounds follow from existing constraints, so no feasible schedule
+        is cut off; time-indexed builders also skip slots outside the window.
+        Release slots shift an order's whole chain and are enforced even with
+        tightening off, since they are hard start bounds; so are explicit
+        start windows, which can cut off schedules the model would allow.
+        """
+        tighten_start = time.time()
+        slots = self.stage_duration_slots
+        num_orders = len(orders)
+        full_domain = num_orders * len(stages) * max_time_slots
+        unreachable = 0
+        release = np.zeros((num_orders, 1), dtype=np.int64)
+        for o, order in enumerate(orders):
+            release[o, 0] = (release_slots or {}).get(order.id, 0)
+        
+        if self.tighten_horizon:
+            earliest = np.cumsum(slots, axis=1) - slots + release
+            
+            ship_stage = stages.index(StageType.SHIP)
+            ship_latest = np.full(num_orders, max_time_slots - 1, dtype=np.int64)
+            for o, order in enumerate(orders):
+                if order.id in deadlines and not self.soft_deadlines:
+                    deadline_slot = self._deadline_to_slot(deadlines[order.id], time_granularity)
+                    ship_latest[o] = min(ship_latest[o], deadline_slot)
+            
+            # Work between each stage's start and the ship stage's start
+            latest = np.full(slots.shape, max_time_slots - 1, dtype=np.int64)
+            lead_to_ship = earliest[:, ship_stage:ship_stage + 1] - earliest[:, :ship_stage + 1]
+            latest[:, :ship_stage + 1] = np.minimum(latest[:, :ship_stage + 1], ship_latest[:, None] - lead_to_ship)
+            
+            # Empty windows mean the order can't be on time; keep a one-value domain and
+            # let the precedence/deadline constraints report infeasibility as before
+            earliest = np.minimum(earliest, max_time_slots - 1)
+            unreachable = int(np.any(latest < earliest, axis=1).sum())
+            latest = np.maximum(latest, earliest)
+        else:
+            earliest = np.minimum(np.broadcast_to(release, slots.shape), max_time_slots - 1)
+            latest = np.full(slots.shape, max_time_slots - 1, dtype=np.int64)
+        
+        if start_windows:
+            earliest, latest = earliest.copy(), latest.copy()
+            for o, order in enumerate(orders):
+                for s, stage in enumerate(stages):
+                    window = start_windows.get(order.id, {}).get(stage)
+                    if window is not None:
+                        earliest[o, s] = min(max(earliest[o, s], window[0]), max_time_slots - 1)
+                        latest[o, s] = max(min(latest[o, s], window[1]), earliest[o, s])
+        
+        earliest.setflags(write=False)
+        latest.setflags(write=False)
+        self.start_earliest = earliest
+        self.start_latest = latest
+        
+        tightened_domain = int((latest - earliest + 1).sum())
+        self.horizon_tightening = {
+            "enabled": self.tighten_horizon,
+            "full_domain_values": full_domain,
+            "tightened_domain_values": tightened_domain,
+            "reduction_percentage": (1 - tightened_domain / full_domain) * 100 if full_domain else 0.0,
+            "orders_with_unreachable_deadline": unreachable,
+            "tightening_seconds": time.time() - tighten_start
+        }
+        print(f"Horizon tightening: start domains {full_domain} -> {tightened_domain} values "
+              f"({self.horizon_tightening['reduction_percentage']:.1f}% smaller, "
+              f"{unreachable} orders cannot meet their deadline)")
+        return earliest, latest
+
+    def _slot_in_window(self, o, s, t):
+        """Whether stage s of order o can be active in slot t given its start window."""
+        return self.start_earliest[o, s] <= t < self.start_latest[o, s] + self.stage_duration_slots[o, s]
+
+    def _sync_walking_parameters(self):
+        """Drop cached walking times when the walking_time configuration changed since they were filled."""
+        current_hash = current_config_hash()
+        if current_hash == self.walking_config_hash:
+            return
+        self.walking_calculator.load_walking_parameters()
+        # Cleared in place: sub-optimizers share these dicts
+        self.walking_times_cache.clear()
+        self.order_walking_minutes.clear()
+        self.walking_config_hash = current_hash
+
+    def _load_order_walking_times(self, orders):
+        """Bulk-load bin locations for all orders and cache their pick walking times."""
+        self._sync_walking_parameters()
+        order_ids = [order.id for order in orders if order.id not in self.order_walking_minutes]
+        if not order_ids:
+            return
+        
+        bins_by_order = {order_id: [] for order_id in order_ids}
+        conn = None
+        try:
+            self.db_round_trips += 1
+            conn = self.walking_calculator.db.get_connection()
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT DISTINCT oi.order_id, b.id, b.x_coordinate, b.y_coordinate,
+                           b.z_coordinate, b.zone, b.level
+                    FROM order_items oi
+                    JOIN skus s ON oi.sku_id = s.id
+                    JOIN bins b ON s.bin_id = b.id
+                    WHERE oi.order_id = ANY(%s)
+                    ORDER BY oi.order_id, b.id
+                """, (order_ids,))
+                
+                for order_id, bin_id, x, y, z, zone, level in cursor.fetchall():
+                    bins_by_order[order_id].append(
+                        (bin_id, (float(x), float(y), float(z)), zone, level)
+                    )
+        except Exception as e:
+            # Nothing is cached, so _calculate_total_walking_time retries per order
+            print(f"Warning: Could not bulk load bin locations for {len(order_ids)} orders: {e}")
+            return
+        finally:
+            if conn is not None:
+                conn.close()
+        
+        # Walk consecutive bins, same simplified route as _calculate_total_walking_time
+        for order_id, bins in bins_by_order.items():
+            total_walking_time = 0.0
+            for (from_id, from_coords, from_zone, from_level), (to_id, to_coords, to_zone, to_level) in zip(bins, bins[1:]):
+                walking_time = self.walking_calculator.calculate_walking_time_minutes(
+                    from_coords, to_coords, from_zone, to_zone, from_level, to_level
+                )
+                self.walking_times_cache[(from_id, to_id)] = walking_time
+                total_walking_time += walking_time
+            self.order_walking_minutes[order_id] = total_walking_time
+
     # Helper methods
     def _get_walking_time_between_bins(self, from_bin_id: int, to_bin_id: int) -> float:
         """Get walking time between two bins, using cache if available."""
@@ -504,11 +1170,18 @@ class MultiStageOptimizer:
         if cache_key in self.walking_times_cache:
             return self.walking_times_cache[cache_key]
         
+        # The memory-mapped matrix answers without touching the database
+        store = get_walking_time_store(self.walking_calculator.warehouse_id)
+        time_minutes = store.walking_time(from_bin_id, to_bin_id) if store is not None else None
+        if time_minutes is not None:
+            self.walking_times_cache[cache_key] = time_minutes
+            return time_minutes
+        
         try:
-            # Get walking time from database
-            from walking_time_calculator import calculate_walking_time_between_bins
-            walking_time = calculate_walking_time_between_bins(from_bin_id, to_bin_id)
-            time_minutes = walking_time.get('walking_time_minutes', 0.0)
+            # Otherwise from the bins, loaded once per process
+            time_minutes = get_bin_index(self.walking_calculator.warehouse_id).walking_time(from_bin_id, to_bin_id)
+            if time_minutes is None:
+                raise ValueError(f"Bin not found: from_bin_id={from_bin_id}, to_bin_id={to_bin_id}")
             self.walking_times_cache[cache_key] = time_minutes
             return time_minutes
         except Exception as e:
@@ -521,6 +1194,7 @@ class MultiStageOptimizer:
         
         try:
             # Get order items with their SKU bin locations
+            self.db_round_trips += 1
             conn = self.walking_calculator.db.get_connection()
             with conn.cursor() as cursor:
                 cursor.execute("""
@@ -542,6 +1216,10 @@ class MultiStageOptimizer:
     
     def _calculate_total_walking_time(self, order) -> float:
         """Calculate total walking time for all picks in an order."""
+        self._sync_walking_parameters()
+        if order.id in self.order_walking_minutes:
+            return self.order_walking_minutes[order.id]
+        
         bin_locations = self._get_order_bin_locations(order)
         
         if len(bin_locations) <= 1:
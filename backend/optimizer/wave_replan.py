@@ -0,0 +1,326 @@
+"""
+Incremental re-planning of a solved wave when its orders change.
+
+Rebuilding and re-solving the whole wave every time the order feed ticks
+takes minutes. The replanner instead starts from the previous solution and
+a delta of added, cancelled and reprioritised orders, and only the affected
+neighborhood is re-solved:
+
+- stages that have already started (start before the re-plan time) keep
+  their start; if their worker or equipment has left the wave's resources,
+  only that resource is re-assigned and the stage is reported as a conflict;
+- changed orders, plus the neighborhood_size unchanged orders planned
+  closest in time to the changes, are free to move, but not into the past;
+- every other order keeps its previous starts, workers and equipment.
+
+Only the orders with a free or re-assigned stage are modelled. Orders kept
+entirely as planned enter the model as fixed intervals on the stages they
+occupy, so each re-plan builds a model of the neighborhood rather than the
+wave. Started stages inside the model are pinned with equality constraints,
+which CP-SAT presolve removes. If the pinned plan can't be completed, the
+replanner escalates once to freeing every stage that hasn't started yet.
+"""
+
+import logging
+import math
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from .wave_constraint_optimizer import WaveConstraintOptimizer
+from .model_estimator import admit
+from .profiling import OptimizerProfile
+
+
+class WaveReplanner:
+    """Re-solves the part of a wave affected by an order delta, freezing the rest."""
+
+    neighborhood_size = 20  # Unchanged orders re-solved alongside the changed ones
+    time_limit = 10         # Seconds per re-plan; re-plans run on every order feed tick
+
+    def __init__(self, neighborhood_size: int = None, time_limit: float = None):
+        self.neighborhood_size = self.neighborhood_size if neighborhood_size is None else neighborhood_size
+        self.time_limit = time_limit or self.time_limit
+        self.optimizer = None
+        self.frozen_stages = 0
+        self.conflicts = []
+        self.admission = None
+        self.profile = OptimizerProfile(type(self).__name__)
+
+    def replan_wave(self, wave_id: int, previous_solution: Dict, delta: Dict,
+                    now: Optional[datetime] = None) -> Dict:
+        """Load the wave's current orders from the database and re-plan them."""
+        self.profile = OptimizerProfile(type(self).__name__)
+        with self.profile.phase("data_load"):
+            wave_data = WaveConstraintOptimizer().get_wave_data(wave_id, use_cache=False)
+        if wave_data.get("error"):
+            return {"error": wave_data["error"]}
+        result = self.replan(wave_data, previous_solution, delta, now, reset_profile=False)
+        if not result.get("error"):
+            result["wave_id"] = wave_id
+        return result
+
+    def replan(self, wave_data: Dict, previous_solution: Dict, delta: Dict,
+               now: Optional[datetime] = None, reset_profile: bool = True) -> Dict:
+        """
+        Re-plan a wave after an order delta.
+
+        Args:
+            wave_data: Current wave rows as returned by WaveConstraintOptimizer.get_wave_data
+            previous_solution: "solution" of the previous optimize or re-plan result
+                (base_time plus a schedule in minutes from it)
+            delta: added_order_ids, cancelled_order_ids and reprioritized_orders
+                (order_id -> 'high', 'medium' or 'low'); orders in wave_data that the
+                previous schedule doesn't cover count as added too
+            now: Re-plan time; stages starting before it are frozen (defaults to now)
+
+        Returns:
+            Result dict like WaveConstraintOptimizer.solve_optimization, with the
+            merged schedule in "solution" and what was frozen in "replan"
+        """
+        logger = logging.getLogger("WaveReplanner")
+        if reset_profile:
+            self.profile = OptimizerProfile(type(self).__name__)
+        replan_start = time.time()
+
+        base_time = previous_solution.get("base_time")
+        if not base_time:
+            return {"error": "Previous solution has no base_time"}
+        base_time = datetime.fromisoformat(str(base_time)).replace(tzinfo=None)
+        now = (now or datetime.now()).replace(tzinfo=None)
+        now_minute = max(0, math.ceil((now - base_time).total_seconds() / 60))
+
+        with self.profile.phase("delta"):
+            wave_data, previous_stages, changed, cancelled = self.apply_delta(wave_data, previous_solution, delta)
+            if not wave_data['wave_data']:
+                return {"error": "No orders left in the wave after the delta"}
+            neighborhood = self.select_neighborhood(wave_data['wave_data'], previous_stages, changed,
+                                                    cancelled, now_minute)
+        free_orders = changed | neighborhood
+        logger.info(f"Re-planning {len(wave_data['wave_data'])} orders at minute {now_minute}: "
+                    f"{len(changed)} changed, {len(neighborhood)} neighbors, "
+                    f"{len(wave_data['wave_data']) - len(free_orders)} frozen")
+
+        result = self._solve(wave_data, previous_stages, free_orders, base_time, now_minute)
+        escalated = False
+        if result.get("error") and "admission" not in result:
+            # The pinned stages leave no room; free everything that hasn't started yet
+            logger.warning(f"Neighborhood re-plan failed ({result['error']}), freeing all unstarted stages")
+            escalated = True
+            free_orders = {order['order_id'] for order in wave_data['wave_data']}
+            result = self._solve(wave_data, previous_stages, free_orders, base_time, now_minute)
+            if result.get("error"):
+                result["profile"] = self.profile.to_dict()
+                return result
+
+        self.profile.counts.update(changed_orders=len(changed), neighborhood_orders=len(neighborhood),
+                                   cancelled_orders=len(cancelled))
+        result["replan"] = {
+            "replan_minute": now_minute,
+            "changed_order_ids": sorted(changed),
+            "cancelled_order_ids": sorted(cancelled),
+            "neighborhood_order_ids": sorted(neighborhood),
+            "free_orders": len(free_orders),
+            "frozen_orders": len(wave_data['wave_data']) - len(free_orders),
+            "frozen_stages": self.frozen_stages,
+            "conflicts": self.conflicts,
+            "escalated": escalated,
+            "replan_seconds": time.time() - replan_start
+        }
+        result["num_orders"] = len(wave_data['wave_data'])
+        result["num_workers"] = len(set(w.get('id', 0) for w in wave_data['workers']))
+        result["num_equipment"] = len(wave_data['equipment'])
+        result["optimization_type"] = "incremental_replan"
+        result["admission"] = self.admission
+        result["profile"] = self.profile.to_dict()
+        return result
+
+    def apply_delta(self, wave_data: Dict, previous_solution: Dict, delta: Dict):
+        """
+        Drop cancelled orders and apply new priorities to a copy of wave_data.
+
+        Returns the updated wave data, the previous stages by order_id, the ids
+        of changed orders still in the wave, and the ids of cancelled orders.
+        """
+        cancelled = set(delta.get('cancelled_order_ids') or [])
+        priorities = {int(order_id): priority
+                      for order_id, priority in (delta.get('reprioritized_orders') or {}).items()}
+        previous_stages = {
+            order_schedule['order_id']: {stage['stage']: stage for stage in order_schedule['stages']}
+            for order_schedule in previous_solution.get('schedule', [])
+        }
+
+        orders = []
+        for order in wave_data['wave_data']:
+            if order.get('order_id') in cancelled:
+                continue
+            order = dict(order)
+            if order.get('order_id') in priorities:
+                order['priority'] = priorities[order['order_id']]
+            orders.append(order)
+
+        order_ids = {order['order_id'] for order in orders}
+        changed = (set(delta.get('added_order_ids') or []) | set(priorities)) & order_ids
+        changed |= order_ids - set(previous_stages)
+        # Cancelled orders that were never planned free nothing
+        cancelled &= set(previous_stages)
+        return dict(wave_data, wave_data=orders), previous_stages, changed, cancelled
+
+    def select_neighborhood(self, orders: List[Dict], previous_stages: Dict, changed: Set[int],
+                            cancelled: Set[int], now_minute: int) -> Set[int]:
+        """
+        Pick the unchanged orders planned closest in time to the changes.
+
+        A change is anchored at the first unstarted stage of the order in the
+        previous plan (cancelled orders leave a gap there), or at the re-plan
+        time for orders that weren't planned. Unchanged orders are ranked by
+        the distance from their own first unstarted stage to the nearest anchor.
+        """
+        def next_start(order_id):
+            starts = [stage['start_time'] for stage in previous_stages.get(order_id, {}).values()
+                      if stage['start_time'] >= now_minute]
+            return min(starts) if starts else None
+
+        anchors = []
+        for order_id in changed | cancelled:
+            start = next_start(order_id)
+            anchors.append(now_minute if start is None else start)
+        if not anchors or self.neighborhood_size <= 0:
+            return set()
+
+        candidates = []
+        for order in orders:
+            order_id = order['order_id']
+            start = next_start(order_id)
+            if order_id in changed or start is None:
+                continue
+            candidates.append((min(abs(start - anchor) for anchor in anchors), start, order_id))
+        return {order_id for _, _, order_id in sorted(candidates)[:self.neighborhood_size]}
+
+    def _solve(self, wave_data: Dict, previous_stages: Dict, free_orders: Set[int],
+               base_time: datetime, now_minute: int) -> Dict:
+        """Model the free orders against the fixed stages of the frozen ones and solve."""
+        optimizer = self.optimizer = WaveConstraintOptimizer()
+        optimizer.profile = self.profile
+        optimizer.schedule_base_time = base_time
+        self.conflicts = []
+        with self.profile.phase("freeze"):
+            start_windows = optimizer.compute_start_windows(optimizer.horizon)
+            worker_ids = {w.get('id') for w in wave_data['workers']}
+            equipment_ids = {eq.get('id') for eq in wave_data['equipment']}
+            frozen = {}
+            for order in wave_data['wave_data']:
+                stages = previous_stages.get(order['order_id'], {})
+                if order['order_id'] not in free_orders and all(
+                        self._usable(stages.get(stage), start_windows[stage], worker_ids, equipment_ids)
+                        for stage in optimizer.stages):
+                    frozen[order['order_id']] = [stages[stage] for stage in optimizer.stages]
+            model_orders = [order for order in wave_data['wave_data'] if order['order_id'] not in frozen]
+            fixed_stages = [stage for stages in frozen.values() for stage in stages]
+
+        if model_orders:
+            # The neighborhood model must fit the budgets; a heuristic re-plan would drop the frozen stages
+            admission = self.admission = admit(
+                "wave_constraint", len(model_orders),
+                len({w.get('id') for w in wave_data['workers'] if w.get('id') is not None}),
+                len(wave_data['equipment'])
+            )
+            if admission["rejected"] or admission["downgraded"]:
+                return {"error": f"Re-plan model over budget: {admission['reason']}", "admission": admission}
+            with self.profile.phase("model_build"):
+                if not optimizer.create_optimization_model(dict(wave_data, wave_data=model_orders), fixed_stages):
+                    return {"error": "Failed to create re-plan model"}
+            with self.profile.phase("freeze"):
+                pinned = self._pin_stages(optimizer, previous_stages, free_orders, now_minute)
+            result = optimizer.solve_optimization(self.time_limit)
+            if result.get("error"):
+                return result
+        else:
+            pinned = 0
+            result = {"status": "success", "solve_time": 0.0, "objective_value": None,
+                      "solution": {"base_time": base_time.isoformat(), "schedule": []}}
+        self.frozen_stages = pinned + len(fixed_stages)
+
+        # Merge the frozen orders back in, in wave order
+        solved = {order['order_id']: order for order in result["solution"]["schedule"]}
+        schedule = []
+        for order in wave_data['wave_data']:
+            order_id = order['order_id']
+            if order_id in frozen:
+                schedule.append({'order_id': order_id, 'stages': frozen[order_id],
+                                 'total_time': frozen[order_id][-1]['end_time']})
+            else:
+                schedule.append(solved[order_id])
+        result["solution"]["schedule"] = schedule
+        result["solution"]["total_time"] = max((order['total_time'] for order in schedule), default=0)
+        return result
+
+    @staticmethod
+    def _usable(previous: Optional[Dict], window, worker_ids: Set, equipment_ids: Set) -> bool:
+        """Whether a previous stage can be kept as is: inside its start window, on resources still present."""
+        earliest, latest = window
+        return (
+            previous is not None
+            and earliest <= previous['start_time'] <= latest
+            and previous['worker_id'] in worker_ids
+            and previous['equipment_id'] in equipment_ids
+        )
+
+    def _pin_stages(self, optimizer: WaveConstraintOptimizer, previous_stages: Dict,
+                    free_orders: Set[int], now_minute: int) -> int:
+        """
+        Pin started and unaffected stages of the modelled orders to the previous plan; hint the rest.
+
+        A started stage keeps its start even when its worker or equipment has
+        left; only that resource is left to the solver, and the stage is added
+        to self.conflicts. Returns the pinned count.
+        """
+        model = optimizer.model
+        worker_ids = {w.get('id') for w in optimizer.workers}
+        equipment_index = {eq.get('id'): idx for idx, eq in enumerate(optimizer.equipment)}
+        pinned = 0
+
+        for order_idx, order in enumerate(optimizer.orders):
+            order_id = order.get('order_id')
+            for stage in optimizer.stages:
+                key = (order_idx, stage)
+                previous = previous_stages.get(order_id, {}).get(stage)
+                earliest, latest = optimizer.start_windows[stage]
+                usable = self._usable(previous, optimizer.start_windows[stage], worker_ids, equipment_index)
+                started = previous is not None and previous['start_time'] < now_minute
+
+                if usable and (started or order_id not in free_orders):
+                    model.Add(optimizer.start_times[key] == previous['start_time'])
+                    model.Add(optimizer.worker_assignments[key] == previous['worker_id'])
+                    model.Add(optimizer.equipment_usage[key] == equipment_index[previous['equipment_id']])
+                    pinned += 1
+                    continue
+
+                if started:
+                    # Work in progress can't be re-timed; keep what is still there and report the rest
+                    lost = []
+                    if earliest <= previous['start_time'] <= latest:
+                        model.Add(optimizer.start_times[key] == previous['start_time'])
+                    else:
+                        lost.append("start_time")
+                    if previous['worker_id'] in worker_ids:
+                        model.Add(optimizer.worker_assignments[key] == previous['worker_id'])
+                    else:
+                        lost.append("worker_id")
+                    if previous['equipment_id'] in equipment_index:
+                        model.Add(optimizer.equipment_usage[key] == equipment_index[previous['equipment_id']])
+                    else:
+                        lost.append("equipment_id")
+                    self.conflicts.append({"order_id": order_id, "stage": stage, "start_time": previous['start_time'],
+                                           "reassigned": lost})
+                    pinned += "start_time" not in lost
+                    continue
+
+                # Free stages can't move into the past; their previous plan is a good first guess
+                model.Add(optimizer.start_times[key] >= now_minute)
+                if usable:
+                    model.AddHint(optimizer.start_times[key], previous['start_time'])
+                    model.AddHint(optimizer.worker_assignments[key], previous['worker_id'])
+                    model.AddHint(optimizer.equipment_usage[key], equipment_index[previous['equipment_id']])
+
+        return pinned
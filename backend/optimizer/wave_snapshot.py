@@ -0,0 +1,239 @@
+"""
+Bulk loading of wave optimization input.
+
+WaveConstraintOptimizer.get_wave_data used to connect by trying each database
+configuration in turn, paying a failed-connect timeout whenever the first one
+was down, then ran one query for the wave's orders and one each for workers
+and equipment. WaveSnapshotLoader instead:
+
+- keeps a connection pool per process, opened with the first configuration
+  that accepts a connection;
+- loads a wave's orders in one query and the workers and equipment in
+  another, each aggregating its columns into arrays on the server;
+- keeps the result as compact column tuples, cached per warehouse and per
+  wave under the wave's version_id and updated_at, which a one-row query
+  reads first. Repeated optimizations of the same wave skip the order query
+  until the wave is moved to another plan version, touched, invalidated or
+  the cache entry expires.
+
+Rows are only materialized as dicts, in the shape get_wave_data returns, when
+a model is built from them.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+
+from config_service import config_service
+
+# Tried in order when the pool is first opened
+CONNECTION_CONFIGS = [
+    {"host": "localhost", "port": 5432, "database": "warehouse_opt", "user": "wave_user", "password": "wave_password"},
+    {"host": "localhost", "port": 5433, "database": "warehouse_opt", "user": "wave_user", "password": "wave_password"}
+]
+
+ORDER_COLUMNS = ("order_id", "order_number", "shipping_deadline", "priority", "customer_id", "customer_type")
+WORKER_COLUMNS = ("id", "worker_code", "name", "hourly_rate", "skill_name", "proficiency_level")
+EQUIPMENT_COLUMNS = ("id", "equipment_code", "equipment_type", "capacity", "hourly_cost")
+
+# The wave's plan version and last change, read before a cached snapshot is reused
+WAVE_STAMP_QUERY = "SELECT version_id, updated_at FROM waves WHERE id = %s"
+
+# One row per wave assignment, in sequence order; priorities are mapped like the model expects them
+ORDERS_QUERY = """
+    SELECT w.id AS wave_id, w.version_id,
+           COALESCE(w.planned_start_time, NOW()) AS planned_start_time,
+           a.order_ids, a.order_numbers, a.shipping_deadlines, a.priorities, a.customer_ids, a.customer_types
+    FROM waves w
+    CROSS JOIN LATERAL (
+        SELECT array_agg(wa.order_id ORDER BY wa.sequence_order) AS order_ids,
+               array_agg(o.order_number::text ORDER BY wa.sequence_order) AS order_numbers,
+               array_agg(o.shipping_deadline ORDER BY wa.sequence_order) AS shipping_deadlines,
+               array_agg(CASE
+                             WHEN o.priority IN (1, 2) THEN 'high'
+                             WHEN o.priority IN (4, 5) THEN 'low'
+                             ELSE 'medium'
+                         END ORDER BY wa.sequence_order) AS priorities,
+               array_agg(o.customer_id ORDER BY wa.sequence_order) AS customer_ids,
+               array_agg(c.customer_type::text ORDER BY wa.sequence_order) AS customer_types
+        FROM wave_assignments wa
+        JOIN orders o ON wa.order_id = o.id
+        JOIN customers c ON o.customer_id = c.id
+        WHERE wa.wave_id = w.id
+    ) a
+    WHERE w.id = %s AND (%s::integer IS NULL OR w.version_id = %s::integer)
+"""
+
+# Workers have one entry per skill (a 'general' one when they have none)
+RESOURCES_QUERY = """
+    SELECT wk.*, eq.*
+    FROM (
+        SELECT array_agg(w.id ORDER BY w.id, ws.skill) AS worker_ids,
+               array_agg(w.worker_code::text ORDER BY w.id, ws.skill) AS worker_codes,
+               array_agg(w.name::text ORDER BY w.id, ws.skill) AS worker_names,
+               array_agg(w.hourly_rate ORDER BY w.id, ws.skill) AS hourly_rates,
+               array_agg(COALESCE(ws.skill::text, 'general') ORDER BY w.id, ws.skill) AS skill_names,
+               array_agg(COALESCE(ws.proficiency_level, 1) ORDER BY w.id, ws.skill) AS proficiency_levels
+        FROM workers w
+        LEFT JOIN worker_skills ws ON w.id = ws.worker_id
+        WHERE w.warehouse_id = %s
+    ) wk
+    CROSS JOIN (
+        SELECT array_agg(e.id ORDER BY e.id) AS equipment_ids,
+               array_agg(e.equipment_code::text ORDER BY e.id) AS equipment_codes,
+               array_agg(e.equipment_type::text ORDER BY e.id) AS equipment_types,
+               array_agg(e.capacity ORDER BY e.id) AS capacities,
+               array_agg(e.hourly_cost ORDER BY e.id) AS hourly_costs
+        FROM equipment e
+        WHERE e.warehouse_id = %s
+    ) eq
+"""
+
+_pool: Optional[ThreadedConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def _open_pool() -> ThreadedConnectionPool:
+    logger = logging.getLogger("WaveSnapshotLoader")
+    max_connections = config_service.get_value("optimization.database_pool_size", 8)
+    for config in CONNECTION_CONFIGS:
+        try:
+            pool = ThreadedConnectionPool(1, max_connections, **config)
+            logger.info(f"Opened database pool on port {config['port']} ({max_connections} connections)")
+            return pool
+        except psycopg2.OperationalError as e:
+            logger.warning(f"Failed to connect with config {config}: {e}")
+    raise psycopg2.OperationalError("Failed to connect to database with any configuration")
+
+
+@contextmanager
+def pooled_connection():
+    """Borrow a connection from this process's pool, opening the pool on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _open_pool()
+        pool = _pool
+    conn = pool.getconn()
+    broken = False
+    try:
+        yield conn
+    except psycopg2.OperationalError:
+        broken = True
+        raise
+    finally:
+        if not broken and not conn.closed:
+            # Reads only; leave no transaction open on a pooled connection
+            conn.rollback()
+        pool.putconn(conn, close=broken or bool(conn.closed))
+
+
+def _columns(names: Tuple[str, ...], arrays: List[Optional[list]]) -> Dict[str, tuple]:
+    return {name: tuple(values or ()) for name, values in zip(names, arrays)}
+
+
+def _rows(columns: Dict[str, tuple]) -> List[Dict[str, Any]]:
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+
+class WaveSnapshotLoader:
+    """Loads wave orders and warehouse resources in bulk, with a per-process TTL cache."""
+
+    max_entries = 256
+
+    _cache: "OrderedDict[tuple, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    def __init__(self, connection: Callable = pooled_connection, ttl_seconds: float = None):
+        self.connection = connection
+        self.ttl_seconds = config_service.get_value("optimization.wave_snapshot_ttl_seconds", 300) \
+            if ttl_seconds is None else ttl_seconds
+
+    def wave_orders(self, wave_id: int, plan_version_id: Optional[int] = None,
+                    use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Order columns of a wave, one value per wave assignment in sequence order.
+
+        Returns None when the wave doesn't exist, isn't in plan_version_id, or
+        has no orders.
+        """
+        with self.connection() as conn, conn.cursor() as cursor:
+            cursor.execute(WAVE_STAMP_QUERY, (wave_id,))
+            stamp = cursor.fetchone()
+        if stamp is None or (plan_version_id is not None and stamp[0] != plan_version_id):
+            return None
+        
+        def load():
+            with self.connection() as conn, conn.cursor() as cursor:
+                cursor.execute(ORDERS_QUERY, (wave_id, plan_version_id, plan_version_id))
+                row = cursor.fetchone()
+            if row is None or not row[3]:
+                return None
+            return {
+                "wave_id": row[0],
+                "plan_version_id": row[1],
+                "planned_start_time": row[2],
+                "columns": _columns(ORDER_COLUMNS, row[3:])
+            }
+        return self._cached(("wave", wave_id) + tuple(stamp), load, use_cache)
+
+    def resources(self, warehouse_id: int = 1, use_cache: bool = True) -> Dict[str, Dict[str, tuple]]:
+        """Worker (one entry per skill) and equipment columns of a warehouse."""
+        def load():
+            with self.connection() as conn, conn.cursor() as cursor:
+                cursor.execute(RESOURCES_QUERY, (warehouse_id, warehouse_id))
+                row = cursor.fetchone()
+            return {
+                "workers": _columns(WORKER_COLUMNS, row[:6]),
+                "equipment": _columns(EQUIPMENT_COLUMNS, row[6:])
+            }
+        return self._cached(("resources", warehouse_id), load, use_cache)
+
+    def _cached(self, key: tuple, load: Callable[[], Any], use_cache: bool):
+        now = time.time()
+        if use_cache:
+            with self._cache_lock:
+                entry = self._cache.get(key)
+                if entry is not None and now - entry[0] < self.ttl_seconds:
+                    self._cache.move_to_end(key)
+                    return entry[1]
+        value = load()
+        if value is not None:
+            with self._cache_lock:
+                self._cache[key] = (now, value)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return value
+
+    @classmethod
+    def invalidate(cls, wave_id: Optional[int] = None):
+        """Drop the cached snapshots of a wave, or everything when wave_id is None."""
+        with cls._cache_lock:
+            if wave_id is None:
+                cls._cache.clear()
+                return
+            for key in [key for key in cls._cache if key[0] == "wave" and key[1] == wave_id]:
+                del cls._cache[key]
+
+    @staticmethod
+    def order_rows(orders: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Order dicts as get_wave_data returns them."""
+        rows = _rows(orders["columns"])
+        for row in rows:
+            row["wave_id"] = orders["wave_id"]
+            row["planned_start_time"] = orders["planned_start_time"]
+        return rows
+
+    @staticmethod
+    def resource_rows(resources: Dict[str, Dict[str, tuple]]) -> Dict[str, List[Dict[str, Any]]]:
+        """Worker and equipment dicts as get_resources returns them."""
+        return {"workers": _rows(resources["workers"]), "equipment": _rows(resources["equipment"])}
+
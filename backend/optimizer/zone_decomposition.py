@@ -0,0 +1,389 @@
+"""
+Zone-partitioned decomposition of the wave scheduling problem.
+
+Orders rarely span more than one or two zones, so picking decomposes well:
+each order is assigned to the zone holding most of its pick work, pickers
+and pick carts are split into per-zone pools, and the PICK stage of every
+zone is scheduled by its own small CP-SAT model in a separate process. The
+pick completions then become release slots of one shared interval model for
+the downstream stages (consolidate through ship), in which the pick
+intervals are frozen on their workers and carts.
+
+The result reports the decomposed schedule's value of the monolithic
+objective, so the loss against a MultiStageOptimizer solve can be measured.
+"""
+
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+from ortools.sat.python import cp_model
+
+from models.warehouse import StageType, SkillType, EquipmentType
+from models.optimization import OptimizationResult, OptimizationMetrics, OrderSchedule, StageSchedule
+from .wave_optimizer import MultiStageOptimizer, OptimizationConstraints, OptimizationRequirements, SimpleOptimizer
+from .profiling import OptimizerProfile
+
+
+class ZoneDecompositionOptimizer:
+    """
+    Solves PICK per zone in parallel, then the downstream stages in one model.
+
+    pick_budget_share of the time limit goes to the zone solves (which run
+    concurrently); the downstream model gets whatever is left.
+    """
+
+    pick_budget_share = 0.4
+    # Per-slot weight on pick completion; earlier picks leave the downstream model more room
+    completion_weight = 1
+
+    def __init__(self, warehouse_config, time_limit_seconds: float = None, max_parallel_zones: int = None):
+        self.warehouse = warehouse_config
+        self.requirements = OptimizationRequirements()
+        self.time_limit_seconds = time_limit_seconds or self.requirements.max_solve_time_seconds
+        self.max_parallel_zones = max_parallel_zones or os.cpu_count() or 1
+        self.time_granularity = self.requirements.time_granularity_minutes
+
+        self.schedule_base_time = None  # Datetime of slot 0, defaults to now
+        self.order_walking_minutes = {}
+        self.zone_reports = []
+        self.downstream_report = {}
+        self.profile = OptimizerProfile(type(self).__name__)
+
+    def optimize_workflow(self, orders, workers, equipment, deadlines):
+        """
+        Schedule picks per zone, then the downstream stages.
+
+        Args:
+            orders: List of Order objects to schedule
+            workers: List of Worker objects available
+            equipment: List of Equipment objects available
+            deadlines: Dictionary mapping order_id to deadline datetime
+
+        Returns:
+            OptimizationResult with per-zone pick solves in input_summary["zones"]
+            and the monolithic objective value of the schedule in input_summary["objective"]
+        """
+        start_time = time.time()
+        profile = self.profile = OptimizerProfile(type(self).__name__)
+        self.zone_reports = []
+        self.downstream_report = {}
+        base_time = self.schedule_base_time or datetime.now()
+        orders = orders[:self.requirements.max_orders_per_wave]
+        workers = workers[:self.requirements.max_workers]
+        deadlines = deadlines if isinstance(deadlines, dict) else {}
+        stages = self.requirements.stages
+        pick_stage = stages.index(StageType.PICK)
+        granularity = self.time_granularity
+        max_time_slots = math.ceil(24 * 60 / granularity)
+
+        # Durations of all stages, so pick due slots can leave room for the downstream chain
+        planner = MultiStageOptimizer(self.warehouse, model_mode="interval")
+        planner.profile = profile
+        planner.order_walking_minutes = self.order_walking_minutes
+        slots = planner.precompute_stage_durations(orders, stages, granularity)
+
+        with profile.phase("zone_partition"):
+            zones = self.partition(orders, workers, equipment)
+            order_index = {order.id: o for o, order in enumerate(orders)}
+            tasks = []
+            for zone, zone_orders, zone_workers, zone_carts in zones:
+                order_rows = []
+                for order in zone_orders:
+                    o = order_index[order.id]
+                    # Ship must start by the deadline, so picking must end before the stages in between
+                    ship_latest = max_time_slots - 1
+                    if order.id in deadlines:
+                        ship_latest = min(ship_latest, planner._deadline_to_slot(deadlines[order.id], granularity))
+                    lead = int(slots[o, pick_stage + 1:stages.index(StageType.SHIP)].sum())
+                    order_rows.append({
+                        "order_id": order.id,
+                        "slots": int(slots[o, pick_stage]),
+                        "latest_end": ship_latest - lead
+                    })
+                tasks.append({
+                    "zone": zone,
+                    "orders": order_rows,
+                    "workers": [(worker.id, worker.hourly_rate) for worker in zone_workers],
+                    "carts": [(cart.id, cart.capacity) for cart in zone_carts],
+                    "horizon": max_time_slots,
+                    "completion_weight": self.completion_weight,
+                    "time_limit": max(0.1, self.time_limit_seconds * self.pick_budget_share),
+                    "num_workers": max(1, (os.cpu_count() or 1) // max(1, min(len(zones), self.max_parallel_zones)))
+                })
+
+        zone_sizes = ", ".join(f"zone {task['zone']}: {len(task['orders'])} orders, {len(task['workers'])} pickers"
+                               for task in tasks)
+        print(f"Zone decomposition: {len(orders)} orders in {len(zones)} zones ({zone_sizes})")
+
+        with profile.phase("zone_solves"):
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=min(len(tasks), self.max_parallel_zones) or 1,
+                                     mp_context=context) as executor:
+                zone_outcomes = list(executor.map(solve_zone_picks, tasks))
+
+        self.zone_reports = [{key: value for key, value in outcome.items() if key != "assignments"}
+                             for outcome in zone_outcomes]
+        pick_assignments = [row for outcome in zone_outcomes for row in outcome["assignments"]]
+        failed_zones = [outcome["zone"] for outcome in zone_outcomes if outcome["status"] not in ("OPTIMAL", "FEASIBLE")]
+        profile.counts.update(orders=len(orders), workers=len(workers), equipment=len(equipment), zones=len(zones))
+
+        if failed_zones:
+            print(f"Pick scheduling failed in zones {failed_zones}, falling back to the simple optimizer")
+            with profile.phase("fallback"):
+                result = SimpleOptimizer(self.warehouse).optimize_workflow(orders, workers, equipment, deadlines)
+            result.input_summary.update(solve_mode="zone_decomposition", zones=self.zone_reports,
+                                        profile=profile.to_dict())
+            return result
+
+        # Downstream stages in one interval model, released by the pick completions
+        downstream = MultiStageOptimizer(self.warehouse, model_mode="interval")
+        downstream.requirements.stages = stages[pick_stage + 1:]
+        downstream.requirements.max_orders_per_wave = len(orders)
+        downstream.order_walking_minutes = self.order_walking_minutes
+        downstream.schedule_base_time = base_time
+        downstream.time_granularity = granularity
+        release_slots = {row["order_id"]: row["start_slot"] + row["slots"] for row in pick_assignments}
+        remaining = self.time_limit_seconds - (time.time() - start_time)
+
+        downstream_result = downstream.optimize_workflow(
+            orders, workers, equipment, deadlines, fixed_commitments=pick_assignments,
+            time_limit_seconds=max(0.1, remaining), release_slots=release_slots
+        )
+        profile.absorb(downstream.profile)
+        stats = downstream.solve_stats
+        self.downstream_report = {"build_seconds": downstream.model_build_seconds, **stats}
+        if stats.get("status") not in ("OPTIMAL", "FEASIBLE"):
+            downstream_result.input_summary.update(solve_mode="zone_decomposition", zones=self.zone_reports,
+                                                   downstream=self.downstream_report, profile=profile.to_dict())
+            return downstream_result
+
+        with profile.phase("stitching"):
+            result = self._stitch_result(orders, workers, equipment, pick_assignments, planner, downstream_result,
+                                         stats, base_time, time.time() - start_time)
+        result.input_summary["profile"] = profile.to_dict()
+        return result
+
+    def partition(self, orders, workers, equipment) -> List[Tuple[int, list, list, list]]:
+        """
+        Split orders, pickers and pick carts into per-zone (zone, orders, pickers, carts) pools.
+
+        Each order belongs to the zone holding most of its pick minutes. The
+        lightest zones are merged until there are no more zones than pickers
+        (and carts, if the warehouse has carts). Every zone then gets one picker
+        and one cart, and the rest go to the zone with the most pick work per
+        resource so far.
+        """
+        sku_zones = {sku.id: sku.zone for sku in self.warehouse.skus}
+        zone_orders: Dict[int, list] = {}
+        zone_load: Dict[int, float] = {}
+        for order in orders:
+            zone = primary_zone(order, sku_zones)
+            zone_orders.setdefault(zone, []).append(order)
+            zone_load[zone] = zone_load.get(zone, 0.0) + max(order.total_pick_time, 1.0)
+
+        pickers = [worker for worker in workers if SkillType.PICKING in worker.skills]
+        carts = [eq for eq in equipment if eq.equipment_type == EquipmentType.PICK_CART]
+        max_zones = max(1, min(len(pickers), len(carts)) if carts else len(pickers))
+        while len(zone_orders) > max_zones:
+            lightest, next_lightest = sorted(zone_load, key=zone_load.get)[:2]
+            zone_orders[next_lightest].extend(zone_orders.pop(lightest))
+            zone_load[next_lightest] += zone_load.pop(lightest)
+
+        def split(resources, weight):
+            pools = {zone: [] for zone in zone_orders}
+            ranked = sorted(resources, key=weight, reverse=True)
+            # Seed every zone with one resource first (heaviest zone, strongest resource), since a
+            # zone model without a picker or cart is infeasible; max_zones guarantees there are enough
+            for zone, resource in zip(sorted(pools, key=lambda z: (-zone_load[z], z)), ranked):
+                pools[zone].append(resource)
+            for resource in ranked[len(pools):]:
+                zone = max(sorted(pools), key=lambda z: zone_load[z] / (1 + sum(weight(r) for r in pools[z])))
+                pools[zone].append(resource)
+            return pools
+
+        # Slower pickers and smaller carts count for less when balancing the pools
+        picker_pools = split(pickers, lambda worker: worker.efficiency_factor)
+        cart_pools = split(carts, lambda cart: cart.capacity)
+        return [(zone, zone_orders[zone], picker_pools[zone], cart_pools[zone]) for zone in sorted(zone_orders)]
+
+    def _stitch_result(self, orders, workers, equipment, pick_assignments, planner, downstream_result,
+                       downstream_stats, base_time, optimization_time) -> OptimizationResult:
+        """Prepend the zone pick stages to the downstream schedule and total the costs."""
+        worker_rates = {worker.id: worker.hourly_rate for worker in workers}
+        equipment_rates = {eq.id: eq.hourly_cost for eq in equipment}
+        order_index = {order.id: o for o, order in enumerate(orders)}
+        pick_stage = self.requirements.stages.index(StageType.PICK)
+        picks = {row["order_id"]: row for row in pick_assignments}
+        equipment_weight = OptimizationConstraints.get_objective_weights()["equipment_utilization_weight"]
+
+        pick_labor_cost = 0.0
+        pick_equipment_cost = 0.0
+        pick_objective = 0.0
+        order_schedules = []
+        for downstream_schedule in downstream_result.order_schedules:
+            row = picks[downstream_schedule.order_id]
+            duration = float(planner.stage_duration_minutes[order_index[row["order_id"]], pick_stage])
+            start = base_time + timedelta(minutes=row["start_slot"] * self.time_granularity)
+            pick_labor_cost += duration * worker_rates[row["worker_id"]] / 60
+            # Same terms as MultiStageOptimizer's objective: slot labor cost plus equipment use
+            pick_objective += row["slots"] * worker_rates[row["worker_id"]]
+            if row["equipment_id"] is not None:
+                pick_equipment_cost += duration * equipment_rates[row["equipment_id"]] / 60
+                pick_objective += equipment_weight
+            order_schedules.append(OrderSchedule(
+                order_id=downstream_schedule.order_id,
+                customer_id=downstream_schedule.customer_id,
+                priority=downstream_schedule.priority,
+                shipping_deadline=downstream_schedule.shipping_deadline,
+                stages=[StageSchedule(
+                    order_id=row["order_id"],
+                    stage_type=StageType.PICK,
+                    start_time=start,
+                    end_time=start + timedelta(minutes=duration),
+                    duration_minutes=duration,
+                    assigned_worker_id=row["worker_id"],
+                    assigned_equipment_id=row["equipment_id"]
+                )] + downstream_schedule.stages
+            ))
+
+        downstream_metrics = downstream_result.metrics
+        total_labor_cost = downstream_metrics.total_labor_cost + pick_labor_cost
+        total_equipment_cost = downstream_metrics.total_equipment_cost + pick_equipment_cost
+        total_orders = len(order_schedules)
+        total_processing_time = sum(st.duration_minutes for o in order_schedules for st in o.stages)
+
+        metrics = OptimizationMetrics(
+            total_orders=total_orders,
+            on_time_orders=downstream_metrics.on_time_orders,
+            late_orders=downstream_metrics.late_orders,
+            on_time_percentage=downstream_metrics.on_time_percentage,
+            total_labor_cost=total_labor_cost,
+            total_equipment_cost=total_equipment_cost,
+            total_deadline_penalties=downstream_metrics.total_deadline_penalties,
+            total_cost=total_labor_cost + total_equipment_cost + downstream_metrics.total_deadline_penalties,
+            average_order_processing_time=total_processing_time / total_orders if total_orders > 0 else 0,
+            total_processing_time=total_processing_time,
+            optimization_runtime_seconds=optimization_time,
+            # Even with every part solved to optimality the decomposed schedule is only feasible
+            solver_status="FEASIBLE"
+        )
+
+        return OptimizationResult(
+            order_schedules=order_schedules,
+            worker_schedules=[],
+            equipment_schedules=[],
+            metrics=metrics,
+            optimization_start_time=datetime.now(),
+            optimization_end_time=datetime.now(),
+            input_summary={
+                "total_orders": len(orders),
+                "total_workers": len(workers),
+                "total_equipment": len(equipment),
+                "optimization_horizon_hours": 24,
+                "model_mode": "interval",
+                "solve_mode": "zone_decomposition",
+                "time_limit_seconds": self.time_limit_seconds,
+                "objective": downstream_stats["objective"] + pick_objective,
+                "zones": self.zone_reports,
+                "downstream": self.downstream_report
+            }
+        )
+
+    def generate_explanation(self, solution):
+        zones = solution.input_summary.get("zones", [])
+        return f"Picks scheduled in {len(zones)} zone solves, downstream stages in one CP-SAT model."
+
+
+def primary_zone(order, sku_zones: Dict[int, int]) -> int:
+    """The zone holding most of an order's pick minutes (0 for orders without items)."""
+    minutes_by_zone = {}
+    for item in order.items:
+        zone = item.sku.zone if item.sku is not None else sku_zones.get(item.sku_id, 0)
+        pick_minutes = item.quantity * (item.sku.pick_time_minutes if item.sku is not None else 1.0)
+        minutes_by_zone[zone] = minutes_by_zone.get(zone, 0.0) + pick_minutes
+    return max(sorted(minutes_by_zone), key=minutes_by_zone.get) if minutes_by_zone else 0
+
+
+def solve_zone_picks(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Schedule the PICK stage of one zone (runs in a worker process).
+
+    Each pick runs on exactly one of the zone's pickers (NoOverlap per picker)
+    and, if the zone has carts, one cart (Cumulative per cart capacity), and
+    must end by the order's latest_end slot. Minimizes labor cost plus
+    completion_weight per slot of pick completion.
+    """
+    model = cp_model.CpModel()
+    horizon = task["horizon"]
+    workers = task["workers"]
+    carts = task["carts"]
+    worker_intervals = {w: [] for w in range(len(workers))}
+    cart_intervals = {c: [] for c in range(len(carts))}
+    starts, worker_vars, cart_vars = [], [], []
+    objective_terms = []
+
+    for o, order in enumerate(task["orders"]):
+        slots = order["slots"]
+        # A due slot that can't be met keeps a one-value domain, as in compute_start_windows
+        latest_start = max(0, min(horizon - 1, order["latest_end"] - slots))
+        start = model.NewIntVar(0, latest_start, f"pick_start_{o}")
+        starts.append(start)
+        objective_terms.append(task["completion_weight"] * (start + slots))
+
+        assigned = [model.NewBoolVar(f"pick_worker_{o}_{w}") for w in range(len(workers))]
+        model.AddExactlyOne(assigned)
+        for w, literal in enumerate(assigned):
+            worker_intervals[w].append(model.NewOptionalFixedSizeIntervalVar(start, slots, literal, f"pick_{o}_{w}"))
+            objective_terms.append(literal * slots * workers[w][1])
+        worker_vars.append(assigned)
+
+        used = [model.NewBoolVar(f"pick_cart_{o}_{c}") for c in range(len(carts))]
+        if used:
+            model.AddExactlyOne(used)
+        for c, literal in enumerate(used):
+            cart_intervals[c].append(model.NewOptionalFixedSizeIntervalVar(start, slots, literal, f"cart_{o}_{c}"))
+        cart_vars.append(used)
+
+    for intervals in worker_intervals.values():
+        if len(intervals) > 1:
+            model.AddNoOverlap(intervals)
+    for c, intervals in cart_intervals.items():
+        if intervals:
+            model.AddCumulative(intervals, [1] * len(intervals), carts[c][1])
+    model.Minimize(sum(objective_terms))
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = task["time_limit"]
+    solver.parameters.num_workers = task["num_workers"]
+    status = solver.Solve(model)
+
+    outcome = {
+        "zone": task["zone"],
+        "orders": len(task["orders"]),
+        "pickers": len(workers),
+        "carts": len(carts),
+        "status": solver.StatusName(status),
+        "wall_time_seconds": solver.WallTime(),
+        "objective": None,
+        "assignments": []
+    }
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return outcome
+    outcome["objective"] = solver.ObjectiveValue()
+    for o, order in enumerate(task["orders"]):
+        worker = next(w for w, literal in enumerate(worker_vars[o]) if solver.Value(literal))
+        cart = next((c for c, literal in enumerate(cart_vars[o]) if solver.Value(literal)), None)
+        outcome["assignments"].append({
+            "order_id": order["order_id"],
+            "stage": StageType.PICK,
+            "start_slot": solver.Value(starts[o]),
+            "slots": order["slots"],
+            "worker_id": workers[worker][0],
+            "equipment_id": carts[cart][0] if cart is not None else None
+        })
+    return outcome
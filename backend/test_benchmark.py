@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test script for the offline optimizer scaling benchmark.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_optimizers import INSTANCE_LADDER, compare_results, run_benchmark, run_isolated
+
+
+def test_smallest_rung():
+    """Every optimizer produces a complete record on the 10x5 rung."""
+    instance = INSTANCE_LADDER[0]
+    for optimizer_name in ("multi_stage_interval", "simple", "simple_wave", "wave_constraint"):
+        record = run_benchmark(optimizer_name, instance, time_limit=5)
+        assert record["instance"] == "10x5"
+        assert record["objective"] is not None, f"{optimizer_name}: no objective ({record['status']})"
+        assert record["on_time_percentage"] == 100.0
+        assert record["build_seconds"] is not None and record["solve_seconds"] is not None
+        assert record["peak_rss_mb"] >= record["baseline_rss_mb"] > 0
+        print(f"✓ {optimizer_name}: {record['status']}, objective {record['objective']:.2f}")
+
+
+def test_oversized_runs_skipped():
+    """Rungs above an optimizer's order cap are recorded as skipped without starting a process."""
+    record = run_isolated("multi_stage_time_indexed", INSTANCE_LADDER[-1], time_limit=5)
+    assert record["status"] == "skipped"
+    print(f"✓ {record['instance']} skipped for multi_stage_time_indexed")
+
+
+def test_compare_results():
+    """Slower runs and runs that lost their solution are reported as regressions."""
+    run = {"optimizer": "simple", "instance": "10x5", "status": "FEASIBLE", "objective": 10.0,
+           "build_seconds": 1.0, "solve_seconds": 2.0, "peak_rss_mb": 100.0}
+    baseline = {"metadata": {}, "results": [run, dict(run, optimizer="wave_constraint")]}
+    current = {"metadata": {}, "results": [
+        dict(run, solve_seconds=3.0, peak_rss_mb=105.0),
+        dict(run, optimizer="wave_constraint", status="UNKNOWN", objective=None)
+    ]}
+
+    regressions = compare_results(baseline, current, threshold=0.2)
+    assert [(r["optimizer"], r["metric"]) for r in regressions] == [("simple", "solve_seconds"),
+                                                                    ("wave_constraint", "status")]
+    assert compare_results(baseline, baseline) == []
+    print(f"✓ {len(regressions)} regressions detected")
+
+
+if __name__ == "__main__":
+    test_smallest_rung()
+    test_oversized_runs_skipped()
+    test_compare_results()
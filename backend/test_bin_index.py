@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test script for the process-wide bin index.
+"""
+
+import sys
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import bin_index
+from bin_index import BinIndex, get_bin_index
+from test_walking_time_matrix import generate_bins, pair_record
+from walking_time_calculator import WalkingTimeCalculator, calculate_walking_time_between_bins
+from walking_time_store import WalkingTimeStore, current_walking_parameters
+
+
+def test_index_matches_pair_formula():
+    """Single and batched queries match the per-pair formula, in microseconds."""
+    print("Testing bin index...")
+    bins = generate_bins(2000, seed=5)
+    calculator = WalkingTimeCalculator()
+    index = BinIndex(bins, calculator)
+
+    for a, b in [(bins[0], bins[1]), (bins[1500], bins[3]), (bins[77], bins[77])]:
+        assert index.pair(a['id'], b['id']) == pair_record(calculator, a, b)
+    assert index.walking_time(bins[0]['id'], 999999) is None
+
+    rng = np.random.default_rng(1)
+    from_index, to_index = rng.integers(0, 2000, 100000), rng.integers(0, 2000, 100000)
+    ids = np.array([b['id'] for b in bins])
+    start = time.perf_counter()
+    minutes = index.walking_times(ids[from_index], ids[to_index])
+    batch_seconds = time.perf_counter() - start
+    dense = calculator.build_matrix(bins).walking_times(dtype=np.float64)
+    assert np.array_equal(minutes, dense[from_index, to_index])
+    assert np.isnan(index.walking_times([ids[0], 999999], [999999, ids[1]])).all()
+    # Steps to or from an unknown bin are skipped, as in WalkingTimeStore.path_walking_time
+    path_ids = [ids[3], ids[40], 999999, ids[41], ids[42]]
+    assert index.path_walking_time(path_ids) == round(float(dense[3, 40]) + float(dense[41, 42]), 2)
+
+    # Single pairs as the optimizer asks for them: through the process index and its version check
+    pairs = list(zip(ids[from_index[:20000]].tolist(), ids[to_index[:20000]].tolist()))
+    with process_index(bins, []):
+        get_bin_index()
+        start = time.perf_counter()
+        singles = [get_bin_index().walking_time(from_id, to_id) for from_id, to_id in pairs]
+        single_seconds = time.perf_counter() - start
+    assert singles == minutes[:20000].tolist()
+    assert single_seconds / len(pairs) < 20e-6
+    print(f"✓ {single_seconds / len(pairs) * 1e6:.1f} µs per pair, "
+          f"{batch_seconds / len(minutes) * 1e9:.0f} ns per pair batched")
+
+
+def test_index_records():
+    """The index lists every ordered pair as the walking_times table did, zones included."""
+    bins = generate_bins(30, seed=8)
+    index = BinIndex(bins, WalkingTimeCalculator())
+    records = list(index.records())
+    assert len(records) == 30 * 29
+    by_id = {b['id']: b for b in bins}
+    for record in records[::37]:
+        expected = index.pair(record['from_bin_id'], record['to_bin_id'])
+        assert {key: record[key] for key in expected} == expected
+        assert record['from_zone'] == by_id[record['from_bin_id']].get('zone')
+        assert record['to_zone'] == by_id[record['to_bin_id']].get('zone')
+    print(f"✓ {len(records)} pair records from the index")
+
+
+@contextmanager
+def process_index(bins, loads):
+    """Point the process index at a temporary matrix path and serve bins (a list, read on every load)."""
+    def get_all_bins(calculator):
+        loads.append(calculator.warehouse_id)
+        return list(bins)
+
+    original_matrix_path = bin_index.matrix_path
+    original_get_all_bins = WalkingTimeCalculator.get_all_bins
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "warehouse_1.wtm")
+        bin_index.matrix_path = lambda warehouse_id=1: path
+        WalkingTimeCalculator.get_all_bins = get_all_bins
+        bin_index._indexes.clear()
+        try:
+            yield path
+        finally:
+            bin_index.matrix_path = original_matrix_path
+            WalkingTimeCalculator.get_all_bins = original_get_all_bins
+            bin_index._indexes.clear()
+
+
+def test_process_index_reloads_on_version_bump():
+    """The index is loaded once and reloaded when the matrix file is rewritten."""
+    bins = generate_bins(60, seed=3)
+    loads = []
+    with process_index(bins, loads) as path:
+        first = get_bin_index()
+        assert get_bin_index() is first and len(loads) == 1
+        record = calculate_walking_time_between_bins(bins[0]['id'], bins[1]['id'])
+        assert record['walking_time_minutes'] == first.walking_time(bins[0]['id'], bins[1]['id'])
+        assert len(loads) == 1, "calculate_walking_time_between_bins reuses the index"
+
+        bins.append(generate_bins(61, seed=4)[60])
+        WalkingTimeStore.write(path, WalkingTimeCalculator().build_matrix(bins), current_walking_parameters())
+        second = get_bin_index()
+        assert second is not first and second.size == 61 and len(loads) == 2
+        assert get_bin_index() is second
+    print("✓ Bin index reloads after a version bump only")
+
+
+def test_index_without_matrix_expires():
+    """Without a matrix file, bins added in the database are seen once the index expires."""
+    bins = generate_bins(60, seed=3)
+    added = generate_bins(61, seed=4)[60]
+    loads = []
+    original_ttl = bin_index.BINS_TTL_SECONDS
+    with process_index(bins, loads):
+        try:
+            first = get_bin_index()
+            bins.append(added)
+            assert get_bin_index() is first and first.walking_time(bins[0]['id'], added['id']) is None
+
+            bin_index.BINS_TTL_SECONDS = 0
+            second = get_bin_index()
+            assert second is not first and len(loads) == 2
+            assert second.walking_time(bins[0]['id'], added['id']) is not None
+        finally:
+            bin_index.BINS_TTL_SECONDS = original_ttl
+    print("✓ Bin index without a matrix reloads after its TTL")
+
+
+if __name__ == "__main__":
+    test_index_matches_pair_formula()
+    test_index_records()
+    test_process_index_reloads_on_version_bump()
+    test_index_without_matrix_expires()
+    print("\n✅ All bin index tests passed!")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script for the large-neighborhood search driver.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_optimizers import INSTANCE_LADDER, SCHEDULE_START, build_instance
+from optimizer.lns import LNSOptimizer
+
+
+def test_lns():
+    """Neighborhood re-solves never worsen the list schedule or double-book a resource."""
+    print("Testing LNS optimizer...")
+
+    warehouse_config, orders = build_instance(INSTANCE_LADDER[1], seed=42)
+    deadlines = {order.id: order.shipping_deadline for order in orders}
+    optimizer = LNSOptimizer(warehouse_config, time_limit_seconds=30, max_iterations=12)
+    optimizer.time_granularity = INSTANCE_LADDER[1]["granularity_minutes"]
+    optimizer.schedule_base_time = SCHEDULE_START
+    optimizer.order_walking_minutes = {order.id: 0.0 for order in orders}
+
+    result = optimizer.optimize_workflow(orders, warehouse_config.workers, warehouse_config.equipment, deadlines)
+    summary = result.input_summary
+    assert summary["solve_mode"] == "lns"
+    assert summary["iterations"] == 12
+    assert summary["objective"] <= summary["initial_objective"] + 1e-6
+    assert sorted(o.order_id for o in result.order_schedules) == sorted(o.id for o in orders)
+    neighborhoods = summary["neighborhoods"]
+    assert set(neighborhoods) == set(LNSOptimizer.NEIGHBORHOODS)
+    assert sum(stats["iterations"] for stats in neighborhoods.values()) == 12
+    assert all(stats["weight"] >= LNSOptimizer.min_weight for stats in neighborhoods.values())
+    print(f"✓ Objective {summary['initial_objective']:.1f} -> {summary['objective']:.1f} "
+          f"in {summary['iterations']} iterations")
+
+    for attribute in ("assigned_worker_id", "assigned_equipment_id"):
+        busy = {}
+        for order_schedule in result.order_schedules:
+            for order_stage in order_schedule.stages:
+                resource = getattr(order_stage, attribute)
+                if resource is not None and order_stage.duration_minutes > 0:
+                    busy.setdefault(resource, []).append(order_stage)
+        capacities = {eq.id: eq.capacity for eq in warehouse_config.equipment}
+        for resource, stages in busy.items():
+            capacity = capacities.get(resource, 1) if attribute == "assigned_equipment_id" else 1
+            for stage in stages:
+                overlapping = sum(1 for other in stages if other.start_time <= stage.start_time < other.end_time)
+                assert overlapping <= capacity, f"{attribute} {resource} over capacity at {stage.start_time}"
+    print("✓ No worker double-booked, no equipment over capacity")
+
+    for order_schedule in result.order_schedules:
+        for current, following in zip(order_schedule.stages, order_schedule.stages[1:]):
+            assert following.start_time >= current.end_time, f"Order {order_schedule.order_id} stages overlap"
+    print("✓ Stage precedence respected")
+
+
+if __name__ == "__main__":
+    test_lns()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script for model-size estimates and admission control.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from benchmark_optimizers import INSTANCE_LADDER, build_instance, to_wave_data
+from optimizer.model_estimator import admit, calibrate, counted_model_size, estimate_model_size
+from optimizer.wave_constraint_optimizer import WaveConstraintOptimizer
+
+BUDGETS = {"max_model_memory_mb": 2048, "max_model_build_seconds": 120, "downgrade_oversized_requests": True}
+
+
+def test_counts_match_builder():
+    """The wave constraint counts follow the builder loops exactly."""
+    warehouse_config, orders = build_instance(INSTANCE_LADDER[0], seed=42)
+    wave_data = to_wave_data(warehouse_config, orders)
+    optimizer = WaveConstraintOptimizer()
+    assert optimizer.create_optimization_model(wave_data)
+
+    counted = counted_model_size("wave_constraint", len(orders), len(wave_data['workers']),
+                                 len(wave_data['equipment']), 15)
+    assert counted["variables"] == optimizer.profile.model_size["variables"]
+    assert counted["constraints"] == optimizer.profile.model_size["constraints"]
+    print(f"✓ Counted {counted['variables']} variables, {counted['constraints']} constraints")
+
+
+def test_estimates_grow_with_size():
+    """Bigger requests estimate bigger models; heuristics build none."""
+    small = estimate_model_size("multi_stage_time_indexed", 50, 10, 15, 15)
+    large = estimate_model_size("multi_stage_time_indexed", 250, 25, 30, 15)
+    assert 0 < small["memory_mb"] < large["memory_mb"]
+    assert 0 < small["build_seconds"] < large["build_seconds"]
+    assert estimate_model_size("simple", 2000, 60, 60)["memory_mb"] == 0
+    with pytest.raises(ValueError):
+        estimate_model_size("no_such_optimizer", 10, 5, 10)
+    print(f"✓ 50x10 ~{small['memory_mb']:.0f}MB, 250x25 ~{large['memory_mb']:.0f}MB")
+
+
+def test_calibrate():
+    """Calibration recovers the ratio between built and counted models."""
+    records = []
+    for instance in INSTANCE_LADDER[:3]:
+        counted = counted_model_size("multi_stage_interval", instance["orders"], instance["workers"],
+                                     instance["equipment"], instance["granularity_minutes"], truncate=False)
+        variables, constraints = counted["variables"] // 2, counted["constraints"] // 4
+        records.append(dict(instance, optimizer="multi_stage_interval", build_seconds=(variables + constraints) / 1000,
+                            peak_rss_mb=100 + 3 * (variables + constraints) / 1000, baseline_rss_mb=100,
+                            model_size={"variables": variables, "constraints": constraints}))
+
+    coefficients = calibrate(records)["multi_stage_interval"]
+    assert coefficients["variables"] == pytest.approx(0.5, abs=0.01)
+    assert coefficients["constraints"] == pytest.approx(0.25, abs=0.01)
+    assert coefficients["mb_per_thousand"] == pytest.approx(3.0)
+    assert coefficients["build_seconds_per_thousand"] == pytest.approx(1.0)
+    print("✓ Calibration recovers the size, memory and build-time factors")
+
+
+def test_admission():
+    """Over-budget requests are downgraded along the chain, or rejected when downgrades are off."""
+    fits = admit("multi_stage_time_indexed", 10, 5, 10, 15, budgets=BUDGETS)
+    assert fits["optimizer"] == "multi_stage_time_indexed" and not fits["downgraded"]
+
+    time_indexed = estimate_model_size("multi_stage_time_indexed", 250, 25, 30, 15)
+    interval = estimate_model_size("multi_stage_interval", 250, 25, 30, 15)
+    assert interval["memory_mb"] < time_indexed["memory_mb"]
+    tight = dict(BUDGETS, max_model_memory_mb=(interval["memory_mb"] + time_indexed["memory_mb"]) / 2)
+
+    downgraded = admit("multi_stage_time_indexed", 250, 25, 30, 15, budgets=tight)
+    assert downgraded["optimizer"] == "multi_stage_interval" and downgraded["downgraded"]
+    assert [estimate["optimizer"] for estimate in downgraded["estimates"]] == [
+        "multi_stage_time_indexed", "multi_stage_interval"]
+
+    rejected = admit("multi_stage_time_indexed", 250, 25, 30, 15,
+                     budgets=dict(tight, downgrade_oversized_requests=False))
+    assert rejected["rejected"] and rejected["optimizer"] is None
+    assert "multi_stage_time_indexed" in rejected["reason"]
+    print(f"✓ Downgraded: {downgraded['reason']}")
+
+
+if __name__ == "__main__":
+    test_counts_match_builder()
+    test_estimates_grow_with_size()
+    test_calibrate()
+    test_admission()
+    print("\n✅ All model estimator tests passed!")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script for coarse-to-fine time granularity solving.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_optimizers import INSTANCE_LADDER, SCHEDULE_START, build_instance
+from models.warehouse import StageType
+from optimizer.multi_resolution import MultiResolutionOptimizer
+from optimizer.wave_optimizer import MultiStageOptimizer
+
+
+def test_start_windows():
+    """Explicit start windows narrow the tightened domains and are kept even with tightening off."""
+    warehouse_config, orders = build_instance(INSTANCE_LADDER[0], seed=42)
+    deadlines = {order.id: order.shipping_deadline for order in orders}
+    windows = {orders[0].id: {StageType.PACK: (10, 12)}}
+
+    for tighten in (True, False):
+        optimizer = MultiStageOptimizer(warehouse_config, tighten_horizon=tighten)
+        optimizer.schedule_base_time = SCHEDULE_START
+        optimizer.order_walking_minutes = {order.id: 0.0 for order in orders}
+        stages = optimizer.requirements.stages
+        optimizer.precompute_stage_durations(orders, stages, 15)
+        earliest, latest = optimizer.compute_start_windows(orders, stages, deadlines, 15, 96,
+                                                           start_windows=windows)
+        pack = stages.index(StageType.PACK)
+        assert earliest[0, pack] >= 10 and latest[0, pack] <= 12
+        assert earliest[1, pack] < 10 or latest[1, pack] > 12, "Other orders keep their own windows"
+    print("✓ Start windows narrow the domains with and without horizon tightening")
+
+
+def test_multi_resolution():
+    """The fine level refines the coarse plan and both levels report their solve times."""
+    print("Testing multi-resolution optimizer...")
+
+    warehouse_config, orders = build_instance(INSTANCE_LADDER[0], seed=42)
+    deadlines = {order.id: order.shipping_deadline for order in orders}
+    optimizer = MultiResolutionOptimizer(warehouse_config, granularities=(30, 5), time_limit_seconds=20)
+    optimizer.schedule_base_time = SCHEDULE_START
+    optimizer.order_walking_minutes = {order.id: 0.0 for order in orders}
+
+    result = optimizer.optimize_workflow(orders, warehouse_config.workers, warehouse_config.equipment, deadlines)
+    levels = result.input_summary["levels"]
+    assert result.input_summary["solve_mode"] == "multi_resolution"
+    assert [level["granularity_minutes"] for level in levels] == [30, 5]
+    assert all(level["status"] in ("OPTIMAL", "FEASIBLE") for level in levels)
+    assert all(level["solve_seconds"] is not None and level["build_seconds"] > 0 for level in levels)
+    # Windows around the coarse starts leave far fewer start values than the full fine horizon
+    assert levels[1]["start_domain_values"] < levels[0]["start_domain_values"] * 6
+    print(f"✓ Levels solved in {[round(level['solve_seconds'], 2) for level in levels]}s")
+
+    for order_schedule in result.order_schedules:
+        for stage in order_schedule.stages:
+            offset = (stage.start_time - SCHEDULE_START).total_seconds() / 60
+            assert offset % 5 == 0, "Final schedule should be on the 5-minute grid"
+        for current, following in zip(order_schedule.stages, order_schedule.stages[1:]):
+            assert following.start_time >= current.end_time, f"Order {order_schedule.order_id} stages overlap"
+    print("✓ Final schedule on the fine grid with stage precedence respected")
+
+
+if __name__ == "__main__":
+    test_start_windows()
+    test_multi_resolution()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test script for the background optimization job queue.
+"""
+
+import sys
+import os
+import time
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import optimization_jobs
+from config_service import config_service
+from optimization_jobs import OptimizationJobManager
+
+
+def solve_generated_wave(num_orders: int = 40, time_limit: int = 30):
+    """Job target: solve a generated wave (runs in the worker process)."""
+    from optimizer.wave_optimizer import MultiStageOptimizer
+    from data_generator.generator import SyntheticDataGenerator
+
+    generator = SyntheticDataGenerator(seed=7)
+    warehouse_config = generator.generate_warehouse_config()
+    orders = generator.generate_orders(num_orders)
+    end_of_day = datetime.now().replace(hour=23, minute=45)
+    deadlines = {order.id: end_of_day for order in orders}
+
+    optimizer = MultiStageOptimizer(warehouse_config, model_mode="interval")
+    result = optimizer.optimize_workflow(orders, warehouse_config.workers, warehouse_config.equipment,
+                                         deadlines, time_limit_seconds=time_limit)
+    return {"solve_stats": optimizer.solve_stats, "total_orders": result.metrics.total_orders}
+
+
+def walking_configuration():
+    """Job target: the walking speed and config hash this worker process sees."""
+    from walking_time_store import config_hash, current_walking_parameters
+
+    parameters = current_walking_parameters()
+    return {"walking_speed_fpm": parameters["walking_speed_fpm"], "config_hash": config_hash(parameters)}
+
+
+def wait_for(manager, job_id, states, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = manager.status(job_id)["status"]
+        if status in states:
+            return status
+        time.sleep(0.2)
+    raise AssertionError(f"Job {job_id} never reached {states}")
+
+
+def test_job_lifecycle_and_cancel():
+    """Jobs run in the pool, report results, and cancellation stops a running solver."""
+    optimization_jobs.JOB_TARGETS["test"] = "test_optimization_jobs:solve_generated_wave"
+    manager = OptimizationJobManager(max_concurrent_solves=1, max_queued_jobs=5)
+    try:
+        quick = manager.submit("test", {"num_orders": 5, "time_limit": 2})
+        slow = manager.submit("test", {"time_limit": 120})
+        queued = manager.submit("test", {"time_limit": 120})
+        assert manager.status(queued["job_id"])["status"] == "queued"
+
+        assert wait_for(manager, quick["job_id"], ("completed", "failed")) == "completed"
+        result = manager.result(quick["job_id"])
+        assert result["result"]["total_orders"] > 0
+        print(f"✓ Quick job completed: {result['result']['solve_stats']['status']}")
+
+        # Queued jobs are dropped without running
+        assert manager.cancel(queued["job_id"])["status"] in ("cancelling", "cancelled")
+
+        # Running jobs stop their solver well before the time limit
+        wait_for(manager, slow["job_id"], ("running",))
+        time.sleep(2)
+        cancel_started = time.time()
+        manager.cancel(slow["job_id"])
+        assert wait_for(manager, slow["job_id"], ("cancelled",)) == "cancelled"
+        assert time.time() - cancel_started < 30
+        print(f"✓ Running job cancelled after {time.time() - cancel_started:.1f}s")
+
+        assert wait_for(manager, queued["job_id"], ("cancelled",)) == "cancelled"
+        assert "result" not in manager.result(queued["job_id"])
+    finally:
+        manager.shutdown()
+        del optimization_jobs.JOB_TARGETS["test"]
+
+
+def test_invalid_job_kind():
+    """Unknown kinds and parameters are rejected before anything is queued."""
+    manager = OptimizationJobManager()
+    for kind, params in (("unknown", {}), ("wave", {"no_such_param": 1})):
+        try:
+            manager.submit(kind, params)
+        except ValueError:
+            continue
+        raise AssertionError(f"Expected ValueError for kind={kind} params={params}")
+    print("✓ Invalid job submissions rejected")
+
+
+def test_workers_follow_config_changes():
+    """A configuration change made after the pool started reaches the next job in the same worker."""
+    optimization_jobs.JOB_TARGETS["test_config"] = "test_optimization_jobs:walking_configuration"
+    manager = OptimizationJobManager(max_concurrent_solves=1, max_queued_jobs=5)
+    original_speed = config_service.get_value("walking_time.walking_speed_fpm")
+    try:
+        before = manager.submit("test_config")
+        assert wait_for(manager, before["job_id"], ("completed", "failed")) == "completed"
+        assert manager.result(before["job_id"])["result"]["walking_speed_fpm"] == float(original_speed)
+
+        config_service.set_value("walking_time.walking_speed_fpm", float(original_speed) + 50)
+        after = manager.submit("test_config")
+        assert wait_for(manager, after["job_id"], ("completed", "failed")) == "completed"
+        result = manager.result(after["job_id"])["result"]
+        assert result["walking_speed_fpm"] == float(original_speed) + 50
+        assert result["config_hash"] != manager.result(before["job_id"])["result"]["config_hash"]
+    finally:
+        config_service.set_value("walking_time.walking_speed_fpm", original_speed)
+        manager.shutdown()
+        del optimization_jobs.JOB_TARGETS["test_config"]
+    print("✓ Running workers pick up configuration changes")
+
+
+if __name__ == "__main__":
+    test_job_lifecycle_and_cancel()
+    test_invalid_job_kind()
+    test_workers_follow_config_changes()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script for the parallel optimizer portfolio.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import datetime
+
+from benchmark_optimizers import INSTANCE_LADDER, SCHEDULE_START, build_instance
+from models.warehouse import EquipmentType, StageType
+from optimizer.portfolio import PortfolioOptimizer, validate_plan
+from optimizer.wave_optimizer import MultiStageOptimizer
+
+
+def test_portfolio_picks_feasible_winner():
+    """All members report back within the budget and the winner's plan is feasible."""
+    warehouse_config, orders = build_instance(INSTANCE_LADDER[0], seed=42)
+    optimizer = PortfolioOptimizer(warehouse_config, time_budget_seconds=20)
+    optimizer.schedule_base_time = SCHEDULE_START
+
+    started = datetime.now()
+    result = optimizer.optimize_workflow(orders, warehouse_config.workers, warehouse_config.equipment, {})
+    elapsed = (datetime.now() - started).total_seconds()
+
+    portfolio = result.input_summary["portfolio"]
+    assert [report["member"] for report in portfolio["members"]] == list(PortfolioOptimizer.DEFAULT_MEMBERS)
+    assert portfolio["winner"] is not None
+    assert elapsed < 20 + 10, f"Portfolio overran its budget: {elapsed:.1f}s"
+    assert len(result.order_schedules) == len(orders)
+    assert result.input_summary["profile"]["counts"]["members"] == len(PortfolioOptimizer.DEFAULT_MEMBERS)
+    for report in portfolio["members"]:
+        print(f"✓ {report['member']}: {report['status']} feasible={report['feasible']} score={report.get('score')}")
+    print(f"✓ Winner {portfolio['winner']} in {elapsed:.1f}s")
+
+
+def test_validate_plan_violations():
+    """Double-booked workers and broken precedence are reported."""
+    warehouse_config, orders = build_instance(INSTANCE_LADDER[0], seed=42)
+    worker = warehouse_config.workers[0]
+    stages = ['pick', 'consolidate', 'pack', 'label', 'stage', 'ship']
+    plan = [{'order_id': order.id, 'stage': stage, 'start_minute': 0, 'end_minute': 10,
+             'worker_id': worker.id, 'equipment_id': None}
+            for order in orders[:2] for stage in stages]
+
+    violations = validate_plan(plan, orders[:2], warehouse_config.workers, warehouse_config.equipment)
+    assert any("double-booked" in violation for violation in violations)
+    assert any("starts before the previous stage ends" in violation for violation in violations)
+    print(f"✓ {len(violations)} violations reported")
+
+
+def test_validate_plan_equipment_types():
+    """Equipment of a type the stage can't use is reported, as the CP model would never assign it."""
+    warehouse_config, orders = build_instance(INSTANCE_LADDER[0], seed=42)
+    order = orders[0]
+    stages = [StageType(stage) for stage in ['pick', 'consolidate', 'pack', 'label', 'stage', 'ship']]
+    by_type = {}
+    for eq in warehouse_config.equipment:
+        by_type.setdefault(eq.equipment_type, eq)
+    matching = {StageType.PICK: EquipmentType.PICK_CART, StageType.PACK: EquipmentType.PACKING_STATION,
+                StageType.LABEL: EquipmentType.LABEL_PRINTER, StageType.SHIP: EquipmentType.DOCK_DOOR}
+
+    def plan_with(equipment_of):
+        return [{'order_id': order.id, 'stage': stage.value, 'start_minute': 10 * i, 'end_minute': 10 * i + 10,
+                 'worker_id': next(w.id for w in warehouse_config.workers
+                                   if MultiStageOptimizer._stage_skill(None, stage) in w.skills),
+                 'equipment_id': equipment_of(stage)}
+                for i, stage in enumerate(stages)]
+
+    valid = plan_with(lambda stage: by_type[matching[stage]].id if stage in matching else None)
+    assert validate_plan(valid, [order], warehouse_config.workers, warehouse_config.equipment) == []
+
+    # A dock door on PICK, and a unit on CONSOLIDATE, which uses none
+    dock_door = by_type[EquipmentType.DOCK_DOOR].id
+    mismatched = plan_with(lambda stage: dock_door if stage in (StageType.PICK, StageType.CONSOLIDATE)
+                           else by_type[matching[stage]].id if stage in matching else None)
+    violations = validate_plan(mismatched, [order], warehouse_config.workers, warehouse_config.equipment)
+    assert violations == [f"order {order.id}: pick can't use equipment {dock_door} (dock_door)",
+                          f"order {order.id}: consolidate can't use equipment {dock_door} (dock_door)"]
+    print(f"✓ Mismatched equipment rejected: {violations}")
+
+
+def test_unknown_member_rejected():
+    warehouse_config, _ = build_instance(INSTANCE_LADDER[0], seed=42)
+    try:
+        PortfolioOptimizer(warehouse_config, members=["simple_wave", "cp_magic"])
+    except ValueError as e:
+        assert "cp_magic" in str(e)
+        print("✓ Unknown member rejected")
+    else:
+        raise AssertionError("Unknown member accepted")
+
+
+if __name__ == "__main__":
+    test_portfolio_picks_feasible_winner()
+    test_validate_plan_violations()
+    test_validate_plan_equipment_types()
+    test_unknown_member_rejected()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test script for optimizer phase timing and model-size instrumentation.
+"""
+
+import sys
+import os
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from optimizer.wave_optimizer import MultiStageOptimizer
+from optimizer.simple_wave_optimizer import SimpleWaveOptimizer
+from test_optimization import create_test_data
+
+
+def test_multi_stage_profile():
+    """Every solve reports its phases, model size and CP-SAT statistics."""
+    warehouse_config, orders, workers, equipment = create_test_data()
+    end_of_day = datetime.now().replace(hour=23, minute=45)
+    deadlines = {order.id: end_of_day for order in orders}
+
+    for model_mode in MultiStageOptimizer.MODEL_MODES:
+        optimizer = MultiStageOptimizer(warehouse_config, model_mode=model_mode)
+        result = optimizer.optimize_workflow(orders, workers, equipment, deadlines, time_limit_seconds=10)
+        profile = result.input_summary["profile"]
+
+        for phase in ("data_load", "duration_precompute", "horizon_tightening", "variable_creation",
+                      "constraints.precedence", "constraints.worker_capacity", "objective", "solve", "extraction"):
+            assert phase in profile["phases"], f"{model_mode}: missing phase {phase}"
+        assert sum(profile["phases"].values()) <= profile["total_seconds"]
+        assert profile["model_size"]["variables"] == profile["model_size"]["booleans"] + profile["model_size"]["integers"]
+        assert profile["model_size"]["constraints"] == sum(profile["model_size"]["constraints_by_type"].values())
+        assert profile["solver"]["status"] == optimizer.solve_stats["status"]
+        assert profile["solver"]["branches"] >= 0
+        assert profile["counts"]["orders"] == len(orders)
+        print(f"✓ {model_mode}: {profile['model_size']['variables']} variables, "
+              f"{profile['model_size']['constraints']} constraints, "
+              f"solve {profile['phases']['solve']:.2f}s of {profile['total_seconds']:.2f}s")
+
+
+def test_simple_wave_profile():
+    """The heuristic reports its phases without CP-SAT statistics."""
+    wave_data = {
+        "wave_data": [{"order_id": i, "priority": "high" if i % 2 else "low"} for i in range(10)],
+        "workers": [{"id": i, "skill_name": "general"} for i in range(3)],
+        "equipment": [{"id": i} for i in range(2)]
+    }
+    result = SimpleWaveOptimizer().optimize_wave(wave_data)
+    profile = result["profile"]
+
+    assert set(profile["phases"]) == {"sort", "scheduling", "metrics"}
+    assert profile["counts"]["scheduled_stages"] == 10 * 6
+    assert profile["solver"] == {}
+    print(f"✓ Simple wave optimizer profiled in {profile['total_seconds'] * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    test_multi_stage_profile()
+    test_simple_wave_profile()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test script for the rolling-horizon decomposition solver.
+"""
+
+import sys
+import os
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from optimizer.rolling_horizon import RollingHorizonOptimizer
+from data_generator.generator import SyntheticDataGenerator
+
+
+def test_rolling_horizon():
+    """Windows are stitched into one schedule without double-booking resources."""
+    print("Testing rolling-horizon optimizer...")
+
+    generator = SyntheticDataGenerator(seed=7)
+    warehouse_config = generator.generate_warehouse_config()
+    orders = generator.generate_orders(30)
+    # Deadlines are mapped to slots since midnight, so use the end of the day
+    end_of_day = datetime.now().replace(hour=23, minute=45)
+    deadlines = {order.id: end_of_day for order in orders}
+
+    optimizer = RollingHorizonOptimizer(warehouse_config, window_size=12, window_overlap=4, time_limit_seconds=20)
+    result = optimizer.optimize_workflow(orders, warehouse_config.workers, warehouse_config.equipment, deadlines)
+
+    windows = result.input_summary["windows"]
+    assert len(windows) == 4, f"Expected 4 windows, got {len(windows)}"
+    assert sum(w["committed_orders"] for w in windows) == len(orders)
+    assert result.metrics.solver_status == "FEASIBLE"
+    assert sorted(o.order_id for o in result.order_schedules) == sorted(o.id for o in orders)
+    print(f"✓ {len(orders)} orders stitched from {len(windows)} windows")
+
+    # Frozen commitments keep later windows off resources already in use
+    busy = {}
+    for order_schedule in result.order_schedules:
+        for stage in order_schedule.stages:
+            if stage.assigned_worker_id is not None and stage.duration_minutes > 0:
+                busy.setdefault(stage.assigned_worker_id, []).append(stage)
+    for worker_id, stages in busy.items():
+        stages.sort(key=lambda st: st.start_time)
+        for current, following in zip(stages, stages[1:]):
+            assert following.start_time >= current.end_time, f"Worker {worker_id} double-booked"
+    print("✓ No worker double-booked across windows")
+
+
+def test_tight_deadlines_schedule_every_order():
+    """Windows that cannot meet every deadline still schedule all their orders, late ones included."""
+    generator = SyntheticDataGenerator(seed=7)
+    warehouse_config = generator.generate_warehouse_config()
+    orders = generator.generate_orders(30)
+    deadlines = {order.id: order.shipping_deadline for order in orders}
+
+    optimizer = RollingHorizonOptimizer(warehouse_config, window_size=12, window_overlap=4, time_limit_seconds=20)
+    result = optimizer.optimize_workflow(orders, warehouse_config.workers, warehouse_config.equipment, deadlines)
+
+    windows = result.input_summary["windows"]
+    assert all(w["status"] in ("OPTIMAL", "FEASIBLE") for w in windows), [w["status"] for w in windows]
+    assert result.input_summary["unscheduled_order_ids"] == []
+    assert result.metrics.solver_status == "FEASIBLE"
+    assert sorted(o.order_id for o in result.order_schedules) == sorted(o.id for o in orders)
+    print(f"✓ All {len(orders)} orders scheduled, {result.metrics.late_orders} late")
+
+
+def test_horizon_reports_retried_windows():
+    """The stitched result reports the longest horizon any window was solved on."""
+    generator = SyntheticDataGenerator(seed=7)
+    warehouse_config = generator.generate_warehouse_config()
+    optimizer = RollingHorizonOptimizer(warehouse_config)
+
+    optimizer.window_reports = [{"window": 0, "horizon_hours": 24}]
+    result = optimizer._stitch_result([], [], warehouse_config.workers, warehouse_config.equipment, 0.0, 0)
+    assert result.input_summary["optimization_horizon_hours"] == 24
+
+    optimizer.window_reports.append({"window": 1, "horizon_hours": 61.5, "retried": True})
+    result = optimizer._stitch_result([], [], warehouse_config.workers, warehouse_config.equipment, 0.0, 0)
+    assert result.input_summary["optimization_horizon_hours"] == 61.5
+    print("✓ Stitched horizon covers retried windows")
+
+
+if __name__ == "__main__":
+    test_rolling_horizon()
+    test_tight_deadlines_schedule_every_order()
+    test_horizon_reports_retried_windows()
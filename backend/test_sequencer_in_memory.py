@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Test script for in-memory sequencing with bulk persistence in EnhancedWMSSequencer.
+"""
+
+import sys
+import os
+import random
+import threading
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from enhanced_wms_sequencer import EnhancedWMSSequencer
+from optimizer.wave_snapshot import WaveSnapshotLoader
+
+START = datetime(2025, 1, 6, 8, 0)
+SKILLS = ['picking', 'packing', 'shipping', 'inventory']
+
+
+def generate_waves(num_waves, orders_per_wave, seed):
+    rng = random.Random(seed)
+    waves = {}
+    for wave_id in range(1, num_waves + 1):
+        orders = [{
+            'order_id': wave_id * 1000 + o,
+            'priority': rng.randint(1, 5),
+            'shipping_deadline': START + timedelta(minutes=rng.randint(60, 600)),
+            'total_pick_time': rng.choice([None, rng.randint(5, 20)]),
+            'total_pack_time': rng.choice([None, rng.randint(5, 20)]),
+            'total_weight': rng.randint(1, 20),
+            'total_volume': 1,
+            'customer_name': 'Customer'
+        } for o in range(orders_per_wave)]
+        zones = {order['order_id']: sorted(rng.sample(['A', 'B', 'C'], rng.randint(1, 3))) for order in orders}
+        waves[wave_id] = (orders, zones)
+    return waves
+
+
+class FakeDatabase:
+    """Answers the sequencer's queries from generated waves and records what it writes."""
+
+    encoding = 'UTF8'
+    closed = 0
+
+    def __init__(self, waves):
+        self.waves = waves
+        self.queries = []
+        self.inserted = {}
+        self.lock = threading.Lock()
+        self.workers = [{'id': w, 'name': f'Worker {w}', 'skills': [SKILLS[w % 4], SKILLS[(w + 1) % 4]],
+                         'proficiency_levels': [3, 3]}
+                        for w in range(1, 9)]
+        self.equipment = [{'id': 100 + e, 'name': f'Eq {e}', 'equipment_type': t, 'capacity': 50}
+                          for e, t in enumerate(['packing_station', 'dock_door', 'label_printer'])]
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, database):
+        self.database = database
+        self.connection = database
+        self.rows = []
+        self.mogrified = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def mogrify(self, template, args):
+        self.mogrified.append(tuple(args))
+        return repr(args).encode()
+
+    def execute(self, query, params=None):
+        database = self.database
+        if isinstance(query, bytes):
+            query = query.decode()
+        with database.lock:
+            database.queries.append(query)
+        if "FROM waves WHERE id" in query:
+            self.rows = [('Wave', START, len(database.waves[params[0]][0]))]
+        elif "WHERE status = 'planned'" in query:
+            self.rows = [(wave_id, 'Wave', len(orders)) for wave_id, (orders, _) in database.waves.items()]
+        elif "FROM wave_assignments wa" in query and "JOIN orders" in query:
+            self.rows = [dict(order) for order in database.waves[params[0]][0]]
+        elif "array_agg(DISTINCT s.zone" in query:
+            self.rows = list(database.waves[params[0]][1].items())
+        elif "WHERE oi.order_id = %s" in query:
+            wave_id = params[0] // 1000
+            self.rows = [(zone,) for zone in database.waves[wave_id][1][params[0]]]
+        elif "FROM workers" in query:
+            self.rows = [dict(worker) for worker in database.workers]
+        elif "FROM equipment" in query:
+            self.rows = [dict(eq) for eq in database.equipment]
+        elif "INSERT INTO wave_assignments" in query:
+            # A multi-row statement carries the rows mogrified into it
+            rows = [params] if params is not None else self.mogrified
+            self.mogrified = []
+            with database.lock:
+                for row in rows:
+                    database.inserted.setdefault(row[0], []).append(row)
+            self.rows = []
+        else:
+            self.rows = []
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakePool:
+    def __init__(self, database):
+        self.database = database
+        self.borrowed = 0
+        self.closed = False
+
+    def getconn(self):
+        self.borrowed += 1
+        return self.database
+
+    def putconn(self, conn, close=False):
+        pass
+
+    def closeall(self):
+        self.closed = True
+
+
+class FakeSequencer(EnhancedWMSSequencer):
+    def __init__(self, database):
+        super().__init__()
+        self.database = database
+        self.conn = database
+        self.pools = []
+
+    def get_connection(self):
+        return self.conn
+
+    def open_pool(self, size):
+        self.pools.append(FakePool(self.database))
+        return self.pools[-1]
+
+
+def test_in_memory_matches_per_row_sequencing():
+    """In-memory sequencing writes the same assignments in one statement, without per-order queries."""
+    print("Testing in-memory sequencing...")
+    waves = generate_waves(1, 40, seed=3)
+
+    per_row = FakeDatabase(waves)
+    random.seed(11)
+    assert FakeSequencer(per_row).sequence_wave_orders(1)
+
+    bulk = FakeDatabase(waves)
+    random.seed(11)
+    WaveSnapshotLoader._cache[("wave", 1, None, START)] = (0.0, {})
+    assert FakeSequencer(bulk).sequence_wave_orders(1, in_memory=True)
+    assert not any(key[:2] == ("wave", 1) for key in WaveSnapshotLoader._cache), "Cached snapshot is dropped"
+    assert any("updated_at = NOW()" in q for q in bulk.queries), "The wave is stamped as changed"
+
+    assert bulk.inserted[1] == per_row.inserted[1]
+    assert len(bulk.inserted[1]) == 40 * 6
+    inserts = [q for q in bulk.queries if "INSERT INTO wave_assignments" in q]
+    assert len(inserts) == 1, "All assignments go in one statement"
+    assert not any("assigned_worker_id IS NULL" in q for q in bulk.queries), "Queues are tracked in memory"
+    assert not any("WHERE oi.order_id = %s" in q for q in bulk.queries), "Zones are read for the whole wave"
+    print(f"✓ {len(bulk.inserted[1])} assignments in {len(bulk.queries)} queries "
+          f"(per-row sequencing used {len(per_row.queries)})")
+
+
+def test_sequence_all_waves_pooled():
+    """A worker pool sequences every planned wave, reading workers and equipment once."""
+    waves = generate_waves(5, 20, seed=5)
+    database = FakeDatabase(waves)
+    sequencer = FakeSequencer(database)
+
+    results = sequencer.sequence_all_waves(max_workers=3)
+    assert results == {'total_waves': 5, 'successful_waves': 5, 'failed_waves': 0}
+    assert sorted(database.inserted) == [1, 2, 3, 4, 5]
+    assert all(len(rows) == 20 * 6 for rows in database.inserted.values())
+
+    pool = sequencer.pools[0]
+    assert pool.borrowed == 5 and pool.closed
+    assert sum("FROM workers" in q for q in database.queries) == 1
+    assert sequencer.order_zones is None, "Per-wave zones don't leak into the shared sequencer"
+    print("✓ Pooled sequencing of 5 waves")
+
+
+def test_given_queue_lengths_skip_query():
+    """adjust_resource_allocation uses queue lengths it is given instead of querying them."""
+    database = FakeDatabase(generate_waves(1, 1, seed=1))
+    sequencer = FakeSequencer(database)
+    sequencer.adjust_resource_allocation(1, database.workers, {}, queue_lengths={'pack': 6})
+    sequencer.adjust_resource_allocation(1, database.workers, {}, queue_lengths={})
+    assert not database.queries
+    print("✓ Queue lengths passed in skip the queue query")
+
+
+if __name__ == "__main__":
+    test_in_memory_matches_per_row_sequencing()
+    test_sequence_all_waves_pooled()
+    test_given_queue_lengths_skip_query()
+    print("\n✅ All in-memory sequencer tests passed!")
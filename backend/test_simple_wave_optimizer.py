@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test script for the indexed list scheduler of SimpleWaveOptimizer.
+"""
+
+import sys
+import os
+import random
+import time
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from optimizer.simple_wave_optimizer import SimpleWaveOptimizer
+
+SKILLS = ['pick', 'picking', 'consolidate', 'pack', 'packing', 'label', 'stage', 'ship', 'general', 'forklift']
+
+
+def generate_wave(num_orders, num_workers, num_equipment, seed):
+    rng = random.Random(seed)
+    now = datetime.now()
+    orders = []
+    for order_id in range(num_orders):
+        order = {
+            "order_id": order_id,
+            "priority": rng.choice(['high', 'medium', 'low']),
+            "shipping_deadline": now + timedelta(minutes=rng.randint(60, 3000))
+        }
+        if rng.random() < 0.3:
+            order["stage_durations"] = {"pick": rng.randint(5, 30), "pack": rng.randint(5, 30)}
+        orders.append(order)
+    # One row per worker skill, some workers without a matching one
+    workers = [{"id": worker_id, "skill_name": skill}
+               for worker_id in range(1, num_workers + 1)
+               for skill in rng.sample(SKILLS, rng.randint(1, 3))]
+    equipment = [{"id": 100 + idx} for idx in range(num_equipment)]
+    return {"wave_data": orders, "workers": workers, "equipment": equipment}
+
+
+def linear_scan_schedule(optimizer, wave_data):
+    """The first-fit scan over every worker and equipment unit the indexed scheduler replaces."""
+    priority_rank = {'high': 1, 'medium': 2, 'low': 3}
+    orders = sorted(wave_data['wave_data'], key=lambda o: (priority_rank[o['priority']], o['shipping_deadline']))
+    workers, equipment = wave_data['workers'], wave_data['equipment']
+    worker_availability = {w['id']: 0 for w in workers}
+    equipment_availability = {e['id']: 0 for e in equipment}
+    schedule = []
+    for order in orders:
+        current_time = 0
+        stages = []
+        for stage in optimizer.stages:
+            worker = next((w for w in workers if worker_availability[w['id']] <= current_time
+                           and optimizer._worker_can_do_stage(w, stage)), None)
+            if worker is None:
+                worker = min(workers, key=lambda w: worker_availability[w['id']])
+            unit = min(equipment, key=lambda e: equipment_availability[e['id']])
+            start = max(current_time, worker_availability[worker['id']], equipment_availability[unit['id']])
+            end = start + order.get('stage_durations', {}).get(stage, optimizer.stage_durations[stage])
+            worker_availability[worker['id']] = equipment_availability[unit['id']] = end
+            stages.append((stage, worker['id'], unit['id'], start, end))
+            current_time = end
+        schedule.append((order['order_id'], stages))
+    return schedule
+
+
+def test_matches_linear_scan():
+    """The indexed scheduler assigns exactly what the linear scan did."""
+    optimizer = SimpleWaveOptimizer()
+    for seed, (num_orders, num_workers, num_equipment) in enumerate([(50, 3, 2), (300, 12, 8), (500, 40, 25)]):
+        wave_data = generate_wave(num_orders, num_workers, num_equipment, seed)
+        result = optimizer.optimize_wave(wave_data)
+        schedule = [(s['order_id'], [(st['stage'], st['worker_id'], st['equipment_id'], st['start_time'],
+                                      st['end_time']) for st in s['stages']])
+                    for s in result['solution']['schedule']]
+        assert schedule == linear_scan_schedule(optimizer, wave_data), f"Schedules differ for seed {seed}"
+    print("✓ Indexed scheduler matches the linear scan")
+
+
+def test_large_day():
+    """A 50k-order day schedules in under 3 seconds (about 1.5s on a development machine)."""
+    wave_data = generate_wave(50000, 60, 60, seed=1)
+    start = time.time()
+    result = SimpleWaveOptimizer().optimize_wave(wave_data)
+    elapsed = time.time() - start
+    assert result['num_orders'] == 50000
+    assert elapsed < 3, f"Took {elapsed:.2f}s"
+    print(f"✓ Scheduled 50000 orders in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    test_matches_linear_scan()
+    test_large_day()
+    print("\n✅ All simple wave optimizer tests passed!")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test script for the skill-class aggregation model mode.
+"""
+
+import sys
+import os
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from optimizer.wave_optimizer import MultiStageOptimizer, WorkerClass
+from data_generator.generator import SyntheticDataGenerator
+from models.warehouse import Worker, SkillType
+
+
+def test_worker_classes():
+    """Workers with the same skills, rate and efficiency share a class."""
+    workers = [
+        Worker(id=1, name="A", skills={SkillType.PICKING}, hourly_rate=20.0, efficiency_factor=1.0),
+        Worker(id=2, name="B", skills={SkillType.PICKING}, hourly_rate=20.0, efficiency_factor=1.0),
+        Worker(id=3, name="C", skills={SkillType.PICKING}, hourly_rate=22.0, efficiency_factor=1.0),
+        Worker(id=4, name="D", skills={SkillType.PICKING, SkillType.PACKING}, hourly_rate=20.0, efficiency_factor=1.0),
+    ]
+    classes, worker_class_of = WorkerClass.group(workers)
+
+    assert [worker_class.members for worker_class in classes] == [[0, 1], [2], [3]]
+    assert worker_class_of == [0, 0, 1, 2]
+    assert classes[0].capacity == 2
+    print(f"✓ {len(workers)} workers grouped into {len(classes)} classes")
+
+
+def test_skill_class_model():
+    """The aggregated model needs fewer variables and its post-pass never double-books a worker."""
+    print("Testing skill-class model mode...")
+
+    generator = SyntheticDataGenerator(seed=7)
+    warehouse_config = generator.generate_warehouse_config()
+    orders = generator.generate_orders(20)
+    # A crew with pay bands: many interchangeable workers per skill
+    crew = [(SkillType.PICKING, 10), (SkillType.CONSOLIDATION, 3), (SkillType.PACKING, 4),
+            (SkillType.LABELING, 2), (SkillType.STAGING, 2), (SkillType.SHIPPING, 3)]
+    workers = []
+    for skill, headcount in crew:
+        for _ in range(headcount):
+            workers.append(Worker(id=len(workers) + 1, name=f"{skill.value} {len(workers) + 1}",
+                                  skills={skill}, hourly_rate=20.0, efficiency_factor=1.0))
+    warehouse_config.workers = workers
+    # Deadlines are mapped to slots since midnight, so use the end of the day
+    end_of_day = datetime.now().replace(hour=23, minute=45)
+    deadlines = {order.id: end_of_day for order in orders}
+
+    interval = MultiStageOptimizer(warehouse_config, model_mode="interval")
+    interval.optimize_workflow(orders, workers, warehouse_config.equipment, deadlines, time_limit_seconds=5)
+
+    optimizer = MultiStageOptimizer(warehouse_config, model_mode="skill_class")
+    result = optimizer.optimize_workflow(orders, workers, warehouse_config.equipment, deadlines, time_limit_seconds=10)
+
+    assert result.metrics.solver_status in ("OPTIMAL", "FEASIBLE")
+    assert result.input_summary["worker_classes"] == len(optimizer.worker_classes)
+    assert optimizer.worker_assignment_variables < interval.worker_assignment_variables
+    print(f"✓ {optimizer.worker_assignment_variables} worker variables "
+          f"(interval model: {interval.worker_assignment_variables})")
+
+    worker_skills = {worker.id: worker.skills for worker in workers}
+    busy = {}
+    for assignment in optimizer.stage_assignments:
+        worker_id = assignment['worker_id']
+        assert worker_id in worker_skills, "Every stage is assigned to an individual worker"
+        assert optimizer._stage_skill(assignment['stage']) in worker_skills[worker_id]
+        busy.setdefault(worker_id, []).append((assignment['start_slot'], assignment['start_slot'] + assignment['slots']))
+
+    for worker_id, intervals in busy.items():
+        intervals.sort()
+        for (_, end), (start, _) in zip(intervals, intervals[1:]):
+            assert start >= end, f"Worker {worker_id} double-booked"
+    print(f"✓ Post-pass assigned {len(optimizer.stage_assignments)} stages without overlaps")
+
+
+if __name__ == "__main__":
+    test_worker_classes()
+    test_skill_class_model()
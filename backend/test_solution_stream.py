@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test script for streaming intermediate CP-SAT solutions.
+"""
+
+import sys
+import os
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from optimizer.wave_optimizer import MultiStageOptimizer
+from test_optimization import create_test_data
+
+
+def test_solution_events():
+    """Every improving solution is published with its objective and schedule delta."""
+    print("Testing solution streaming...")
+
+    warehouse_config, orders, workers, equipment = create_test_data()
+    # Deadlines are mapped to slots since midnight, so use the end of the day
+    end_of_day = datetime.now().replace(hour=23, minute=45)
+    deadlines = {order.id: end_of_day for order in orders}
+
+    events = []
+    optimizer = MultiStageOptimizer(warehouse_config, model_mode="interval")
+    result = optimizer.optimize_workflow(orders, workers, equipment, deadlines,
+                                         time_limit_seconds=10, on_solution=events.append)
+
+    assert result.metrics.solver_status in ("OPTIMAL", "FEASIBLE")
+    assert events, "Expected at least one solution event"
+
+    # The first event carries the full schedule, later ones only what changed
+    first = events[0]
+    assert first["solution"] == 1
+    assert first["changed_stages"] == len(orders) * len(optimizer.requirements.stages)
+    for row in first["delta"]:
+        order_id, stage, start_slot, worker_id, equipment_id = row
+        assert order_id in deadlines
+
+    objectives = [event["objective"] for event in events]
+    assert objectives == sorted(objectives, reverse=True), "Objectives should only improve"
+    assert abs(events[-1]["objective"] - optimizer.solve_stats["objective"]) < 1e-6
+    print(f"✓ {len(events)} solution events, objective {objectives[0]} -> {objectives[-1]}")
+
+
+if __name__ == "__main__":
+    test_solution_events()
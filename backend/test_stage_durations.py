@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script for the precomputed (order x stage) duration table.
+"""
+
+import sys
+import os
+import math
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from optimizer.wave_optimizer import MultiStageOptimizer, OptimizationRequirements
+from test_optimization import create_test_data
+
+
+class FakeDatabase:
+    """Answers the bulk bin-location query with two bins per order, or fails it."""
+
+    def __init__(self, orders, fail=False):
+        self.orders = orders
+        self.fail = fail
+        self.closed = 0
+
+    def get_connection(self):
+        return self
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, query, params=None):
+        if self.fail:
+            raise RuntimeError("connection lost")
+
+    def fetchall(self):
+        return [(order.id, order.id * 10 + b, 10.0 * b, 5.0, 0.0, 'A', 1)
+                for order in self.orders for b in range(2)]
+
+    def close(self):
+        self.closed += 1
+
+
+def test_stage_duration_table():
+    """The table is built with one bulk load and is read-only afterwards."""
+    print("Testing stage duration precompute...")
+
+    warehouse_config, orders, workers, equipment = create_test_data()
+    stages = OptimizationRequirements.stages
+    optimizer = MultiStageOptimizer(warehouse_config)
+    optimizer.walking_calculator.db = FakeDatabase(orders)
+
+    slots = optimizer.precompute_stage_durations(orders, stages, optimizer.time_granularity)
+
+    assert slots.shape == (len(orders), len(stages))
+    assert optimizer.db_round_trips == 1, f"Expected 1 DB round-trip, got {optimizer.db_round_trips}"
+    print(f"✓ Table built with {optimizer.db_round_trips} DB round-trip")
+
+    for o, order in enumerate(orders):
+        for s, stage in enumerate(stages):
+            minutes = optimizer.stage_duration_minutes[o, s]
+            assert minutes == optimizer._stage_duration(order, stage)
+            assert slots[o, s] == math.ceil(minutes / optimizer.time_granularity)
+    assert optimizer.db_round_trips == 1, "Cached walking times should not hit the database again"
+    print("✓ Table matches _stage_duration without extra round-trips")
+
+    try:
+        slots[0, 0] = 0
+    except ValueError:
+        print("✓ Duration table is immutable")
+        return
+    raise AssertionError("Expected the duration table to be read-only")
+
+
+def test_failed_bulk_load_caches_nothing():
+    """A failed bulk load closes its connection and leaves the orders to the per-order fallback."""
+    warehouse_config, orders, workers, equipment = create_test_data()
+    optimizer = MultiStageOptimizer(warehouse_config)
+    database = FakeDatabase(orders, fail=True)
+    optimizer.walking_calculator.db = database
+
+    optimizer._load_order_walking_times(orders)
+    assert optimizer.order_walking_minutes == {}
+    assert database.closed == 1
+    print("✓ Failed bulk load is not cached as zero walking time")
+
+
+if __name__ == "__main__":
+    test_stage_duration_table()
+    test_failed_bulk_load_caches_nothing()
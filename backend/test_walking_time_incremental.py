@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test script for incremental walking-time matrix updates.
+"""
+
+import sys
+import os
+import tempfile
+from decimal import Decimal
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from config_service import config_service
+from optimizer.wave_optimizer import MultiStageOptimizer
+from test_optimization import create_test_data
+from test_walking_time_matrix import generate_bins
+from walking_time_calculator import WalkingTimeCalculator
+from walking_time_store import WalkingTimeStore
+
+
+def all_pairs(store, bins):
+    ids = np.array([b['id'] for b in bins])
+    return store.lookup(np.repeat(ids, len(ids)), np.tile(ids, len(ids))).reshape(len(ids), len(ids))
+
+
+def test_update_recomputes_changed_bins():
+    """Added, moved and deleted bins give the same matrix as a full recompute."""
+    print("Testing incremental walking-time update...")
+    bins = generate_bins(400, seed=11)
+    calculator = WalkingTimeCalculator()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "warehouse_1.wtm")
+        store = WalkingTimeStore.write(path, calculator.build_matrix(bins), calculator.walking_parameters())
+
+        unchanged, stats = store.update(bins)
+        assert unchanged is store and stats["recomputed_rows"] == 0
+
+        changed = [dict(b) for b in bins]
+        changed[7]['x_coordinate'] = Decimal("12.50")
+        changed[150]['zone'] = 'D'
+        changed[220]['level'] = 9
+        # A bin in the middle, and the last one
+        del changed[399], changed[30]
+        changed += generate_bins(403, seed=12)[400:]
+        updated, stats = store.update(changed)
+
+        assert stats == {"added": 3, "moved": 3, "deleted": 2, "recomputed_rows": 7}
+        assert updated.version == 2 and updated.size == 401
+        expected = calculator.build_matrix(changed).walking_times()
+        assert np.array_equal(all_pairs(updated, changed), expected)
+        assert updated.walking_time(bins[30]['id'], bins[0]['id']) is None
+    print(f"✓ {stats['recomputed_rows']} of {updated.size} rows recomputed")
+
+
+def test_optimizer_drops_stale_walking_times():
+    """Cached walking times are dropped once the walking_time configuration changes."""
+    warehouse_config, orders, workers, equipment = create_test_data()
+    optimizer = MultiStageOptimizer(warehouse_config)
+    optimizer.walking_times_cache[(1, 2)] = 0.4
+    optimizer.order_walking_minutes[orders[0].id] = 0.4
+
+    optimizer._sync_walking_parameters()
+    assert optimizer.walking_times_cache == {(1, 2): 0.4}
+
+    original_speed = config_service.get_value("walking_time.walking_speed_fpm")
+    try:
+        config_service.set_value("walking_time.walking_speed_fpm", 125.0)
+        optimizer._sync_walking_parameters()
+        assert optimizer.walking_times_cache == {} and optimizer.order_walking_minutes == {}
+        assert optimizer.walking_calculator.walking_speed_fpm == 125.0
+    finally:
+        config_service.set_value("walking_time.walking_speed_fpm", original_speed)
+    print("✓ Optimizer refreshes walking times after a config change")
+
+
+if __name__ == "__main__":
+    test_update_recomputes_changed_bins()
+    test_optimizer_drops_stale_walking_times()
+    print("\n✅ All incremental walking-time tests passed!")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test script for the vectorized walking-time matrix.
+"""
+
+import sys
+import os
+import random
+import time
+from decimal import Decimal
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from walking_time_calculator import WalkingTimeCalculator
+from walking_time_matrix import round2
+
+
+def generate_bins(num_bins, seed):
+    rng = random.Random(seed)
+    return [{
+        'id': 10 + b,
+        'bin_id': f'BIN-{b:05d}',
+        'x_coordinate': Decimal(f"{rng.uniform(0, 400):.2f}"),
+        'y_coordinate': Decimal(f"{rng.uniform(0, 250):.2f}"),
+        'z_coordinate': Decimal(f"{rng.uniform(0, 20):.2f}"),
+        # Missing zones and levels never incur a change penalty
+        'zone': rng.choice(['A', 'B', 'C', None, '']),
+        'level': rng.choice([1, 2, 3, 4, None, 0])
+    } for b in range(num_bins)]
+
+
+def pair_record(calculator, from_bin, to_bin):
+    """The per-pair formula the matrix engine vectorizes."""
+    from_coords = tuple(float(from_bin[k]) for k in ('x_coordinate', 'y_coordinate', 'z_coordinate'))
+    to_coords = tuple(float(to_bin[k]) for k in ('x_coordinate', 'y_coordinate', 'z_coordinate'))
+    return {
+        'from_bin_id': from_bin['id'],
+        'to_bin_id': to_bin['id'],
+        'from_bin_code': from_bin['bin_id'],
+        'to_bin_code': to_bin['bin_id'],
+        'distance_feet': round(calculator.calculate_weighted_manhattan_distance(from_coords, to_coords), 2),
+        'walking_time_minutes': calculator.calculate_walking_time_minutes(
+            from_coords, to_coords, from_bin.get('zone'), to_bin.get('zone'),
+            from_bin.get('level'), to_bin.get('level')),
+        'path_type': 'weighted_manhattan'
+    }
+
+
+def test_matches_pair_formula():
+    """Records and the dense matrix match the per-pair formula exactly."""
+    print("Testing walking-time matrix...")
+    bins = generate_bins(120, seed=4)
+    calculator = WalkingTimeCalculator()
+    calculator.walking_speed_fpm = 237.0
+    calculator.z_weight = 2.5
+    matrix = calculator.build_matrix(bins)
+
+    expected = [pair_record(calculator, a, b) for a in bins for b in bins if a['id'] != b['id']]
+    assert list(matrix.records(block_rows=7)) == expected
+
+    dense = matrix.walking_times(dtype=np.float64, block_rows=13)
+    reference = np.array([[pair_record(calculator, a, b)['walking_time_minutes'] for b in bins] for a in bins])
+    assert np.array_equal(dense, reference)
+    assert matrix.walking_times().dtype == np.float32
+    assert np.array_equal(matrix.walking_times(), reference.astype(np.float32))
+    print(f"✓ {len(expected)} pairs match the per-pair formula")
+
+
+def test_round2_matches_python_round():
+    """round2 agrees with round(x, 2) where np.round does not."""
+    rng = np.random.default_rng(7)
+    values = np.concatenate([rng.uniform(0, 1000, 200000), rng.uniform(0, 5, 200000),
+                             np.arange(0, 100000) / 1000 + 0.005])
+    expected = np.array([round(v, 2) for v in values.tolist()])
+    assert np.array_equal(round2(values), expected)
+    print(f"✓ round2 matches round(x, 2) ({int((np.round(values, 2) != expected).sum())} np.round misses)")
+
+
+def test_large_matrix():
+    """5000 bins (25M pairs) compute in seconds."""
+    bins = generate_bins(5000, seed=1)
+    start = time.time()
+    matrix = WalkingTimeCalculator().build_matrix(bins).walking_times()
+    elapsed = time.time() - start
+    assert matrix.shape == (5000, 5000) and matrix.nbytes == 5000 * 5000 * 4
+    assert np.all(np.diag(matrix) == 0)
+    assert elapsed < 30
+    print(f"✓ 5000 x 5000 walking-time matrix in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    test_matches_pair_formula()
+    test_round2_matches_python_round()
+    test_large_matrix()
+    print("\n✅ All walking-time matrix tests passed!")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for the memory-mapped walking-time matrix store.
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import walking_time_store
+from test_walking_time_matrix import generate_bins
+from walking_time_calculator import WalkingTimeCalculator
+from walking_time_store import (WalkingTimeStore, current_walking_parameters, get_walking_time_store,
+                                refresh_walking_time_stores)
+
+
+def test_store_lookups_match_matrix():
+    """Single, batched and path lookups read the values of the dense matrix."""
+    print("Testing walking-time store...")
+    bins = generate_bins(300, seed=2)
+    # Bin ids out of order, like get_bins returns them (sorted by zone)
+    bins.reverse()
+    calculator = WalkingTimeCalculator()
+    matrix = calculator.build_matrix(bins)
+    dense = matrix.walking_times()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "warehouse_1.wtm")
+        store = WalkingTimeStore.write(path, matrix, calculator.walking_parameters())
+        assert store.size == 300 and store.version == 1
+        assert store.values.shape == (300 * 299 // 2,), "Only one triangle is stored"
+
+        rng = np.random.default_rng(3)
+        from_index, to_index = rng.integers(0, 300, 5000), rng.integers(0, 300, 5000)
+        minutes = store.lookup(matrix.bin_ids[from_index], matrix.bin_ids[to_index])
+        assert np.array_equal(minutes, dense[from_index, to_index].astype(np.float64))
+
+        a, b = bins[5], bins[17]
+        assert store.walking_time(a['id'], b['id']) == \
+            calculator.calculate_walking_time_minutes(
+                tuple(float(a[k]) for k in ('x_coordinate', 'y_coordinate', 'z_coordinate')),
+                tuple(float(b[k]) for k in ('x_coordinate', 'y_coordinate', 'z_coordinate')),
+                a['zone'], b['zone'], a['level'], b['level'])
+        assert store.walking_time(a['id'], 999999) is None
+
+        # Steps to or from an unknown bin are skipped
+        path_ids = [bins[3]['id'], bins[40]['id'], 999999, bins[41]['id'], bins[42]['id']]
+        expected = round(float(dense[3, 40]) + float(dense[41, 42]), 2)
+        assert store.path_walking_time(path_ids) == expected
+
+        rewritten = WalkingTimeStore.write(path, matrix, calculator.walking_parameters(), dtype="float16")
+        assert rewritten.version == 2 and rewritten.values.dtype == np.float16
+        assert np.allclose(rewritten.lookup(matrix.bin_ids[from_index], matrix.bin_ids[to_index]),
+                           minutes, rtol=1e-3)
+    print(f"✓ {len(minutes)} lookups match the dense matrix")
+
+
+def test_process_store_reopens_and_checks_parameters():
+    """The process-wide store follows rewrites; matrices of other parameters wait for a refresh."""
+    bins = generate_bins(50, seed=6)
+    calculator = WalkingTimeCalculator()
+    original_matrix_path = walking_time_store.matrix_path
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "warehouse_1.wtm")
+        walking_time_store.matrix_path = lambda warehouse_id=1: path
+        try:
+            assert get_walking_time_store() is None
+
+            WalkingTimeStore.write(path, calculator.build_matrix(bins), current_walking_parameters())
+            first = get_walking_time_store()
+            assert first is not None and first.version == 1
+            assert get_walking_time_store() is first, "The mapping is opened once per process"
+
+            WalkingTimeStore.write(path, calculator.build_matrix(bins[:40]), current_walking_parameters())
+            assert get_walking_time_store().version == 2
+
+            calculator.walking_speed_fpm = 175.0
+            stale = WalkingTimeStore.write(path, calculator.build_matrix(bins), calculator.walking_parameters())
+            assert not stale.matches(current_walking_parameters())
+            assert get_walking_time_store() is None, "A stale matrix isn't served"
+            assert WalkingTimeStore(path).version == 3, "Lookups don't recompute it"
+
+            assert refresh_walking_time_stores() == {1: 4}
+            refreshed = get_walking_time_store()
+            assert refreshed.version == 4 and refreshed.matches(current_walking_parameters())
+            assert refresh_walking_time_stores() == {1: 4}, "Fresh matrices are left alone"
+            expected = WalkingTimeCalculator().build_matrix(bins).walking_times()
+            ids = np.array([b['id'] for b in bins])
+            assert np.array_equal(refreshed.lookup(np.repeat(ids, 50), np.tile(ids, 50)), expected.ravel())
+        finally:
+            walking_time_store.matrix_path = original_matrix_path
+    print("✓ Process store reopens rewritten matrices; stale ones are recomputed on refresh only")
+
+
+if __name__ == "__main__":
+    test_store_lookups_match_matrix()
+    test_process_store_reopens_and_checks_parameters()
+    print("\n✅ All walking-time store tests passed!")
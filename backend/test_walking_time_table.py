@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test script for the COPY-based walking_times export.
+"""
+
+import sys
+import os
+import csv
+import io
+import time
+from decimal import Decimal
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from test_walking_time_matrix import generate_bins
+from walking_time_calculator import WalkingTimeCalculator
+from walking_time_table import COPY_STAGING, DEPENDENT_VIEWS, WalkingTimeTableWriter, matrix_csv_chunks
+
+
+class FakeConnection:
+    """Records the statements and the COPY stream the writer sends."""
+
+    def __init__(self):
+        self.statements = []
+        self.copied = b""
+        self.committed = self.closed = False
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, query, params=None):
+        self.statements.append(query)
+
+    def fetchall(self):
+        # One view depends on walking_times
+        return [("walking_times_matrix", "v", " SELECT wt.from_bin_id\n   FROM walking_times wt;")]
+
+    def copy_expert(self, query, file, size=8192):
+        self.statements.append(query)
+        while True:
+            data = file.read(size)
+            if not data:
+                break
+            self.copied += data
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def parse(copied):
+    return [(int(row[0]), int(row[1]), Decimal(row[2]), Decimal(row[3]), row[4])
+            for row in csv.reader(io.StringIO(copied.decode()))]
+
+
+def test_copy_matches_records():
+    """The COPY stream carries exactly the records, then the staging table is swapped in."""
+    print("Testing walking_times COPY export...")
+    bins = generate_bins(150, seed=8)
+    matrix = WalkingTimeCalculator().build_matrix(bins)
+    expected = [(r['from_bin_id'], r['to_bin_id'], Decimal(str(r['distance_feet'])),
+                 Decimal(str(r['walking_time_minutes'])), r['path_type']) for r in matrix.records()]
+
+    conn = FakeConnection()
+    stats = WalkingTimeTableWriter(lambda: conn, chunk_rows=1000).write_matrix(matrix)
+    assert parse(conn.copied) == expected
+    assert stats["rows"] == len(expected) == 150 * 149
+    assert conn.committed and conn.closed
+
+    statements = conn.statements
+    assert statements.index(COPY_STAGING) < statements.index(DEPENDENT_VIEWS)
+    swap = statements[-1]
+    assert swap.index("DROP VIEW walking_times_matrix") < swap.index("DROP TABLE walking_times")
+    assert swap.index("RENAME TO walking_times;") < swap.index("CREATE VIEW walking_times_matrix AS")
+    assert not any("DELETE FROM walking_times" in s or "INSERT INTO walking_times" in s for s in statements)
+
+    records = WalkingTimeTableWriter(lambda: FakeConnection(), chunk_rows=777)
+    record_conn = FakeConnection()
+    records.get_connection = lambda: record_conn
+    records.write_records(matrix.records())
+    assert parse(record_conn.copied) == expected
+    print(f"✓ {stats['rows']} rows streamed through one COPY")
+
+
+def test_csv_throughput():
+    """CSV for ~20M pairs is generated in seconds."""
+    matrix = WalkingTimeCalculator().build_matrix(generate_bins(4500, seed=9))
+    start = time.time()
+    rows = total_bytes = 0
+    for chunk, chunk_rows in matrix_csv_chunks(matrix, 1000000):
+        rows += chunk_rows
+        total_bytes += len(chunk)
+    elapsed = time.time() - start
+    assert rows == 4500 * 4499
+    assert elapsed < 60
+    print(f"✓ {rows} rows ({total_bytes / 1e6:.0f} MB of CSV) in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    test_copy_matches_records()
+    test_csv_throughput()
+    print("\n✅ All walking_times export tests passed!")
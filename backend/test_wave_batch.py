@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test script for batch optimization of many waves.
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_optimizers import INSTANCE_LADDER, build_instance, to_wave_data
+from optimizer.wave_constraint_optimizer import WaveConstraintOptimizer
+from wave_batch import WaveBatchRunner
+
+FAILING_WAVE = 99
+
+
+class GeneratedWaveOptimizer(WaveConstraintOptimizer):
+    """Reads generated waves instead of the database (runs in the worker processes)."""
+
+    def get_resources(self, use_cache=True):
+        wave_data = to_wave_data(*build_instance(INSTANCE_LADDER[0], seed=42))
+        return {'workers': wave_data['workers'], 'equipment': wave_data['equipment']}
+
+    def get_wave_data(self, wave_id, resources=None, plan_version_id=None, use_cache=True):
+        assert resources is not None, "Batch waves should use the shared snapshot"
+        if wave_id == FAILING_WAVE:
+            return {"error": f"No orders found for wave_id={wave_id}"}
+        wave_data = to_wave_data(*build_instance(INSTANCE_LADDER[0], seed=wave_id))
+        return dict(wave_data, workers=resources['workers'], equipment=resources['equipment'])
+
+
+def make_runner(max_processes):
+    return WaveBatchRunner(max_processes=max_processes, optimizer_target="test_wave_batch:GeneratedWaveOptimizer")
+
+
+def test_batch_events():
+    """Every wave reports once, failures don't stop the batch, and the summary adds them up."""
+    print("Testing wave batch runner...")
+    runner = make_runner(2)
+    events = list(runner.run([1, 2, FAILING_WAVE], runner.load_resources(), time_limit=5))
+
+    assert [event for event, _ in events] == ["started", "wave", "wave", "wave", "summary"]
+    started = events[0][1]
+    assert started["processes"] == 2 and started["workers"] > 0
+
+    waves = {data["wave_id"]: data for event, data in events if event == "wave"}
+    assert waves[1]["status"] == "success" and waves[2]["status"] == "success"
+    assert waves[1]["result"]["solution"]["schedule"], "Wave results carry the solution"
+    assert waves[FAILING_WAVE]["status"] == "failed" and waves[FAILING_WAVE]["error"]
+
+    summary = events[-1][1]
+    assert summary["waves"] == 3 and summary["succeeded"] == 2
+    assert summary["failed_wave_ids"] == [FAILING_WAVE]
+    assert summary["total_orders"] == waves[1]["num_orders"] + waves[2]["num_orders"]
+    print(f"✓ Batch solved {summary['succeeded']} waves in {summary['wall_seconds']:.1f}s "
+          f"({summary['solve_seconds']:.1f}s of solving)")
+
+
+def test_batch_close_stops_solves():
+    """Closing the event stream stops the running solves instead of waiting out their time limits."""
+    runner = make_runner(1)
+    events = runner.run([1, 2, 3], runner.load_resources(), time_limit=120)
+    assert next(events)[0] == "started"
+    first = next(events)
+    assert first[0] == "wave"
+
+    close_start = time.time()
+    events.close()
+    assert time.time() - close_start < 60
+    print(f"✓ Closing the batch after wave {first[1]['wave_id']} took {time.time() - close_start:.1f}s")
+
+
+if __name__ == "__main__":
+    test_batch_events()
+    test_batch_close_stops_solves()
+    print("\n✅ All wave batch tests passed!")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test script for incremental wave re-planning.
+"""
+
+import sys
+import os
+from datetime import timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_optimizers import INSTANCE_LADDER, SCHEDULE_START, build_instance, to_wave_data
+from optimizer.wave_constraint_optimizer import WaveConstraintOptimizer
+from optimizer import wave_replan
+from optimizer.model_estimator import admit
+from optimizer.wave_replan import WaveReplanner
+
+
+def _solved_wave():
+    """Solve a 10-order wave without its last three orders; return the full wave data and the solution."""
+    warehouse_config, orders = build_instance(INSTANCE_LADDER[0], seed=42)
+    wave_data = to_wave_data(warehouse_config, orders)
+    optimizer = WaveConstraintOptimizer()
+    optimizer.schedule_base_time = SCHEDULE_START
+    assert optimizer.create_optimization_model(dict(wave_data, wave_data=wave_data['wave_data'][:-3]))
+    result = optimizer.solve_optimization(10)
+    assert result["status"] == "success"
+    return wave_data, result["solution"]
+
+
+def test_replan_delta():
+    """Added orders are scheduled, cancelled ones dropped, started and unaffected stages kept."""
+    print("Testing incremental wave re-plan...")
+
+    wave_data, previous = _solved_wave()
+    order_ids = [order['order_id'] for order in wave_data['wave_data']]
+    delta = {
+        "added_order_ids": order_ids[-3:],
+        "cancelled_order_ids": [order_ids[0]],
+        "reprioritized_orders": {order_ids[4]: "high"}
+    }
+    replan_minute = 60
+
+    replanner = WaveReplanner(neighborhood_size=2, time_limit=10)
+    result = replanner.replan(wave_data, previous, delta, now=SCHEDULE_START + timedelta(minutes=replan_minute))
+    assert result["status"] == "success", result.get("error")
+    report = result["replan"]
+    assert report["changed_order_ids"] == sorted(order_ids[-3:] + [order_ids[4]])
+    assert report["cancelled_order_ids"] == [order_ids[0]]
+    assert len(report["neighborhood_order_ids"]) == 2
+    assert report["frozen_orders"] == len(order_ids) - 1 - 4 - 2
+    assert not report["escalated"]
+
+    schedule = {order['order_id']: order for order in result["solution"]["schedule"]}
+    assert sorted(schedule) == order_ids[1:]
+    print(f"✓ {len(report['changed_order_ids'])} changed orders re-planned, cancelled order dropped")
+
+    previous_stages = {order['order_id']: order['stages'] for order in previous["schedule"]}
+    free = set(report["changed_order_ids"]) | set(report["neighborhood_order_ids"])
+    for order_id, stages in previous_stages.items():
+        if order_id not in schedule:
+            continue
+        for before, after in zip(stages, schedule[order_id]["stages"]):
+            if before["start_time"] < replan_minute or order_id not in free:
+                assert before == after, f"Order {order_id} {before['stage']} moved"
+            else:
+                assert after["start_time"] >= replan_minute
+    for order_id in order_ids[-3:]:
+        assert schedule[order_id]["stages"][0]["start_time"] >= replan_minute
+    print(f"✓ {report['frozen_stages']} started or unaffected stages kept, nothing moved into the past")
+
+
+def test_started_stage_keeps_start_when_worker_leaves():
+    """A started stage whose worker left keeps its start and is reported; only affected orders are modelled."""
+    wave_data, previous = _solved_wave()
+    wave_data = dict(wave_data, wave_data=wave_data['wave_data'][:-3])
+    replan_minute = 30
+    order_schedule, stage = min(((order, st) for order in previous["schedule"] for st in order["stages"]
+                                 if st["start_time"] < replan_minute), key=lambda pair: pair[1]["start_time"])
+    # The stage's worker has since left the wave's resources
+    gone = max(w['id'] for w in wave_data['workers']) + 1
+    stage["worker_id"] = gone
+
+    replanner = WaveReplanner(neighborhood_size=0, time_limit=10)
+    result = replanner.replan(wave_data, previous, {}, now=SCHEDULE_START + timedelta(minutes=replan_minute))
+    assert result["status"] == "success", result.get("error")
+
+    conflicts = result["replan"]["conflicts"]
+    assert conflicts == [{"order_id": order_schedule["order_id"], "stage": stage["stage"],
+                          "start_time": stage["start_time"], "reassigned": ["worker_id"]}]
+    schedule = {order['order_id']: order for order in result["solution"]["schedule"]}
+    assert sorted(schedule) == sorted(order['order_id'] for order in wave_data['wave_data'])
+    replanned = {st['stage']: st for st in schedule[order_schedule["order_id"]]["stages"]}[stage["stage"]]
+    assert replanned["start_time"] == stage["start_time"] and replanned["worker_id"] != gone
+
+    # Every other order is kept as planned and stays out of the model
+    assert [order['order_id'] for order in replanner.optimizer.orders] == [order_schedule["order_id"]]
+    for order in previous["schedule"]:
+        if order is not order_schedule:
+            assert schedule[order['order_id']]["stages"] == order["stages"]
+    print(f"✓ Started {stage['stage']} of order {order_schedule['order_id']} re-assigned in place, "
+          f"1 of {len(schedule)} orders modelled")
+
+
+def test_replan_admission():
+    """A neighborhood model over the memory budget is refused instead of built, and not escalated."""
+    wave_data, previous = _solved_wave()
+    budgets = {"max_model_memory_mb": 0, "max_model_build_seconds": 120, "downgrade_oversized_requests": True}
+    wave_replan.admit = lambda *args: admit(*args, budgets=budgets)
+    try:
+        replanner = WaveReplanner(time_limit=10)
+        result = replanner.replan(wave_data, previous, {}, now=SCHEDULE_START)
+    finally:
+        wave_replan.admit = admit
+    assert "over budget" in result["error"]
+    assert result["admission"]["requested_optimizer"] == "wave_constraint"
+    assert replanner.optimizer.model is None, "No model is built"
+    print("✓ Oversized re-plan refused by admission control")
+
+
+def test_replan_without_base_time():
+    """Previous solutions must carry the minute-0 time their schedule is relative to."""
+    wave_data, previous = _solved_wave()
+    result = WaveReplanner().replan(wave_data, dict(previous, base_time=None), {})
+    assert "error" in result
+    print("✓ Previous solution without base_time rejected")
+
+
+if __name__ == "__main__":
+    test_replan_delta()
+    test_started_stage_keeps_start_when_worker_leaves()
+    test_replan_admission()
+    test_replan_without_base_time()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test script for the bulk wave snapshot loader.
+"""
+
+import sys
+import os
+from contextlib import contextmanager
+from datetime import timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_optimizers import INSTANCE_LADDER, SCHEDULE_START, build_instance, to_wave_data
+from optimizer.wave_constraint_optimizer import WaveConstraintOptimizer
+from optimizer.wave_snapshot import (
+    EQUIPMENT_COLUMNS, ORDER_COLUMNS, ORDERS_QUERY, WAVE_STAMP_QUERY, WORKER_COLUMNS, WaveSnapshotLoader
+)
+
+
+class FakeDatabase:
+    """Answers the snapshot queries with the rows PostgreSQL would return."""
+
+    def __init__(self, wave_data):
+        self.queries = []
+        self.stamp_row = (3, SCHEDULE_START)
+        orders = wave_data['wave_data']
+        self.order_row = (7, 3, SCHEDULE_START) + tuple(
+            [order.get(column) for order in orders] for column in ORDER_COLUMNS)
+        self.resource_row = tuple(
+            [worker.get(column) for worker in wave_data['workers']] for column in WORKER_COLUMNS
+        ) + tuple([eq.get(column) for eq in wave_data['equipment']] for column in EQUIPMENT_COLUMNS)
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    @contextmanager
+    def cursor(self):
+        yield self
+
+    def execute(self, query, params):
+        self.queries.append(query)
+        self.last_query = query
+
+    def fetchone(self):
+        if self.last_query == WAVE_STAMP_QUERY:
+            return self.stamp_row
+        return self.order_row if self.last_query == ORDERS_QUERY else self.resource_row
+
+    def count(self, query):
+        return self.queries.count(query)
+
+
+def make_optimizer(database):
+    WaveSnapshotLoader.invalidate()
+    optimizer = WaveConstraintOptimizer()
+    optimizer.snapshot_loader = WaveSnapshotLoader(connection=database.connection, ttl_seconds=60)
+    return optimizer
+
+
+def test_snapshot_matches_rows():
+    """Materialized snapshot rows build the same model as the rows they came from."""
+    expected = to_wave_data(*build_instance(INSTANCE_LADDER[0], seed=42))
+    database = FakeDatabase(expected)
+    optimizer = make_optimizer(database)
+
+    wave_data = optimizer.get_wave_data(7)
+    assert database.queries == [WAVE_STAMP_QUERY, ORDERS_QUERY, database.queries[2]], \
+        "The wave's stamp, then one query for the orders and one for workers and equipment"
+    assert [order['order_id'] for order in wave_data['wave_data']] == [o['order_id'] for o in expected['wave_data']]
+    assert wave_data['wave_data'][0]['wave_id'] == 7
+    assert wave_data['workers'][0]['skill_name'] == expected['workers'][0]['skill_name']
+
+    reference = WaveConstraintOptimizer()
+    assert optimizer.create_optimization_model(wave_data) and reference.create_optimization_model(expected)
+    assert optimizer.profile.model_size["variables"] == reference.profile.model_size["variables"]
+    assert optimizer.profile.model_size["constraints"] == reference.profile.model_size["constraints"]
+    print(f"✓ Snapshot of {len(wave_data['wave_data'])} orders builds the same model")
+
+
+def test_snapshot_cache():
+    """Repeated loads of a wave skip the database until bypassed or invalidated."""
+    database = FakeDatabase(to_wave_data(*build_instance(INSTANCE_LADDER[0], seed=42)))
+    optimizer = make_optimizer(database)
+
+    optimizer.get_wave_data(7)
+    optimizer.get_wave_data(7)
+    assert database.count(ORDERS_QUERY) == 1, "Second load should come from the cache"
+    assert database.count(WAVE_STAMP_QUERY) == 2
+
+    optimizer.get_wave_data(7, use_cache=False)
+    assert database.count(ORDERS_QUERY) == 2 and len(database.queries) == 7
+
+    WaveSnapshotLoader.invalidate(wave_id=7)
+    optimizer.get_wave_data(7)
+    assert database.count(ORDERS_QUERY) == 3 and len(database.queries) == 9, \
+        "Invalidating a wave keeps the warehouse resources cached"
+
+    # A wave written since it was cached (or moved to another plan version) is reloaded
+    database.stamp_row = (3, SCHEDULE_START + timedelta(seconds=1))
+    optimizer.get_wave_data(7)
+    assert database.count(ORDERS_QUERY) == 4
+    database.stamp_row = (4, SCHEDULE_START + timedelta(seconds=1))
+    optimizer.get_wave_data(7)
+    assert database.count(ORDERS_QUERY) == 5
+    assert optimizer.get_wave_data(7, plan_version_id=3)["error"]
+    assert database.count(ORDERS_QUERY) == 5, "A wave outside the plan version isn't loaded"
+
+    # A cached snapshot hands out fresh rows, so callers can't corrupt it
+    optimizer.get_wave_data(7)['wave_data'][0]['priority'] = 'changed'
+    assert optimizer.get_wave_data(7)['wave_data'][0]['priority'] != 'changed'
+    print("✓ Wave snapshots are cached per wave version and reloaded after the wave changes")
+
+
+if __name__ == "__main__":
+    test_snapshot_matches_rows()
+    test_snapshot_cache()
+    print("\n✅ All wave snapshot tests passed!")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test script for the zone-partitioned decomposition solver.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_optimizers import INSTANCE_LADDER, SCHEDULE_START, annotate_objective_loss, build_instance, run_benchmark
+from models.warehouse import StageType
+from optimizer.zone_decomposition import ZoneDecompositionOptimizer
+
+
+def test_zone_decomposition():
+    """Per-zone picks are stitched ahead of the downstream stages without double-booking pickers."""
+    print("Testing zone decomposition optimizer...")
+
+    warehouse_config, orders = build_instance(INSTANCE_LADDER[0], seed=42)
+    deadlines = {order.id: order.shipping_deadline for order in orders}
+    optimizer = ZoneDecompositionOptimizer(warehouse_config, time_limit_seconds=10)
+    optimizer.schedule_base_time = SCHEDULE_START
+    optimizer.order_walking_minutes = {order.id: 0.0 for order in orders}
+
+    result = optimizer.optimize_workflow(orders, warehouse_config.workers, warehouse_config.equipment, deadlines)
+    zones = result.input_summary["zones"]
+    assert len(zones) > 1, "Expected the orders to span several zones"
+    assert sum(zone["orders"] for zone in zones) == len(orders)
+    assert result.input_summary["objective"] is not None
+    assert sorted(o.order_id for o in result.order_schedules) == sorted(o.id for o in orders)
+    print(f"✓ {len(orders)} orders picked in {len(zones)} zones")
+
+    for order_schedule in result.order_schedules:
+        pick, following = order_schedule.stages[0], order_schedule.stages[1]
+        assert pick.stage_type == StageType.PICK
+        assert following.start_time >= pick.end_time, f"Order {order_schedule.order_id} starts before its pick ends"
+
+    busy = {}
+    for order_schedule in result.order_schedules:
+        for stage in order_schedule.stages:
+            if stage.assigned_worker_id is not None and stage.duration_minutes > 0:
+                busy.setdefault(stage.assigned_worker_id, []).append(stage)
+    for worker_id, stages in busy.items():
+        stages.sort(key=lambda st: st.start_time)
+        for current, following in zip(stages, stages[1:]):
+            assert following.start_time >= current.end_time, f"Worker {worker_id} double-booked"
+    print("✓ Downstream stages released by pick completions, no worker double-booked")
+
+
+def test_every_zone_has_a_picker_and_cart():
+    """A light zone still gets a picker and a cart, so no zone solve falls back to the simple optimizer."""
+    warehouse_config, orders = build_instance(INSTANCE_LADDER[0], seed=3)
+    deadlines = {order.id: order.shipping_deadline for order in orders}
+    optimizer = ZoneDecompositionOptimizer(warehouse_config, time_limit_seconds=10)
+    optimizer.schedule_base_time = SCHEDULE_START
+    optimizer.order_walking_minutes = {order.id: 0.0 for order in orders}
+
+    for instance in INSTANCE_LADDER[:3]:
+        for seed in (1, 3):
+            config, instance_orders = build_instance(instance, seed=seed)
+            for zone, _, pickers, carts in optimizer.partition(instance_orders, config.workers, config.equipment):
+                assert pickers and carts, f"Zone {zone} of {instance['name']} (seed {seed}) has no picker or cart"
+
+    result = optimizer.optimize_workflow(orders, warehouse_config.workers, warehouse_config.equipment, deadlines)
+    zones = result.input_summary["zones"]
+    assert all(zone["status"] in ("OPTIMAL", "FEASIBLE") for zone in zones)
+    assert result.input_summary["objective"] is not None
+    print(f"✓ Seed 3: {len(zones)} zones, each with a picker and a cart")
+
+
+def test_objective_loss():
+    """The decomposed objective is never better than the monolithic optimum."""
+    instance = INSTANCE_LADDER[0]
+    results = [run_benchmark(name, instance, time_limit=10)
+               for name in ("multi_stage_interval", "zone_decomposition")]
+    annotate_objective_loss(results)
+    monolithic, decomposed = results
+    assert monolithic["status"] == "OPTIMAL"
+    assert "objective_loss_percentage" not in monolithic
+    assert decomposed["objective_loss_percentage"] >= -1e-6
+    print(f"✓ Objective loss vs monolithic: {decomposed['objective_loss_percentage']:.1f}%")
+
+
+if __name__ == "__main__":
+    test_zone_decomposition()
+    test_every_zone_has_a_picker_and_cart()
+    test_objective_loss()
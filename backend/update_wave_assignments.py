@@ -11,6 +11,8 @@ import psycopg2
 from psycopg2.extras import RealDictCursor
 import logging
 
+from optimizer.wave_snapshot import WaveSnapshotLoader
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -40,6 +42,7 @@ def update_wave_assignments():
             print(f"📊 Found {len(order_ids)} orders to update")
             
             updated_count = 0
+            updated_waves = set()
             for order_id in order_ids:
                 # Get the new baseline data for this order
                 cursor.execute("""
@@ -120,11 +123,17 @@ def update_wave_assignments():
                         stage_data['stage_order']
                     ))
                 
+                updated_waves.add(wave_id)
                 updated_count += 1
                 if updated_count % 100 == 0:
                     print(f"✅ Updated {updated_count} orders...")
             
+            # Cached wave snapshots are keyed by updated_at, so mark the rewritten waves as changed
+            if updated_waves:
+                cursor.execute("UPDATE waves SET updated_at = NOW() WHERE id = ANY(%s)", (list(updated_waves),))
             conn.commit()
+            for wave_id in updated_waves:
+                WaveSnapshotLoader.invalidate(wave_id)
             print(f"🎉 Successfully updated {updated_count} orders!")
             print("   The frontend should now show consistent baseline data.")
             
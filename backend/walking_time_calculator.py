@@ -10,6 +10,9 @@ from typing import List, Dict, Tuple
 from decimal import Decimal
 from database_service import DatabaseService
 from config_service import config_service
+from walking_time_matrix import WalkingTimeMatrix
+from walking_time_store import WalkingTimeStore, matrix_path
+from walking_time_table import WalkingTimeTableWriter
 
 
 class WalkingTimeCalculator:
@@ -18,8 +21,16 @@ class WalkingTimeCalculator:
     def __init__(self, warehouse_id: int = 1):
         self.warehouse_id = warehouse_id
         self.db = DatabaseService()
+        self.load_walking_parameters()
         
-        # Load configuration values
+        # Matrix file written by the last recompute, what its last incremental
+        # update changed (None after a full recompute), and stats of the last table export
+        self.store = None
+        self.store_update = None
+        self.table_export = None
+    
+    def load_walking_parameters(self):
+        """(Re)load the walking_time parameters from the configuration."""
         self.walking_speed_fpm = config_service.get_value("walking_time.walking_speed_fpm", 250.0)
         self.x_weight = config_service.get_value("walking_time.x_weight", 1.0)
         self.y_weight = config_service.get_value("walking_time.y_weight", 1.0)
@@ -95,6 +106,83 @@ class WalkingTimeCalculator:
         """Get all bins for the warehouse."""
         return self.db.get_bins(self.warehouse_id)
     
+    def build_matrix(self, bins: List[Dict] | None = None) -> WalkingTimeMatrix:
+        """
+        Load bins into a vectorized matrix engine with this calculator's parameters.
+        
+        Args:
+            bins: Bins to use (defaults to all bins of the warehouse)
+            
+        Returns:
+            WalkingTimeMatrix over the bins, in the given order
+        """
+        return WalkingTimeMatrix(
+            self.get_all_bins() if bins is None else bins,
+            walking_speed_fpm=self.walking_speed_fpm,
+            x_weight=self.x_weight,
+            y_weight=self.y_weight,
+            z_weight=self.z_weight,
+            zone_change_penalty_minutes=self.zone_change_penalty_minutes,
+            level_change_penalty_minutes=self.level_change_penalty_minutes
+        )
+    
+    def walking_parameters(self) -> Dict[str, float]:
+        """The walking_time parameters this calculator uses, keyed like config.json."""
+        return {
+            "walking_speed_fpm": self.walking_speed_fpm,
+            "x_weight": self.x_weight,
+            "y_weight": self.y_weight,
+            "vertical_movement_weight": self.z_weight,
+            "zone_change_penalty_minutes": self.zone_change_penalty_minutes,
+            "level_change_penalty_minutes": self.level_change_penalty_minutes
+        }
+    
+    def save_walking_time_store(self, matrix: WalkingTimeMatrix) -> WalkingTimeStore:
+        """
+        Write the memory-mapped matrix file of this warehouse.
+        
+        Args:
+            matrix: Matrix engine over the warehouse's bins
+            
+        Returns:
+            The written store, opened
+        """
+        self.store = WalkingTimeStore.write(
+            matrix_path(self.warehouse_id), matrix, self.walking_parameters(), self.warehouse_id,
+            dtype=config_service.get_value("walking_time_matrix.dtype", "float32")
+        )
+        print(f"✓ Saved {matrix.size}x{matrix.size} walking time matrix to {self.store.path} "
+              f"(version {self.store.version})")
+        return self.store
+    
+    def update_walking_time_store(self, bins: List[Dict] | None = None) -> WalkingTimeStore:
+        """
+        Bring the matrix file up to date with the bins, recomputing only the
+        rows of added, moved and deleted bins. Without a matrix of the current
+        walking_time parameters, the whole matrix is computed.
+        
+        Args:
+            bins: Bins to use (defaults to all bins of the warehouse)
+            
+        Returns:
+            The up-to-date store, opened
+        """
+        bins = self.get_all_bins() if bins is None else bins
+        path = matrix_path(self.warehouse_id)
+        try:
+            store = WalkingTimeStore(path)
+        except (OSError, ValueError, KeyError):
+            store = None
+        if store is None or not store.matches(self.walking_parameters()):
+            self.store_update = None
+            return self.save_walking_time_store(self.build_matrix(bins))
+        
+        self.store, self.store_update = store.update(bins)
+        print(f"✓ Updated walking time matrix {self.store.path} to version {self.store.version}: "
+              f"{self.store_update['added']} added, {self.store_update['moved']} moved, "
+              f"{self.store_update['deleted']} deleted bins, {self.store_update['recomputed_rows']} rows recomputed")
+        return self.store
+    
     def calculate_walking_times_matrix(self) -> List[Dict]:
         """
         Calculate walking times between all bins and return as a list of records.
@@ -103,45 +191,10 @@ class WalkingTimeCalculator:
             List of dictionaries with walking time data
         """
         bins = self.get_all_bins()
-        walking_times = []
         
         print(f"Calculating walking times for {len(bins)} bins...")
         
-        for i, from_bin in enumerate(bins):
-            for j, to_bin in enumerate(bins):
-                # Skip same bin
-                if from_bin['id'] == to_bin['id']:
-                    continue
-                
-                # Get coordinates
-                from_coords = (
-                    float(from_bin['x_coordinate']),
-                    float(from_bin['y_coordinate']),
-                    float(from_bin['z_coordinate'])
-                )
-                to_coords = (
-                    float(to_bin['x_coordinate']),
-                    float(to_bin['y_coordinate']),
-                    float(to_bin['z_coordinate'])
-                )
-                
-                # Calculate distance and walking time
-                distance_feet = self.calculate_weighted_manhattan_distance(from_coords, to_coords)
-                walking_time_minutes = self.calculate_walking_time_minutes(
-                    from_coords, to_coords,
-                    from_bin.get('zone'), to_bin.get('zone'),
-                    from_bin.get('level'), to_bin.get('level')
-                )
-                
-                walking_times.append({
-                    'from_bin_id': from_bin['id'],
-                    'to_bin_id': to_bin['id'],
-                    'from_bin_code': from_bin['bin_id'],
-                    'to_bin_code': to_bin['bin_id'],
-                    'distance_feet': round(distance_feet, 2),
-                    'walking_time_minutes': walking_time_minutes,
-                    'path_type': 'weighted_manhattan'
-                })
+        walking_times = list(self.build_matrix(bins).records())
         
         print(f"✓ Calculated {len(walking_times)} walking time records")
         return walking_times
@@ -157,53 +210,72 @@ class WalkingTimeCalculator:
             True if successful, False otherwise
         """
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            
-            # Clear existing walking times
-            cursor.execute("DELETE FROM walking_times")
-            
-            # Insert new walking times
-            for record in walking_times:
-                cursor.execute("""
-                    INSERT INTO walking_times 
-                    (from_bin_id, to_bin_id, distance_feet, walking_time_minutes, path_type)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (
-                    record['from_bin_id'],
-                    record['to_bin_id'],
-                    record['distance_feet'],
-                    record['walking_time_minutes'],
-                    record['path_type']
-                ))
+            self.table_export = WalkingTimeTableWriter(self.db.get_connection).write_records(walking_times)
+            self._report_table_export()
+            return True
             
-            conn.commit()
-            conn.close()
+        except Exception as e:
+            print(f"❌ Error saving walking times: {e}")
+            return False
+    
+    def export_walking_times_table(self, matrix: WalkingTimeMatrix) -> bool:
+        """
+        Replace the walking_times table with every pair of a matrix, streamed with COPY.
+        
+        Args:
+            matrix: Matrix engine over the warehouse's bins
             
-            print(f"✓ Saved {len(walking_times)} walking time records to database")
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            self.table_export = WalkingTimeTableWriter(self.db.get_connection).write_matrix(matrix)
+            self._report_table_export()
             return True
             
         except Exception as e:
-            print(f"❌ Error saving walking times: {e}")
-            if 'conn' in locals():
-                conn.rollback()
-                conn.close()
+            print(f"❌ Error exporting walking times: {e}")
             return False
     
-    def recompute_walking_times(self) -> bool:
+    def _report_table_export(self):
+        stats = self.table_export
+        print(f"✓ Saved {stats['rows']} walking time records to database in {stats['seconds']:.1f}s "
+              f"({stats['rows_per_second'] or 0:,.0f} rows/s)")
+    
+    def recompute_walking_times(self, export_table: bool | None = None, full: bool = False) -> bool:
         """
         Recompute and save the walking times matrix.
         
+        Args:
+            export_table: Also fill the walking_times table (defaults to
+                walking_time_matrix.export_table)
+            full: Recompute every pair, instead of only the rows of bins that
+                changed since the matrix file was written
+            
         Returns:
             True if successful, False otherwise
         """
         print("Starting walking times recomputation...")
         
-        # Calculate walking times matrix
-        walking_times = self.calculate_walking_times_matrix()
+        if export_table is None:
+            export_table = config_service.get_value("walking_time_matrix.export_table", False)
         
-        # Save to database
-        success = self.save_walking_times_matrix(walking_times)
+        try:
+            bins = self.get_all_bins()
+            print(f"Calculating walking times for {len(bins)} bins...")
+            if full:
+                self.store_update = None
+                self.save_walking_time_store(self.build_matrix(bins))
+            else:
+                self.update_walking_time_store(bins)
+            success = True
+        except Exception as e:
+            print(f"❌ Error saving walking time matrix: {e}")
+            success = False
+        
+        # The table is an export of the same matrix for SQL consumers
+        if success and export_table:
+            success = self.export_walking_times_table(self.build_matrix(bins))
         
         if success:
             print("✓ Walking times recomputation completed successfully!")
@@ -229,41 +301,11 @@ def calculate_walking_time_between_bins(
     Returns:
         Dictionary with walking time information
     """
-    calculator = WalkingTimeCalculator(warehouse_id)
-    bins = calculator.get_all_bins()
+    # The bins are loaded once per process, not once per pair
+    from bin_index import get_bin_index
+    walking_time = get_bin_index(warehouse_id).pair(from_bin_id, to_bin_id)
     
-    # Find the specific bins
-    from_bin = next((b for b in bins if b['id'] == from_bin_id), None)
-    to_bin = next((b for b in bins if b['id'] == to_bin_id), None)
-    
-    if not from_bin or not to_bin:
+    if walking_time is None:
         raise ValueError(f"Bin not found: from_bin_id={from_bin_id}, to_bin_id={to_bin_id}")
     
-    # Calculate walking time
-    from_coords = (
-        float(from_bin['x_coordinate']),
-        float(from_bin['y_coordinate']),
-        float(from_bin['z_coordinate'])
-    )
-    to_coords = (
-        float(to_bin['x_coordinate']),
-        float(to_bin['y_coordinate']),
-        float(to_bin['z_coordinate'])
-    )
-    
-    distance_feet = calculator.calculate_weighted_manhattan_distance(from_coords, to_coords)
-    walking_time_minutes = calculator.calculate_walking_time_minutes(
-        from_coords, to_coords,
-        from_bin.get('zone'), to_bin.get('zone'),
-        from_bin.get('level'), to_bin.get('level')
-    )
-    
-    return {
-        'from_bin_id': from_bin_id,
-        'to_bin_id': to_bin_id,
-        'from_bin_code': from_bin['bin_id'],
-        'to_bin_code': to_bin['bin_id'],
-        'distance_feet': round(distance_feet, 2),
-        'walking_time_minutes': walking_time_minutes,
-        'path_type': 'weighted_manhattan'
-    } 
\ No newline at end of file
+    return walking_time
@@ -0,0 +1,200 @@
+"""
+Vectorized all-pairs walking times.
+
+WalkingTimeCalculator.calculate_walking_times_matrix evaluated the weighted
+Manhattan formula one bin pair at a time and kept a dict per pair. For
+20k bins that is 400M dicts. WalkingTimeMatrix loads the bin coordinates,
+zones and levels into arrays once. It then computes the same distances and
+zone/level penalties for blocks of rows at a time with NumPy broadcasting.
+It can return the whole matrix as float32, or yield it block by block, and
+recompute just the rows of some bins (WalkingTimeStore.update uses that when
+bins are added, moved or deleted).
+
+Values match the per-pair formula exactly, including Python's round(x, 2).
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+PATH_TYPE = 'weighted_manhattan'
+
+# Cells per row block (~32 MB for each float64 temporary)
+BLOCK_CELLS = 1 << 22
+
+# Veltkamp splitting constant for float64
+_SPLITTER = float(2 ** 27 + 1)
+
+
+def _category_codes(values: List[Any], codes: Dict[Any, int]) -> np.ndarray:
+    """
+    Integer code per distinct value, -1 for values that never incur a penalty
+    (None, '', 0). New values are added to codes, in code order.
+    """
+    return np.array([codes.setdefault(value, len(codes)) if value else -1 for value in values],
+                    dtype=np.int32)
+
+
+def round2(values: np.ndarray) -> np.ndarray:
+    """
+    Round to 2 decimals exactly like Python's round(x, 2).
+
+    np.round scales by 100 in floating point, so a product that rounds onto a
+    .5 tie can round the wrong way. The exact product is recovered with
+    Dekker's two-product, and the rounding of those ties is corrected.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scaled = values * 100.0
+    # scaled + error == values * 100 exactly
+    split = values * _SPLITTER
+    high = split - (split - values)
+    low = values - high
+    error = (high * 100.0 - scaled) + low * 100.0
+
+    rounded = np.rint(scaled)
+    offset = scaled - rounded
+    rounded += (offset == 0.5) & (error > 0)
+    rounded -= (offset == -0.5) & (error < 0)
+    return rounded / 100.0
+
+
+class WalkingTimeMatrix:
+    """All-pairs walking times between bins, computed in broadcast row blocks."""
+
+    def __init__(self, bins: List[Dict], walking_speed_fpm: float = 250.0, x_weight: float = 1.0,
+                 y_weight: float = 1.0, z_weight: float = 2.0, zone_change_penalty_minutes: float = 0.5,
+                 level_change_penalty_minutes: float = 1.0, zone_categories: Optional[Dict[Any, int]] = None,
+                 level_categories: Optional[Dict[Any, int]] = None):
+        self.bin_ids = np.array([b['id'] for b in bins], dtype=np.int64)
+        self.bin_codes = [b['bin_id'] for b in bins]
+        self.coordinates = np.array([
+            (float(b['x_coordinate']), float(b['y_coordinate']), float(b['z_coordinate'])) for b in bins
+        ], dtype=np.float64).reshape(-1, 3)
+        # Zone and level codes continue the given categories, so they can be compared with a stored matrix
+        self.zone_categories = dict(zone_categories or {})
+        self.level_categories = dict(level_categories or {})
+        self.zones = _category_codes([b.get('zone') for b in bins], self.zone_categories)
+        self.levels = _category_codes([b.get('level') for b in bins], self.level_categories)
+        self._set_parameters(walking_speed_fpm, x_weight, y_weight, z_weight,
+                             zone_change_penalty_minutes, level_change_penalty_minutes)
+
+    @classmethod
+    def from_arrays(cls, bin_ids: np.ndarray, coordinates: np.ndarray, zones: np.ndarray, levels: np.ndarray,
+                    zone_categories: Optional[Dict[Any, int]] = None,
+                    level_categories: Optional[Dict[Any, int]] = None, **parameters) -> "WalkingTimeMatrix":
+        """A matrix over bins already loaded into arrays, such as a stored matrix's (without bin codes)."""
+        matrix = cls.__new__(cls)
+        matrix.bin_ids = np.asarray(bin_ids, dtype=np.int64)
+        matrix.bin_codes = [None] * len(matrix.bin_ids)
+        matrix.coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 3)
+        matrix.zone_categories = dict(zone_categories or {})
+        matrix.level_categories = dict(level_categories or {})
+        matrix.zones = np.asarray(zones, dtype=np.int32)
+        matrix.levels = np.asarray(levels, dtype=np.int32)
+        matrix._set_parameters(**parameters)
+        return matrix
+
+    def _set_parameters(self, walking_speed_fpm: float = 250.0, x_weight: float = 1.0, y_weight: float = 1.0,
+                        z_weight: float = 2.0, zone_change_penalty_minutes: float = 0.5,
+                        level_change_penalty_minutes: float = 1.0):
+        self.walking_speed_fpm = walking_speed_fpm
+        self.weights = (x_weight, y_weight, z_weight)
+        self.zone_change_penalty_minutes = zone_change_penalty_minutes
+        self.level_change_penalty_minutes = level_change_penalty_minutes
+
+    @property
+    def size(self) -> int:
+        return len(self.bin_ids)
+
+    def default_block_rows(self) -> int:
+        return max(1, min(self.size, BLOCK_CELLS // max(1, self.size)))
+
+    def distance_block(self, start: int, stop: int) -> np.ndarray:
+        """Weighted Manhattan distances (feet) from bins start..stop-1 to every bin."""
+        return self.distance_rows(slice(start, stop))
+
+    def walking_time_block(self, start: int, stop: int, distance: Optional[np.ndarray] = None) -> np.ndarray:
+        """Walking minutes, penalties included and rounded to 2 decimals, from bins start..stop-1."""
+        return self.walking_time_rows(slice(start, stop), distance)
+
+    def distance_rows(self, rows) -> np.ndarray:
+        """Weighted Manhattan distances (feet) from the bins at rows (a slice or index array) to every bin."""
+        rows = self.coordinates[rows]
+        distance = None
+        # Summed x, then y, then z, like calculate_weighted_manhattan_distance
+        for axis, weight in enumerate(self.weights):
+            axis_distance = np.abs(self.coordinates[:, axis][None, :] - rows[:, axis][:, None])
+            axis_distance *= weight
+            if distance is None:
+                distance = axis_distance
+            else:
+                distance += axis_distance
+        return distance
+
+    def walking_time_rows(self, rows, distance: Optional[np.ndarray] = None) -> np.ndarray:
+        """Walking minutes, penalties included and rounded to 2 decimals, from the bins at rows."""
+        if distance is None:
+            distance = self.distance_rows(rows)
+        minutes = distance / self.walking_speed_fpm
+        for codes, penalty in ((self.zones, self.zone_change_penalty_minutes),
+                               (self.levels, self.level_change_penalty_minutes)):
+            row_codes = codes[rows][:, None]
+            changed = (row_codes >= 0) & (codes[None, :] >= 0) & (row_codes != codes[None, :])
+            minutes[changed] += penalty
+        return round2(minutes)
+
+    def pair_distances(self, from_positions: np.ndarray, to_positions: np.ndarray) -> np.ndarray:
+        """Weighted Manhattan distances (feet) between the bins at paired positions."""
+        distance = np.zeros(len(from_positions), dtype=np.float64)
+        for axis, weight in enumerate(self.weights):
+            distance += np.abs(self.coordinates[to_positions, axis] - self.coordinates[from_positions, axis]) * weight
+        return distance
+
+    def pair_walking_times(self, from_positions: np.ndarray, to_positions: np.ndarray) -> np.ndarray:
+        """Walking minutes, penalties included and rounded to 2 decimals, between the bins at paired positions."""
+        minutes = self.pair_distances(from_positions, to_positions) / self.walking_speed_fpm
+        for codes, penalty in ((self.zones, self.zone_change_penalty_minutes),
+                               (self.levels, self.level_change_penalty_minutes)):
+            from_codes, to_codes = codes[from_positions], codes[to_positions]
+            minutes[(from_codes >= 0) & (to_codes >= 0) & (from_codes != to_codes)] += penalty
+        return round2(minutes)
+
+    def row_blocks(self, block_rows: Optional[int] = None,
+                   dtype=np.float32) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (first row, walking-time block) for consecutive blocks of rows."""
+        block_rows = block_rows or self.default_block_rows()
+        for start in range(0, self.size, block_rows):
+            stop = min(start + block_rows, self.size)
+            yield start, self.walking_time_block(start, stop).astype(dtype, copy=False)
+
+    def walking_times(self, dtype=np.float32, block_rows: Optional[int] = None) -> np.ndarray:
+        """Dense N x N walking-time matrix in minutes, rows and columns in bin order."""
+        matrix = np.empty((self.size, self.size), dtype=dtype)
+        for start, block in self.row_blocks(block_rows, dtype):
+            matrix[start:start + len(block)] = block
+        return matrix
+
+    def records(self, block_rows: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield the walking_times rows of every ordered pair of distinct bins."""
+        block_rows = block_rows or self.default_block_rows()
+        bin_ids = self.bin_ids.tolist()
+        for start in range(0, self.size, block_rows):
+            stop = min(start + block_rows, self.size)
+            distance = self.distance_block(start, stop)
+            minutes = self.walking_time_block(start, stop, distance).tolist()
+            distance = round2(distance).tolist()
+            for offset, from_bin_id in enumerate(bin_ids[start:stop]):
+                from_bin_code = self.bin_codes[start + offset]
+                distance_row, minutes_row = distance[offset], minutes[offset]
+                for j, to_bin_id in enumerate(bin_ids):
+                    if from_bin_id == to_bin_id:
+                        continue
+                    yield {
+                        'from_bin_id': from_bin_id,
+                        'to_bin_id': to_bin_id,
+                        'from_bin_code': from_bin_code,
+                        'to_bin_code': self.bin_codes[j],
+                        'distance_feet': distance_row[j],
+                        'walking_time_minutes': minutes_row[j],
+                        'path_type': PATH_TYPE
+                    }
@@ -0,0 +1,460 @@
+"""
+Memory-mapped walking-time matrices.
+
+The walking_times table holds one row per ordered bin pair, so it grows with
+N², and every lookup is a separate indexed query. WalkingTimeStore keeps a
+warehouse's walking minutes in one binary file instead:
+
+- a JSON header with the walking_time parameters the matrix was computed
+  with, their config hash, and a matrix version that is bumped on every write;
+- the bins (ids, coordinates, zone and level codes) in matrix index order;
+- the strict lower triangle of the symmetric matrix, as float32 or float16.
+  Row i holds the pairs (i, 0..i-1), so a bin added at the end only appends
+  a row.
+
+Every process maps the file read-only. Lookups are then array reads, and
+the API and optimizer processes share the pages. The walking_times table
+can still be filled as an export (WalkingTimeCalculator.recompute_walking_times).
+
+Since the bins are in the file, a matrix can follow changes without a full
+recompute: update() recomputes only the rows of added, moved or deleted
+bins, and refresh_walking_time_stores() recomputes the matrices whose config
+hash no longer matches the walking_time configuration from their own bins.
+Until then get_walking_time_store() doesn't return a stale matrix, and
+lookups fall back to the warehouse's bin index (bin_index.get_bin_index).
+Lookups look for other processes' rewrites of the matrix file and of
+config.json at most every CHECK_INTERVAL_SECONDS, so they stay array reads.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config_service import config_service
+from walking_time_matrix import PATH_TYPE, WalkingTimeMatrix
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"WTMX"
+FORMAT_VERSION = 2
+# Magic, format version, header length
+_PREAMBLE = struct.Struct("<4sII")
+_ALIGNMENT = 64
+# Bin arrays stored after the header: name, little-endian dtype, shape per bin
+_BIN_ARRAYS = (("bin_ids", "<i8", ()), ("coordinates", "<f8", (3,)), ("zones", "<i4", ()), ("levels", "<i4", ()))
+
+DEFAULT_DIRECTORY = "walking_time_matrices"
+# How often lookups check whether another process changed config.json or a matrix file
+CHECK_INTERVAL_SECONDS = 1.0
+
+# walking_time.* keys that change the matrix, with the calculator's defaults
+WALKING_PARAMETERS = {
+    "walking_speed_fpm": 250.0,
+    "x_weight": 1.0,
+    "y_weight": 1.0,
+    "vertical_movement_weight": 2.0,
+    "zone_change_penalty_minutes": 0.5,
+    "level_change_penalty_minutes": 1.0
+}
+
+# The WalkingTimeMatrix argument of each walking_time.* key
+_MATRIX_ARGUMENTS = {
+    "walking_speed_fpm": "walking_speed_fpm",
+    "x_weight": "x_weight",
+    "y_weight": "y_weight",
+    "vertical_movement_weight": "z_weight",
+    "zone_change_penalty_minutes": "zone_change_penalty_minutes",
+    "level_change_penalty_minutes": "level_change_penalty_minutes"
+}
+
+
+def current_walking_parameters() -> Dict[str, float]:
+    """
+    The walking_time parameters in the configuration now.
+
+    config.json is reloaded when another process (the API, on PUT /config)
+    changed it, checked at most every CHECK_INTERVAL_SECONDS.
+    """
+    config_service.reload_if_changed(CHECK_INTERVAL_SECONDS)
+    return {key: float(config_service.get_value(f"walking_time.{key}", default))
+            for key, default in WALKING_PARAMETERS.items()}
+
+
+def config_hash(parameters: Dict[str, float]) -> str:
+    """Hash of walking_time parameters; every matrix is stamped with the one it was computed with."""
+    canonical = json.dumps({key: float(parameters[key]) for key in sorted(WALKING_PARAMETERS)})
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+# Config generation and the config hash of its walking_time parameters
+_current_hash: Tuple[Optional[int], Optional[str]] = (None, None)
+
+
+def current_config_hash() -> str:
+    """config_hash(current_walking_parameters()), hashed again only when the configuration changed."""
+    global _current_hash
+    config_service.reload_if_changed(CHECK_INTERVAL_SECONDS)
+    generation, current_hash = _current_hash
+    if generation != config_service.generation:
+        generation = config_service.generation
+        current_hash = config_hash(current_walking_parameters())
+        _current_hash = (generation, current_hash)
+    return current_hash
+
+
+# Warehouse id -> (config generation, matrix path)
+_paths: Dict[int, Tuple[int, str]] = {}
+
+
+def matrix_path(warehouse_id: int = 1) -> str:
+    """Where a warehouse's matrix file lives (walking_time_matrix.directory)."""
+    cached = _paths.get(warehouse_id)
+    if cached is not None and cached[0] == config_service.generation:
+        return cached[1]
+    directory = config_service.get_value("walking_time_matrix.directory", DEFAULT_DIRECTORY)
+    if not os.path.isabs(directory):
+        directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), directory)
+    path = os.path.join(directory, f"warehouse_{warehouse_id}.wtm")
+    _paths[warehouse_id] = (config_service.generation, path)
+    return path
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _pairs(size: int) -> int:
+    return size * (size - 1) // 2
+
+
+def _row_starts(size: int) -> np.ndarray:
+    """Index in the lower triangle of pair (i, 0), for every row i."""
+    rows = np.arange(size, dtype=np.int64)
+    return rows * (rows - 1) // 2
+
+
+def _layout(header_length: int, size: int, dtype: str) -> Tuple[Dict[str, int], int]:
+    """Offset of each bin array and of the values, and the file length."""
+    offsets = {}
+    offset = _PREAMBLE.size + header_length
+    for name, array_dtype, shape in _BIN_ARRAYS:
+        offsets[name] = offset = _aligned(offset)
+        offset += size * int(np.prod(shape, dtype=np.int64)) * np.dtype(array_dtype).itemsize
+    offsets["values"] = offset = _aligned(offset)
+    return offsets, offset + _pairs(size) * np.dtype(dtype).itemsize
+
+
+def _map(path: str, dtype, offset: int, shape: Tuple[int, ...], mode: str = "r") -> np.ndarray:
+    if not np.prod(shape, dtype=np.int64):
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode=mode, offset=offset, shape=shape)
+
+
+def _matrix_arguments(parameters: Dict[str, float]) -> Dict[str, float]:
+    return {_MATRIX_ARGUMENTS[key]: float(value) for key, value in parameters.items() if key in _MATRIX_ARGUMENTS}
+
+
+class WalkingTimeStore:
+    """A read-only, memory-mapped walking-time matrix."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, format_version, header_length = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a walking-time matrix")
+            if format_version != FORMAT_VERSION:
+                raise ValueError(f"{path} has format version {format_version}, expected {FORMAT_VERSION}")
+            self.header = json.loads(f.read(header_length).decode("utf-8"))
+
+        self.size = self.header["size"]
+        self.version = self.header["version"]
+        self.warehouse_id = self.header["warehouse_id"]
+        self.dtype = self.header["dtype"]
+        self.parameters = self.header["walking_parameters"]
+        self.config_hash = self.header["config_hash"]
+        # Zone and level values in code order
+        self.zone_categories = {value: code for code, value in enumerate(self.header["zone_values"])}
+        self.level_categories = {value: code for code, value in enumerate(self.header["level_values"])}
+
+        offsets, _ = _layout(header_length, self.size, self.dtype)
+        for name, dtype, shape in _BIN_ARRAYS:
+            setattr(self, name, _map(path, dtype, offsets[name], (self.size,) + shape))
+        self.values = _map(path, np.dtype(self.dtype).newbyteorder("<"), offsets["values"], (_pairs(self.size),))
+
+        self._row_starts = _row_starts(self.size)
+        self._sorter = np.argsort(self.bin_ids, kind="stable")
+        self._sorted_ids = np.asarray(self.bin_ids)[self._sorter]
+
+    @classmethod
+    def write(cls, path: str, matrix: WalkingTimeMatrix, parameters: Dict[str, float], warehouse_id: int = 1,
+              dtype: str = "float32") -> "WalkingTimeStore":
+        """
+        Write a matrix to path and open it.
+
+        The file is written next to path and renamed over it, so processes
+        that have the previous version mapped keep reading it until they
+        reopen.
+        """
+        def fill(values, row_starts):
+            for start, block in matrix.row_blocks(dtype=dtype):
+                for offset, row in enumerate(block):
+                    i = start + offset
+                    values[row_starts[i]:row_starts[i] + i] = row[:i]
+
+        return cls._write(path, matrix, parameters, warehouse_id, dtype, fill)
+
+    @classmethod
+    def _write(cls, path: str, matrix: WalkingTimeMatrix, parameters: Dict[str, float], warehouse_id: int,
+               dtype: str, fill) -> "WalkingTimeStore":
+        """Write the header and bins of a matrix, then let fill(values, row_starts) write the values."""
+        version = 1
+        if os.path.exists(path):
+            try:
+                version = cls(path).version + 1
+            except (ValueError, OSError, KeyError):
+                pass
+
+        size = matrix.size
+        dtype = np.dtype(dtype).name
+        header = json.dumps({
+            "version": version,
+            "warehouse_id": warehouse_id,
+            "size": size,
+            "dtype": dtype,
+            "path_type": PATH_TYPE,
+            "walking_parameters": {key: float(value) for key, value in parameters.items()},
+            "config_hash": config_hash(parameters),
+            "zone_values": list(matrix.zone_categories),
+            "level_values": list(matrix.level_categories),
+            "created_at": datetime.now().isoformat()
+        }).encode("utf-8")
+        offsets, length = _layout(len(header), size, dtype)
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+                f.write(header)
+                for name, array_dtype, _ in _BIN_ARRAYS:
+                    f.seek(offsets[name])
+                    f.write(np.ascontiguousarray(getattr(matrix, name), dtype=array_dtype).tobytes())
+                f.truncate(length)
+            if _pairs(size):
+                values = _map(temp_path, np.dtype(dtype).newbyteorder("<"), offsets["values"], (_pairs(size),),
+                              mode="r+")
+                fill(values, _row_starts(size))
+                values.flush()
+                del values
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        global _writes
+        _writes += 1
+        return cls(path)
+
+    def update(self, bins: List[Dict]) -> Tuple["WalkingTimeStore", Dict[str, int]]:
+        """
+        Bring the matrix up to date with the warehouse's bins.
+
+        Only the rows (and so the columns) of bins that were added, moved or
+        deleted are recomputed; every other value is copied from this file.
+        The last bins of the matrix move into the indexes of deleted bins,
+        and added bins are appended.
+
+        Returns:
+            The rewritten store (this one when nothing changed), and counts of
+            added, moved and deleted bins and of recomputed rows
+        """
+        old_positions = self.positions([b['id'] for b in bins])
+        kept_positions = old_positions[old_positions >= 0]
+        kept = len(kept_positions)
+        deleted = np.setdiff1d(np.arange(self.size), kept_positions)
+        holes = deleted[deleted < kept]
+
+        order = np.arange(kept)
+        order[holes] = np.sort(kept_positions[kept_positions >= kept])
+        bins_by_position = {int(position): b for position, b in zip(old_positions, bins) if position >= 0}
+        added = [b for position, b in zip(old_positions, bins) if position < 0]
+        matrix = WalkingTimeMatrix(
+            [bins_by_position[int(position)] for position in order] + added,
+            zone_categories=self.zone_categories, level_categories=self.level_categories,
+            **_matrix_arguments(self.parameters)
+        )
+
+        in_place = np.ones(kept, dtype=bool)
+        in_place[holes] = False
+        unchanged = in_place.copy()
+        for name in ("coordinates", "zones", "levels"):
+            same = getattr(matrix, name)[:kept] == getattr(self, name)[:kept]
+            unchanged &= same.all(axis=1) if same.ndim > 1 else same
+        dirty = np.concatenate([np.flatnonzero(~unchanged), np.arange(kept, matrix.size)])
+        stats = {
+            "added": len(added),
+            "moved": int((in_place & ~unchanged).sum()),
+            "deleted": len(deleted),
+            "recomputed_rows": len(dirty)
+        }
+        if not len(dirty) and matrix.size == self.size:
+            return self, stats
+        # Past half the rows, recomputing them one by one costs more than the whole triangle
+        if 2 * len(dirty) > matrix.size:
+            stats["recomputed_rows"] = matrix.size
+            return self.write(self.path, matrix, self.parameters, self.warehouse_id, self.dtype), stats
+
+        def fill(values, row_starts):
+            copied = _pairs(kept)
+            values[:copied] = self.values[:copied]
+            block_rows = matrix.default_block_rows()
+            for start in range(0, len(dirty), block_rows):
+                rows = dirty[start:start + block_rows]
+                for i, row in zip(rows, matrix.walking_time_rows(rows).astype(self.dtype)):
+                    values[row_starts[i]:row_starts[i] + i] = row[:i]
+                    values[row_starts[i + 1:] + i] = row[i + 1:]
+
+        return self._write(self.path, matrix, self.parameters, self.warehouse_id, self.dtype, fill), stats
+
+    def matrix(self, parameters: Optional[Dict[str, float]] = None) -> WalkingTimeMatrix:
+        """A matrix engine over the stored bins, with other walking_time parameters if given."""
+        return WalkingTimeMatrix.from_arrays(self.bin_ids, self.coordinates, self.zones, self.levels,
+                                             self.zone_categories, self.level_categories,
+                                             **_matrix_arguments(parameters or self.parameters))
+
+    def recompute(self, parameters: Dict[str, float]) -> "WalkingTimeStore":
+        """Rewrite the matrix for other walking_time parameters, from the stored bins (no database)."""
+        return self.write(self.path, self.matrix(parameters), parameters, self.warehouse_id, self.dtype)
+
+    def matches(self, parameters: Optional[Dict[str, float]] = None) -> bool:
+        """Whether the matrix was computed with these walking_time parameters (default: the current ones)."""
+        if parameters is None:
+            return self.config_hash == current_config_hash()
+        return self.config_hash == config_hash(parameters)
+
+    def positions(self, bin_ids: Iterable[int]) -> np.ndarray:
+        """Matrix index of each bin id, -1 for bins not in the matrix."""
+        bin_ids = np.asarray(bin_ids, dtype=np.int64)
+        if not self.size:
+            return np.full(bin_ids.shape, -1, dtype=np.int64)
+        found = np.minimum(np.searchsorted(self._sorted_ids, bin_ids), self.size - 1)
+        return np.where(self._sorted_ids[found] == bin_ids, self._sorter[found], -1)
+
+    def lookup(self, from_bin_ids: Iterable[int], to_bin_ids: Iterable[int]) -> np.ndarray:
+        """Walking minutes for each (from, to) pair; NaN where a bin isn't in the matrix."""
+        from_positions = self.positions(from_bin_ids)
+        to_positions = self.positions(to_bin_ids)
+        low = np.minimum(from_positions, to_positions)
+        high = np.maximum(from_positions, to_positions)
+        known = low >= 0
+        between = known & (low != high)
+
+        minutes = np.where(known, 0.0, np.nan)
+        minutes[between] = self.values[self._row_starts[high[between]] + low[between]]
+        return minutes
+
+    def walking_time(self, from_bin_id: int, to_bin_id: int) -> Optional[float]:
+        """Walking minutes between two bins, None if either isn't in the matrix."""
+        minutes = self.lookup([from_bin_id], [to_bin_id])[0]
+        return None if np.isnan(minutes) else round(float(minutes), 2)
+
+    def path_walking_time(self, bin_ids: Sequence[int]) -> float:
+        """Walking minutes along consecutive bins, skipping steps to or from unknown bins."""
+        if len(bin_ids) < 2:
+            return 0.0
+        minutes = self.lookup(bin_ids[:-1], bin_ids[1:])
+        return round(float(np.nansum(minutes)), 2)
+
+
+_stores: Dict[str, tuple] = {}
+_stores_lock = threading.Lock()
+# Serializes refreshes without holding up lookups, which only take _stores_lock
+_refresh_lock = threading.Lock()
+# Matrix files written by this process, and path -> (file identity, checked at, _writes then)
+_writes = 0
+_identities: Dict[str, tuple] = {}
+
+
+def matrix_file_identity(path: str) -> Optional[Tuple[int, int, int]]:
+    """
+    (inode, mtime, size) of a matrix file, None when there is none.
+
+    The file is checked at most every CHECK_INTERVAL_SECONDS, since other
+    processes' rewrites only need to be seen eventually; a matrix written by
+    this process is seen at once.
+    """
+    now = time.monotonic()
+    cached = _identities.get(path)
+    if cached is not None and cached[2] == _writes and now - cached[1] < CHECK_INTERVAL_SECONDS:
+        return cached[0]
+    try:
+        stat = os.stat(path)
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        identity = None
+    _identities[path] = (identity, now, _writes)
+    return identity
+
+
+def _open_store(path: str) -> Optional[WalkingTimeStore]:
+    """This process's mapping of a matrix file, reopened when the file is replaced."""
+    identity = matrix_file_identity(path)
+    if identity is None:
+        return None
+    cached = _stores.get(path)
+    if cached is None or cached[0] != identity:
+        try:
+            cached = (identity, WalkingTimeStore(path))
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Ignoring walking-time matrix {path}: {e}")
+            return None
+        _stores[path] = cached
+    return cached[1]
+
+
+def get_walking_time_store(warehouse_id: int = 1) -> Optional[WalkingTimeStore]:
+    """
+    This process's mapping of a warehouse's matrix, or None when there is no
+    matrix or it is stale (stamped with another config hash than the
+    walking_time configuration's). Stale matrices are only recomputed by
+    refresh_walking_time_stores, so a lookup never waits for a rebuild.
+    """
+    with _stores_lock:
+        store = _open_store(matrix_path(warehouse_id))
+    if store is None or not store.matches():
+        return None
+    return store
+
+
+def refresh_walking_time_stores() -> Dict[int, int]:
+    """Recompute the stale matrices of every warehouse; returns warehouse id -> matrix version."""
+    directory = os.path.dirname(matrix_path())
+    if not os.path.isdir(directory):
+        return {}
+    parameters = current_walking_parameters()
+    versions = {}
+    with _refresh_lock:
+        for name in sorted(os.listdir(directory)):
+            match = re.fullmatch(r"warehouse_(\d+)\.wtm", name)
+            if not match:
+                continue
+            path = matrix_path(int(match.group(1)))
+            with _stores_lock:
+                store = _open_store(path)
+            if store is None:
+                continue
+            if not store.matches(parameters):
+                logger.info(f"Walking-time matrix {path} is stale (config hash {store.config_hash}), recomputing")
+                store = store.recompute(parameters)
+            versions[store.warehouse_id] = store.version
+    return versions
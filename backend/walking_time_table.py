@@ -0,0 +1,238 @@
+"""
+Bulk export of walking times to the walking_times table.
+
+Saving a matrix used to run DELETE FROM walking_times and then one INSERT per
+bin pair, all in one long transaction. WalkingTimeTableWriter instead:
+
+- streams the rows through a single COPY FROM STDIN (CSV) into a staging
+  table that has no indexes yet;
+- builds the keys and indexes once the rows are loaded;
+- swaps the staging table in for walking_times in the same transaction.
+  Readers keep seeing the previous table until the commit, never an empty
+  one, and only wait for the swap itself.
+
+Matrices from the NumPy engine are written as fixed-width CSV built with
+array arithmetic, so no Python objects are created per pair.
+"""
+
+import csv
+import io
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from config_service import config_service
+from walking_time_matrix import PATH_TYPE, WalkingTimeMatrix
+
+logger = logging.getLogger(__name__)
+
+COPY_COLUMNS = ("from_bin_id", "to_bin_id", "distance_feet", "walking_time_minutes", "path_type")
+
+CREATE_STAGING = """
+    DROP TABLE IF EXISTS walking_times_staging;
+    CREATE TABLE walking_times_staging (LIKE walking_times INCLUDING DEFAULTS INCLUDING CONSTRAINTS);
+"""
+
+COPY_STAGING = f"COPY walking_times_staging ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+
+# Keys and indexes of create_walking_times_table.sql, under staging names
+INDEX_STAGING = """
+    ALTER TABLE walking_times_staging
+        ADD CONSTRAINT walking_times_staging_pkey PRIMARY KEY (id),
+        ADD CONSTRAINT walking_times_staging_from_bin_id_to_bin_id_key UNIQUE (from_bin_id, to_bin_id),
+        ADD CONSTRAINT walking_times_staging_from_bin_id_fkey
+            FOREIGN KEY (from_bin_id) REFERENCES bins(id) ON DELETE CASCADE,
+        ADD CONSTRAINT walking_times_staging_to_bin_id_fkey
+            FOREIGN KEY (to_bin_id) REFERENCES bins(id) ON DELETE CASCADE;
+    CREATE INDEX idx_walking_times_staging_from_bin ON walking_times_staging(from_bin_id);
+    CREATE INDEX idx_walking_times_staging_to_bin ON walking_times_staging(to_bin_id);
+    CREATE INDEX idx_walking_times_staging_computed_at ON walking_times_staging(computed_at);
+"""
+
+# Views reading walking_times are dropped with it and recreated on the new table
+DEPENDENT_VIEWS = """
+    SELECT DISTINCT v.oid::regclass::text, v.relkind, pg_get_viewdef(v.oid, true)
+    FROM pg_depend d
+    JOIN pg_rewrite r ON r.oid = d.objid
+    JOIN pg_class v ON v.oid = r.ev_class
+    WHERE d.refobjid = 'walking_times'::regclass
+      AND v.oid <> 'walking_times'::regclass
+      AND v.relkind IN ('v', 'm')
+"""
+
+SWAP = """
+    LOCK TABLE walking_times IN ACCESS EXCLUSIVE MODE;
+    {drop_views}
+    DO $$
+    DECLARE id_sequence text := pg_get_serial_sequence('walking_times', 'id');
+    BEGIN
+        IF id_sequence IS NOT NULL THEN
+            EXECUTE format('ALTER SEQUENCE %s OWNED BY walking_times_staging.id', id_sequence);
+        END IF;
+    END $$;
+    DROP TABLE walking_times;
+    ALTER TABLE walking_times_staging RENAME TO walking_times;
+    ALTER TABLE walking_times RENAME CONSTRAINT walking_times_staging_pkey TO walking_times_pkey;
+    ALTER TABLE walking_times RENAME CONSTRAINT walking_times_staging_from_bin_id_to_bin_id_key
+        TO walking_times_from_bin_id_to_bin_id_key;
+    ALTER TABLE walking_times RENAME CONSTRAINT walking_times_staging_from_bin_id_fkey
+        TO walking_times_from_bin_id_fkey;
+    ALTER TABLE walking_times RENAME CONSTRAINT walking_times_staging_to_bin_id_fkey
+        TO walking_times_to_bin_id_fkey;
+    ALTER INDEX idx_walking_times_staging_from_bin RENAME TO idx_walking_times_from_bin;
+    ALTER INDEX idx_walking_times_staging_to_bin RENAME TO idx_walking_times_to_bin;
+    ALTER INDEX idx_walking_times_staging_computed_at RENAME TO idx_walking_times_computed_at;
+    {create_views}
+"""
+
+# Field widths of the fixed-width CSV: ids are int4, the times numeric(8,2) and numeric(6,2)
+_ID_DIGITS = 10
+_DISTANCE_DIGITS = 6
+_MINUTES_DIGITS = 4
+
+
+def _digits(values: np.ndarray, digits: int, name: str) -> np.ndarray:
+    """Zero-padded ASCII digits of non-negative integers, one row per value."""
+    if len(values) and (values.min() < 0 or values.max() >= 10 ** digits):
+        raise ValueError(f"{name} out of range for the walking_times table")
+    out = np.empty((len(values), digits), dtype=np.uint8)
+    for position in range(digits):
+        out[:, position] = values // 10 ** (digits - 1 - position) % 10 + ord("0")
+    return out
+
+
+def _text(rows: int, text: bytes) -> np.ndarray:
+    return np.broadcast_to(np.frombuffer(text, dtype=np.uint8), (rows, len(text)))
+
+
+def _csv_lines(from_digits: np.ndarray, to_digits: np.ndarray, distance_cents: np.ndarray,
+               minutes_cents: np.ndarray) -> bytes:
+    """Fixed-width CSV lines: from,to,distance,minutes,path_type."""
+    rows = len(from_digits)
+    columns = [from_digits, _text(rows, b","), to_digits]
+    for cents, digits, name in ((distance_cents, _DISTANCE_DIGITS, "distance_feet"),
+                                (minutes_cents, _MINUTES_DIGITS, "walking_time_minutes")):
+        columns += [_text(rows, b","), _digits(cents // 100, digits, name),
+                    _text(rows, b"."), _digits(cents % 100, 2, name)]
+    columns.append(_text(rows, f",{PATH_TYPE}\n".encode()))
+    return np.concatenate(columns, axis=1).tobytes()
+
+
+def matrix_csv_chunks(matrix: WalkingTimeMatrix, chunk_rows: int) -> Iterator[Tuple[bytes, int]]:
+    """CSV chunks of the walking_times rows of a matrix, with their row counts."""
+    size = matrix.size
+    block_rows = max(1, chunk_rows // max(1, size))
+    # Every bin id is formatted once and gathered into the lines
+    id_digits = _digits(matrix.bin_ids, _ID_DIGITS, "bin id")
+    for start in range(0, size, block_rows):
+        stop = min(start + block_rows, size)
+        distance = matrix.distance_block(start, stop)
+        minutes = matrix.walking_time_block(start, stop, distance)
+        from_index = np.repeat(np.arange(start, stop), size)
+        to_index = np.tile(np.arange(size), stop - start)
+        pairs = matrix.bin_ids[from_index] != matrix.bin_ids[to_index]
+        # round2 values are exact multiples of 0.01 once scaled back to cents
+        distance_cents = np.rint(distance.ravel()[pairs] * 100).astype(np.int64)
+        minutes_cents = np.rint(minutes.ravel()[pairs] * 100).astype(np.int64)
+        yield (_csv_lines(id_digits[from_index[pairs]], id_digits[to_index[pairs]], distance_cents, minutes_cents),
+               int(pairs.sum()))
+
+
+def record_csv_chunks(records: Iterable[Dict[str, Any]], chunk_rows: int) -> Iterator[Tuple[bytes, int]]:
+    """CSV chunks of walking_times record dicts, with their row counts."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    rows = 0
+    for record in records:
+        writer.writerow([record['from_bin_id'], record['to_bin_id'], record['distance_feet'],
+                         record['walking_time_minutes'], record.get('path_type') or PATH_TYPE])
+        rows += 1
+        if rows == chunk_rows:
+            yield buffer.getvalue().encode(), rows
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    if rows:
+        yield buffer.getvalue().encode(), rows
+
+
+class _ChunkReader(io.RawIOBase):
+    """A read-only file over CSV chunks, for COPY FROM STDIN; counts the rows it hands out."""
+
+    def __init__(self, chunks: Iterator[Tuple[bytes, int]]):
+        self.chunks = chunks
+        self.buffer = memoryview(b"")
+        self.rows = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        while not self.buffer:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                return b""
+            self.buffer = memoryview(chunk[0])
+            self.rows += chunk[1]
+        if size is None or size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data.tobytes()
+
+
+class WalkingTimeTableWriter:
+    """Replaces the walking_times table with COPY into a staging table and an atomic swap."""
+
+    def __init__(self, get_connection: Callable, chunk_rows: Optional[int] = None):
+        self.get_connection = get_connection
+        self.chunk_rows = chunk_rows or config_service.get_value("walking_time_matrix.copy_chunk_rows", 1000000)
+
+    def write_matrix(self, matrix: WalkingTimeMatrix) -> Dict[str, Any]:
+        """Replace the table with every ordered pair of distinct bins of a matrix."""
+        return self._write(matrix_csv_chunks(matrix, self.chunk_rows))
+
+    def write_records(self, records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Replace the table with walking_times record dicts."""
+        return self._write(record_csv_chunks(records, self.chunk_rows))
+
+    def _write(self, chunks: Iterator[Tuple[bytes, int]]) -> Dict[str, Any]:
+        start = time.time()
+        conn = self.get_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(CREATE_STAGING)
+                reader = _ChunkReader(chunks)
+                cursor.copy_expert(COPY_STAGING, reader, size=1 << 20)
+                copy_seconds = time.time() - start
+
+                cursor.execute(INDEX_STAGING)
+                cursor.execute(DEPENDENT_VIEWS)
+                views = cursor.fetchall()
+                cursor.execute(self._swap_sql(views))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        seconds = time.time() - start
+        stats = {
+            "rows": reader.rows,
+            "seconds": seconds,
+            "copy_seconds": copy_seconds,
+            "rows_per_second": reader.rows / seconds if seconds > 0 else None
+        }
+        logger.info(f"Replaced walking_times with {stats['rows']} rows in {seconds:.1f}s "
+                    f"({stats['rows_per_second'] or 0:,.0f} rows/s)")
+        return stats
+
+    @staticmethod
+    def _swap_sql(views: List[Tuple[str, str, str]]) -> str:
+        kinds = {'v': "VIEW", 'm': "MATERIALIZED VIEW"}
+        drop_views = "\n".join(f"DROP {kinds[kind]} {name};" for name, kind, _ in views)
+        create_views = "\n".join(f"CREATE {kinds[kind]} {name} AS {definition.rstrip().rstrip(';')};"
+                                 for name, kind, definition in views)
+        return SWAP.format(drop_views=drop_views, create_views=create_views)
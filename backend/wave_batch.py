@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Batch optimization of many waves.
+
+Re-planning a shift through /optimization/wave/{wave_id} solves its waves one
+after another and reads the workers and equipment again for every one of
+them. WaveBatchRunner reads that resource snapshot once, hands it to each
+process of a pool when the process starts, and solves the waves concurrently,
+yielding every wave's result as soon as it completes. The CP-SAT search
+threads are split over the processes so concurrent solves don't oversubscribe
+the cores.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config_service import config_service
+from optimization_jobs import _resolve_target, _run_job
+
+# Optimizer class solving each wave, as "module:class"
+WAVE_OPTIMIZER = "optimizer.wave_constraint_optimizer:WaveConstraintOptimizer"
+
+# Resource snapshot of this worker process, set by the pool initializer
+_resources: Optional[Dict[str, Any]] = None
+
+
+def _init_worker(resources: Dict[str, Any]):
+    global _resources
+    _resources = resources
+
+
+def optimize_batch_wave(optimizer_target: str, wave_id: int, time_limit: int, warm_start: Optional[str],
+                        num_search_workers: int) -> Dict[str, Any]:
+    """Worker-process entry point: optimize one wave against the process's resource snapshot."""
+    optimizer = _resolve_target(optimizer_target)()
+    optimizer.num_search_workers = num_search_workers
+    return optimizer.optimize_wave(wave_id, time_limit=time_limit, warm_start=warm_start, resources=_resources)
+
+
+class WaveBatchRunner:
+    """Optimizes a list of waves on a process pool sharing one worker and equipment snapshot."""
+
+    def __init__(self, max_processes: int = None, optimizer_target: str = WAVE_OPTIMIZER):
+        self.max_processes = max_processes or config_service.get_value("optimization.max_batch_processes", 4)
+        self.optimizer_target = optimizer_target
+        self._cancel_event = None
+
+    def load_resources(self) -> Dict[str, Any]:
+        """Read the workers and equipment once for the whole batch."""
+        return _resolve_target(self.optimizer_target)().get_resources()
+
+    def plan_wave_ids(self, version_id: int) -> Dict[str, Any]:
+        """Ids of the waves of a plan version."""
+        return _resolve_target(self.optimizer_target)().get_plan_wave_ids(version_id)
+
+    def run(self, wave_ids: List[int], resources: Dict[str, Any], time_limit: int = 300,
+            warm_start: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Optimize the waves and yield ("started", ...), one ("wave", ...) per wave
+        in completion order, then ("summary", ...).
+
+        Closing the generator early stops the running solves and drops the
+        waves that haven't started.
+        """
+        processes = max(1, min(self.max_processes, len(wave_ids)))
+        num_search_workers = max(1, (os.cpu_count() or 1) // processes)
+        batch_start = time.time()
+        yield "started", {
+            "wave_ids": wave_ids,
+            "processes": processes,
+            "search_workers_per_wave": num_search_workers,
+            "time_limit_seconds": time_limit,
+            "workers": len({w.get('id') for w in resources['workers']}),
+            "equipment": len(resources['equipment'])
+        }
+
+        context = multiprocessing.get_context("spawn")
+        sync_manager = context.Manager()
+        self._cancel_event = sync_manager.Event()
+        executor = ProcessPoolExecutor(max_workers=processes, mp_context=context,
+                                       initializer=_init_worker, initargs=(resources,))
+        records = []
+        try:
+            futures = {}
+            for wave_id in wave_ids:
+                params = {
+                    "optimizer_target": self.optimizer_target,
+                    "wave_id": wave_id,
+                    "time_limit": time_limit,
+                    "warm_start": warm_start,
+                    "num_search_workers": num_search_workers
+                }
+                future = executor.submit(_run_job, f"{__name__}:optimize_batch_wave", params, self._cancel_event)
+                futures[future] = (wave_id, time.time())
+
+            for future in as_completed(futures):
+                wave_id, submitted_at = futures[future]
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    # The worker process itself died (e.g. out of memory)
+                    outcome = {"error": f"Wave worker failed: {e}"}
+                record = self._wave_record(wave_id, outcome, time.time() - submitted_at)
+                records.append(record)
+                yield "wave", record
+        finally:
+            if len(records) < len(wave_ids):
+                self._cancel_event.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            sync_manager.shutdown()
+            self._cancel_event = None
+
+        yield "summary", self.summarize(records, time.time() - batch_start)
+
+    def cancel(self):
+        """Stop the running solves of the current batch; they keep their best solution so far."""
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+
+    def _wave_record(self, wave_id: int, outcome: Dict[str, Any], elapsed_seconds: float) -> Dict[str, Any]:
+        result = outcome.get("result") or {}
+        error = outcome.get("error") or result.get("error") or (None if result else "Cancelled before it started")
+        return {
+            "wave_id": wave_id,
+            "status": "failed" if error else "success",
+            "error": error,
+            "optimization_type": result.get("optimization_type"),
+            "objective_value": result.get("objective_value"),
+            "solve_time": result.get("solve_time"),
+            # Includes the time the wave waited for a free process
+            "elapsed_seconds": elapsed_seconds,
+            "num_orders": result.get("num_orders"),
+            "result": result
+        }
+
+    @staticmethod
+    def summarize(records: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+        """Aggregate the wave records of a batch."""
+        succeeded = [record for record in records if record["status"] == "success"]
+        solve_seconds = sum(record["solve_time"] or 0.0 for record in succeeded)
+        return {
+            "waves": len(records),
+            "succeeded": len(succeeded),
+            "failed": len(records) - len(succeeded),
+            "failed_wave_ids": [record["wave_id"] for record in records if record["status"] != "success"],
+            "total_orders": sum(record["num_orders"] or 0 for record in succeeded),
+            "total_objective": sum(record["objective_value"] or 0.0 for record in succeeded),
+            "solve_seconds": solve_seconds,
+            "wall_seconds": wall_seconds,
+            # How much faster than solving the waves one after another
+            "speedup": solve_seconds / wall_seconds if wall_seconds > 0 else None
+        }
@@ -0,0 +1,2 @@
+-- Optimizer profile per run: phase timings, model size and CP-SAT statistics
+ALTER TABLE optimization_runs ADD COLUMN IF NOT EXISTS profile JSONB;
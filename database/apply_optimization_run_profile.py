@@ -0,0 +1,24 @@
+import psycopg2
+
+SQL = '''
+ALTER TABLE optimization_runs ADD COLUMN IF NOT EXISTS profile JSONB;
+'''
+
+def main():
+    conn = psycopg2.connect(
+        host="localhost",
+        port=5433,
+        database="warehouse_opt",
+        user="wave_user",
+        password="wave_password"
+    )
+    try:
+        with conn.cursor() as cur:
+            cur.execute(SQL)
+            conn.commit()
+            print("optimization_runs profile column migration applied successfully.")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
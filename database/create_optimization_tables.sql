@@ -13,7 +13,8 @@ CREATE TABLE IF NOT EXISTS optimization_runs (
     total_equipment INTEGER,
     objective_value DECIMAL(15,2),
     solver_status VARCHAR(50),
-    solve_time_seconds DECIMAL(10,3)
+    solve_time_seconds DECIMAL(10,3),
+    profile JSONB
 );
 
 -- Table to store optimization plan summaries
@@ -330,6 +330,7 @@ CREATE TABLE optimization_runs (
     solve_time_seconds DECIMAL(8,2),
     input_version_id INTEGER REFERENCES wave_plan_versions(id), -- Input wave plan version
     output_version_id INTEGER REFERENCES wave_plan_versions(id), -- Output wave plan version
+    profile JSONB, -- Phase timings, model size and solver statistics
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
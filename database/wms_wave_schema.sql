@@ -191,6 +191,7 @@ CREATE TABLE optimization_runs (
     objective_value DECIMAL(12,2), -- Cost savings or efficiency improvement
     solver_status VARCHAR(20), -- 'optimal', 'feasible', 'infeasible'
     solve_time_seconds DECIMAL(8,2),
+    profile JSONB, -- Phase timings, model size and solver statistics
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 